@@ -43,5 +43,33 @@ cdef object HOP_HEADERS = frozenset((
     PROXY_AUTHORIZATION, TE, TRAILERS,
     TRANSFER_ENCODING, UPGRADE
 ))
+cdef object HOP_NAMES = frozenset((h.lower().encode(CHARSET) for h in HOP_HEADERS))
+cdef tuple COMMON_HEADERS = (
+    'Accept', 'Accept-Charset', 'Accept-Encoding', 'Accept-Language',
+    'Authorization', 'Cache-Control', 'Connection', 'Content-Encoding',
+    'Content-Length', 'Content-Type', 'Cookie', 'Date', 'Dnt', 'Expect',
+    'Forwarded', 'Host', 'If-Match', 'If-Modified-Since', 'If-None-Match',
+    'If-Range', 'If-Unmodified-Since', 'Keep-Alive', 'Origin', 'Pragma',
+    'Proxy-Authorization', 'Range', 'Referer', 'Script_Name',
+    'Sec-Websocket-Extensions', 'Sec-Websocket-Key', 'Sec-Websocket-Protocol',
+    'Sec-Websocket-Version', 'Te', 'Trailers', 'Transfer-Encoding',
+    'Upgrade', 'Upgrade-Insecure-Requests', 'User-Agent', 'Via',
+    'X-Forwarded-For', 'X-Forwarded-Host', 'X-Forwarded-Proto',
+    'X-Forwarded-Protocol', 'X-Forwarded-Ssl', 'X-Real-Ip',
+    'X-Requested-With'
+)
+cdef tuple COMMON_RESPONSE_HEADERS = (
+    'Accept-Ranges', 'Access-Control-Allow-Origin', 'Age', 'Allow',
+    'Cache-Control', 'Connection', 'Content-Disposition',
+    'Content-Encoding', 'Content-Language', 'Content-Length',
+    'Content-Range', 'Content-Type', 'Date', 'ETag', 'Expires',
+    'Keep-Alive', 'Last-Modified', 'Location', 'Retry-After', 'Server',
+    'Set-Cookie', 'Transfer-Encoding', 'Vary', 'WWW-Authenticate'
+)
+# bound the caches filled with names coming from clients and applications
+cdef int MAX_CACHED_NAMES = 1000
+cdef dict HEADER_TABLE = {}
+cdef dict RESPONSE_HEADERS = {}
+cdef dict STATUS_LINES = {}
 cdef str _http_date_ = ''
 cdef int _http_time_ = 0
@@ -2,18 +2,32 @@
 #define     __PULSAR_WEBSOCKET__
 
 #include <Python.h>
+#include <stdint.h>
+#include <string.h>
 
 
 PyObject* websocket_mask(const char* chunk, const char* key,
                          size_t chunk_length, size_t mask_length) {
-    size_t i;
+    size_t i = 0;
     char* buf;
+    uint64_t word, key_word;
     PyObject* result = PyBytes_FromStringAndSize(NULL, chunk_length);
     if (!result) {
         return NULL;
     }
     buf = PyBytes_AS_STRING(result);
-    for (i = 0; i < chunk_length; i++) {
+    if (mask_length && 8 % mask_length == 0) {
+        // XOR eight bytes at a time with the key repeated in a word
+        for (i = 0; i < 8; i++) {
+            ((char*) &key_word)[i] = key[i % mask_length];
+        }
+        for (i = 0; i + 8 <= chunk_length; i += 8) {
+            memcpy(&word, chunk + i, 8);
+            word ^= key_word;
+            memcpy(buf + i, &word, 8);
+        }
+    }
+    for (; i < chunk_length; i++) {
         buf[i] = chunk[i] ^ key[i % mask_length];
     }
     return result;
@@ -1,7 +1,9 @@
 import os
-from struct import pack, unpack
+from struct import pack, unpack_from
 
 cimport cython
+from cpython.bytearray cimport PyByteArray_AS_STRING
+from cpython.bytes cimport PyBytes_FromStringAndSize
 from websocket cimport websocket_mask, to_bytes
 
 
@@ -51,13 +53,19 @@ cdef class FrameParser:
     * kind = 1, client (decode unmasked messages, encode masked messages)
     * kind = 2, unmasked both encoding and decoding
     * kind = 3, masked both encoding and decoding
+
+    Received data is accumulated in a single buffer together with the
+    offset of the first byte not yet decoded. The payload is unmasked
+    directly from the buffer and decoded bytes are discarded only when new
+    data is received and more than half of the buffer has been decoded.
     '''
     cdef readonly:
         int version, kind, decode_mask_length, encode_mask_length
         list extensions, protocols
 
     cdef Frame frame
-    cdef object buffer
+    cdef bytearray buffer
+    cdef Py_ssize_t offset
     cdef object ProtocolError
     cdef tuple _opcodes
     cdef object _close_codes
@@ -68,6 +76,7 @@ cdef class FrameParser:
         self.kind = kind
         self.frame = None
         self.buffer = bytearray()
+        self.offset = 0
         self.ProtocolError = ProtocolError
         self._opcodes = (0, 1, 2, 8, 9, 10)
         self.encode_mask_length = 0
@@ -147,14 +156,20 @@ cdef class FrameParser:
         cdef int fin, rsv1, rsv2, rsv3, opcode, payload_length
         cdef Frame frame = self.frame
         cdef int mask_length = self.decode_mask_length
-        cdef bytes chunk
+        cdef bytearray buffer = self.buffer
+        cdef Py_ssize_t available
+        cdef const char* start
+        cdef object chunk
         #
         if data:
-            self.buffer.extend(data)
+            if self.offset and 2 * self.offset >= len(buffer):
+                del buffer[:self.offset]
+                self.offset = 0
+            buffer.extend(data)
         if frame is None:
-            if len(self.buffer) < 2:
+            if len(buffer) - self.offset < 2:
                 return
-            first_byte, second_byte = unpack("BB", self.buffer[:2])
+            first_byte, second_byte = unpack_from("BB", buffer, self.offset)
             fin = (first_byte >> 7) & 1
             rsv1 = (first_byte >> 6) & 1
             rsv2 = (first_byte >> 5) & 1
@@ -177,36 +192,51 @@ cdef class FrameParser:
                 elif not fin:
                     raise self.ProtocolError(
                         'WEBSOCKET control frame fragmented')
-            chunk = self._chunk(2)
+            self.offset += 2
             self.frame = frame = Frame(opcode, <bint>fin, payload_length)
 
         if frame.masking_key is None:
+            available = len(buffer) - self.offset
             if frame.payload_length == 126:
-                if len(self.buffer) < 2 + mask_length:  # 2 + 4 for mask
+                if available < 2 + mask_length:  # 2 + 4 for mask
                     return
-                chunk = self._chunk(2)
-                frame.payload_length = unpack("!H", chunk)[0]
+                frame.payload_length = unpack_from("!H", buffer,
+                                                   self.offset)[0]
+                self.offset += 2
             elif frame.payload_length == 127:
-                if len(self.buffer) < 8 + mask_length:  # 8 + 4 for mask
+                if available < 8 + mask_length:  # 8 + 4 for mask
                     return
-                chunk = self._chunk(8)
-                frame.payload_length = unpack("!Q", chunk)[0]
-            elif len(self.buffer) < mask_length:
+                frame.payload_length = unpack_from("!Q", buffer,
+                                                   self.offset)[0]
+                self.offset += 8
+            elif available < mask_length:
                 return
             if mask_length:
                 frame.set_masking_key(self._chunk(mask_length))
             else:
                 frame.set_masking_key(b'')
 
-        if len(self.buffer) >= frame.payload_length:
+        if len(buffer) - self.offset >= frame.payload_length:
             self.frame = None
-            chunk = self._chunk(frame.payload_length)
             if self.extensions:
+                chunk = self._chunk(frame.payload_length)
                 for extension in self.extensions:
-                    chunk = extension.receive(frame, self.buffer)
-            if frame.masking_key:
-                chunk = websocket_mask(chunk, frame.masking_key,
-                                       len(chunk), len(frame.masking_key))
+                    chunk = extension.receive(frame, chunk)
+                if frame.masking_key:
+                    chunk = websocket_mask(chunk, frame.masking_key,
+                                           len(chunk),
+                                           len(frame.masking_key))
+            else:
+                # unmask or copy the payload straight from the buffer
+                start = PyByteArray_AS_STRING(buffer) + self.offset
+                self.offset += frame.payload_length
+                if frame.masking_key:
+                    chunk = websocket_mask(start, frame.masking_key,
+                                           frame.payload_length,
+                                           len(frame.masking_key))
+                else:
+                    chunk = PyBytes_FromStringAndSize(start,
+                                                      frame.payload_length)
             if frame.opcode == 1:
                 frame.set_body(chunk.decode("utf-8", "replace"))
             else:
@@ -261,7 +291,8 @@ cdef class FrameParser:
                 pass
         return opcode, masking_key, data
 
-    cdef bytes _chunk(self, int length):
-        cdef bytes chunk = bytes(self.buffer[:length])
-        self.buffer = self.buffer[length:]
-        return chunk
+    cdef bytes _chunk(self, Py_ssize_t length):
+        cdef Py_ssize_t offset = self.offset
+        self.offset = offset + length
+        return PyBytes_FromStringAndSize(
+            PyByteArray_AS_STRING(self.buffer) + offset, length)
@@ -33,6 +33,74 @@ class Headers:
         return True
 
 
+cdef tuple header_entry(bytes name):
+    """Entry of the HEADER_TABLE for the raw header ``name``
+
+    An entry is a tuple containing the header, the header name in the
+    ``environ`` without the ``HTTP_`` prefix, the ``environ`` key,
+    whether it is a hop header and whether :class:`Headers` handles it.
+    """
+    cdef bytes lower = name.lower()
+    cdef tuple entry = HEADER_TABLE.get(lower)
+    cdef object header
+    cdef str header_env
+    if entry is None:
+        header = istr(name.decode(CHARSET))
+        header_env = header.upper().replace('-', '_')
+        entry = (header, header_env, 'HTTP_%s' % header_env,
+                 lower in HOP_NAMES, hasattr(Headers, header_env))
+        if len(HEADER_TABLE) < MAX_CACHED_NAMES:
+            HEADER_TABLE[lower] = entry
+    if len(HEADER_TABLE) < MAX_CACHED_NAMES:
+        HEADER_TABLE[name] = entry
+    return entry
+
+
+cdef bytes header_name(object name):
+    cdef bytes value = RESPONSE_HEADERS.get(name)
+    if value is None:
+        value = ('%s: ' % name).encode(CHARSET)
+        if len(RESPONSE_HEADERS) < MAX_CACHED_NAMES:
+            RESPONSE_HEADERS[name] = value
+    return value
+
+
+cdef bytes status_line(str protocol, str status):
+    cdef tuple key = (protocol, status)
+    cdef bytes line = STATUS_LINES.get(key)
+    if line is None:
+        line = ('%s %s\r\n' % key).encode(CHARSET)
+        if len(STATUS_LINES) < MAX_CACHED_NAMES:
+            STATUS_LINES[key] = line
+    return line
+
+
+cdef dict base_environ(object protocol, object FileWrapper):
+    cdef object transport = protocol.connection.transport
+    cdef object server_address = transport.get_extra_info('sockname')
+    return {
+        'wsgi.async': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.version': (1, 0),
+        'wsgi.run_once': False,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.url_scheme': 'https' if transport.get_extra_info('sslcontext') else URL_SCHEME,
+        'SCRIPT_NAME': OS_SCRIPT_NAME,
+        'SERVER_SOFTWARE': protocol.producer.server_software,
+        'wsgi.file_wrapper': FileWrapper,
+        'CONTENT_TYPE': '',
+        'SERVER_NAME': server_address[0],
+        'SERVER_PORT': str(server_address[1])
+    }
+
+
+for _name in COMMON_HEADERS:
+    header_entry(_name.encode(CHARSET))
+for _name in COMMON_RESPONSE_HEADERS:
+    header_name(_name)
+
+
 cdef class WsgiProtocol:
 
     cdef readonly:
@@ -45,23 +113,14 @@ cdef class WsgiProtocol:
 
     def __cinit__(self, object protocol, object cfg, object FileWrapper):
         cdef object connection = protocol.connection
-        cdef object server_address = connection.transport.get_extra_info('sockname')
-        self.environ = {
-            'wsgi.async': True,
-            'wsgi.timestamp': connection.producer.time.current_time,
-            'wsgi.errors': sys.stderr,
-            'wsgi.version': (1, 0),
-            'wsgi.run_once': False,
-            'wsgi.multithread': True,
-            'wsgi.multiprocess': True,
-            'SCRIPT_NAME': OS_SCRIPT_NAME,
-            'SERVER_SOFTWARE': protocol.producer.server_software,
-            'wsgi.file_wrapper': FileWrapper,
-            'CONTENT_TYPE': '',
-            'SERVER_NAME': server_address[0],
-            'SERVER_PORT': str(server_address[1]),
-            PULSAR_CACHE: protocol
-        }
+        # the constant part of the environ is built once per connection
+        cdef dict base = getattr(connection, 'wsgi_environ', None)
+        if base is None:
+            base = base_environ(protocol, FileWrapper)
+            connection.wsgi_environ = base
+        self.environ = base.copy()
+        self.environ['wsgi.timestamp'] = protocol.producer.current_time
+        self.environ[PULSAR_CACHE] = protocol
         self.body_reader = protocol.body_reader(self.environ)
         self.environ['wsgi.input'] = self.body_reader
         self.cfg = cfg
@@ -74,8 +133,8 @@ cdef class WsgiProtocol:
 
     cpdef on_url(self, bytes url):
         cdef object proto = self.protocol
-        cdef object transport = self.connection.transport
-        cdef object scheme = 'https' if transport.get_extra_info('sslcontext') else URL_SCHEME
+        cdef dict environ = self.environ
+        cdef str scheme = environ['wsgi.url_scheme']
         cdef object parsed_url
 
         try:
@@ -84,38 +143,34 @@ cdef class WsgiProtocol:
             parsed_url = proto.parse_url(scheme.encode(CHARSET) + b'://' + url)
         else:
             if parsed_url.schema:
-                scheme = parsed_url.schema.decode(CHARSET)
+                environ['wsgi.url_scheme'] = parsed_url.schema.decode(CHARSET)
 
         self.parsed_url = parsed_url
-        self.environ.update((
-            ('RAW_URI', url.decode(CHARSET)),
-            ('REQUEST_METHOD', self.parser.get_method().decode(CHARSET)),
-            ('QUERY_STRING', parsed_url.query.decode(CHARSET) if parsed_url.query else ''),
-            ('wsgi.url_scheme', scheme)
-        ))
+        environ['RAW_URI'] = url.decode(CHARSET)
+        environ['REQUEST_METHOD'] = self.parser.get_method().decode(CHARSET)
+        environ['QUERY_STRING'] = parsed_url.query.decode(CHARSET) if parsed_url.query else ''
 
     cpdef on_header(self, bytes name, bytes value):
-        cdef object header = istr(name.decode(CHARSET))
+        cdef tuple entry = HEADER_TABLE.get(name) or header_entry(name)
+        cdef object header = entry[0]
         cdef str header_value = value.decode(CHARSET)
-        cdef str header_env = header.upper().replace('-', '_')
-        cdef object hnd
+        cdef dict environ = self.environ
 
-        if 'SERVER_PROTOCOL' not in self.environ:
-            self.environ['SERVER_PROTOCOL'] = "HTTP/%s" % self.parser.get_http_version()
+        if 'SERVER_PROTOCOL' not in environ:
+            environ['SERVER_PROTOCOL'] = "HTTP/%s" % self.parser.get_http_version()
 
-        if header in HOP_HEADERS:
+        if entry[3]:
             if header == CONNECTION:
-                if (self.environ['SERVER_PROTOCOL'] == 'HTTP/1.0'
+                if (environ['SERVER_PROTOCOL'] == 'HTTP/1.0'
                         or header_value.lower() != 'keep-alive'):
                     self.headers[header] = header_value
             else:
                 self.headers[header] = header_value
-        else:
-            hnd = getattr(self.header_wsgi, header_env, None)
-            if hnd and hnd(self.environ, header_value):
+        elif entry[4]:
+            if getattr(self.header_wsgi, entry[1])(environ, header_value):
                 return
 
-        self.environ['HTTP_%s' % header_env] = header_value
+        environ[entry[2]] = header_value
 
     cpdef on_headers_complete(self):
         cdef str forward = self.headers.get(X_FORWARDED_FOR)
@@ -146,6 +201,7 @@ cdef class WsgiProtocol:
                 path_info = path_info.split(script_name, 1)[1]
             self.environ['PATH_INFO'] = unquote(path_info)
 
+        self.protocol.queued = self.protocol._loop.time()
         self.connection.pipeline(self.protocol)
 
     cpdef on_body(self, bytes body):
@@ -197,9 +253,10 @@ cdef class WsgiProtocol:
         if not self.headers_sent:
             http = env.get('SERVER_PROTOCOL', DEFAULT_HTTP)
             self.headers_sent = self.get_headers()
-            buffer = bytearray(('%s %s\r\n' % (http, self.status)).encode(CHARSET))
+            buffer = bytearray(status_line(http, self.status))
             for k, v in self.headers_sent.items():
-                buffer.extend(('%s: %s\r\n' % (k, v)).encode(CHARSET))
+                buffer.extend(RESPONSE_HEADERS.get(k) or header_name(k))
+                buffer.extend(('%s\r\n' % v).encode(CHARSET))
             buffer.extend(CRLF)
             proto.event('on_headers').fire(data=buffer)
 
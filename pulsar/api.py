@@ -20,7 +20,10 @@ from .async.lock import Lock, LockBase
 from .async.protocols import (
     Connection, PulsarProtocol, DatagramProtocol, TcpServer, DatagramServer
 )
-from .async.clients import Pool, PoolConnection, AbstractClient
+from .async.clients import (
+    Pool, PoolConnection, AbstractClient, ConnectionLimit
+)
+from .async.resolver import Resolver, get_resolver
 from .async.futures import chain_future, AsyncObject
 from .async.commands import async_while
 from .async.monitor import arbiter
@@ -72,8 +75,11 @@ __all__ = [
     #
     # Async Clients
     'Pool',
+    'ConnectionLimit',
     'PoolConnection',
     'AbstractClient',
+    'Resolver',
+    'get_resolver',
     #
     # Async Locks
     'Lock',
@@ -1,6 +1,7 @@
 from functools import partial
 
 from ....async.clients import Pool
+from ....async.resolver import get_resolver
 from ....utils.string import to_string
 from ..store import RemoteStore
 
@@ -14,9 +15,10 @@ class RedisStore(RemoteStore):
     supported_queries = frozenset(('filter', 'exclude'))
 
     def _init(self, namespace=None, pool_size=10,
-              decode_responses=False, **kwargs):
+              decode_responses=False, resolver=None, **kwargs):
         self.protocol_factory = partial(RedisStoreConnection, Consumer)
         self._decode_responses = decode_responses
+        self._resolver = resolver
         if namespace:
             self._urlparams['namespace'] = namespace
         self._pool = Pool(self.connect, pool_size=pool_size, loop=self._loop)
@@ -29,6 +31,13 @@ class RedisStore(RemoteStore):
     def pool(self):
         return self._pool
 
+    @property
+    def resolver(self):
+        '''The :class:`.Resolver` for the redis server host name
+        '''
+        resolver = self._resolver
+        return get_resolver(self._loop) if resolver is None else resolver
+
     @property
     def namespace(self):
         '''The prefix namespace to append to all transaction on keys
@@ -72,7 +81,7 @@ class RedisStore(RemoteStore):
         protocol_factory = protocol_factory or self.create_protocol
         if isinstance(self._host, tuple):
             host, port = self._host
-            transport, connection = await self._loop.create_connection(
+            transport, connection = await self.resolver.create_connection(
                 protocol_factory, host, port)
         else:
             raise NotImplementedError('Could not connect to %s' %
@@ -1,12 +1,16 @@
 from .client import (
     HttpRequest, HttpResponse, HttpClient, HttpRequestException, SSLError,
-    full_url, FORM_URL_ENCODED
+    ResponseTooLarge, full_url, FORM_URL_ENCODED
 )
+from .decompress import DecompressionError
 from .wsgi import HttpWsgiClient
 from .plugins import TooManyRedirects
 from .auth import Auth, HTTPBasicAuth, HTTPDigestAuth
 from .oauth import OAuth1, OAuth2
 from .stream import HttpStream, StreamConsumedError
+from .bulk import FetchMany
+from .cache import HttpCache, MemoryCache, FileCache, CachedResponse
+from .pipeline import HttpPipeline
 
 
 __all__ = [
@@ -18,6 +22,8 @@ __all__ = [
     'HttpRequestException',
     'TooManyRedirects',
     'SSLError',
+    'ResponseTooLarge',
+    'DecompressionError',
     #
     'Auth',
     'HTTPBasicAuth',
@@ -27,6 +33,12 @@ __all__ = [
     #
     'HttpStream',
     'StreamConsumedError',
+    'FetchMany',
+    'HttpCache',
+    'MemoryCache',
+    'FileCache',
+    'CachedResponse',
+    'HttpPipeline',
     #
     'full_url',
     'FORM_URL_ENCODED'
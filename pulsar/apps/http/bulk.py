@@ -0,0 +1,225 @@
+import asyncio
+import random
+from collections import deque
+from functools import partial
+from urllib.parse import urlparse
+
+from pulsar.api import HttpRequestException, HttpConnectionError, SSLError
+
+
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE',
+                                'TRACE'))
+
+
+def retriable(exc):
+    """Check if a request failed with ``exc`` can be sent again
+    """
+    if isinstance(exc, SSLError):
+        return False
+    elif isinstance(exc, HttpRequestException):
+        return isinstance(exc, HttpConnectionError)
+    return isinstance(exc, (ConnectionError, asyncio.TimeoutError))
+
+
+class FetchMany:
+    """An asynchronous iterator over the responses of many requests
+
+    Created by :meth:`.HttpClient.fetch_many`, it yields ``(request,
+    response)`` pairs in the order responses complete. ``request`` is the
+    item of the input iterable and ``response`` is the :class:`.HttpResponse`
+    or the exception raised by the request.
+
+    Requests are taken from the input iterable only when there is room for
+    them, no more than :attr:`concurrency` requests are in flight or
+    waiting to be consumed, therefore memory is bounded regardless of the
+    number of requests.
+
+    .. attribute:: completed
+
+        Number of successful requests
+
+    .. attribute:: failed
+
+        Number of requests which failed after all attempts
+
+    .. attribute:: retried
+
+        Number of times a request was sent again
+    """
+    def __init__(self, client, requests, concurrency=10, per_host=None,
+                 retries=2, backoff=0.1, max_backoff=10, **params):
+        if concurrency < 1:
+            raise ValueError('concurrency must be a positive integer')
+        self.client = client
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.params = params
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self._loop = client._loop
+        self._requests = iter(requests)
+        self._exhausted = False
+        self._running = 0
+        self._tasks = set()
+        self._hosts = {}
+        self._parked = {}
+        self._num_parked = 0
+        self._ready = deque()
+        self._waiter = None
+        self._error = None
+
+    def __repr__(self):
+        return '%s(%d running)' % (self.__class__.__name__, self._running)
+    __str__ = __repr__
+
+    @property
+    def running(self):
+        """Number of requests in flight, including streamed responses
+        whose body is not fully received
+        """
+        return self._running
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._ready:
+            error = self._error
+            if error is not None:
+                self._error = None
+                raise error
+            self._fill()
+            if self._ready:
+                break
+            if self._exhausted and not self._running:
+                raise StopAsyncIteration
+            self._waiter = self._loop.create_future()
+            await self._waiter
+        return self._ready.popleft()
+
+    def close(self):
+        """Stop sending requests and cancel requests in flight
+        """
+        self._exhausted = True
+        self._parked.clear()
+        self._num_parked = 0
+        for task in tuple(self._tasks):
+            task.cancel()
+
+    # INTERNALS
+    def _fill(self):
+        concurrency = self.concurrency
+        for host in tuple(self._parked):
+            self._start_parked(host)
+        while (not self._exhausted and
+               self._running + len(self._ready) < concurrency and
+               self._num_parked < concurrency):
+            try:
+                item = next(self._requests)
+            except StopIteration:
+                self._exhausted = True
+                break
+            request = self._parse(item)
+            host = request[0]
+            if self.per_host and self._hosts.get(host, 0) >= self.per_host:
+                self._parked.setdefault(host, deque()).append(request)
+                self._num_parked += 1
+            else:
+                self._start(*request)
+
+    def _parse(self, item):
+        params = self.params
+        if isinstance(item, str):
+            method, url = 'GET', item
+        else:
+            method, url = item[:2]
+            method = method.upper()
+            if len(item) > 2:
+                params = params.copy()
+                params.update(item[2])
+        p = urlparse(url)
+        host = '%s://%s' % (p.scheme, p.netloc.lower())
+        return host, item, method, url, params
+
+    def _start(self, host, item, method, url, params):
+        self._running += 1
+        self._hosts[host] = self._hosts.get(host, 0) + 1
+        task = self._loop.create_task(self._fetch(method, url, params))
+        self._tasks.add(task)
+        task.add_done_callback(partial(self._done, host, item))
+
+    def _start_parked(self, host):
+        parked = self._parked[host]
+        while (parked and self._hosts.get(host, 0) < self.per_host and
+               self._running + len(self._ready) < self.concurrency):
+            self._num_parked -= 1
+            self._start(*parked.popleft())
+        if not parked:
+            self._parked.pop(host)
+
+    async def _fetch(self, method, url, params):
+        attempt = 0
+        while True:
+            try:
+                return await self.client.request(method, url, **params)
+            except Exception as exc:
+                if (attempt >= self.retries or
+                        method not in IDEMPOTENT_METHODS or
+                        not retriable(exc)):
+                    raise
+            attempt += 1
+            self.retried += 1
+            # exponential backoff with full jitter
+            await asyncio.sleep(random.uniform(
+                0, min(self.max_backoff, self.backoff * 2 ** attempt)),
+                loop=self._loop)
+
+    def _done(self, host, item, task):
+        self._tasks.discard(task)
+        if task.cancelled():
+            return self._release(host)
+        exc = task.exception()
+        if exc is not None:
+            self.failed += 1
+            response = exc
+        else:
+            self.completed += 1
+            response = task.result()
+        self._ready.append((item, response))
+        if (exc is None and response is not None and
+                response.request.stream and
+                not response.event('post_request').fired()):
+            # the connection is in use until the body is received
+            response.event('post_request').bind(
+                partial(self._stream_done, host))
+            self._wakeup()
+        else:
+            self._release(host)
+
+    def _stream_done(self, host, response, **kw):
+        self._release(host)
+
+    def _release(self, host):
+        self._running -= 1
+        count = self._hosts[host] - 1
+        if count:
+            self._hosts[host] = count
+        else:
+            self._hosts.pop(host)
+        try:
+            self._fill()
+        except Exception as exc:
+            # called by a done callback, raise the error in __anext__
+            self._error = exc
+        self._wakeup()
+
+    def _wakeup(self):
+        waiter = self._waiter
+        if waiter is not None:
+            self._waiter = None
+            if not waiter.done():
+                waiter.set_result(None)
@@ -0,0 +1,675 @@
+"""A client side HTTP cache following :rfc:`7234`.
+
+An :class:`HttpCache` is a plugin of :class:`.HttpClient`, consulted
+before a connection is taken from the pool, which keeps the responses of
+``GET`` requests in a storage backend::
+
+    from pulsar.apps.http import HttpClient, HttpCache
+
+    client = HttpClient(cache=HttpCache())
+
+Fresh responses are served without contacting the server. Stale responses
+with an ``ETag`` or ``Last-Modified`` header are revalidated with a
+conditional request and served from the cache when the server answers
+``304 Not Modified``. Responses with a ``stale-while-revalidate``
+directive are served stale while they are revalidated in the background.
+
+Concurrent requests for a resource which is not in the cache are
+coalesced: only the first one reaches the server while the others wait
+for its response to be stored.
+
+Two backends are available, a :class:`MemoryCache` bounded by bytes, the
+default, and a :class:`FileCache` which stores responses in a directory.
+"""
+import asyncio
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from copy import copy
+from email.utils import parsedate_tz, mktime_tz
+from hashlib import sha1
+
+from multidict import CIMultiDict
+
+from pulsar.api import EventHandler
+from pulsar.async.timeout import timeout as async_timeout
+from pulsar.utils.httpurl import cache_control
+from pulsar.utils.system import json
+
+from .client import HttpResponse
+from .stream import HttpStream
+
+
+SAFE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'TRACE'))
+# status codes cacheable by default, redirects are followed by the client
+# and never stored
+CACHEABLE_STATUS = frozenset((200, 203, 204, 300, 404, 405, 410, 414, 501))
+BYPASS_HEADERS = ('if-none-match', 'if-modified-since', 'if-match',
+                  'if-unmodified-since', 'if-range', 'range')
+NOT_UPDATED_HEADERS = frozenset(('content-length', 'content-encoding',
+                                 'transfer-encoding', 'content-range'))
+
+
+def http_time(value):
+    """Seconds since the epoch of an HTTP-date ``value``, ``None`` if
+    ``value`` is not a valid date
+    """
+    try:
+        return mktime_tz(parsedate_tz(value))
+    except (TypeError, ValueError, OverflowError):
+        pass
+
+
+def seconds(value):
+    """Parse the argument of a delta-seconds directive, ``None`` if invalid
+    """
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        pass
+
+
+def header_value(request, name):
+    headers = request.headers.getall(name, None)
+    if headers is None:
+        headers = request.unredirected_headers.getall(name, ())
+    return ', '.join(headers)
+
+
+def request_directives(request):
+    directives = cache_control(header_value(request, 'cache-control'))
+    if 'no-cache' in header_value(request, 'pragma').lower():
+        directives['no-cache'] = ''
+    return directives
+
+
+class CacheEntry:
+    """A response stored by an :class:`HttpCache`
+
+    .. attribute:: request_time
+
+        Time, in seconds since the epoch, the request was sent
+
+    .. attribute:: response_time
+
+        Time the response was received, updated when the response is
+        revalidated
+
+    .. attribute:: vary
+
+        Dictionary of the request headers named by the ``Vary`` header of
+        the response
+    """
+    __slots__ = ('url', 'status_code', 'version', 'headers', 'content',
+                 'vary', 'decoded', 'request_time', 'response_time')
+
+    def __init__(self, url, status_code, version, headers, content, vary,
+                 decoded, request_time, response_time):
+        self.url = url
+        self.status_code = status_code
+        self.version = version
+        self.headers = CIMultiDict(headers)
+        self.content = content
+        self.vary = vary
+        self.decoded = decoded
+        self.request_time = request_time
+        self.response_time = response_time
+
+    def __repr__(self):
+        return '%s(%s %s)' % (self.__class__.__name__, self.status_code,
+                              self.url)
+    __str__ = __repr__
+
+    @property
+    def size(self):
+        return len(self.content) + sum((len(n) + len(v) for n, v in
+                                        self.headers.items()))
+
+    @property
+    def directives(self):
+        return cache_control(', '.join(self.headers.getall('cache-control',
+                                                           ())))
+
+    def age(self, now=None):
+        """Current age of the response in seconds (:rfc:`7234#section-4.2.3`)
+        """
+        if now is None:
+            now = time.time()
+        date = http_time(self.headers.get('date')) or self.response_time
+        apparent_age = max(0, self.response_time - date)
+        age_value = seconds(self.headers.get('age')) or 0
+        response_delay = self.response_time - self.request_time
+        corrected_initial_age = max(apparent_age, age_value + response_delay)
+        return corrected_initial_age + now - self.response_time
+
+    def lifetime(self, shared=False, heuristic=0, max_heuristic=None):
+        """Freshness lifetime of the response in seconds
+        (:rfc:`7234#section-4.2.1`)
+        """
+        directives = self.directives
+        names = ('s-maxage', 'max-age') if shared else ('max-age',)
+        for name in names:
+            if name in directives:
+                return seconds(directives[name]) or 0
+        headers = self.headers
+        date = http_time(headers.get('date')) or self.response_time
+        if 'expires' in headers:
+            expires = http_time(headers['expires'])
+            return max(expires - date, 0) if expires else 0
+        modified = http_time(headers.get('last-modified'))
+        if heuristic and modified and modified < date:
+            lifetime = heuristic * (date - modified)
+            if max_heuristic:
+                lifetime = min(lifetime, max_heuristic)
+            return lifetime
+        return 0
+
+    def matches(self, request):
+        """Check if this response can be used for ``request``, the request
+        headers named by the ``Vary`` header must match
+        """
+        if self.decoded != bool(request.decompress):
+            return False
+        for name, value in self.vary.items():
+            if header_value(request, name) != value:
+                return False
+        return True
+
+    def validators(self):
+        """Conditional headers for revalidating this response
+        """
+        validators = []
+        etag = self.headers.get('etag')
+        if etag:
+            validators.append(('if-none-match', etag))
+        modified = self.headers.get('last-modified')
+        if modified:
+            validators.append(('if-modified-since', modified))
+        return validators
+
+    def update(self, headers, request_time, response_time):
+        """Update this response with the ``headers`` of a
+        ``304 Not Modified`` response
+        """
+        names = set((name.lower() for name in headers)) - NOT_UPDATED_HEADERS
+        for name in names:
+            self.headers.popall(name, None)
+            self.headers.extend(((name, value) for value in
+                                 headers.getall(name)))
+        self.request_time = request_time
+        self.response_time = response_time
+
+    def serialize(self):
+        """Serialize this entry into bytes
+        """
+        meta = dict(url=self.url, status_code=self.status_code,
+                    version=self.version,
+                    headers=list(self.headers.items()),
+                    vary=self.vary, decoded=self.decoded,
+                    request_time=self.request_time,
+                    response_time=self.response_time)
+        return b'\n'.join((json.dumps(meta).encode('utf-8'), self.content))
+
+    @classmethod
+    def deserialize(cls, data):
+        meta, content = data.split(b'\n', 1)
+        meta = json.loads(meta.decode('utf-8'))
+        meta['headers'] = [tuple(h) for h in meta['headers']]
+        return cls(content=content, **meta)
+
+
+class CachedResponse(EventHandler):
+    """A response served by an :class:`HttpCache`
+
+    It is not bound to a connection and has the public attributes and
+    methods of an :class:`.HttpResponse`.
+    """
+    connection = None
+    parser = None
+    request_again = None
+    _cookies = None
+    _raw = None
+    ONE_TIME_EVENTS = HttpResponse.ONE_TIME_EVENTS
+
+    def __init__(self, request, entry, cache_status):
+        self.request = request
+        self.producer = request.client
+        self._loop = request.client._loop
+        self.status_code = entry.status_code
+        self.version = entry.version
+        self.headers = CIMultiDict(entry.headers)
+        self.headers['age'] = str(int(entry.age()))
+        self.content = entry.content
+        self.cache_status = cache_status
+        self.event('on_headers').fire()
+        self.event('post_request').fire()
+
+    __repr__ = HttpResponse.__repr__
+    __str__ = __repr__
+    url = HttpResponse.url
+    history = HttpResponse.history
+    ok = HttpResponse.ok
+    cookies = HttpResponse.cookies
+    encoding = HttpResponse.encoding
+    links = HttpResponse.links
+    reason = HttpResponse.reason
+    text = HttpResponse.text
+    json = HttpResponse.json
+    save = HttpResponse.save
+    decode_content = HttpResponse.decode_content
+    raise_for_status = HttpResponse.raise_for_status
+    info = HttpResponse.info
+
+    @property
+    def raw(self):
+        """An :class:`.HttpStream` over the cached body
+        """
+        if self._raw is None:
+            self._raw = HttpStream(self)
+            if self.content:
+                self._raw.feed_data(self.content)
+        return self._raw
+
+
+class MemoryCache:
+    """A least recently used storage of :class:`CacheEntry` in memory,
+    bounded by bytes
+
+    :param max_size: maximum number of bytes held by the cache
+    :param max_entry_size: responses larger than this are not stored
+    """
+    def __init__(self, max_size=2**26, max_entry_size=2**20):
+        self.max_size = max_size
+        self.max_entry_size = min(max_entry_size, max_size)
+        self.size = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    async def set(self, key, entry):
+        self._pop(key)
+        size = entry.size
+        if size > self.max_entry_size:
+            return
+        self._entries[key] = (entry, size)
+        self.size += size
+        while self.size > self.max_size:
+            self._pop(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def delete(self, key):
+        self._pop(key)
+
+    async def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def info(self):
+        return dict(entries=len(self._entries),
+                    size=self.size,
+                    max_size=self.max_size,
+                    evictions=self.evictions)
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+
+class FileCache:
+    """A storage of :class:`CacheEntry` in files of a ``directory``
+
+    Files are read and written in the ``executor``, the event loop default
+    executor if not provided.
+
+    :param max_size: optional maximum number of bytes stored in
+        ``directory``, the least recently used files are removed when it
+        is exceeded
+    :param max_entry_size: responses larger than this are not stored
+    """
+    def __init__(self, directory, max_size=None, max_entry_size=2**24,
+                 executor=None):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_entry_size = max_entry_size
+        self.executor = executor
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        """The path of the file storing ``key``
+        """
+        return os.path.join(self.directory,
+                            sha1(key.encode('utf-8')).hexdigest())
+
+    async def get(self, key):
+        entry = await self._run(self._read, self.path(key))
+        if entry is not None and entry.url == key:
+            return entry
+
+    async def set(self, key, entry):
+        if entry.size > self.max_entry_size:
+            await self.delete(key)
+        else:
+            await self._run(self._write, self.path(key), entry.serialize())
+
+    async def delete(self, key):
+        await self._run(self._remove, self.path(key))
+
+    async def clear(self):
+        await self._run(self._clear)
+
+    def info(self):
+        return dict(directory=self.directory, max_size=self.max_size)
+
+    # INTERNALS
+    def _run(self, method, *args):
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(self.executor, method, *args)
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as fp:
+                data = fp.read()
+            # the modification time orders files for eviction
+            os.utime(path)
+            return CacheEntry.deserialize(data)
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+
+    def _write(self, path, data):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            self._remove(tmp)
+            raise
+        if self.max_size:
+            self._trim()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _clear(self):
+        for name in os.listdir(self.directory):
+            self._remove(os.path.join(self.directory, name))
+
+    def _trim(self):
+        files = []
+        size = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            size += stat.st_size
+        files.sort()
+        for _, file_size, path in files:
+            if size <= self.max_size:
+                break
+            self._remove(path)
+            size -= file_size
+
+
+class HttpCache:
+    """An :rfc:`7234` cache of :class:`.HttpClient` responses
+
+    :param backend: the storage of responses, a :class:`MemoryCache` if
+        not provided
+    :param shared: behave as a shared cache, ``s-maxage`` directives are
+        honoured while ``private`` responses and responses to requests
+        with an ``Authorization`` header are not stored
+    :param heuristic: fraction of the time since the ``Last-Modified`` date
+        used as freshness lifetime of responses without explicit
+        expiration, ``0`` to disable heuristic freshness
+    :param max_heuristic: maximum heuristic freshness lifetime in seconds
+
+    Only ``GET`` requests without conditional or ``Range`` headers are
+    served from the cache, streamed requests bypass it. Successful
+    requests with unsafe methods remove the response of their url from the
+    cache. Responses with a ``Set-Cookie`` header or a ``Vary: *``
+    header are not stored. A single response is stored for each url, its
+    ``Vary`` headers must match the ones of the request.
+
+    Responses served by the cache are :class:`CachedResponse` and the
+    :attr:`~.HttpResponse.cache_status` of all responses is one of:
+
+    * ``HIT`` a fresh response served from the cache
+    * ``STALE`` a stale response served while it is revalidated
+    * ``REVALIDATED`` a response served from the cache after a
+      ``304 Not Modified`` response from the server
+    * ``MISS`` a response received from the server
+
+    .. attribute:: hits
+
+        Number of responses served from the cache without contacting the
+        server
+
+    .. attribute:: misses
+
+        Number of responses received from the server
+
+    .. attribute:: revalidated
+
+        Number of stored responses validated by the server
+
+    .. attribute:: coalesced
+
+        Number of requests which waited for the response of a concurrent
+        identical request
+    """
+    def __init__(self, backend=None, shared=False, heuristic=0.1,
+                 max_heuristic=86400):
+        self.backend = backend or MemoryCache()
+        self.shared = shared
+        self.heuristic = heuristic
+        self.max_heuristic = max_heuristic
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._revalidating = set()
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__,
+                           self.backend.__class__.__name__)
+    __str__ = __repr__
+
+    def key(self, request):
+        """The cache key of ``request``, ``None`` if the request bypasses
+        the cache
+        """
+        if request.method != 'GET' or request.stream:
+            return
+        headers = request.headers
+        for name in BYPASS_HEADERS:
+            if name in headers:
+                return
+        if self.shared and request.has_header('authorization'):
+            return
+        if 'no-store' in request_directives(request):
+            return
+        return request.url
+
+    def info(self):
+        """Statistics about this cache
+        """
+        info = dict(hits=self.hits,
+                    misses=self.misses,
+                    revalidated=self.revalidated,
+                    stale=self.stale,
+                    coalesced=self.coalesced,
+                    inflight=len(self._inflight),
+                    revalidating=len(self._revalidating))
+        if hasattr(self.backend, 'info'):
+            info.update(self.backend.info())
+        return info
+
+    def clear(self):
+        """Remove all responses from the cache
+        """
+        return self.backend.clear()
+
+    def lifetime(self, entry):
+        """Freshness lifetime of a stored response in seconds
+        """
+        return entry.lifetime(self.shared, self.heuristic,
+                              self.max_heuristic)
+
+    def entry(self, request, response, request_time, response_time):
+        """Create the :class:`CacheEntry` of ``response`` or return
+        ``None`` if the response cannot be stored
+        """
+        if response.status_code not in CACHEABLE_STATUS:
+            return
+        headers = response.headers
+        directives = cache_control(', '.join(headers.getall('cache-control',
+                                                            ())))
+        if 'no-store' in directives or 'set-cookie' in headers:
+            return
+        if self.shared:
+            if 'private' in directives:
+                return
+            if (request.has_header('authorization') and not
+                    ('public' in directives or 's-maxage' in directives or
+                     'must-revalidate' in directives)):
+                return
+        vary = {}
+        for name in ', '.join(headers.getall('vary', ())).split(','):
+            name = name.strip().lower()
+            if name == '*':
+                return
+            elif name:
+                vary[name] = header_value(request, name)
+        entry = CacheEntry(request.url, response.status_code,
+                           response.version, headers.items(),
+                           response.content or b'', vary,
+                           bool(request.decompress), request_time,
+                           response_time)
+        if self.lifetime(entry) or entry.validators():
+            return entry
+
+    async def response(self, request, send):
+        """Get the response for ``request``
+
+        :param request: the :class:`.HttpRequest`
+        :param send: a coroutine function sending a request to the server
+            and returning its response
+        """
+        key = self.key(request)
+        if key is None:
+            response = await send(request)
+            if (response is not None and
+                    request.method not in SAFE_METHODS and
+                    response.status_code and response.status_code < 400):
+                await self.backend.delete(request.url)
+            return response
+        started = time.time()
+        directives = request_directives(request)
+        entry = await self._lookup(key, request)
+        if entry is not None and 'no-cache' not in directives:
+            age = entry.age()
+            lifetime = self.lifetime(entry)
+            stored = entry.directives
+            if 'max-age' in directives:
+                lifetime = min(lifetime, seconds(directives['max-age']) or 0)
+            if 'min-fresh' in directives:
+                age += seconds(directives['min-fresh']) or 0
+            if 'no-cache' not in stored:
+                if age < lifetime:
+                    self.hits += 1
+                    return CachedResponse(request, entry, 'HIT')
+                swr = seconds(stored.get('stale-while-revalidate'))
+                if (swr and age < lifetime + swr and
+                        'must-revalidate' not in stored):
+                    self.stale += 1
+                    self._background(request, key, entry, send)
+                    return CachedResponse(request, entry, 'STALE')
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            # wait for the response of an identical request
+            self.coalesced += 1
+            await asyncio.shield(inflight)
+            entry = await self._lookup(key, request)
+            if entry is not None and entry.response_time >= started:
+                self.hits += 1
+                return CachedResponse(request, entry, 'HIT')
+            return await self._fetch(request, key, entry, send)
+        inflight = request._loop.create_future()
+        self._inflight[key] = inflight
+        try:
+            return await self._fetch(request, key, entry, send)
+        finally:
+            self._inflight.pop(key)
+            inflight.set_result(None)
+
+    # INTERNALS
+    async def _lookup(self, key, request):
+        entry = await self.backend.get(key)
+        if entry is not None and entry.matches(request):
+            return entry
+
+    async def _fetch(self, request, key, entry, send):
+        validators = entry.validators() if entry is not None else None
+        if validators:
+            # the conditional request must not change the caller headers
+            request = copy(request)
+            request.headers = CIMultiDict(request.headers)
+            for name, value in validators:
+                request.headers[name] = value
+        request_time = time.time()
+        response = await send(request)
+        response_time = time.time()
+        if response is None or not response.status_code:
+            return response
+        if entry is not None and response.status_code == 304:
+            self.revalidated += 1
+            entry.update(response.headers, request_time, response_time)
+            await self.backend.set(key, entry)
+            return CachedResponse(request, entry, 'REVALIDATED')
+        self.misses += 1
+        response.cache_status = 'MISS'
+        if response.status_code < 500:
+            new_entry = self.entry(request, response, request_time,
+                                   response_time)
+            if new_entry is not None:
+                await self.backend.set(key, new_entry)
+            elif entry is not None:
+                await self.backend.delete(key)
+        return response
+
+    def _background(self, request, key, entry, send):
+        if key not in self._revalidating:
+            self._revalidating.add(key)
+            request = copy(request)
+            request.headers = CIMultiDict(request.headers)
+            request._loop.create_task(self._revalidate(request, key,
+                                                       entry, send))
+
+    async def _revalidate(self, request, key, entry, send):
+        client = request.client
+        try:
+            with async_timeout(client._loop, client.timeout):
+                await self._fetch(request, key, entry, send)
+        except Exception as exc:
+            client.logger.warning('Could not revalidate %s: %s',
+                                  request.url, exc)
+        finally:
+            self._revalidating.discard(key)
@@ -26,7 +26,7 @@ from multidict import CIMultiDict
 
 import pulsar
 from pulsar.api import (
-    AbortEvent, AbstractClient, Pool, Connection,
+    AbortEvent, AbstractClient, Pool, ConnectionLimit, Connection,
     ProtocolConsumer, HttpRequestException, HttpConnectionError,
     SSLError, cfg_value
 )
@@ -48,7 +48,11 @@ from .plugins import (
 )
 from .auth import Auth, HTTPBasicAuth
 from .stream import HttpStream
-from .decompress import GzipDecompress, DeflateDecompress
+from .bulk import FetchMany
+from .pipeline import HttpPipeline, can_pipeline
+from .upload import BodyReader, body_length
+from .tls import create_context, transport_context
+from .decompress import DecompressionError, DEFAULT_MAX_RATIO, get_decoder
 
 
 scheme_host = namedtuple('scheme_host', 'scheme netloc')
@@ -56,6 +60,9 @@ scheme_host = namedtuple('scheme_host', 'scheme netloc')
 LOGGER = logging.getLogger('pulsar.http')
 FORM_URL_ENCODED = 'application/x-www-form-urlencoded'
 MULTIPART_FORM_DATA = 'multipart/form-data'
+CONTINUE_TIMEOUT = 1
+# largest body buffer allocated upfront from a response Content-Length
+MAX_PREALLOCATE = 2**24
 
 
 def guess_filename(obj):
@@ -101,11 +108,23 @@ def full_url(url, params, method=None):
     )
 
 
+def merge_pool_info(a, b):
+    """Merge the statistics of two connection pools to the same host
+    """
+    info = dict(((k, a[k] + b[k]) for k in a))
+    info['max_wait'] = max(a['max_wait'], b['max_wait'])
+    info['idle'] = min(a['idle'], b['idle'])
+    used = info['created'] + info['reused']
+    info['reuse_ratio'] = info['reused'] / used if used else 0.0
+    return info
+
+
 class RequestBase:
     inp_params = None
     release_connection = True
     history = None
     url = None
+    _write_done = False
 
     @property
     def unverifiable(self):
@@ -208,11 +227,46 @@ class HttpRequest(RequestBase):
 
         Allow for streaming body
 
+    .. attribute:: stream_buffer
+
+        Maximum number of bytes of a streaming body buffered in memory
+        before reading from the connection is paused
+
+    .. attribute:: max_body_size
+
+        Maximum size in bytes of the response body, a larger response is
+        aborted with :class:`ResponseTooLarge`. ``None`` for no limit.
+        When the body is decompressed the limit applies to the
+        decompressed body too.
+
+    .. attribute:: max_decompress_ratio
+
+        Maximum ratio between the size of the decompressed and the
+        compressed body, a response exceeding it is aborted with
+        :class:`.DecompressionError`. ``None`` for no limit.
+
+    .. attribute:: continue_timeout
+
+        When :attr:`wait_continue` is ``True``, seconds to wait for the
+        ``100 Continue`` response before sending the body anyway
+
+    .. attribute:: upload_progress
+
+        Optional callable invoked with the number of bytes of the body sent
+        and the total number of bytes, ``None`` if unknown, as the body
+        is written
+
+    .. attribute:: pipeline
+
+        Maximum number of requests waiting for their response on a
+        connection, ``None`` if requests are not pipelined.
+        Only requests with an idempotent method other than ``HEAD`` and
+        a body which is not streamed are pipelined.
+
     """
     _proxy = None
     _ssl = None
     _tunnel = None
-    _write_done = False
 
     def __init__(self, client, url, method, inp_params=None, headers=None,
                  data=None, files=None, json=None, history=None, auth=None,
@@ -220,7 +274,10 @@ class HttpRequest(RequestBase):
                  allow_redirects=False, decompress=True, version=None,
                  wait_continue=False, websocket_handler=None, cookies=None,
                  params=None, stream=False, proxies=None, verify=True,
-                 cert=None, **extra):
+                 cert=None, stream_buffer=None, max_body_size=None,
+                 max_decompress_ratio=DEFAULT_MAX_RATIO,
+                 continue_timeout=CONTINUE_TIMEOUT, upload_progress=None,
+                 pipeline=None, **extra):
         self.client = client
         self.method = method.upper()
         self.inp_params = inp_params or {}
@@ -235,6 +292,12 @@ class HttpRequest(RequestBase):
         self.websocket_handler = websocket_handler
         self.source_address = source_address
         self.stream = stream
+        self.stream_buffer = stream_buffer
+        self.max_body_size = max_body_size
+        self.max_decompress_ratio = max_decompress_ratio
+        self.continue_timeout = continue_timeout
+        self.upload_progress = upload_progress
+        self.pipeline = pipeline
         self.verify = verify
         self.cert = cert
         if auth and not isinstance(auth, Auth):
@@ -339,14 +402,22 @@ class HttpRequest(RequestBase):
         self.unredirected_headers[header_name] = header_value
 
     def write_body(self, transport):
+        """Write the body into ``transport``
+
+        Return the :class:`~asyncio.Task` writing a streamed body,
+        ``None`` otherwise
+        """
         assert not self._write_done, 'Body already sent'
         self._write_done = True
         if not self.body:
             return
         if is_streamed(self.body):
-            self._loop.create_task(self._write_streamed_data(transport))
+            return self._loop.create_task(
+                self._write_streamed_data(transport))
         else:
             self._write_body_data(transport, self.body, True)
+            if self.upload_progress:
+                self.upload_progress(len(self.body), len(self.body))
 
     # INTERNAL ENCODING METHODS
     def _encode_body(self, data, files, json):
@@ -362,7 +433,11 @@ class HttpRequest(RequestBase):
                 raise ValueError('data cannot be an iterator when '
                                  'files are present')
             if 'content-length' not in self.headers:
-                self.headers['transfer-encoding'] = 'chunked'
+                length = body_length(data)
+                if length is None:
+                    self.headers['transfer-encoding'] = 'chunked'
+                else:
+                    self.headers['content-length'] = str(length)
             return data
         elif data or files:
             if files:
@@ -445,16 +520,25 @@ class HttpRequest(RequestBase):
             data = (data,)
         else:
             return
+        waiter = None
         for chunk in data:
-            transport.write(chunk)
+            waiter = transport.write(chunk)
+        return waiter
 
     async def _write_streamed_data(self, transport):
-        for data in self.body:
-            try:
-                data = await data
-            except TypeError:
-                pass
-            self._write_body_data(transport, data)
+        length = self.headers.get('content-length')
+        total = int(length) if length else None
+        progress = self.upload_progress
+        sent = 0
+        async for data in BodyReader(self.body, self._loop):
+            data = to_bytes(data, self.charset)
+            waiter = self._write_body_data(transport, data)
+            if waiter is not None:
+                # the write buffer is full, wait for it to drain
+                await waiter
+            sent += len(data)
+            if progress:
+                progress(sent, total)
         self._write_body_data(transport, b'', True)
 
     # PROXY INTERNALS
@@ -477,21 +561,85 @@ class HttpRequest(RequestBase):
                     self._proxy = proxy_url
 
 
+class ResponseTooLarge(HttpRequestException):
+    """The response body exceeds the
+    :attr:`~HttpRequest.max_body_size` of the request
+    """
+
+
+class HttpBody:
+    """Accumulate the body of a response in linear time
+
+    When the body ``length`` is known the buffer is allocated once and
+    chunks are copied in place, otherwise chunks are appended to a
+    growing :class:`bytearray`. No more than ``max_allocate`` bytes are
+    allocated upfront, the buffer grows past them when more data arrives.
+    """
+    __slots__ = ('size', '_data', '_view')
+
+    def __init__(self, length=None, max_allocate=None):
+        self.size = 0
+        if length:
+            self._data = bytearray(min(length,
+                                       max_allocate or MAX_PREALLOCATE))
+            self._view = memoryview(self._data)
+        else:
+            self._data = bytearray()
+            self._view = None
+
+    def __len__(self):
+        return self.size
+
+    def write(self, chunk):
+        start = self.size
+        self.size = end = start + len(chunk)
+        view = self._view
+        if view is not None:
+            if end <= len(view):
+                view[start:end] = chunk
+                return
+            # more data than announced, switch to a growing buffer
+            view.release()
+            self._view = None
+            del self._data[start:]
+        self._data.extend(chunk)
+
+    def getvalue(self):
+        """The body as :class:`bytes`
+        """
+        view = self._view
+        if view is not None and self.size < len(view):
+            return view[:self.size].tobytes()
+        return bytes(self._data)
+
+
 class HttpResponse(ProtocolConsumer):
     """A :class:`.ProtocolConsumer` for the HTTP client protocol.
 
     Initialised by a call to the :class:`HttpClient.request` method.
+
+    .. attribute:: cache_status
+
+        How the response was obtained when the client has an
+        :class:`.HttpCache`: ``HIT``, ``STALE``, ``REVALIDATED`` or
+        ``MISS``. ``None`` when responses are not cached.
     """
     _has_proxy = False
     _data_sent = None
     _cookies = None
     _raw = None
+    _body = None
+    _received = 0
+    _decoder = None
+    _continue = None
+    _writer = None
     content = None
     headers = None
     parser = None
     version = None
     status_code = None
     request_again = None
+    cache_status = None
     ONE_TIME_EVENTS = ('pre_request', 'on_headers', 'post_request')
 
     def __repr__(self):
@@ -573,6 +721,38 @@ class HttpResponse(ProtocolConsumer):
         """
         return _json.loads(self.text)
 
+    async def save(self, path, executor=None):
+        """Write the body of this response into ``path``
+
+        :param path: a file name or a file-like object open in binary mode
+        :param executor: optional executor where blocking writes are
+            performed, the event loop default executor if not provided
+        :return: the number of bytes written
+
+        When the request was sent with ``stream=True`` the body is written
+        chunk by chunk as it is received, the next chunk being read only
+        once the previous one is written. Together with the
+        :attr:`~HttpRequest.stream_buffer` this keeps memory bounded
+        regardless of the body size.
+        """
+        loop = self._loop
+        fp = path
+        if isinstance(path, str):
+            fp = await loop.run_in_executor(executor, open, path, 'wb')
+        size = 0
+        try:
+            if self.request.stream or self._raw:
+                async for chunk in self.raw:
+                    await loop.run_in_executor(executor, fp.write, chunk)
+                    size += len(chunk)
+            elif self.content:
+                await loop.run_in_executor(executor, fp.write, self.content)
+                size = len(self.content)
+        finally:
+            if fp is not path:
+                await loop.run_in_executor(executor, fp.close)
+        return size
+
     def decode_content(self):
         """Return the best possible representation of the response body.
         """
@@ -619,8 +799,14 @@ class HttpResponse(ProtocolConsumer):
         request = self.request
         self.parser = request.new_parser(self)
         headers = request.encode()
-        self.connection.transport.write(headers)
-        if not headers or request.headers.get('expect') != '100-continue':
+        self.connection.write(headers)
+        if headers and request.headers.get('expect') == '100-continue':
+            # wait for 100 Continue, send the body anyway after a while
+            timeout = getattr(request, 'continue_timeout', None)
+            if timeout:
+                self._continue = self._loop.call_later(timeout,
+                                                       self._send_body)
+        elif not request._write_done:
             self.write_body()
 
     def feed_data(self, data):
@@ -634,26 +820,109 @@ class HttpResponse(ProtocolConsumer):
 
     def on_headers_complete(self):
         request = self.request
+        if self._continue is not None:
+            self._continue.cancel()
+            self._continue = None
         self.status_code = self.parser.get_status_code()
         self.version = self.parser.get_http_version()
         self.event('on_headers').fire()
         if request.method == 'HEAD':
             self.event('post_request').fire()
+            return
+        if request.max_body_size:
+            length = self.headers.get('content-length')
+            if (length and length.isdigit() and
+                    int(length) > request.max_body_size):
+                return self._too_large()
+        encoding = self.headers.get('content-encoding')
+        if encoding and request.decompress:
+            self._decoder = self.producer.decoder(encoding, request)
 
     def on_body(self, body):
-        if self.request.stream or self._raw:
-            self.raw.feed_data(body)
-        elif self.content is None:
-            self.content = body
-        else:
-            self.content += body
+        if self.event('post_request').fired():
+            return
+        request = self.request
+        self._received += len(body)
+        if (request.max_body_size and
+                self._received > request.max_body_size):
+            return self._too_large()
+        if self._decoder is not None:
+            try:
+                body = self._decoder.decompress(body)
+            except DecompressionError as exc:
+                return self._abort(exc)
+        if body:
+            self._write(body)
 
     def on_message_complete(self):
-        self.producer.maybe_decompress(self)
+        if self.event('post_request').fired():
+            return
+        if (self.status_code != 100 and self._writer is not None and
+                not self._writer.done()):
+            # the server responded before receiving the whole body,
+            # stop sending it, the connection cannot be reused
+            self._writer.cancel()
+            self.connection.close()
+        if self._decoder is not None:
+            try:
+                body = self._decoder.flush()
+            except DecompressionError as exc:
+                return self._abort(exc)
+            self._decoder = None
+            if body:
+                self._write(body)
+        if self._body is not None:
+            self.content = self._body.getvalue()
+            self._body = None
         self.fire_event('post_request')
 
     def write_body(self):
-        self.request.write_body(self.connection)
+        writer = self.request.write_body(self.connection)
+        if writer is not None:
+            self._writer = writer
+            writer.add_done_callback(self._body_written)
+
+    def _write(self, body):
+        if self.request.stream or self._raw:
+            self.raw.feed_data(body)
+        else:
+            if self._body is None:
+                length = None
+                if self._decoder is None:
+                    length = self.headers.get('content-length')
+                self._body = HttpBody(
+                    int(length) if length and length.isdigit() else None,
+                    self.request.max_body_size)
+            self._body.write(body)
+
+    def _send_body(self):
+        self._continue = None
+        connection = self.connection
+        if (connection is not None and not connection.closed and
+                not self.event('post_request').fired()):
+            self.write_body()
+
+    def _body_written(self, writer):
+        if not writer.cancelled() and writer.exception():
+            self._abort(writer.exception())
+
+    def _too_large(self):
+        self._abort(ResponseTooLarge(
+            'Response body larger than %d bytes' %
+            self.request.max_body_size, response=self))
+
+    def _abort(self, exc):
+        # abort the response, the connection cannot be reused
+        self._body = None
+        self._decoder = None
+        if isinstance(exc, DecompressionError) and exc.response is None:
+            exc = DecompressionError(str(exc), response=self)
+        if not self.event('post_request').fired():
+            if self.request.stream:
+                # make sure the stream consumer receives the error
+                self.raw
+            self.fire_event('post_request', exc=exc)
+            self.connection.abort()
 
 
 class HttpClient(AbstractClient):
@@ -662,7 +931,14 @@ class HttpClient(AbstractClient):
     It handles pool of asynchronous connections.
 
     :param pool_size: set the :attr:`pool_size` attribute.
+    :param max_connections: maximum number of connections open at the same
+        time across all hosts, unlimited if not provided
+    :param idle_timeout: seconds after which the connection pool of a host
+        which has not been used is closed
     :param store_cookies: set the :attr:`store_cookies` attribute
+    :param resolver: optional :class:`.Resolver` for host names, the
+        shared resolver of the event loop if not provided
+    :param cache: optional :class:`.HttpCache` for responses
 
     .. attribute:: headers
 
@@ -691,12 +967,37 @@ class HttpClient(AbstractClient):
 
     .. attribute:: pool_size
 
-        The size of a pool of connection for a given host.
+        The size of a pool of connection for a given host, it is the
+        maximum number of connections open to a host.
 
     .. attribute:: connection_pools
 
         Dictionary of connection pools for different hosts
 
+    .. attribute:: connection_limit
+
+        The :class:`.ConnectionLimit` shared by all connection pools,
+        ``None`` if the number of connections is unlimited
+
+    .. attribute:: cache
+
+        The :class:`.HttpCache` of responses, ``None`` if responses are not
+        cached
+
+    .. attribute:: pipeline
+
+        Default :attr:`~HttpRequest.pipeline` depth of requests, ``None``
+        if requests are not pipelined
+
+    .. attribute:: pipelines
+
+        Dictionary of :class:`.HttpPipeline` for different hosts
+
+    .. attribute:: ssl_contexts
+
+        Dictionary of SSL contexts created by :meth:`ssl_context`, one for
+        each set of verification parameters
+
     .. attribute:: DEFAULT_HTTP_HEADERS
 
         Default headers for this :class:`HttpClient`
@@ -735,6 +1036,10 @@ class HttpClient(AbstractClient):
         'version',
         'verify',
         'stream',
+        'stream_buffer',
+        'max_body_size',
+        'max_decompress_ratio',
+        'pipeline',
         'cert'
     )
     # Default hosts not affected by proxy settings. This can be overwritten
@@ -747,7 +1052,11 @@ class HttpClient(AbstractClient):
                  websocket_handler=None, parser=None, trust_env=True,
                  loop=None, client_version=None, timeout=None, stream=False,
                  pool_size=10, frame_parser=None, logger=None,
-                 close_connections=False, keep_alive=None):
+                 close_connections=False, keep_alive=None,
+                 stream_buffer=None, max_body_size=None, resolver=None,
+                 max_connections=None, idle_timeout=60,
+                 max_decompress_ratio=DEFAULT_MAX_RATIO, cache=None,
+                 pipeline=None):
         super().__init__(
             partial(Connection, HttpResponse),
             loop=loop,
@@ -757,6 +1066,12 @@ class HttpClient(AbstractClient):
         self.client_version = client_version or self.client_version
         self.connection_pools = {}
         self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.connection_limit = None
+        if max_connections:
+            self.connection_limit = ConnectionLimit(max_connections,
+                                                    loop=self._loop)
+        self._last_sweep = self._loop.time()
         self.trust_env = trust_env
         self.timeout = timeout
         self.store_cookies = store_cookies
@@ -770,7 +1085,13 @@ class HttpClient(AbstractClient):
         # cert file (.pem). If Tuple, ('cert', 'key') pair
         self.cert = cert
         self.stream = stream
+        self.stream_buffer = stream_buffer
+        self.max_body_size = max_body_size
+        self.max_decompress_ratio = max_decompress_ratio
         self.close_connections = close_connections
+        self.cache = cache
+        self.pipeline = pipeline
+        self.pipelines = {}
         dheaders = CIMultiDict(self.DEFAULT_HTTP_HEADERS)
         dheaders['user-agent'] = self.client_version
         # override headers
@@ -794,10 +1115,8 @@ class HttpClient(AbstractClient):
         self.event('pre_request').bind(WebSocket())
         self.event('post_request').bind(Expect())
         self.event('post_request').bind(Redirect())
-        self._decompressors = dict(
-            gzip=GzipDecompress(),
-            deflate=DeflateDecompress()
-        )
+        self.ssl_contexts = {}
+        self.resolver = resolver
 
     # API
     def connect(self, address):
@@ -880,6 +1199,31 @@ class HttpClient(AbstractClient):
         else:
             return response
 
+    def fetch_many(self, requests, concurrency=10, per_host=None, **kw):
+        """Send many requests with bounded concurrency
+
+        :param requests: an iterable over URLs for ``GET`` requests, or
+            ``(method, url)`` and ``(method, url, params)`` tuples
+        :param concurrency: maximum number of requests in flight
+        :param per_host: optional maximum number of requests in flight
+            to the same host
+        :param retries: number of times idempotent requests failed with a
+            connection error are sent again, defaults to 2
+        :param backoff: base delay in seconds between attempts, doubled at
+            each attempt and randomised
+        :param kw: parameters passed to all requests
+        :return: a :class:`.FetchMany` asynchronous iterator over
+            ``(request, response)`` pairs, in completion order
+
+        For example::
+
+            async for url, response in client.fetch_many(urls, 50):
+                if isinstance(response, Exception):
+                    ...
+        """
+        return FetchMany(self, requests, concurrency=concurrency,
+                         per_host=per_host, **kw)
+
     def close(self):
         """Close all connections
         """
@@ -887,15 +1231,60 @@ class HttpClient(AbstractClient):
         for p in self.connection_pools.values():
             waiters.append(p.close())
         self.connection_pools.clear()
+        self.pipelines.clear()
         return asyncio.gather(*waiters, loop=self._loop)
 
-    def maybe_decompress(self, response):
-        encoding = response.headers.get('content-encoding')
-        if encoding and response.request.decompress:
-            deco = self._decompressors.get(encoding)
-            if not deco:
-                self.logger.warning('Cannot decompress %s', encoding)
-            response.content = deco(response.content)
+    def stats(self):
+        """Statistics about the connections of this client
+
+        Returns a dictionary with the ``connections`` totals, the
+        statistics of the connection pools by ``hosts``, the ``tls``
+        handshake statistics, the ``resolver`` cache statistics and the
+        statistics of the response ``cache``, if any.
+        """
+        limit = self.connection_limit
+        hosts = {}
+        for key, pool in self.connection_pools.items():
+            info = pool.info()
+            pipeline = self.pipelines.get(key)
+            if pipeline is not None and pipeline.pool is pool:
+                info['pipelined'] = pipeline.pipelined
+                info['pipeline_retries'] = pipeline.retried
+            else:
+                info['pipelined'] = info['pipeline_retries'] = 0
+            host = '%s://%s' % (key.scheme, key.netloc)
+            if host in hosts:
+                info = merge_pool_info(hosts[host], info)
+            hosts[host] = info
+        connections = dict(
+            open=0, idle=0, in_use=0,
+            max_connections=limit.max_connections if limit else None,
+            waiting=limit.waiting if limit else 0,
+            peak=limit.peak if limit else None,
+            evictions=limit.evictions if limit else 0
+        )
+        for info in hosts.values():
+            connections['open'] += info['open']
+            connections['idle'] += info['available']
+            connections['in_use'] += info['in_use']
+        return dict(connections=connections,
+                    hosts=hosts,
+                    tls=self.tls_info(),
+                    resolver=self.resolver.info(),
+                    cache=self.cache.info() if self.cache else None)
+
+    def decoder(self, encoding, request):
+        """An incremental decoder for the ``encoding`` of a response body
+
+        Return ``None``, and the body is not decompressed, when the
+        encoding is not supported
+        """
+        decoder = get_decoder(encoding,
+                              max_size=request.max_body_size,
+                              max_ratio=request.max_decompress_ratio)
+        if decoder is None and encoding != 'identity':
+            self.logger.warning('Cannot decompress %s', encoding)
+        return decoder
 
     async def __aenter__(self):
         await self.close()
@@ -905,6 +1294,22 @@ class HttpClient(AbstractClient):
         await self.close()
 
     # INTERNALS
+    def _sweep(self):
+        # close connection pools not used for more than idle_timeout
+        if not self.idle_timeout:
+            return
+        now = self._loop.time()
+        if now - self._last_sweep < min(self.idle_timeout, 1):
+            return
+        self._last_sweep = now
+        pools = self.connection_pools
+        for key, pool in tuple(pools.items()):
+            if (not pool.in_use and not pool._connecting and
+                    now - pool.last_used > self.idle_timeout):
+                pools.pop(key)
+                self.pipelines.pop(key, None)
+                pool.close()
+
     async def _request(self, method, url, timeout=None, **params):
         if timeout is None:
             timeout = self.timeout
@@ -917,41 +1322,10 @@ class HttpClient(AbstractClient):
             nparams.update(((name, getattr(self, name)) for name in
                             self.request_parameters if name not in params))
             request = HttpRequest(self, url, method, params, **nparams)
-            key = request.key
-            pool = self.connection_pools.get(key)
-            if pool is None:
-                tunnel = request.tunnel
-                if tunnel:
-                    connector = partial(self.create_tunnel_connection, key)
-                else:
-                    connector = partial(self.create_http_connection, key)
-                pool = self.connection_pool(
-                    connector, pool_size=self.pool_size, loop=self._loop
-                )
-                self.connection_pools[request.key] = pool
-            try:
-                conn = await pool.connect()
-            except BaseSSLError as e:
-                raise SSLError(str(e), response=self) from None
-            except ConnectionRefusedError as e:
-                raise HttpConnectionError(str(e), response=self) from None
-
-            async with conn:
-                try:
-                    response = await start_request(request, conn)
-                    status_code = response.status_code
-                except AbortEvent:
-                    response = None
-                    status_code = None
-
-                if (not status_code or
-                        not keep_alive(response.version, response.headers) or
-                        status_code == 101 or
-                        # if response is done stream is not relevant
-                        (response.request.stream and not
-                         response.event('post_request').fired()) or
-                        self.close_connections):
-                    await conn.detach()
+            if self.cache is not None:
+                response = await self.cache.response(request, self._send)
+            else:
+                response = await self._send(request)
 
             # Handle a possible redirect
             if response and isinstance(response.request_again, tuple):
@@ -959,6 +1333,77 @@ class HttpClient(AbstractClient):
                 response = await self._request(method, url, **params)
             return response
 
+    async def _send(self, request):
+        key = request.key
+        pool = self.connection_pools.get(key)
+        if pool is None:
+            tunnel = request.tunnel
+            if tunnel:
+                connector = partial(self.create_tunnel_connection, key)
+            else:
+                connector = partial(self.create_http_connection, key)
+            self._sweep()
+            pool = self.connection_pool(
+                connector, pool_size=self.pool_size, loop=self._loop,
+                limit=self.connection_limit
+            )
+            self.connection_pools[request.key] = pool
+        if can_pipeline(request):
+            return await self._pipeline(request, pool)
+        try:
+            conn = await pool.connect()
+        except BaseSSLError as e:
+            raise SSLError(str(e), response=self) from None
+        except ConnectionRefusedError as e:
+            raise HttpConnectionError(str(e), response=self) from None
+
+        async with conn:
+            try:
+                response = await start_request(request, conn)
+                status_code = response.status_code
+            except AbortEvent:
+                response = None
+                status_code = None
+
+            if status_code and conn.processed == 1:
+                # the first response on a TLS connection has been
+                # received, store the session for resumption
+                context = transport_context(conn.transport)
+                if context is not None:
+                    context.save_session(conn.transport)
+
+            if (not status_code or
+                    not keep_alive(response.version, response.headers) or
+                    status_code == 101 or
+                    # if response is done stream is not relevant
+                    (response.request.stream and not
+                     response.event('post_request').fired()) or
+                    self.close_connections):
+                await conn.detach()
+        return response
+
+    async def _pipeline(self, request, pool):
+        pipeline = self.pipelines.get(request.key)
+        if pipeline is None or pipeline.pool is not pool:
+            pipeline = HttpPipeline(pool)
+            self.pipelines[request.key] = pipeline
+        try:
+            response = await pipeline.request(request)
+        except AbortEvent:
+            return None
+        except BaseSSLError as e:
+            raise SSLError(str(e), response=self) from None
+        except ConnectionRefusedError as e:
+            raise HttpConnectionError(str(e), response=self) from None
+
+        if hasattr(response.request_again, '__call__'):
+            response = response.request_again(response)
+            try:
+                response = await response
+            except TypeError:
+                pass
+        return response
+
     def get_headers(self, request, headers):
         # Returns a :class:`Header` obtained from combining
         # :attr:`headers` with *headers*. Can handle websocket requests.
@@ -974,6 +1419,9 @@ class HttpClient(AbstractClient):
                     cafile=None, capath=None, cadata=None, **kw):
         """Create a SSL context object.
 
+        Contexts are cached in :attr:`ssl_contexts` so that certificates
+        are loaded once and TLS sessions are resumed across connections.
+
         This method should not be called by from user code
         """
         assert ssl, 'SSL not supported'
@@ -990,16 +1438,40 @@ class HttpClient(AbstractClient):
             elif os.path.isdir(verify):
                 capath = verify
 
-        return ssl._create_unverified_context(cert_reqs=cert_reqs,
-                                              check_hostname=check_hostname,
-                                              certfile=certfile,
-                                              keyfile=keyfile,
-                                              cafile=cafile,
-                                              capath=capath,
-                                              cadata=cadata)
+        key = (cert_reqs, check_hostname, certfile, keyfile, cafile, capath,
+               cadata)
+        context = self.ssl_contexts.get(key)
+        if context is None:
+            context = create_context(cert_reqs=cert_reqs,
+                                     check_hostname=check_hostname,
+                                     certfile=certfile,
+                                     keyfile=keyfile,
+                                     cafile=cafile,
+                                     capath=capath,
+                                     cadata=cadata)
+            self.ssl_contexts[key] = context
+        return context
+
+    def tls_info(self):
+        """Handshake statistics of TLS connections created by this client
+        """
+        info = dict(contexts=len(self.ssl_contexts), handshakes=0, resumed=0,
+                    handshake_time=0.0, sessions=0)
+        for context in self.ssl_contexts.values():
+            for key, value in context.info().items():
+                info[key] += value
+        handshakes = info['handshakes']
+        info['resumption_ratio'] = (info['resumed'] / handshakes
+                                    if handshakes else 0.0)
+        info['handshake_latency'] = (info.pop('handshake_time') / handshakes
+                                     if handshakes else 0.0)
+        return info
 
     async def create_http_connection(self, req):
-        return await self.create_connection(req.address, ssl=req.ssl(self))
+        connection = await self.create_connection(req.address,
+                                                  ssl=req.ssl(self))
+        self._tls_connected(connection)
+        return connection
 
     async def create_tunnel_connection(self, req):
         """Create a tunnel connection
@@ -1029,4 +1501,10 @@ class HttpClient(AbstractClient):
         connection = await self.create_connection(
             sock=raw_sock, ssl=req.ssl(self), server_hostname=req.netloc
         )
+        self._tls_connected(connection)
         return connection
+
+    def _tls_connected(self, connection):
+        context = transport_context(connection.transport)
+        if context is not None:
+            context.connected(connection.transport)
@@ -1,17 +1,179 @@
+"""Incremental decoders for the ``Content-Encoding`` of response bodies.
+
+Decoders decompress body chunks as they arrive and produce the output in
+pieces of at most :data:`CHUNK_SIZE` bytes, so that the limits of a
+decoder are checked before a small compressed chunk can expand into a
+large amount of memory. For ``br`` bodies this requires brotli 1.2 or
+above, see :class:`BrotliDecoder`.
+"""
 import zlib
 
+from pulsar.api import HttpRequestException
+
+try:
+    import brotli
+except ImportError:     # pragma    nocover
+    brotli = None
+
+
+CHUNK_SIZE = 2**16
+DEFAULT_MAX_RATIO = 100
+RATIO_THRESHOLD = 2**20
+
+
+class DecompressionError(HttpRequestException):
+    """The body of a response cannot be decompressed or it exceeds the
+    limits of its decoder
+    """
+
+
+class Decoder:
+    """Base class for incremental decoders
+
+    :param max_size: maximum number of decompressed bytes
+    :param max_ratio: maximum ratio between decompressed and compressed
+        bytes, checked once more than :data:`RATIO_THRESHOLD` bytes have
+        been decompressed
+
+    .. attribute:: received
+
+        Number of compressed bytes received
+
+    .. attribute:: size
+
+        Number of decompressed bytes produced
+    """
+    def __init__(self, max_size=None, max_ratio=DEFAULT_MAX_RATIO):
+        self.max_size = max_size
+        self.max_ratio = max_ratio
+        self.received = 0
+        self.size = 0
+
+    def decompress(self, data):
+        """Decompress a chunk of ``data``
+        """
+        self.received += len(data)
+        try:
+            chunks = []
+            for chunk in self._decompress(data):
+                self._produced(chunk)
+                chunks.append(chunk)
+        except zlib.error as exc:
+            raise DecompressionError(
+                'Cannot decompress response body: %s' % exc) from None
+        return b''.join(chunks)
+
+    def flush(self):
+        """Decompress data left in the decoder
+        """
+        return b''
 
-class GzipDecompress:
+    def _decompress(self, data):
+        raise NotImplementedError
 
-    def __call__(self, data):
-        deco = zlib.decompressobj(16 + zlib.MAX_WBITS)
-        return deco.decompress(data)
+    def _produced(self, chunk):
+        self.size += len(chunk)
+        if self.max_size and self.size > self.max_size:
+            raise DecompressionError(
+                'Decompressed body larger than %d bytes' % self.max_size)
+        if (self.max_ratio and self.size > RATIO_THRESHOLD and
+                self.size > self.max_ratio * self.received):
+            raise DecompressionError(
+                'Decompressed body more than %d times larger than '
+                'the compressed body' % self.max_ratio)
 
 
-class DeflateDecompress:
+class ZlibDecoder(Decoder):
+    wbits = zlib.MAX_WBITS
 
-    def __call__(self, data):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._obj = None
+
+    def flush(self):
+        if self._obj is not None:
+            chunk = self._obj.flush()
+            self._produced(chunk)
+            return chunk
+        return b''
+
+    def _decompress(self, data):
+        if self._obj is None:
+            self._obj = zlib.decompressobj(self._wbits(data))
+        obj = self._obj
+        while True:
+            chunk = obj.decompress(data, CHUNK_SIZE)
+            if chunk:
+                yield chunk
+            data = obj.unconsumed_tail
+            if not data and len(chunk) < CHUNK_SIZE:
+                break
+
+    def _wbits(self, data):
+        return self.wbits
+
+
+class GzipDecoder(ZlibDecoder):
+    wbits = 16 + zlib.MAX_WBITS
+
+
+class DeflateDecoder(ZlibDecoder):
+    """Decode ``deflate`` bodies, with or without the zlib header
+    """
+    def _wbits(self, data):
+        if (len(data) > 1 and data[0] & 0x0f == 8 and
+                (data[0] << 8 | data[1]) % 31 == 0):
+            return zlib.MAX_WBITS
+        return -zlib.MAX_WBITS
+
+
+class BrotliDecoder(Decoder):
+    """Decode ``br`` bodies, available when the brotli package is installed
+
+    With brotli 1.2 or above the output is produced in pieces of at most
+    :data:`CHUNK_SIZE` bytes, like the other decoders. Older versions, and
+    brotlipy, decompress a chunk of data in one call and the limits are
+    checked after it: with them ``br`` bodies are not safe against
+    decompression bombs.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._obj = brotli.Decompressor()
+        self._limited = hasattr(self._obj, 'can_accept_more_data')
+        self._process = getattr(self._obj, 'process', None)
+        if self._process is None:
+            self._process = self._obj.decompress
+
+    def _decompress(self, data):
         try:
-            return zlib.decompressobj().decompress(data)
-        except zlib.error:
-            return zlib.decompressobj(-zlib.MAX_WBITS).decompress(data)
+            if self._limited:
+                yield from self._decompress_limited(data)
+            else:
+                chunk = self._process(data)
+                if chunk:
+                    yield chunk
+        except Exception as exc:
+            raise DecompressionError(
+                'Cannot decompress response body: %s' % exc) from None
+
+    def _decompress_limited(self, data):
+        obj = self._obj
+        while True:
+            chunk = self._process(data, output_buffer_limit=CHUNK_SIZE)
+            if chunk:
+                yield chunk
+            if obj.is_finished() or obj.can_accept_more_data():
+                break
+            data = b''
+
+
+DECODERS = dict(gzip=GzipDecoder, deflate=DeflateDecoder)
+if brotli is not None:
+    DECODERS['br'] = BrotliDecoder
+
+
+def get_decoder(encoding, **kwargs):
+    """A new decoder for ``encoding`` or ``None`` if not supported
+    """
+    decoder = DECODERS.get(encoding.strip().lower())
+    return decoder(**kwargs) if decoder else None
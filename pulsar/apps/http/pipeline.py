@@ -0,0 +1,312 @@
+"""HTTP/1.1 request pipelining (:rfc:`7230#section-6.3.2`).
+
+Pipelined requests are written on a connection without waiting for the
+responses of the requests sent before them, the server answers them in
+order. On a high latency link this saves a round trip for each request
+without opening more connections.
+"""
+from collections import deque
+from functools import partial
+from urllib.parse import urlparse
+
+from pulsar.api import ProtocolConsumer, AbortEvent, HttpConnectionError
+from pulsar.utils import http
+
+from .plugins import keep_alive
+
+
+# idempotent methods, HEAD responses have no body and are not pipelined
+PIPELINE_METHODS = frozenset(('GET', 'OPTIONS', 'TRACE', 'PUT', 'DELETE'))
+MAX_RETRIES = 3
+
+
+def can_pipeline(request):
+    """Check if ``request`` can be sent on a connection with requests
+    waiting for their response
+    """
+    body = request.body
+    return bool(request.pipeline and
+                request.method in PIPELINE_METHODS and
+                not request.stream and
+                not request.wait_continue and
+                (body is None or isinstance(body, bytes)) and
+                urlparse(request.url).scheme in ('http', 'https'))
+
+
+class HttpPipeline:
+    """Send requests to a host on pipelined connections
+
+    Requests are written on a connection of the :attr:`pool` until the
+    number of requests waiting for their response on the connection
+    reaches the :attr:`~.HttpRequest.pipeline` depth of the request. A new
+    connection is taken from the pool only when all pipelined connections
+    are full, a connection is released to the pool once all its responses
+    are received.
+
+    When a connection is lost, requests whose response has not started
+    are sent again, at most :data:`MAX_RETRIES` times.
+
+    .. attribute:: pipelined
+
+        Number of requests sent on a connection while other requests were
+        waiting for their response
+
+    .. attribute:: retried
+
+        Number of requests sent again after losing their connection
+    """
+    def __init__(self, pool):
+        self.pool = pool
+        self.connections = []
+        self.pipelined = 0
+        self.retried = 0
+        self._loop = pool._loop
+        self._connecting = 0
+        self._demand = 0
+        self._waiters = []
+
+    def __repr__(self):
+        return '%s(%d connections)' % (self.__class__.__name__,
+                                       len(self.connections))
+    __str__ = __repr__
+
+    async def request(self, request):
+        """Send ``request`` and return its response
+        """
+        attempts = 0
+        while True:
+            consumer = await self._consumer(request.pipeline)
+            try:
+                waiter = consumer.send(request)
+            except ConnectionError:
+                waiter = None
+            response = await waiter if waiter is not None else None
+            if response is not None:
+                return response
+            attempts += 1
+            if attempts > MAX_RETRIES:
+                raise HttpConnectionError(
+                    'Connection lost before receiving a response to %s' %
+                    request)
+            self.retried += 1
+            request._write_done = False
+
+    # INTERNALS
+    async def _consumer(self, depth):
+        consumer = self._available(depth)
+        if consumer is not None:
+            return consumer
+        self._demand += 1
+        try:
+            while True:
+                pool = self.pool
+                full = (self.connections and
+                        pool.in_use + pool._connecting >= pool.pool_size)
+                if (not full and
+                        self._demand > self._connecting * depth):
+                    return await self._connect()
+                waiter = self._loop.create_future()
+                self._waiters.append(waiter)
+                await waiter
+                consumer = self._available(depth)
+                if consumer is not None:
+                    return consumer
+        finally:
+            self._demand -= 1
+
+    def _available(self, depth):
+        best = None
+        for consumer in self.connections:
+            outstanding = consumer.outstanding
+            if (outstanding < depth and consumer.usable and
+                    (best is None or outstanding < best.outstanding)):
+                best = consumer
+        if best is not None and best.outstanding:
+            self.pipelined += 1
+        return best
+
+    async def _connect(self):
+        self._connecting += 1
+        try:
+            conn = await self.pool.connect()
+        except BaseException:
+            self._connecting -= 1
+            self._wakeup()
+            raise
+        self._connecting -= 1
+        connection = conn.connection
+        factory = connection.consumer_factory
+        # replace the idle consumer of the connection
+        connection.finished_consumer(connection.current_consumer())
+        connection.upgrade(PipelineConsumer)
+        consumer = connection.current_consumer()
+        consumer.pipeline = self
+        consumer.pool_connection = conn
+        consumer.factory = factory
+        consumer.start(self)
+        self.connections.append(consumer)
+        # requests waiting for this connection can be pipelined on it
+        self._wakeup()
+        return consumer
+
+    def _release(self, consumer):
+        try:
+            self.connections.remove(consumer)
+        except ValueError:
+            pass
+        self._wakeup()
+
+    def _wakeup(self):
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+class PipelineConsumer(ProtocolConsumer):
+    """The :class:`.ProtocolConsumer` of a pipelined connection
+
+    It parses the responses received by the connection and dispatches
+    them, in order, to the :class:`.HttpResponse` of the requests sent.
+    """
+    pipeline = None
+    pool_connection = None
+    factory = None
+    closing = False
+    _parser = None
+    _interim = False
+    _responses = None
+
+    @property
+    def outstanding(self):
+        """Number of requests waiting for their response
+        """
+        return len(self._responses) if self._responses else 0
+
+    @property
+    def usable(self):
+        return not self.closing and not self.connection.closed
+
+    def copy_many_times_events(self, other):
+        # events of the client are bound to the responses
+        pass
+
+    def start_request(self):
+        self._responses = deque()
+        self.event('post_request').bind(self._lost)
+
+    def send(self, request):
+        """Write ``request`` into the connection
+
+        Return a :class:`~asyncio.Future` resulting in the response or in
+        ``None`` when the connection is lost before the response starts
+        """
+        connection = self.connection
+        response = self.factory(connection)
+        response.copy_many_times_events(connection.producer)
+        response.bind_events(request.inp_params)
+        if request.auth:
+            response.event('pre_request').bind(request.auth)
+        waiter = self._loop.create_future()
+        done = partial(self._response_done, waiter)
+        response.event('post_request').bind(done)
+        self._responses.append((response, waiter))
+        try:
+            response.start(request)
+        except BaseException:
+            self._responses.pop()
+            self.closing = True
+            raise
+        if response.parser is None:
+            # aborted by a pre_request hook
+            self._responses.pop()
+            raise AbortEvent
+        # responses are parsed by this consumer
+        response.parser = self
+        return waiter
+
+    def feed_data(self, data):
+        while data:
+            if self._parser is None:
+                self._parser = self.producer.http_parser(self)
+            try:
+                data = self._parser.feed_data(data)
+            except http.HttpParserUpgrade:
+                data = None
+            if data:
+                # the parser returned the data after a complete message
+                self._parser = None
+
+    def get_status_code(self):
+        return self._parser.get_status_code()
+
+    def get_http_version(self):
+        return self._parser.get_http_version()
+
+    # Parser callbacks
+    def on_header(self, name, value):
+        self._responses[0][0].on_header(name, value)
+
+    def on_headers_complete(self):
+        response = self._responses[0][0]
+        if self._parser.get_status_code() // 100 == 1:
+            # interim response, wait for the final one
+            self._interim = True
+            response.headers.clear()
+        else:
+            response.on_headers_complete()
+
+    def on_body(self, body):
+        self._responses[0][0].on_body(body)
+
+    def on_message_complete(self):
+        if self._interim:
+            self._interim = False
+            return
+        response, _ = self._responses.popleft()
+        response.on_message_complete()
+        if not keep_alive(response.version, response.headers):
+            self.closing = True
+        if not self._responses:
+            self._release()
+        else:
+            self.pipeline._wakeup()
+
+    # INTERNALS
+    def _response_done(self, waiter, response, exc=None):
+        if not waiter.done():
+            if exc is None:
+                waiter.set_result(response)
+            else:
+                waiter.set_exception(exc)
+
+    def _release(self):
+        # return the connection to the pool
+        self.pipeline._release(self)
+        conn, self.pool_connection = self.pool_connection, None
+        if self.closing or self.connection.closed:
+            self.connection.close()
+            conn.close(True)
+        else:
+            self.connection.upgrade(self.factory)
+            self.fire_event('post_request')
+            conn.close()
+
+    def _lost(self, _, exc=None):
+        if self.pool_connection is None:
+            return
+        self.closing = True
+        responses, self._responses = self._responses, deque()
+        for response, waiter in responses:
+            if response.status_code is None:
+                # the response has not started, send the request again
+                if not waiter.done():
+                    waiter.set_result(None)
+            elif exc is None:
+                # end of the message delimited by the connection close
+                response.on_message_complete()
+            else:
+                response.event('post_request').fire(exc=exc)
+        self.pipeline._release(self)
+        conn, self.pool_connection = self.pool_connection, None
+        conn.close(True)
@@ -1,4 +1,7 @@
-import asyncio
+from collections import deque
+
+
+DEFAULT_HIGH_WATER = 2**20
 
 
 class StreamConsumedError(Exception):
@@ -8,11 +11,27 @@ class StreamConsumedError(Exception):
 
 class HttpStream:
     """An asynchronous streaming body for an HTTP response
+
+    Body chunks are buffered until consumed. When the buffer grows above
+    :attr:`high_water` bytes the transport stops reading from the socket,
+    so that a slow consumer does not pile up the whole body in memory,
+    and reading resumes once the buffer is drained below
+    :attr:`low_water` bytes.
     """
-    def __init__(self, response):
+    def __init__(self, response, high_water=None):
+        if high_water is None:
+            high_water = getattr(response.request, 'stream_buffer', None)
         self._response = response
         self._streamed = False
-        self._queue = asyncio.Queue()
+        self._buffer = deque()
+        self._waiter = None
+        self._paused = False
+        self._exc = None
+        self.high_water = high_water or DEFAULT_HIGH_WATER
+        self.low_water = self.high_water // 4
+        self.buffered = 0
+        if not self.done:
+            response.event('post_request').bind(self._finished)
 
     def __repr__(self):
         return repr(self._response)
@@ -24,6 +43,12 @@ class HttpStream:
         """
         return self._response.event('post_request').fired()
 
+    @property
+    def paused(self):
+        """``True`` when reading from the transport is paused
+        """
+        return self._paused
+
     async def read(self, n=None):
         """Read all content
         """
@@ -35,34 +60,101 @@ class HttpStream:
         return b''.join(buffer)
 
     def close(self):
-        pass
+        """Discard buffered data and close the connection if the body
+        was not fully received
+        """
+        self._buffer.clear()
+        self.buffered = 0
+        if not self.done:
+            connection = self._response.connection
+            if connection:
+                connection.close()
 
     def __iter__(self):
         return _start_iter(self)
 
     def __next__(self):
-        if self.done:
-            try:
-                return self._queue.get_nowait()
-            except asyncio.QueueEmpty:
-                raise StopIteration
+        if self._buffer:
+            return self._pop()
+        elif self.done:
+            self._raise()
+            raise StopIteration
         else:
-            return self._queue.get()
+            return self._next()
 
     async def __aiter__(self):
         return _start_iter(self)
 
     async def __anext__(self):
-        if self.done:
-            try:
-                return self._queue.get_nowait()
-            except asyncio.QueueEmpty:
+        while not self._buffer:
+            if self.done:
+                self._raise()
                 raise StopAsyncIteration
-        else:
-            return await self._queue.get()
+            await self._wait()
+        return self._pop()
 
     def feed_data(self, body):
-        self._queue.put_nowait(body)
+        self._buffer.append(body)
+        self.buffered += len(body)
+        self._wakeup()
+        if not self._paused and self.buffered > self.high_water:
+            transport = self._transport()
+            if transport is not None:
+                self._paused = True
+                transport.pause_reading()
+
+    # INTERNALS
+    async def _next(self):
+        while not self._buffer:
+            if self.done:
+                self._raise()
+                return b''
+            await self._wait()
+        return self._pop()
+
+    def _pop(self):
+        body = self._buffer.popleft()
+        self.buffered -= len(body)
+        if self._paused and self.buffered <= self.low_water:
+            self._paused = False
+            transport = self._transport()
+            if transport is not None:
+                transport.resume_reading()
+        return body
+
+    def _wait(self):
+        self._waiter = self._response._loop.create_future()
+        return self._waiter
+
+    def _wakeup(self):
+        waiter = self._waiter
+        if waiter is not None:
+            self._waiter = None
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _finished(self, _, exc=None, **kw):
+        self._exc = exc
+        if self._paused:
+            # the message is complete, the connection can be reused
+            self._paused = False
+            transport = self._transport()
+            if transport is not None:
+                transport.resume_reading()
+        self._wakeup()
+
+    def _raise(self):
+        exc = self._exc
+        if exc is not None:
+            self._exc = None
+            raise exc
+
+    def _transport(self):
+        connection = self._response.connection
+        if connection is not None:
+            transport = connection.transport
+            if transport is not None and not transport.is_closing():
+                return transport
 
 
 def _start_iter(self):
@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from time import monotonic
+
+try:
+    import ssl
+    SSLContext = ssl.SSLContext
+    HAS_SESSIONS = hasattr(ssl, 'SSLSession')
+except ImportError:     # pragma    nocover
+    ssl = None
+    SSLContext = object
+    HAS_SESSIONS = False
+
+
+class TlsContext(SSLContext):
+    """An SSL context which remembers TLS sessions by server name
+
+    The last session negotiated with a server is offered when a new
+    connection to the same server is created, so that the server can
+    resume it and skip the full handshake.
+
+    .. attribute:: handshakes
+
+        Number of completed handshakes
+
+    .. attribute:: resumed
+
+        Number of handshakes which resumed a previous session
+
+    .. attribute:: handshake_time
+
+        Total time, in seconds, spent in handshakes
+    """
+    max_sessions = 1000
+
+    def __init__(self, *args, **kwargs):
+        self.sessions = OrderedDict()
+        self.handshakes = 0
+        self.resumed = 0
+        self.handshake_time = 0.0
+
+    def wrap_bio(self, incoming, outgoing, server_side=False,
+                 server_hostname=None, **kwargs):
+        if (HAS_SESSIONS and not server_side and
+                kwargs.get('session') is None):
+            kwargs['session'] = self.sessions.get(server_hostname)
+        sslobj = super().wrap_bio(incoming, outgoing, server_side,
+                                  server_hostname, **kwargs)
+        sslobj.handshake_start = monotonic()
+        return sslobj
+
+    def connected(self, transport):
+        """Record the handshake of a newly connected ``transport``
+        """
+        sslobj = transport.get_extra_info('ssl_object')
+        start = getattr(sslobj, 'handshake_start', None)
+        if start is not None:
+            self.handshakes += 1
+            self.handshake_time += monotonic() - start
+            if HAS_SESSIONS and sslobj.session_reused:
+                self.resumed += 1
+
+    def save_session(self, transport):
+        """Store the session of ``transport`` for its server name
+
+        With TLS 1.3 the session ticket is sent after the handshake,
+        therefore this method should be called once data has been received
+        from the server.
+        """
+        sslobj = transport.get_extra_info('ssl_object')
+        if HAS_SESSIONS and sslobj is not None and sslobj.server_hostname:
+            session = sslobj.session
+            if session is not None:
+                sessions = self.sessions
+                sessions[sslobj.server_hostname] = session
+                sessions.move_to_end(sslobj.server_hostname)
+                if len(sessions) > self.max_sessions:
+                    sessions.popitem(last=False)
+
+    def info(self):
+        return dict(handshakes=self.handshakes,
+                    resumed=self.resumed,
+                    handshake_time=self.handshake_time,
+                    sessions=len(self.sessions))
+
+
+def create_context(cert_reqs=None, check_hostname=False, certfile=None,
+                   keyfile=None, cafile=None, capath=None, cadata=None):
+    """Create a client :class:`TlsContext`
+
+    Same as :func:`ssl._create_unverified_context`
+    """
+    context = TlsContext(ssl.PROTOCOL_SSLv23)
+    if cert_reqs is not None:
+        context.verify_mode = cert_reqs
+    context.check_hostname = check_hostname
+    if keyfile and not certfile:
+        raise ValueError("certfile must be specified")
+    if certfile or keyfile:
+        context.load_cert_chain(certfile, keyfile)
+    if cafile or capath or cadata:
+        context.load_verify_locations(cafile, capath, cadata)
+    elif context.verify_mode != ssl.CERT_NONE:
+        context.load_default_certs(ssl.Purpose.SERVER_AUTH)
+    return context
+
+
+def transport_context(transport):
+    """The :class:`TlsContext` of ``transport`` or ``None``
+    """
+    if transport is not None:
+        context = transport.get_extra_info('sslcontext')
+        if isinstance(context, TlsContext):
+            return context
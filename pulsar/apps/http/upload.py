@@ -0,0 +1,96 @@
+import os
+from asyncio import iscoroutinefunction
+from inspect import isawaitable
+from io import BytesIO
+
+from .stream import HttpStream
+
+
+UPLOAD_CHUNK_SIZE = 2**16
+
+
+def body_length(body):
+    """Number of bytes left in a file-like ``body``, ``None`` if unknown
+    """
+    try:
+        if isinstance(body, BytesIO):
+            return len(body.getbuffer()) - body.tell()
+        position = body.tell()
+        return os.fstat(body.fileno()).st_size - position
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class BodyReader:
+    """An asynchronous iterator over the chunks of a streamed request body
+
+    The ``body`` can be:
+
+    * an iterable over bytes or over awaitables resulting in bytes
+    * an asynchronous iterable over bytes, such as the
+      :attr:`~.HttpResponse.raw` stream of another response
+    * a file-like object, read in chunks of ``chunk_size`` bytes. Its
+      ``read`` method is awaited when it is a coroutine function, otherwise
+      it is called in the ``executor`` so that reading from disk does not
+      block the event loop.
+    """
+    def __init__(self, body, loop, executor=None,
+                 chunk_size=UPLOAD_CHUNK_SIZE):
+        self.body = body
+        self.chunk_size = chunk_size
+        self._loop = loop
+        self._executor = executor
+        read = getattr(body, 'read', None)
+        if read is None or isinstance(body, HttpStream):
+            if hasattr(body, '__aiter__'):
+                # the iterator is obtained when the first chunk is read
+                self._iter = None
+                self._next = self._next_async
+            else:
+                self._iter = iter(body)
+                self._next = self._next_item
+        elif isinstance(body, BytesIO):
+            self._next = self._read_memory
+        elif iscoroutinefunction(read):
+            self._next = self._read_coroutine
+        else:
+            self._next = self._read_executor
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        return self._next()
+
+    # INTERNALS
+    async def _next_item(self):
+        try:
+            data = next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration from None
+        if isawaitable(data):
+            data = await data
+        return data
+
+    async def _next_async(self):
+        if self._iter is None:
+            self._iter = self.body.__aiter__()
+            if isawaitable(self._iter):
+                # __aiter__ is a coroutine before python 3.5.2
+                self._iter = await self._iter
+        return await self._iter.__anext__()
+
+    async def _read_memory(self):
+        return self._chunk(self.body.read(self.chunk_size))
+
+    async def _read_coroutine(self):
+        return self._chunk(await self.body.read(self.chunk_size))
+
+    async def _read_executor(self):
+        return self._chunk(await self._loop.run_in_executor(
+            self._executor, self.body.read, self.chunk_size))
+
+    def _chunk(self, data):
+        if not data:
+            raise StopAsyncIteration
+        return data
@@ -9,6 +9,7 @@ from pulsar.api import Protocol, Producer
 from pulsar.apps.wsgi import HttpServerResponse
 from pulsar.async.access import cfg
 from pulsar.async.mixins import Pipeline
+from pulsar.async.timeout import timer_wheel
 
 
 class DummyTransport(Transport):
@@ -53,6 +54,9 @@ class DummyConnection(Pipeline):
     def write(self, data):
         self.transport.write(data)
 
+    def flush(self):
+        pass
+
     async def __aenter__(self):
         return self
 
@@ -168,6 +172,7 @@ class WsgiProducer(Producer):
     """Dummy producers of Server protocols
     """
     server_software = 'Local/%s' % pulsar.SERVER_SOFTWARE
+    inflight = 0
 
     def __init__(self, connection):
         super().__init__(DummyServerConnection.create, loop=connection._loop)
@@ -175,3 +180,7 @@ class WsgiProducer(Producer):
         self.cfg = connection.producer.cfg
         self.wsgi_callable = connection.producer.wsgi_callable
         self.keep_alive = self.cfg.http_keep_alive or 0
+        self.timer = timer_wheel(self._loop)
+
+    def admit(self, queued=None):
+        pass
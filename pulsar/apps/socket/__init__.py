@@ -51,6 +51,23 @@ You can bind to a random available port by specifying 0 as the port number::
 useful during testing.
 
 
+reuse_port
+--------------
+By default, workers accept connections on the listening sockets they
+inherit from the arbiter. On Linux, this distributes connections unevenly
+when there are many keep-alive clients. With the
+:ref:`reuse-port <setting-reuse_port>` setting, each worker listens on its
+own socket bound with the ``SO_REUSEPORT`` option, and the kernel balances
+new connections across them::
+
+    python script.py --reuse-port
+
+The arbiter keeps the addresses bound, without listening, so that the
+port is never released when a worker is respawned. If the platform does
+not support ``SO_REUSEPORT``, the setting is ignored and a warning is
+logged.
+
+
 backlog
 ---------
 To specify the maximum number of queued connections you can use the
@@ -70,6 +87,32 @@ last read from the remote client, one can use the
 
 will close client connections which have been idle for 10 seconds.
 
+Idle connections, as well as the requests and chunks of the
+:ref:`WSGI server <apps-wsgi>`, time out via a coarse-grained timer wheel
+shared by all connections of a worker. Its resolution is controlled by the
+:ref:`timer-tick <setting-timer_tick>` setting (0.1 seconds by default)::
+
+    python script.py --keep-alive 10 --timer-tick 0.5
+
+admission control
+---------------------
+By default a worker accepts every connection and processes every request,
+so that under overload latency degrades for all clients. Admission control
+keeps a worker responsive by rejecting the excess load early::
+
+    python script.py --max-connections 1000 --max-inflight 200 --max-lag 0.5
+
+* :ref:`max-connections <setting-max_connections>` stops accepting
+  connections once a worker has that many open connections.
+* :ref:`max-inflight <setting-max_inflight>` rejects requests
+  beyond that number of concurrent requests.
+* :ref:`max-lag <setting-max_lag>` rejects requests which waited longer
+  than the given number of seconds before being processed.
+
+Rejected requests receive a ``503 Service Unavailable`` response with a
+``Retry-After`` header. The number of rejections is available in the
+``admission`` section of the server info.
+
 .. _socket-server-ssl:
 
 TLS/SSL support
@@ -112,6 +155,7 @@ for:
 Check the :meth:`SocketServer.monitor_start` method for implementation details.
 '''
 import os
+import errno
 import socket
 from math import log
 from random import lognormvariate
@@ -126,7 +170,10 @@ from pulsar import DEFAULT_PORT, SERVER_SOFTWARE
 from ...utils.internet import parse_address
 from ...utils.system import platform
 from ...utils.exceptions import ImproperlyConfigured
-from ...utils.config import pass_through, validate_pos_int, Config, Setting
+from ...utils.config import (
+    pass_through, validate_pos_int, validate_pos_float, validate_bool,
+    Config, Setting
+)
 from ...async.protocols import (
     TcpServer, DatagramServer, Connection, DatagramProtocol
 )
@@ -165,6 +212,21 @@ class KeepAlive(SocketSetting):
         open."""
 
 
+class TimerTick(SocketSetting):
+    name = "timer_tick"
+    flags = ["--timer-tick"]
+    validator = validate_pos_float
+    type = float
+    default = 0.1
+    desc = """\
+        Resolution, in seconds, of the timer wheel used for connection
+        and request timeouts.
+
+        Timeouts fire at most one tick after their deadline. A larger tick
+        means fewer timer callbacks in the event loop.
+        """
+
+
 class Backlog(SocketSetting):
     name = "backlog"
     flags = ["--backlog"]
@@ -182,6 +244,64 @@ class Backlog(SocketSetting):
         """
 
 
+class ReusePort(SocketSetting):
+    name = "reuse_port"
+    flags = ["--reuse-port"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Each worker listens on its own socket bound with ``SO_REUSEPORT``.
+
+        The kernel balances new connections across workers rather than
+        letting workers compete for a shared socket. Ignored when the
+        platform does not support the option.
+        """
+
+
+class MaxConnections(SocketSetting):
+    name = "max_connections"
+    flags = ["--max-connections"]
+    validator = validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        Maximum number of concurrent connections per worker.
+
+        Beyond this number a worker stops accepting new connections until
+        some of its connections are closed. Zero means no limit.
+        """
+
+
+class MaxInflight(SocketSetting):
+    name = "max_inflight"
+    flags = ["--max-inflight"]
+    validator = validate_pos_int
+    type = int
+    default = 0
+    desc = """\
+        Maximum number of requests processed concurrently by a worker.
+
+        Requests beyond this number are rejected with a
+        ``503 Service Unavailable`` response. Zero means no limit.
+        """
+
+
+class MaxLag(SocketSetting):
+    name = "max_lag"
+    flags = ["--max-lag"]
+    validator = validate_pos_float
+    type = float
+    default = 0
+    desc = """\
+        Maximum time, in seconds, a request can wait before being processed.
+
+        The waiting time measures the event loop lag of an overloaded
+        worker. Requests which waited longer are rejected with a
+        ``503 Service Unavailable`` response. Zero means no limit.
+        """
+
+
 class KeyFile(SocketSetting):
     name = "key_file"
     flags = ["--key-file"]
@@ -214,6 +334,7 @@ class SocketServer(Application):
     '''
     name = 'socket'
     support_ssl = ssl
+    support_reuse_port = True
     server_factory = TcpServer
     cfg = Config(apps=['socket'], server_software=SERVER_SOFTWARE)
 
@@ -263,24 +384,46 @@ class SocketServer(Application):
         if (not platform.has_multiprocessing_socket or
                 cfg.concurrency == 'thread'):
             cfg.set('workers', 0)
-        servers = await self.binds(monitor)
-        if not servers:
+        monitor.reuse_port = None
+        if cfg.reuse_port and cfg.workers and self.support_reuse_port:
+            monitor.reuse_port = self.reserve(monitor)
+        if monitor.reuse_port:
+            sockets = monitor.reuse_port.values()
+        else:
+            servers = await self.binds(monitor)
+            sockets = [server.sockets for server in servers.values()]
+        if not sockets:
             raise ImproperlyConfigured('Could not open a socket. '
                                        'No address to bind to')
         addresses = []
-        for server in servers.values():
-            addresses.extend(server.addresses)
+        for socks in sockets:
+            addresses.extend((sock.getsockname() for sock in socks))
         self.cfg.addresses = addresses
 
     def actorparams(self, monitor, params):
-        params['sockets'] = dict(((name, server.sockets) for
-                                  name, server in monitor.servers.items()))
+        if monitor.reuse_port:
+            params['sockets'] = None
+            params['reuse_port'] = dict(
+                ((name, [sock.getsockname() for sock in sockets]) for
+                 name, sockets in monitor.reuse_port.items())
+            )
+        else:
+            params['sockets'] = dict(((name, server.sockets) for
+                                      name, server in monitor.servers.items()))
+            params['reuse_port'] = None
 
     async def worker_start(self, worker, exc=None):
         '''Start the worker by invoking the :meth:`create_server` method.
+
+        When the :ref:`reuse-port <setting-reuse_port>` setting is on,
+        the worker binds its own sockets to the arbiter addresses.
         '''
         if not exc and self.name not in worker.servers:
-            servers = await self.binds(worker, worker.sockets)
+            sockets = worker.sockets
+            if worker.reuse_port:
+                sockets = dict(((name, bind_reuse_port(addresses)) for
+                                name, addresses in worker.reuse_port.items()))
+            servers = await self.binds(worker, sockets)
             for server in servers.values():
                 server.event('stop').bind(lambda _, **kw: worker.stop())
 
@@ -294,7 +437,10 @@ class SocketServer(Application):
                 await close()
             except Exception:
                 pass
-    monitor_stopping = worker_stopping
+
+    async def monitor_stopping(self, monitor, **kw):
+        close_sockets(getattr(monitor, 'reuse_port', None))
+        await self.worker_stopping(monitor, **kw)
 
     def worker_info(self, worker, data=None):
         server = worker.servers.get(self.name)
@@ -318,6 +464,10 @@ class SocketServer(Application):
             loop=worker._loop,
             max_requests=max_requests,
             keep_alive=cfg.keep_alive,
+            timer_tick=cfg.timer_tick,
+            max_connections=cfg.max_connections,
+            max_inflight=cfg.max_inflight,
+            max_lag=cfg.max_lag,
             name=self.name,
             logger=self.logger,
             server_software=cfg.server_software,
@@ -337,6 +487,32 @@ class SocketServer(Application):
         )
         return server
 
+    def reserve(self, monitor):
+        '''Bind, without listening, ``SO_REUSEPORT`` sockets to the
+        ``bind`` addresses.
+
+        :return: a dictionary of lists of sockets or ``None`` if the
+            platform does not support ``SO_REUSEPORT``.
+        '''
+        reserved = {}
+        for idx, bind in enumerate(self.cfg.bind.split(',')):
+            name = '%s%s' % (self.name, idx) if idx else self.name
+            address = parse_address(bind)
+            sockets = None
+            if isinstance(address, tuple):
+                try:
+                    sockets = bind_reuse_port([address])
+                except socket.error as e:
+                    close_sockets(reserved)
+                    raise ImproperlyConfigured(e) from None
+            if not sockets:
+                close_sockets(reserved)
+                self.logger.warning('SO_REUSEPORT not available for %s, '
+                                    'workers share listening sockets', bind)
+                return
+            reserved[name] = sockets
+        return reserved
+
     def sslcontext(self):
         cfg = self.cfg
         if cfg.cert_file and cfg.key_file and self.support_ssl:
@@ -351,6 +527,58 @@ class SocketServer(Application):
             return ctx
 
 
+def bind_reuse_port(addresses):
+    '''Bind new TCP sockets to ``addresses`` with the ``SO_REUSEPORT``
+    option.
+
+    Each address is a tuple with host and port and the host can resolve
+    to several addresses (IPv4 and IPv6 for example). Sockets are bound
+    but not listening.
+
+    :return: a list of sockets or ``None`` if the platform does not
+        support ``SO_REUSEPORT``.
+    '''
+    reuse_port = getattr(socket, 'SO_REUSEPORT', None)
+    if reuse_port is None:
+        return
+    sockets = []
+    try:
+        for address in addresses:
+            host, port = address[:2]
+            infos = socket.getaddrinfo(host or None, port,
+                                       type=socket.SOCK_STREAM,
+                                       flags=socket.AI_PASSIVE)
+            for family, type, proto, _, sockaddr in infos:
+                sock = socket.socket(family, type, proto)
+                sockets.append(sock)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, reuse_port, 1)
+                except OSError as exc:
+                    if exc.errno in (errno.ENOPROTOOPT, errno.EINVAL):
+                        for sock in sockets:
+                            sock.close()
+                        return
+                    raise
+                if family == socket.AF_INET6:
+                    sock.setsockopt(socket.IPPROTO_IPV6,
+                                    socket.IPV6_V6ONLY, 1)
+                # with port 0, all sockets share the first random port
+                sock.bind((sockaddr[0], port) + sockaddr[2:])
+                port = sock.getsockname()[1]
+    except Exception:
+        for sock in sockets:
+            sock.close()
+        raise
+    return sockets
+
+
+def close_sockets(sockets):
+    for socks in (sockets or {}).values():
+        for sock in socks:
+            sock.close()
+
+
 class UdpSocketServer(SocketServer):
     """A :class:`.SocketServer` which serves application on a UDP sockets.
 
@@ -359,6 +587,7 @@ class UdpSocketServer(SocketServer):
     """
     name = 'udpsocket'
     support_ssl = False
+    support_reuse_port = False
     server_factory = DatagramServer
 
     def protocol_factory(self, idx=0):
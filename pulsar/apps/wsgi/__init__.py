@@ -69,12 +69,15 @@ from .middleware import (clean_path_middleware, authorization_middleware,
 from .response import AccessControl, GZipMiddleware
 from .wrappers import WsgiResponse, WsgiRequest, wsgi_cached
 from .server import HttpServerResponse, AbortWsgi
+from .accesslog import AccessLog
 from .route import route, Route
 from .handlers import WsgiHandler, LazyWsgi
 from .routers import (Router, MediaRouter, MediaMixin, RouterParam,
                       file_response)
+from .assets import AssetCache
+from .cache import ResponseCache
 from .auth import HttpAuthenticate, parse_authorization_header
-from .formdata import parse_form_data
+from .formdata import parse_form_data, stream_form_data
 from .headers import HOP_HEADERS
 from .utils import (handle_wsgi_error, render_error_debug, wsgi_request,
                     set_wsgi_request_class, dump_environ)
@@ -105,6 +108,7 @@ __all__ = [
     # Response middleware
     'AccessControl',
     'GZipMiddleware',
+    'ResponseCache',
     #
     # WSGI Wrappers
     'WsgiResponse',
@@ -123,9 +127,11 @@ __all__ = [
     'MediaMixin',
     'RouterParam',
     'file_response',
+    'AssetCache',
     #
     # Utilities
     'parse_form_data',
+    'stream_form_data',
     'HttpAuthenticate',
     'parse_authorization_header',
     'handle_wsgi_error',
@@ -133,6 +139,7 @@ __all__ = [
     'wsgi_request',
     'set_wsgi_request_class',
     'dump_environ',
+    'AccessLog',
     'HOP_HEADERS'
 ]
 
@@ -147,7 +154,18 @@ class WSGIServer(SocketServer):
         cfg = self.cfg
         server.keep_alive = cfg.http_keep_alive
         server.wsgi_callable = self.callable(idx)
+        server.access_log = AccessLog.from_cfg(cfg)
+        if server.access_log:
+            server.event('stop').bind(
+                lambda _, **kw: server.access_log.close())
         return server
 
+    def worker_info(self, worker, data=None):
+        data = super().worker_info(worker, data)
+        server = worker.servers.get(self.name)
+        if server and data and server.access_log:
+            data['access_log'] = server.access_log.info()
+        return data
+
     def protocol_factory(self, idx=0):
         return partial(Connection, HttpServerResponse)
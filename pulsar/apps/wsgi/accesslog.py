@@ -0,0 +1,220 @@
+"""Access log of the WSGI server, enabled by the ``access_log`` setting.
+
+Records are formatted in the event loop, using only the fields required
+by the format, and written to the log file in batches by a
+:class:`.BatchWriter` thread so that a slow disk or pipe never blocks
+the server.
+
+The ``access_log_format`` setting is either ``common``, ``combined``,
+``json`` or a format string with the following Apache directives:
+
+========================  ===============================================
+``%h``                    remote address
+``%l``                    remote logname, always ``-``
+``%u``                    remote user
+``%t``                    time the request was received
+``%r``                    first line of the request
+``%s``, ``%>s``           response status code
+``%b``                    response size in bytes, ``-`` when empty
+``%B``                    response size in bytes
+``%D``                    time taken to serve the request in microseconds
+``%T``                    time taken to serve the request in seconds
+``%m``                    request method
+``%U``                    url path
+``%q``                    query string, prepended with ``?``
+``%H``                    request protocol
+``%{Header}i``            a request header
+``%{KEY}e``               a WSGI environ key
+``%%``                    the percent sign
+========================  ===============================================
+
+.. autoclass:: AccessLog
+   :members:
+   :member-order: bysource
+
+"""
+import re
+import sys
+import time
+
+from pulsar.utils.log import BatchWriter
+from pulsar.utils.system import json
+
+
+COMMON = '%h %l %u %t "%r" %>s %b'
+COMBINED = COMMON + ' "%{Referer}i" "%{User-Agent}i"'
+FORMATS = {'common': COMMON, 'combined': COMBINED}
+JSON_FIELDS = (('remote_addr', 'h', None),
+               ('time', 'e', 'wsgi.timestamp'),
+               ('method', 'm', None), ('path', 'U', None),
+               ('query', 'q', None), ('protocol', 'H', None),
+               ('status', 's', None), ('size', 'B', None),
+               ('duration', 'D', None), ('referer', 'i', 'Referer'),
+               ('user_agent', 'i', 'User-Agent'))
+
+directive = re.compile(r'%(?:\{([^}]*)\})?>?([a-zA-Z%])')
+
+_time = None
+_time_string = None
+
+
+def request_time(environ):
+    global _time, _time_string
+    timestamp = environ.get('wsgi.timestamp')
+    timestamp = int(time.time() if timestamp is None else timestamp)
+    if _time != timestamp:
+        _time = timestamp
+        _time_string = time.strftime('[%d/%b/%Y:%H:%M:%S +0000]',
+                                     time.gmtime(timestamp))
+    return _time_string
+
+
+def request_line(environ):
+    return '%s %s %s' % (environ.get('REQUEST_METHOD'),
+                         environ.get('RAW_URI'),
+                         environ.get('SERVER_PROTOCOL'))
+
+
+def query_string(environ):
+    query = environ.get('QUERY_STRING')
+    return '?%s' % query if query else ''
+
+
+def status_code(status):
+    return str(status).split(' ', 1)[0]
+
+
+def environ_field(key, default='-'):
+    return lambda environ, status, size, duration: (
+        environ.get(key) or default
+    )
+
+
+FIELDS = {
+    'h': environ_field('REMOTE_ADDR'),
+    'l': lambda environ, status, size, duration: '-',
+    'u': environ_field('REMOTE_USER'),
+    't': lambda environ, status, size, duration: request_time(environ),
+    'r': lambda environ, status, size, duration: request_line(environ),
+    's': lambda environ, status, size, duration: status_code(status),
+    'b': lambda environ, status, size, duration: size or '-',
+    'B': lambda environ, status, size, duration: size,
+    'D': lambda environ, status, size, duration: int(duration * 1000000),
+    'T': lambda environ, status, size, duration: int(duration),
+    'm': environ_field('REQUEST_METHOD'),
+    'U': environ_field('PATH_INFO'),
+    'q': lambda environ, status, size, duration: query_string(environ),
+    'H': environ_field('SERVER_PROTOCOL')
+}
+
+
+def field(name, key=None):
+    if key is not None:
+        if name == 'i':
+            key = key.upper().replace('-', '_')
+            if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                key = 'HTTP_%s' % key
+            return environ_field(key)
+        elif name == 'e':
+            return environ_field(key)
+    elif name in FIELDS:
+        return FIELDS[name]
+    raise ValueError('Unknown access log directive "%s"' % name)
+
+
+def compile_format(format):
+    """Compile an access log ``format`` into a callable
+
+    The callable accepts the WSGI ``environ``, the response ``status``,
+    its ``size`` and the ``duration`` in seconds of the request, and
+    returns the log line.
+    """
+    format = FORMATS.get(format, format)
+    if format == 'json':
+        return json_format()
+    template = []
+    fields = []
+    offset = 0
+    for match in directive.finditer(format):
+        template.append(format[offset:match.start()].replace('%', '%%'))
+        key, name = match.groups()
+        if name == '%':
+            template.append('%%')
+        else:
+            template.append('%s')
+            fields.append(field(name, key))
+        offset = match.end()
+    template.append(format[offset:].replace('%', '%%'))
+    template.append('\n')
+    template = ''.join(template)
+    fields = tuple(fields)
+
+    def _format(environ, status, size, duration):
+        return template % tuple([f(environ, status, size, duration)
+                                 for f in fields])
+
+    return _format
+
+
+def json_format():
+    fields = tuple(((name, field(code, key))
+                    for name, code, key in JSON_FIELDS))
+
+    def _format(environ, status, size, duration):
+        record = dict(((name, f(environ, status, size, duration))
+                       for name, f in fields))
+        record['status'] = int(record['status'])
+        return json.dumps(record) + '\n'
+
+    return _format
+
+
+class AccessLog:
+    """Format and queue access log records
+
+    :param stream: a text stream where log lines are written
+    :param format: the access log format, see the module documentation
+    :param max_queue: maximum number of lines waiting to be written,
+        lines are dropped when the queue is full
+    """
+    _owned = None
+
+    def __init__(self, stream, format='combined', max_queue=10000,
+                 interval=0.1):
+        self.format = compile_format(format)
+        self.writer = BatchWriter(stream, max_queue=max_queue,
+                                  interval=interval)
+
+    @classmethod
+    def from_cfg(cls, cfg):
+        """Build the :class:`AccessLog` of a server, ``None`` if the
+        ``access_log`` setting is empty
+        """
+        path = cfg.access_log
+        if not path:
+            return None
+        if path == '-':
+            return cls(sys.stdout, cfg.access_log_format,
+                       cfg.access_log_queue)
+        log = cls(open(path, 'a'), cfg.access_log_format,
+                  cfg.access_log_queue)
+        log._owned = log.writer.stream
+        return log
+
+    def log(self, environ, status, size, duration):
+        """Queue the access log record of a request
+        """
+        return self.writer.write(self.format(environ, status, size,
+                                             duration))
+
+    def info(self):
+        return self.writer.info()
+
+    def close(self, timeout=1):
+        """Write queued records and close the log file, return ``True``
+        if all records were written
+        """
+        stopped = self.writer.close(timeout)
+        if stopped and self._owned is not None:
+            self._owned.close()
+        return stopped
@@ -0,0 +1,222 @@
+'''An in-memory cache of static files for :class:`.MediaRouter`.
+
+Small assets (style-sheets, javascript, icons) are served many times over
+and rarely change. When a :class:`.MediaRouter` is given an
+:class:`AssetCache` the content of these files is kept in memory together
+with a strong ETag, the ``Last-Modified`` date and a pre-compressed gzip
+variant, so that a cache hit does not touch the file system::
+
+    from pulsar.apps import wsgi
+
+    media = wsgi.MediaRouter('/media', '/path/to/media',
+                             cache=wsgi.AssetCache(max_size=2**25))
+
+Entries are validated against the file modification time every
+:attr:`AssetCache.check_interval` seconds. An external watcher can also
+call :meth:`AssetCache.invalidate` when a file changes.
+'''
+import os
+import stat
+import mimetypes
+from collections import OrderedDict
+from gzip import compress
+from time import monotonic
+
+from pulsar.utils.security import digest
+from pulsar.utils.lib import http_date
+
+from .response import re_accepts_gzip, re_media_type
+from .routers import was_modified_since
+
+
+class Asset:
+    '''A file held in an :class:`AssetCache`
+    '''
+    __slots__ = ('path', 'content', 'gzip', 'etag', 'last_modified',
+                 'content_type', 'encoding', 'mtime', 'size', 'checked')
+
+    def __init__(self, path, content, mtime, content_type=None,
+                 encoding=None, gzip=None):
+        self.path = path
+        self.content = content
+        self.gzip = gzip
+        self.etag = digest(content)
+        self.last_modified = http_date(mtime)
+        self.content_type = content_type
+        self.encoding = encoding
+        self.mtime = mtime
+        self.size = len(content)
+        self.checked = monotonic()
+
+    def __repr__(self):
+        return self.path
+
+    @property
+    def memory(self):
+        '''Number of bytes used by this asset'''
+        return self.size + (len(self.gzip) if self.gzip else 0)
+
+    def not_modified(self, request):
+        '''Check ``If-None-Match`` and ``If-Modified-Since`` headers
+        '''
+        match = request.get('HTTP_IF_NONE_MATCH')
+        if match:
+            tags = set(t.strip() for t in match.split(','))
+            return bool(tags.intersection(('*', '"%s"' % self.etag,
+                                           '"%s-gzip"' % self.etag)))
+        header = request.get('HTTP_IF_MODIFIED_SINCE')
+        return bool(header) and not was_modified_since(header, self.mtime,
+                                                       self.size)
+
+
+class AssetCache:
+    '''A least recently used cache of static files bounded by bytes.
+
+    :param max_size: maximum number of bytes held by the cache, including
+        the compressed variants.
+    :param max_file_size: files larger than this are not cached and
+        are served from disk.
+    :param check_interval: seconds between modification time checks of
+        a cached file. ``0`` checks at every request, ``None`` never.
+    :param gzip_level: compression level of the gzip variant, ``0``
+        to disable compression.
+    :param min_gzip_length: files smaller than this are not compressed.
+
+    .. attribute:: hits
+
+        Number of requests served from memory
+
+    .. attribute:: misses
+
+        Number of requests not found in the cache
+    '''
+    def __init__(self, max_size=2**26, max_file_size=2**20,
+                 check_interval=1, gzip_level=6, min_gzip_length=200):
+        self.max_size = max_size
+        self.max_file_size = min(max_file_size, max_size)
+        self.check_interval = check_interval
+        self.gzip_level = gzip_level
+        self.min_gzip_length = min_gzip_length
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._assets = OrderedDict()
+
+    def __len__(self):
+        return len(self._assets)
+
+    def __contains__(self, key):
+        return key in self._assets
+
+    def get(self, key):
+        '''Get a valid :class:`Asset` for ``key`` or ``None``
+        '''
+        asset = self._assets.get(key)
+        if asset is None:
+            self.misses += 1
+            return
+        if self.check_interval is not None:
+            now = monotonic()
+            if now - asset.checked >= self.check_interval:
+                try:
+                    info = os.stat(asset.path)
+                except OSError:
+                    info = None
+                if (info is None or info[stat.ST_MTIME] != asset.mtime or
+                        info[stat.ST_SIZE] != asset.size):
+                    self.pop(key)
+                    self.misses += 1
+                    return
+                asset.checked = now
+        self._assets.move_to_end(key)
+        self.hits += 1
+        return asset
+
+    def load(self, key, path):
+        '''Load the file at ``path`` into the cache
+
+        :return: the :class:`Asset` or ``None`` if ``path`` is not a
+            regular file or it is too large to be cached.
+        '''
+        try:
+            info = os.stat(path)
+        except OSError:
+            return
+        if (not stat.S_ISREG(info[stat.ST_MODE]) or
+                info[stat.ST_SIZE] > self.max_file_size):
+            return
+        with open(path, 'rb') as fp:
+            content = fp.read()
+        content_type, encoding = mimetypes.guess_type(path)
+        asset = Asset(path, content, info[stat.ST_MTIME],
+                      content_type, encoding,
+                      self.compress(content, content_type, encoding))
+        self.pop(key)
+        self._assets[key] = asset
+        self.size += asset.memory
+        while self.size > self.max_size:
+            self.pop(next(iter(self._assets)))
+        return asset
+
+    def compress(self, content, content_type=None, encoding=None):
+        '''The gzip variant of ``content`` or ``None``
+        '''
+        if (not self.gzip_level or encoding or
+                len(content) < self.min_gzip_length or
+                re_media_type.match(content_type or '')):
+            return
+        data = compress(content, self.gzip_level)
+        return data if len(data) < len(content) else None
+
+    def pop(self, key):
+        asset = self._assets.pop(key, None)
+        if asset is not None:
+            self.size -= asset.memory
+        return asset
+
+    def invalidate(self, path=None):
+        '''Remove all assets loaded from ``path``, or everything if
+        ``path`` is not given
+        '''
+        if path is None:
+            self._assets.clear()
+            self.size = 0
+        else:
+            for key, asset in tuple(self._assets.items()):
+                if asset.path == path:
+                    self.pop(key)
+
+    def info(self):
+        return dict(assets=len(self._assets),
+                    size=self.size,
+                    max_size=self.max_size,
+                    hits=self.hits,
+                    misses=self.misses)
+
+    def response(self, request, asset, cache_control=None):
+        '''Build the response for ``asset``
+        '''
+        response = request.response
+        headers = response.headers
+        content = asset.content
+        etag = asset.etag
+        if asset.gzip is not None:
+            headers['Vary'] = 'Accept-Encoding'
+            accept = request.get('HTTP_ACCEPT_ENCODING', '')
+            if re_accepts_gzip.search(accept):
+                content = asset.gzip
+                etag = '%s-gzip' % etag
+        if asset.not_modified(request):
+            response.status_code = 304
+        else:
+            if content is not asset.content:
+                headers['Content-Encoding'] = 'gzip'
+            response.content_type = asset.content_type
+            response.encoding = asset.encoding
+            response.content = content
+            headers['Accept-Ranges'] = 'bytes'
+            headers['Last-Modified'] = asset.last_modified
+        if cache_control:
+            cache_control(headers, etag=etag)
+        headers['etag'] = '"%s"' % etag
+        return response
@@ -0,0 +1,321 @@
+'''An in-process cache of full WSGI responses.
+
+A :class:`ResponseCache` keeps the responses of idempotent ``GET`` and
+``HEAD`` requests in memory, in a least recently used dictionary bounded
+by bytes, so that they are served without calling the application.
+It is both an :ref:`asynchronous WSGI middleware <wsgi-middleware>`,
+which serves cache hits, and a
+:ref:`response middleware <wsgi-response-middleware>`, which stores
+responses::
+
+    from pulsar.apps import wsgi
+
+    cache = wsgi.ResponseCache(max_size=2**26, max_age=10)
+    handler = wsgi.WsgiHandler([cache.middleware, router],
+                               response_middleware=[cache])
+
+Responses are keyed by method, path, query string and the request headers
+listed in :attr:`~ResponseCache.vary`. The ``Cache-Control`` header of
+responses is honoured: ``no-store``, ``no-cache`` and ``private`` responses
+are not cached and ``s-maxage`` or ``max-age`` set the time a response
+stays fresh. Requests with an ``Authorization`` header or with a
+``no-store`` directive bypass the cache.
+
+Conditional requests with ``If-None-Match`` or ``If-Modified-Since`` are
+answered with ``304 Not Modified``, an ``ETag`` is added to cached
+responses without one.
+
+When many requests for the same key arrive before the first one has been
+computed, only the first one reaches the application while the others
+wait for its response (request collapsing).
+'''
+import asyncio
+from collections import OrderedDict
+from time import monotonic
+
+from pulsar.utils.httpurl import cache_control
+from pulsar.utils.security import digest
+
+from .response import ResponseMiddleware
+from .routers import modified_since
+from .utils import PULSAR_CACHE
+from .wrappers import WsgiResponse
+
+
+CACHE_KEY = 'pulsar.response_cache'
+CACHEABLE_METHODS = frozenset(('GET', 'HEAD'))
+CACHEABLE_STATUS = frozenset((200, 203, 300, 301, 404, 410))
+NOT_MODIFIED_HEADERS = ('cache-control', 'content-location', 'date', 'etag',
+                        'expires', 'last-modified', 'vary')
+
+
+def max_age(directives, default=None):
+    '''Seconds a response with ``directives`` stays fresh in a shared cache
+    '''
+    for name in ('s-maxage', 'max-age'):
+        if name in directives:
+            try:
+                return max(int(directives[name]), 0)
+            except ValueError:
+                return 0
+    return default
+
+
+class CachedResponse:
+    '''A response held by a :class:`ResponseCache`
+    '''
+    __slots__ = ('status_code', 'headers', 'content', 'etag', 'mtime',
+                 'created', 'expires', 'size')
+
+    def __init__(self, status_code, headers, content, ttl):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.etag = None
+        self.mtime = None
+        for name, value in headers:
+            name = name.lower()
+            if name == 'etag':
+                self.etag = value
+            elif name == 'last-modified':
+                self.mtime = modified_since(value)
+        self.created = monotonic()
+        self.expires = self.created + ttl
+        self.size = len(content) + sum((len(n) + len(v) for n, v in headers))
+
+    def not_modified(self, environ):
+        '''Check ``If-None-Match`` and ``If-Modified-Since`` headers
+        '''
+        match = environ.get('HTTP_IF_NONE_MATCH')
+        if match:
+            if not self.etag:
+                return False
+            tags = set(t.strip() for t in match.split(','))
+            return bool(tags.intersection(('*', self.etag,
+                                           'W/%s' % self.etag)))
+        since = modified_since(environ.get('HTTP_IF_MODIFIED_SINCE'))
+        return bool(since and self.mtime and self.mtime <= since)
+
+    def response(self, environ):
+        '''Build the :class:`.WsgiResponse` for ``environ``
+        '''
+        if self.not_modified(environ):
+            response = WsgiResponse(304)
+            for name, value in self.headers:
+                if name.lower() in NOT_MODIFIED_HEADERS:
+                    response.headers.add(name, value)
+        else:
+            response = WsgiResponse(self.status_code, self.content,
+                                    self.headers)
+        response.headers['Age'] = str(int(monotonic() - self.created))
+        return response
+
+
+class ResponseCache(ResponseMiddleware):
+    '''A least recently used cache of WSGI responses bounded by bytes.
+
+    :param max_size: maximum number of bytes held by the cache
+    :param max_entry_size: responses larger than this are not cached
+    :param max_age: seconds a response without ``max-age`` directive stays
+        fresh, ``None`` to cache only responses with an explicit
+        ``max-age``
+    :param vary: request headers which are part of the cache key, a
+        response with a ``Vary`` header naming other headers is not cached
+    :param collapse_timeout: seconds a request waits for the response of
+        a request with the same key before calling the application itself
+
+    .. attribute:: hits
+
+        Number of requests served from memory
+
+    .. attribute:: misses
+
+        Number of requests passed to the application
+
+    .. attribute:: collapsed
+
+        Number of requests which waited for the response of a concurrent
+        request with the same key
+    '''
+    def __init__(self, max_size=2**26, max_entry_size=2**20, max_age=None,
+                 vary=('Accept-Encoding',), collapse_timeout=30):
+        self.max_size = max_size
+        self.max_entry_size = min(max_entry_size, max_size)
+        self.max_age = max_age
+        self.vary = tuple(vary or ())
+        self.collapse_timeout = collapse_timeout
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self._vary_names = frozenset((v.lower() for v in self.vary))
+        self._vary_keys = tuple(('HTTP_%s' % v.upper().replace('-', '_')
+                                 for v in self.vary))
+        self._entries = OrderedDict()
+        self._inflight = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def key(self, environ):
+        '''The cache key of a request, ``None`` if the request bypasses
+        the cache
+        '''
+        method = environ['REQUEST_METHOD']
+        if (method not in CACHEABLE_METHODS or
+                'HTTP_AUTHORIZATION' in environ):
+            return
+        if 'no-store' in cache_control(environ.get('HTTP_CACHE_CONTROL', '')):
+            return
+        return (method, environ.get('PATH_INFO', '/'),
+                environ.get('QUERY_STRING', '')) + tuple(
+            (environ.get(key) for key in self._vary_keys))
+
+    def get(self, key):
+        '''Get a fresh :class:`CachedResponse` for ``key`` or ``None``
+        '''
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires > monotonic():
+                self._entries.move_to_end(key)
+                return entry
+            self.pop(key)
+
+    def set(self, key, entry):
+        self.pop(key)
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_size:
+            self.pop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def info(self):
+        return dict(entries=len(self._entries),
+                    size=self.size,
+                    max_size=self.max_size,
+                    hits=self.hits,
+                    misses=self.misses,
+                    collapsed=self.collapsed,
+                    not_modified=self.not_modified,
+                    evictions=self.evictions,
+                    inflight=len(self._inflight))
+
+    async def middleware(self, environ, start_response=None):
+        '''Serve a request from the cache
+
+        Return ``None`` when the request must be handled by the application
+        '''
+        key = self.key(environ)
+        if key is None:
+            return
+        directives = cache_control(environ.get('HTTP_CACHE_CONTROL', ''))
+        revalidate = ('no-cache' in directives or
+                      directives.get('max-age') == '0')
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight[1] <= monotonic():
+            inflight = None
+        if not revalidate:
+            entry = self.get(key)
+            if entry is None and inflight is not None:
+                self.collapsed += 1
+                try:
+                    entry = await asyncio.wait_for(
+                        asyncio.shield(inflight[0]), self.collapse_timeout)
+                except asyncio.TimeoutError:
+                    pass
+            if entry is not None:
+                self.hits += 1
+                return self._respond(environ, entry)
+        self.misses += 1
+        waiter = asyncio.get_event_loop().create_future()
+        if inflight is None:
+            self._inflight[key] = (waiter,
+                                   monotonic() + self.collapse_timeout)
+            self._release_when_done(environ, key, waiter)
+        environ[CACHE_KEY] = (key, waiter)
+
+    def available(self, environ, response):
+        return CACHE_KEY in environ
+
+    def execute(self, environ, response):
+        key, waiter = environ.pop(CACHE_KEY)
+        entry = self.store(key, response)
+        self._release(key, waiter, entry)
+        if entry is not None and entry.not_modified(environ):
+            return self._respond(environ, entry)
+
+    def store(self, key, response):
+        '''Store ``response`` at ``key`` if it can be cached
+
+        :return: the :class:`CachedResponse` or ``None``
+        '''
+        if (response.status_code not in CACHEABLE_STATUS or
+                response.is_streamed()):
+            return
+        headers = response.headers
+        if 'set-cookie' in headers or response.cookies:
+            return
+        directives = cache_control(','.join(headers.getall('cache-control',
+                                                           ())))
+        if ('no-store' in directives or 'no-cache' in directives or
+                'private' in directives):
+            return
+        ttl = max_age(directives, self.max_age)
+        if not ttl:
+            return
+        for name in ','.join(headers.getall('vary', ())).split(','):
+            name = name.strip().lower()
+            if name and name not in self._vary_names:
+                return
+        content = b''.join(response.content)
+        if len(content) > self.max_entry_size:
+            return
+        response.content = content
+        if 'etag' not in headers:
+            headers['ETag'] = '"%s"' % digest(content)
+        entry = CachedResponse(response.status_code,
+                               tuple(headers.items()), content, ttl)
+        self.set(key, entry)
+        return entry
+
+    def _release(self, key, waiter, entry=None):
+        if self._inflight.get(key, (None,))[0] is waiter:
+            self._inflight.pop(key)
+        if not waiter.done():
+            waiter.set_result(entry)
+
+    def _release_when_done(self, environ, key, waiter):
+        # wake up collapsed requests when execute is not called: the
+        # application or a middleware failed, the response was started
+        # or the request was cancelled
+        def release(*args, **kw):
+            self._release(key, waiter)
+
+        consumer = environ.get(PULSAR_CACHE)
+        if hasattr(consumer, 'event'):
+            consumer.event('post_request').bind(release)
+        else:
+            task = asyncio.Task.current_task()
+            if task is not None:
+                task.add_done_callback(release)
+
+    def _respond(self, environ, entry):
+        response = entry.response(environ)
+        if response.status_code == 304:
+            self.not_modified += 1
+        return response
@@ -4,9 +4,9 @@ import json
 
 from http.client import HTTPMessage, _MAXHEADERS
 from io import BytesIO
+from tempfile import SpooledTemporaryFile
 from urllib.parse import parse_qs
 from base64 import b64encode
-from functools import reduce
 from cgi import valid_boundary, parse_header
 from inspect import isawaitable
 from asyncio import ensure_future
@@ -27,6 +27,13 @@ FORM_ENCODED_TYPES = ('application/x-www-form-urlencoded',
 BODY_DATA = 0
 BODY_FILES = 1
 LARGE_BODY_CODE = 403
+# status of the limits on streamed multipart bodies
+PAYLOAD_TOO_LARGE = 413
+CHUNK_SIZE = 2**16
+# states of the MultipartReader
+BODY = 0
+BOUNDARY = 1
+DONE = 2
 
 
 def http_protocol(parser):
@@ -39,13 +46,14 @@ class HttpBodyReader:
     An instance of this class is injected into the wsgi.input key
     of the WSGI environment
     """
-    __slots__ = ('limit', 'transport', 'environ',
+    __slots__ = ('limit', 'transport', 'environ', 'write',
                  '_reader', '_expect_sent', '_waiting')
 
-    def __init__(self, transport, limit, environ):
+    def __init__(self, transport, limit, environ, write=None):
         self.limit = limit
         self.transport = transport
         self.environ = environ
+        self.write = write or transport.write
         self._reader = asyncio.StreamReader()
         self._expect_sent = None
         self._waiting = None
@@ -96,7 +104,7 @@ class HttpBodyReader:
             else:
                 msg = '%s 100 Continue\r\n\r\n' % protocol
                 self._expect_sent = msg
-                self.transport.write(msg.encode(CHARSET))
+                self.write(msg.encode(CHARSET))
 
 
 def parse_form_data(request, stream=None, **kw):
@@ -137,6 +145,29 @@ def parse_form_data(request, stream=None, **kw):
     return decoder.parse()
 
 
+def stream_form_data(request, **kw):
+    '''Asynchronous iterator over the parts of a ``multipart/form-data``
+    request.
+
+    Parts are yielded as soon as their headers are received and they are
+    asynchronous iterators over chunks of their body, so that large
+    uploads can be streamed to storage without being buffered::
+
+        async for part in stream_form_data(request):
+            async for chunk in part:
+                await storage.write(part.filename, chunk)
+
+    The ``max_parts`` and ``max_size`` limits of :class:`MultipartDecoder`
+    are applied. A part not consumed is skipped when moving to the next one.
+    '''
+    content_type, options = parse_options_header(
+        request.get('CONTENT_TYPE', ''))
+    if content_type != 'multipart/form-data':
+        raise HttpException(status=415)
+    options.update(kw)
+    return MultipartDecoder(request, options, None).parts()
+
+
 class FormDecoder:
     """Base class for decoding HTTP body data
     """
@@ -162,64 +193,218 @@ class FormDecoder:
 
 
 class MultipartDecoder(FormDecoder):
-    buffer = None
+    """Decoder of ``multipart/form-data`` bodies.
+
+    The body is scanned for the boundary incrementally, file parts larger
+    than :attr:`spool_size` are spooled to a temporary file.
+    The following limits can be overwritten via ``options``:
+
+    * :attr:`max_parts` maximum number of parts, a ``413`` response when
+      exceeded
+    * :attr:`max_field_size` maximum size of a non-file part, it defaults
+      to the ``stream_buffer`` setting. A ``403`` response when exceeded,
+      as for other form data too large
+    * :attr:`max_size` maximum size of the whole body, no limit by default,
+      a ``413`` response when exceeded
+    """
+    spool_size = 2**20
+    max_parts = 1000
+    max_field_size = None
+    max_size = None
+
+    def __init__(self, request, options, stream):
+        super().__init__(request, options, stream)
+        for name in ('spool_size', 'max_parts', 'max_field_size',
+                     'max_size'):
+            if name in options:
+                setattr(self, name, options[name])
+        if self.max_field_size is None:
+            self.max_field_size = self.limit
 
     @property
     def boundary(self):
         return self.options.get('boundary', '')
 
     def parse(self):
+        inp = self.input()
+        if isinstance(inp, HttpBodyReader):
+            return self._consume(inp)
+        else:
+            producer = BytesProducer(inp)
+            return producer(self._consume)
+
+    def parts(self):
+        """Asynchronous iterator over :class:`MultipartPart`
+        """
+        inp = self.input()
+        if not isinstance(inp, HttpBodyReader):
+            inp = BytesProducer(inp)
+        return MultipartParts(self, self.reader(inp))
+
+    def input(self):
         boundary = self.boundary
         if not valid_boundary(boundary):
             raise HttpException("Invalid boundary for multipart/form-data",
                                 status=422)
-        inp = self.request.get('wsgi.input') or BytesIO()
-        self.buffer = bytearray()
+        if self.max_size and self.content_length > self.max_size:
+            raise_large_body_error(self.max_size, PAYLOAD_TOO_LARGE)
+        return self.request.get('wsgi.input') or BytesIO()
 
-        if isinstance(inp, HttpBodyReader):
-            return self._consume(inp, boundary)
-        else:
-            producer = BytesProducer(inp)
-            return producer(self._consume, boundary)
-
-    async def _consume(self, fp, boundary):
-        sep = b'--'
-        nextpart = ('--%s' % boundary).encode()
-        lastpart = ("--%s--" % boundary).encode()
-        terminator = b""
-
-        while terminator != lastpart:
-            nbytes = -1
-            current = None
-
-            if terminator:
-                headers = await parse_headers(fp)
-                current = MultipartPart(self, headers)
-
-                data = await fp.read(nbytes) if nbytes > 0 else b''
-
-                if current.name:
-                    current.feed_data(data)
-                else:
-                    current = None
-
-            while 1:
-                line = await fp.readline() or lastpart
-                if line.startswith(sep):
-                    terminator = line.rstrip()
-                    if terminator in (nextpart, lastpart):
-                        break
-                if current:
-                    current.feed_data(line)
+    def reader(self, fp):
+        return MultipartReader(fp, self.boundary, max_parts=self.max_parts,
+                               max_size=self.max_size)
 
-            # Done with part.
-            if current:
-                current.done()
+    async def _consume(self, fp):
+        reader = self.reader(fp)
+        while True:
+            headers = await reader.next_part()
+            if headers is None:
+                break
+            part = MultipartPart(self, headers)
+            if part.name:
+                while True:
+                    data = await reader.read()
+                    if not data:
+                        break
+                    part.feed_data(data)
+                part.done()
 
-        self.request.environ['wsgi.input'] = BytesIO(self.buffer)
+        self.request.environ['wsgi.input'] = BytesIO()
         return self.result
 
 
+class MultipartReader:
+    """Incremental reader of a ``multipart/form-data`` body.
+
+    The boundary is located with ``bytearray.find`` on a rolling buffer
+    so that body data is consumed in chunks rather than lines.
+    """
+    def __init__(self, fp, boundary, max_parts=None, max_size=None,
+                 chunk_size=CHUNK_SIZE):
+        self.fp = fp
+        self.delimiter = ('--%s' % boundary).encode('latin-1')
+        # a delimiter is always preceded by a line break
+        self.marker = b'\n' + self.delimiter
+        self.max_parts = max_parts
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.parts = 0
+        self.size = 0
+        self.eof = False
+        # the preamble is consumed as the body of a part
+        self.state = BODY
+        self.buffer = bytearray(b'\r\n')
+
+    async def next_part(self):
+        """Headers of the next part or ``None`` if there are no more parts
+        """
+        while self.state == BODY:
+            await self.read()
+        buffer = self.buffer
+        while self.state == BOUNDARY:
+            if len(buffer) >= 2:
+                if buffer[:2] == b'--':
+                    self.state = DONE
+                    break
+                # skip transport padding and line break
+                idx = buffer.find(b'\n')
+                if idx >= 0:
+                    del buffer[:idx + 1]
+                    break
+            if not await self._fill():
+                self.state = DONE
+        if self.state == DONE:
+            return
+        self.parts += 1
+        if self.max_parts and self.parts > self.max_parts:
+            raise HttpException(
+                "Too many parts in multipart request. Limit is %d" %
+                self.max_parts, status=PAYLOAD_TOO_LARGE)
+        headers = []
+        size = 0
+        while True:
+            idx = buffer.find(b'\n')
+            if idx < 0:
+                if size + len(buffer) > CHUNK_SIZE:
+                    raise_large_headers_error(CHUNK_SIZE)
+                if not await self._fill():
+                    self.state = DONE
+                    return
+                continue
+            line = bytes(buffer[:idx + 1])
+            del buffer[:idx + 1]
+            headers.append(line)
+            size += len(line)
+            if len(headers) > _MAXHEADERS:
+                raise HttpException("got more than %d headers" % _MAXHEADERS)
+            if size > CHUNK_SIZE:
+                raise_large_headers_error(CHUNK_SIZE)
+            if line in (b'\r\n', b'\n'):
+                break
+        self.state = BODY
+        hstring = b''.join(headers).decode('iso-8859-1')
+        return email.parser.Parser(_class=HTTPMessage).parsestr(hstring)
+
+    async def read(self):
+        """Read a chunk of the current part body
+
+        An empty bytes string signals the end of the part.
+        """
+        marker = self.marker
+        buffer = self.buffer
+        while self.state == BODY:
+            idx = buffer.find(marker)
+            if idx >= 0:
+                end = idx - 1 if idx and buffer[idx - 1] == 13 else idx
+                data = bytes(buffer[:end])
+                del buffer[:idx + len(marker)]
+                self.state = BOUNDARY
+                return data
+            # keep enough bytes for a delimiter split between reads
+            size = len(buffer) - len(marker)
+            if size > 0:
+                data = bytes(buffer[:size])
+                del buffer[:size]
+                return data
+            if not await self._fill():
+                # no closing delimiter
+                data = bytes(buffer)
+                buffer.clear()
+                self.state = DONE
+                return data
+        return b''
+
+    async def _fill(self):
+        if self.eof:
+            return False
+        data = await self.fp.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.size += len(data)
+        if self.max_size and self.size > self.max_size:
+            raise_large_body_error(self.max_size, PAYLOAD_TOO_LARGE)
+        self.buffer.extend(data)
+        return True
+
+
+class MultipartParts:
+    """Asynchronous iterator over the parts of a multipart body
+    """
+    def __init__(self, decoder, reader):
+        self.decoder = decoder
+        self.reader = reader
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        headers = await self.reader.next_part()
+        if headers is None:
+            raise StopAsyncIteration
+        return MultipartPart(self.decoder, headers, self.reader)
+
+
 class BytesDecoder(FormDecoder):
 
     def parse(self, mem_limit=None, **kw):
@@ -268,14 +453,23 @@ class JsonDecoder(BytesDecoder):
 
 
 class MultipartPart:
+    """A part of a ``multipart/form-data`` body
+
+    When obtained from :func:`stream_form_data`, the part is an
+    asynchronous iterator over chunks of its body.
+    """
     filename = None
     name = ''
 
-    def __init__(self, parser, headers):
+    def __init__(self, parser, headers, reader=None):
         self.parser = parser
         self.headers = headers
         self._bytes = []
+        self._file = None
+        self._size = 0
         self._done = False
+        self._reader = reader
+        self._index = reader.parts if reader else None
         length = headers.get(CONTENT_LENGTH)
         content = headers.get('content-disposition')
         if length:
@@ -296,6 +490,15 @@ class MultipartPart:
     def __repr__(self):
         return self.name
 
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        data = await self.read_chunk()
+        if not data:
+            raise StopAsyncIteration
+        return data
+
     @property
     def charset(self):
         return self.parser.charset
@@ -306,14 +509,25 @@ class MultipartPart:
 
     @property
     def size(self):
-        return reduce(lambda x, y: x+len(y), self._bytes, 0)
+        return self._size
+
+    @property
+    def file(self):
+        """File-like object with the part data
+        """
+        if self._file is None:
+            self._file = BytesIO(self.recv())
+        self._file.seek(0)
+        return self._file
 
     def bytes(self):
         '''Bytes'''
+        if self._file is not None:
+            return self.file.read()
         return b''.join(self._bytes)
 
     def bytesio(self):
-        return BytesIO(self.recv())
+        return self.file
 
     def base64(self, charset=None):
         '''Data encoded as base 64'''
@@ -329,19 +543,51 @@ class MultipartPart:
     def feed_data(self, data):
         """Feed new data into the MultiPart parser or the data stream"""
         if data:
-            self._bytes.append(data)
-            if self.parser.stream:
-                self.parser.stream(self)
+            parser = self.parser
+            is_file = self.is_file()
+            self._size += len(data)
+            if not is_file and self._size > parser.max_field_size:
+                raise_large_body_error(parser.max_field_size)
+            if parser.stream:
+                self._bytes.append(data)
+                parser.stream(self)
+            elif self._file is not None:
+                self._file.write(data)
+            elif is_file:
+                self._file = SpooledTemporaryFile(max_size=parser.spool_size)
+                self._file.write(data)
             else:
-                self.parser.buffer.extend(data)
+                self._bytes.append(data)
 
-    def recv(self, size=-1):
-        if self._done:
-            data = self._bytes
-            self._bytes = []
+    async def read_chunk(self):
+        """Read a chunk of data from a streaming part.
+
+        Return an empty bytes string when the part is consumed.
+        """
+        reader = self._reader
+        if reader is None or reader.parts != self._index:
+            return b''
+        data = await reader.read()
+        if data:
+            self._size += len(data)
         else:
-            data = self._bytes[:-1]
-            self._bytes = self._bytes[-1:]
+            self._done = True
+        return data
+
+    async def read(self):
+        """Read the remaining data from a streaming part"""
+        chunks = []
+        while True:
+            data = await self.read_chunk()
+            if not data:
+                return b''.join(chunks)
+            chunks.append(data)
+
+    def recv(self, size=-1):
+        if self._file is not None:
+            return self._file.read(size)
+        data = self._bytes
+        self._bytes = []
         return b''.join(data)
 
     def is_file(self):
@@ -349,51 +595,30 @@ class MultipartPart:
 
     def done(self):
         if not self._done:
-
-            if self._bytes and self.length < 0:
-                # Strip final line terminator
-                line = self._bytes[-1]
-                if line[-2:] == b"\r\n":
-                    line = line[:-2]
-                elif line[-1:] == b"\n":
-                    line = line[:-1]
-                self._bytes[-1] = line
-
             self._done = True
             if self.parser.stream:
                 self.parser.stream(self)
 
             if self.is_file():
+                if self._file is not None:
+                    self._file.seek(0)
                 self.parser.result[1].add(self.name, self)
             else:
                 self.parser.result[0].add(self.name, self.string())
 
 
-async def parse_headers(fp, _class=HTTPMessage):
-    """Parses only RFC2822 headers from a file pointer.
-    email Parser wants to see strings rather than bytes.
-    But a TextIOWrapper around self.rfile would buffer too many bytes
-    from the stream, bytes which we later need to read as bytes.
-    So we read the correct bytes here, as bytes, for email Parser
-    to parse.
-    """
-    headers = []
-    while True:
-        line = await fp.readline()
-        headers.append(line)
-        if len(headers) > _MAXHEADERS:
-            raise HttpException("got more than %d headers" % _MAXHEADERS)
-        if line in (b'\r\n', b'\n', b''):
-            break
-    hstring = b''.join(headers).decode('iso-8859-1')
-    return email.parser.Parser(_class=_class).parsestr(hstring)
-
-
-def raise_large_body_error(limit):
+def raise_large_body_error(limit, status=LARGE_BODY_CODE):
     raise HttpException(
         "Request content length too large. Limit is %s" %
         convert_bytes(limit),
-        status=LARGE_BODY_CODE
+        status=status
+    )
+
+
+def raise_large_headers_error(limit):
+    raise HttpException(
+        "Part headers too large. Limit is %s" % convert_bytes(limit),
+        status=PAYLOAD_TOO_LARGE
     )
 
 
@@ -405,8 +630,8 @@ class BytesProducer:
     async def readline(self):
         return self.bytes.readline()
 
-    async def read(self):
-        return self.bytes.read()
+    async def read(self, n=-1):
+        return self.bytes.read(n)
 
     def __call__(self, consumer, *args):
         value = None
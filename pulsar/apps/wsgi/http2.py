@@ -0,0 +1,908 @@
+"""
+HTTP/2 Protocol Consumer
+==============================
+
+Cleartext HTTP/2 (h2c) for the WSGI server, enabled by the ``http2``
+setting. A connection switches to the :class:`Http2ServerProtocol`
+either when the client sends the HTTP/2 connection preface (prior
+knowledge) or after an HTTP/1.1 request with the ``Upgrade: h2c`` header.
+
+Each stream is served by the same ``wsgi_callable`` used for HTTP/1.1
+requests, with its own WSGI environ.
+
+.. autoclass:: Http2ServerProtocol
+   :members:
+   :member-order: bysource
+
+.. autoclass:: Http2Stream
+   :members:
+   :member-order: bysource
+
+"""
+import os
+import sys
+import struct
+from asyncio import CancelledError
+from base64 import urlsafe_b64decode
+from urllib.parse import unquote
+
+from pulsar.api import BadRequest, ProtocolError, ProtocolConsumer
+from pulsar.utils.lib import isawaitable, fast_http_date, has_empty_content
+from pulsar.utils.httpurl import CHARSET
+from pulsar.utils.http import hpack
+from pulsar.async.timeout import timeout
+
+from .utils import handle_wsgi_error, log_wsgi_info, AbortWsgi, LOGGER
+from .formdata import HttpBodyReader
+from .wrappers import FileWrapper, file_wrapper, close_object
+from .headers import HEADER_WSGI, HOP_HEADERS
+
+
+PREFACE = b'PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n'
+FRAME_HEADER = struct.Struct('>LBL')
+SETTING = struct.Struct('>HL')
+UINT32 = struct.Struct('>L')
+GOAWAY_HEADER = struct.Struct('>LL')
+
+# frame types
+DATA = 0x0
+HEADERS = 0x1
+PRIORITY = 0x2
+RST_STREAM = 0x3
+SETTINGS = 0x4
+PUSH_PROMISE = 0x5
+PING = 0x6
+GOAWAY = 0x7
+WINDOW_UPDATE = 0x8
+CONTINUATION = 0x9
+
+# frame flags
+END_STREAM = 0x1
+ACK = 0x1
+END_HEADERS = 0x4
+PADDED = 0x8
+PRIORITY_FLAG = 0x20
+
+# settings
+HEADER_TABLE_SIZE = 0x1
+ENABLE_PUSH = 0x2
+MAX_CONCURRENT_STREAMS = 0x3
+INITIAL_WINDOW_SIZE = 0x4
+MAX_FRAME_SIZE = 0x5
+MAX_HEADER_LIST_SIZE = 0x6
+
+# error codes
+NO_ERROR = 0x0
+PROTOCOL_ERROR = 0x1
+INTERNAL_ERROR = 0x2
+FLOW_CONTROL_ERROR = 0x3
+STREAM_CLOSED = 0x5
+FRAME_SIZE_ERROR = 0x6
+REFUSED_STREAM = 0x7
+CANCEL = 0x8
+COMPRESSION_ERROR = 0x9
+
+DEFAULT_WINDOW_SIZE = 65535
+DEFAULT_FRAME_SIZE = 16384
+MAX_FRAME_SIZE_LIMIT = 2**24 - 1
+MAX_WINDOW_SIZE = 2**31 - 1
+MAX_HEADER_BLOCK = 2**16
+SERVER_PROTOCOL = 'HTTP/2'
+URL_SCHEME = os.environ.get('wsgi.url_scheme', 'http')
+OS_SCRIPT_NAME = os.environ.get("SCRIPT_NAME", "")
+PULSAR_CACHE = 'pulsar.cache'
+PULSAR_TEST = 'PULSAR_TEST'
+
+# connection-specific headers are not allowed in HTTP/2 requests
+CONNECTION_HEADERS = frozenset((
+    'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding',
+    'upgrade'
+))
+LOWER_HOP_HEADERS = frozenset((header.lower() for header in HOP_HEADERS))
+ENVIRON_HEADERS = dict(((header.upper().replace('-', '_'), handler)
+                        for header, handler in HEADER_WSGI.items()))
+# headers of the HTTP/1.1 request which are not passed to stream 1
+UPGRADE_HEADERS = ('HTTP_CONNECTION', 'HTTP_UPGRADE', 'HTTP_HTTP2_SETTINGS')
+
+
+class Http2Error(ProtocolError):
+    """A connection error, the connection is closed after a ``GOAWAY``
+    """
+    def __init__(self, code, msg=None):
+        super().__init__(msg)
+        self.code = code
+
+
+class StreamError(Http2Error):
+    """A stream error, the stream is reset with a ``RST_STREAM``
+    """
+    def __init__(self, code, stream_id, msg=None):
+        super().__init__(code, msg)
+        self.stream_id = stream_id
+
+
+def parse_settings(payload):
+    """Parse the payload of a ``SETTINGS`` frame into a list of
+    ``(identifier, value)`` pairs
+    """
+    if len(payload) % SETTING.size:
+        raise Http2Error(FRAME_SIZE_ERROR, 'Invalid SETTINGS frame size')
+    return [SETTING.unpack_from(payload, offset)
+            for offset in range(0, len(payload), SETTING.size)]
+
+
+def h2c_settings(environ):
+    """The client settings of an ``Upgrade: h2c`` request or ``None``
+    if the request cannot be upgraded to HTTP/2
+    """
+    if (environ.get('HTTP_UPGRADE', '').lower() != 'h2c' or
+            'HTTP_HTTP2_SETTINGS' not in environ or
+            environ.get('CONTENT_LENGTH', '0') != '0' or
+            'HTTP_TRANSFER_ENCODING' in environ):
+        return None
+    value = environ['HTTP_HTTP2_SETTINGS'].strip().encode(CHARSET)
+    try:
+        payload = urlsafe_b64decode(value + b'=' * (-len(value) % 4))
+        return parse_settings(payload)
+    except Exception:
+        return None
+
+
+def frame(frame_type, flags, stream_id, payload=b''):
+    return FRAME_HEADER.pack(len(payload) << 8 | frame_type, flags,
+                             stream_id) + payload
+
+
+def strip_padding(flags, payload, stream_id):
+    if flags & PADDED:
+        if not payload:
+            raise Http2Error(PROTOCOL_ERROR, 'Missing pad length')
+        padding = payload[0]
+        if padding >= len(payload):
+            raise Http2Error(PROTOCOL_ERROR, 'Invalid padding')
+        return payload[1:len(payload) - padding]
+    return payload
+
+
+class Http2Stream:
+    """A stream of an HTTP/2 connection
+
+    It is stored in the ``pulsar.cache`` key of the WSGI environ and it
+    plays the role of the :class:`.HttpServerResponse` for HTTP/1.1
+    requests.
+    It is also the transport of the ``wsgi.input`` body reader:
+    window updates are not sent while reading is paused so that the
+    client cannot overflow the body buffer.
+
+    .. attribute:: connection
+
+        Always ``None``, HTTP/2 streams cannot upgrade the connection
+    """
+    connection = None
+    app_handler = None
+    urlargs = None
+    status = None
+    headers = None
+    headers_sent = None
+    remote_closed = False
+    local_closed = False
+    task = None
+
+    def __init__(self, protocol, stream_id, environ):
+        self.protocol = protocol
+        self.id = stream_id
+        self.producer = protocol.producer
+        self.cfg = protocol.cfg
+        self.logger = LOGGER
+        self._loop = protocol._loop
+        self.queued = self._loop.time()
+        self.send_window = protocol.initial_window_size
+        self.receive_window = DEFAULT_WINDOW_SIZE
+        self.environ = environ
+        self._output = bytearray()
+        self._end_output = False
+        self._waiter = None
+        self._paused = False
+        self._unacked = 0
+        environ[PULSAR_CACHE] = self
+        environ['wsgi.input'] = HttpBodyReader(
+            self, self.cfg.stream_buffer, environ, self._no_continue)
+
+    def __repr__(self):
+        return 'stream %d - %s' % (self.id, self.protocol.connection)
+    __str__ = __repr__
+
+    def get(self, attr):
+        return getattr(self, attr, None)
+
+    def set(self, attr, value):
+        setattr(self, attr, value)
+
+    def pop(self, attr, default=None):
+        value = getattr(self, attr, default)
+        try:
+            delattr(self, attr)
+        except AttributeError:
+            pass
+        return value
+
+    def feed_data(self, data, end_stream=False, size=0):
+        """Feed request body ``data`` to the ``wsgi.input`` reader
+
+        ``size`` is the flow controlled length of the ``DATA`` frame,
+        padding included.
+        """
+        body_reader = self.environ['wsgi.input']
+        if data:
+            body_reader.feed_data(data)
+        if end_stream:
+            self.remote_closed = True
+            body_reader.feed_eof()
+        elif size:
+            self.receive_window -= size
+            self._unacked += size
+            if not self._paused:
+                self.resume_reading()
+
+    def pause_reading(self):
+        self._paused = True
+
+    def resume_reading(self):
+        self._paused = False
+        if self._unacked and not self.remote_closed:
+            self.receive_window += self._unacked
+            self.protocol.window_update(self.id, self._unacked)
+            self._unacked = 0
+
+    def start_response(self, status, response_headers, exc_info=None):
+        if exc_info:
+            try:
+                if self.headers_sent:
+                    raise exc_info[1].with_traceback(exc_info[2])
+            finally:
+                exc_info = None
+        elif self.status:
+            raise RuntimeError("Response headers already set!")
+        self.status = status
+        producer = self.producer
+        headers = []
+        for header, value in response_headers:
+            header = header.lower()
+            if header in LOWER_HOP_HEADERS:
+                producer.logger.warning(
+                    'Application passing hop header "%s"', header
+                )
+                continue
+            headers.append((header, value))
+        headers.append(('server', producer.server_software))
+        headers.append(('date', fast_http_date(producer.current_time)))
+        self.headers = headers
+        return self.write
+
+    def write(self, data, force=False):
+        """Write ``data`` into the stream
+
+        Headers are sent with the first non empty ``data`` or when
+        ``force`` is ``True``, which also ends the stream.
+        Return a waiter when flow control does not allow to send all
+        ``data``.
+        """
+        if self._end_output:
+            return
+        if self.local_closed:
+            raise IOError('Stream %d closed' % self.id)
+        if not self.headers_sent:
+            if not (data or force):
+                return
+            if not self.status:
+                raise RuntimeError('Headers not set.')
+            status = self.status.split(' ', 1)[0]
+            self.headers_sent = [(':status', status)] + self.headers
+            end_stream = has_empty_content(int(status),
+                                           self.environ['REQUEST_METHOD'])
+            self.protocol.write_headers(
+                self.id, self.headers_sent, end_stream or (force and not data)
+            )
+            if end_stream or (force and not data):
+                self._end_output = True
+                return self.protocol.stream_done(self)
+        if data:
+            self._output.extend(data)
+        if force:
+            self._end_output = True
+        if self._output or force:
+            return self.protocol.send_data(self)
+
+    def close_remote(self):
+        """No more request data, the body reader is at EOF
+        """
+        if not self.remote_closed:
+            self.remote_closed = True
+            self.environ['wsgi.input'].feed_eof()
+
+    def reset(self):
+        """The stream was reset, abort the response
+        """
+        self.close_remote()
+        self.local_closed = True
+        if self._waiter:
+            waiter, self._waiter = self._waiter, None
+            if not waiter.done():
+                waiter.set_exception(AbortWsgi())
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+    async def write_response(self):
+        loop = self._loop
+        producer = self.producer
+        environ = self.environ
+        keep_alive = producer.keep_alive or None
+        timer = producer.timer
+        exc_info = None
+        response = None
+        done = False
+        size = 0
+        #
+        retry_after = producer.admit(self.queued)
+        if retry_after:
+            self.start_response('503 Service Unavailable',
+                                [('Retry-After', str(retry_after)),
+                                 ('Content-Length', '0')])
+            self._access_log(0)
+            return self.write(b'', True)
+        producer.inflight += 1
+        try:
+            while not done:
+                done = True
+                try:
+                    if exc_info is None:
+                        if not environ.get('HTTP_HOST'):
+                            raise BadRequest
+                        response = producer.wsgi_callable(
+                            environ, self.start_response)
+                    else:
+                        response = handle_wsgi_error(environ, exc_info)
+                    if isawaitable(response):
+                        with timeout(loop, keep_alive, timer):
+                            response = await response
+                    if exc_info:
+                        response.start(environ, self.start_response,
+                                       exc_info)
+                    wrapper = file_wrapper(response)
+                    if wrapper:
+                        # read the file in the executor
+                        async for chunk in wrapper:
+                            size += len(chunk)
+                            waiter = self.write(chunk)
+                            if waiter:
+                                with timeout(loop, keep_alive, timer):
+                                    await waiter
+                    else:
+                        for chunk in response:
+                            if isawaitable(chunk):
+                                with timeout(loop, keep_alive, timer):
+                                    chunk = await chunk
+                            size += len(chunk)
+                            waiter = self.write(chunk)
+                            if waiter:
+                                with timeout(loop, keep_alive, timer):
+                                    await waiter
+                    waiter = self.write(b'', True)
+                    if waiter:
+                        with timeout(loop, keep_alive, timer):
+                            await waiter
+                # stream reset or client disconnected
+                except (IOError, AbortWsgi, RuntimeError, CancelledError):
+                    self.protocol.reset_stream(self, CANCEL)
+                except Exception:
+                    if self.get('handle_wsgi_error'):
+                        self.logger.exception(
+                            'Exception while handling WSGI error'
+                        )
+                        self.protocol.reset_stream(self, INTERNAL_ERROR)
+                    else:
+                        done = False
+                        exc_info = sys.exc_info()
+                else:
+                    if loop.get_debug():
+                        log_wsgi_info(self.logger.info, environ, self.status)
+                    self._access_log(size)
+                finally:
+                    close_object(response)
+        finally:
+            producer.inflight -= 1
+            if PULSAR_TEST not in os.environ:
+                environ.clear()
+            self = None
+
+    def _access_log(self, size):
+        access_log = getattr(self.producer, 'access_log', None)
+        if access_log:
+            access_log.log(self.environ, self.status, size,
+                           self._loop.time() - self.queued)
+
+    def _no_continue(self, data):
+        # there are no interim responses in HTTP/2, see environ()
+        pass
+
+
+class Http2ServerProtocol(ProtocolConsumer):
+    """Server side HTTP/2 :class:`.ProtocolConsumer`
+
+    One consumer handles all the streams of a connection. Frames are
+    parsed as they arrive, header blocks are decoded with
+    :mod:`~pulsar.utils.http.hpack` and each new stream runs the
+    ``wsgi_callable`` of the server in its own task.
+
+    Both connection and stream flow control windows are honoured when
+    sending ``DATA`` frames. The connection receive window is replenished
+    as soon as data arrives, stream windows when the body is consumed.
+    """
+    closing = False
+    initial_window_size = DEFAULT_WINDOW_SIZE
+    max_frame_size = DEFAULT_FRAME_SIZE
+
+    @classmethod
+    def create(cls, settings, environ, connection):
+        """Create the HTTP/2 protocol of a ``connection``
+
+        :param settings: client settings from the ``HTTP2-Settings``
+            header of an upgraded request
+        :param environ: the WSGI environ of the upgraded request,
+            served as stream 1
+        """
+        h2 = cls(connection)
+        h2.cfg = connection.producer.cfg
+        h2.max_streams = h2.cfg.http2_max_streams
+        h2.streams = {}
+        h2.last_stream_id = 0
+        h2.send_window = DEFAULT_WINDOW_SIZE
+        h2.encoder = hpack.Encoder()
+        h2.decoder = hpack.Decoder(max_header_list_size=MAX_HEADER_BLOCK)
+        h2._buffer = bytearray()
+        h2._preface = False
+        h2._header_block = None
+        h2._blocked = []
+        h2._handlers = (h2._data, h2._headers, h2._priority, h2._rst_stream,
+                        h2._settings, h2._push_promise, h2._ping,
+                        h2._goaway, h2._window_update, h2._continuation)
+        h2.event('post_request').bind(h2._connection_closed)
+        h2.write_frame(SETTINGS, 0, 0, b''.join((
+            SETTING.pack(MAX_CONCURRENT_STREAMS, h2.max_streams),
+            SETTING.pack(MAX_HEADER_LIST_SIZE, MAX_HEADER_BLOCK)
+        )))
+        if settings:
+            h2.apply_settings(settings)
+        if environ is not None:
+            h2._upgraded(environ)
+        return h2
+
+    def __repr__(self):
+        return 'h2 - %d streams - %s' % (len(self.streams), self.connection)
+    __str__ = __repr__
+
+    def feed_data(self, data):
+        if self.closing:
+            return
+        buffer = self._buffer
+        buffer.extend(data)
+        offset = 0
+        try:
+            if not self._preface:
+                if len(buffer) < len(PREFACE):
+                    if not PREFACE.startswith(buffer):
+                        raise Http2Error(PROTOCOL_ERROR, 'Invalid preface')
+                    return
+                if buffer[:len(PREFACE)] != PREFACE:
+                    raise Http2Error(PROTOCOL_ERROR, 'Invalid preface')
+                self._preface = True
+                offset = len(PREFACE)
+            offset = self._frames(buffer, offset)
+        except Http2Error as exc:
+            self.goaway(exc.code, str(exc))
+        except hpack.HPACKError as exc:
+            self.goaway(COMPRESSION_ERROR, str(exc))
+        finally:
+            if offset:
+                del buffer[:offset]
+
+    def write_frame(self, frame_type, flags, stream_id, payload=b''):
+        return self.connection.write(
+            frame(frame_type, flags, stream_id, payload))
+
+    def write_headers(self, stream_id, headers, end_stream=False):
+        """Encode and write ``headers``, split into ``CONTINUATION``
+        frames when larger than the maximum frame size of the client
+        """
+        block = self.encoder.encode(
+            (name.encode(CHARSET), str(value).encode(CHARSET))
+            for name, value in headers
+        )
+        size = self.max_frame_size
+        flags = END_STREAM if end_stream else 0
+        frame_type = HEADERS
+        for offset in range(0, len(block) or 1, size):
+            chunk = block[offset:offset + size]
+            if offset + size >= len(block):
+                flags |= END_HEADERS
+            self.write_frame(frame_type, flags, stream_id, chunk)
+            frame_type = CONTINUATION
+            flags = 0
+
+    def send_data(self, stream):
+        """Send the pending output of a ``stream`` as ``DATA`` frames
+
+        Return a waiter if the flow control windows or the transport
+        do not allow to send all the data.
+        """
+        output = stream._output
+        waiter = None
+        while output or stream._end_output:
+            size = min(len(output), self.send_window, stream.send_window,
+                       self.max_frame_size)
+            if output and size <= 0:
+                if stream not in self._blocked:
+                    self._blocked.append(stream)
+                if stream._waiter is None:
+                    stream._waiter = self._loop.create_future()
+                return stream._waiter
+            chunk = bytes(output[:size])
+            del output[:size]
+            self.send_window -= size
+            stream.send_window -= size
+            end_stream = stream._end_output and not output
+            waiter = self.write_frame(DATA, END_STREAM if end_stream else 0,
+                                      stream.id, chunk)
+            if end_stream:
+                self.stream_done(stream)
+                break
+        if stream._waiter:
+            w, stream._waiter = stream._waiter, None
+            w.set_result(None)
+        return waiter
+
+    def window_update(self, stream_id, increment):
+        self.write_frame(WINDOW_UPDATE, 0, stream_id, UINT32.pack(increment))
+
+    def stream_done(self, stream):
+        """The response of ``stream`` is complete
+        """
+        stream.local_closed = True
+        if not stream.remote_closed:
+            # the request body is no longer needed
+            self.write_frame(RST_STREAM, 0, stream.id, UINT32.pack(NO_ERROR))
+            stream.close_remote()
+        self._close_stream(stream)
+
+    def reset_stream(self, stream, code):
+        """Abort ``stream`` with a ``RST_STREAM`` frame
+        """
+        if self.streams.get(stream.id) is stream:
+            self.write_frame(RST_STREAM, 0, stream.id, UINT32.pack(code))
+            stream.reset()
+            self._close_stream(stream)
+
+    def goaway(self, code=NO_ERROR, msg=None):
+        """Send a ``GOAWAY`` frame and close the connection
+        """
+        if code:
+            self.producer.logger.warning('HTTP/2 error %d in %s: %s',
+                                         code, self.connection, msg)
+        self.closing = True
+        debug = msg.encode(CHARSET) if code and msg else b''
+        self.write_frame(GOAWAY, 0, 0, GOAWAY_HEADER.pack(
+            self.last_stream_id, code) + debug)
+        self.connection.close()
+
+    def apply_settings(self, settings):
+        """Apply client ``settings``
+        """
+        for key, value in settings:
+            if key == HEADER_TABLE_SIZE:
+                self.encoder.max_table_size = min(value,
+                                                  hpack.DEFAULT_TABLE_SIZE)
+            elif key == ENABLE_PUSH:
+                if value > 1:
+                    raise Http2Error(PROTOCOL_ERROR, 'Invalid ENABLE_PUSH')
+            elif key == INITIAL_WINDOW_SIZE:
+                if value > MAX_WINDOW_SIZE:
+                    raise Http2Error(FLOW_CONTROL_ERROR,
+                                     'Invalid INITIAL_WINDOW_SIZE')
+                delta = value - self.initial_window_size
+                self.initial_window_size = value
+                for stream in self.streams.values():
+                    stream.send_window += delta
+            elif key == MAX_FRAME_SIZE:
+                if not DEFAULT_FRAME_SIZE <= value <= MAX_FRAME_SIZE_LIMIT:
+                    raise Http2Error(PROTOCOL_ERROR, 'Invalid MAX_FRAME_SIZE')
+                self.max_frame_size = value
+        self._unblock()
+
+    ########################################################################
+    #    INTERNALS
+    def _frames(self, buffer, offset):
+        length = len(buffer)
+        handlers = self._handlers
+        while length - offset >= FRAME_HEADER.size:
+            head, flags, stream_id = FRAME_HEADER.unpack_from(buffer, offset)
+            size = head >> 8
+            if size > DEFAULT_FRAME_SIZE:
+                raise Http2Error(FRAME_SIZE_ERROR, 'Frame too large')
+            end = offset + FRAME_HEADER.size + size
+            if end > length:
+                break
+            frame_type = head & 0xff
+            payload = bytes(buffer[offset + FRAME_HEADER.size:end])
+            offset = end
+            stream_id &= 0x7fffffff
+            if (self._header_block is not None and
+                    frame_type != CONTINUATION):
+                raise Http2Error(PROTOCOL_ERROR, 'Expected CONTINUATION')
+            if frame_type < len(handlers):
+                try:
+                    handlers[frame_type](flags, stream_id, payload)
+                except StreamError as exc:
+                    stream = self.streams.get(exc.stream_id)
+                    if stream:
+                        self.reset_stream(stream, exc.code)
+                    else:
+                        self.write_frame(RST_STREAM, 0, exc.stream_id,
+                                         UINT32.pack(exc.code))
+            if self.closing:
+                break
+        return offset
+
+    def _data(self, flags, stream_id, payload):
+        if not stream_id:
+            raise Http2Error(PROTOCOL_ERROR, 'DATA on stream 0')
+        # flow control accounts for padding too
+        if payload:
+            self.window_update(0, len(payload))
+        data = strip_padding(flags, payload, stream_id)
+        stream = self.streams.get(stream_id)
+        if stream is None or stream.remote_closed:
+            if stream_id > self.last_stream_id:
+                raise Http2Error(PROTOCOL_ERROR, 'DATA on idle stream')
+            raise StreamError(STREAM_CLOSED, stream_id)
+        if len(payload) > stream.receive_window:
+            raise StreamError(FLOW_CONTROL_ERROR, stream_id)
+        stream.feed_data(data, flags & END_STREAM, len(payload))
+
+    def _headers(self, flags, stream_id, payload):
+        if not stream_id or not stream_id % 2:
+            raise Http2Error(PROTOCOL_ERROR, 'Invalid stream identifier')
+        block = strip_padding(flags, payload, stream_id)
+        if flags & PRIORITY_FLAG:
+            if len(block) < 5:
+                raise Http2Error(FRAME_SIZE_ERROR, 'Invalid HEADERS frame')
+            block = block[5:]
+        if flags & END_HEADERS:
+            self._headers_complete(stream_id, flags, block)
+        else:
+            self._header_block = (stream_id, flags, bytearray(block))
+
+    def _continuation(self, flags, stream_id, payload):
+        if (self._header_block is None or
+                self._header_block[0] != stream_id):
+            raise Http2Error(PROTOCOL_ERROR, 'Unexpected CONTINUATION')
+        _, first_flags, block = self._header_block
+        block.extend(payload)
+        if len(block) > MAX_HEADER_BLOCK:
+            raise Http2Error(PROTOCOL_ERROR, 'Header block too large')
+        if flags & END_HEADERS:
+            self._header_block = None
+            self._headers_complete(stream_id, first_flags, block)
+
+    def _headers_complete(self, stream_id, flags, block):
+        # always decode to keep the HPACK state in sync with the client
+        headers = self.decoder.decode(block)
+        end_stream = flags & END_STREAM
+        stream = self.streams.get(stream_id)
+        if stream is not None:
+            # trailers, they are ignored
+            if stream.remote_closed:
+                raise StreamError(STREAM_CLOSED, stream_id)
+            if not end_stream:
+                raise StreamError(PROTOCOL_ERROR, stream_id)
+            stream.feed_data(b'', True)
+            return
+        if stream_id <= self.last_stream_id:
+            raise Http2Error(STREAM_CLOSED, 'HEADERS on closed stream')
+        self.last_stream_id = stream_id
+        if len(self.streams) >= self.max_streams:
+            raise StreamError(REFUSED_STREAM, stream_id)
+        environ = self._environ(stream_id, headers)
+        self._start_stream(Http2Stream(self, stream_id, environ), end_stream)
+
+    def _priority(self, flags, stream_id, payload):
+        if not stream_id:
+            raise Http2Error(PROTOCOL_ERROR, 'PRIORITY on stream 0')
+        if len(payload) != 5:
+            raise StreamError(FRAME_SIZE_ERROR, stream_id)
+
+    def _rst_stream(self, flags, stream_id, payload):
+        if not stream_id:
+            raise Http2Error(PROTOCOL_ERROR, 'RST_STREAM on stream 0')
+        if len(payload) != 4:
+            raise Http2Error(FRAME_SIZE_ERROR, 'Invalid RST_STREAM frame')
+        if stream_id > self.last_stream_id:
+            raise Http2Error(PROTOCOL_ERROR, 'RST_STREAM on idle stream')
+        stream = self.streams.get(stream_id)
+        if stream:
+            stream.reset()
+            self._close_stream(stream)
+
+    def _settings(self, flags, stream_id, payload):
+        if stream_id:
+            raise Http2Error(PROTOCOL_ERROR, 'SETTINGS on a stream')
+        if flags & ACK:
+            if payload:
+                raise Http2Error(FRAME_SIZE_ERROR, 'Invalid SETTINGS ACK')
+            return
+        self.apply_settings(parse_settings(payload))
+        self.write_frame(SETTINGS, ACK, 0)
+
+    def _push_promise(self, flags, stream_id, payload):
+        raise Http2Error(PROTOCOL_ERROR, 'PUSH_PROMISE from a client')
+
+    def _ping(self, flags, stream_id, payload):
+        if stream_id:
+            raise Http2Error(PROTOCOL_ERROR, 'PING on a stream')
+        if len(payload) != 8:
+            raise Http2Error(FRAME_SIZE_ERROR, 'Invalid PING frame')
+        if not flags & ACK:
+            self.write_frame(PING, ACK, 0, payload)
+
+    def _goaway(self, flags, stream_id, payload):
+        if stream_id:
+            raise Http2Error(PROTOCOL_ERROR, 'GOAWAY on a stream')
+        # no new streams, close once the open ones are done
+        self.max_streams = 0
+        if not self.streams:
+            self.closing = True
+            self.connection.close()
+
+    def _window_update(self, flags, stream_id, payload):
+        if len(payload) != 4:
+            raise Http2Error(FRAME_SIZE_ERROR, 'Invalid WINDOW_UPDATE frame')
+        increment = UINT32.unpack(payload)[0] & 0x7fffffff
+        if not stream_id:
+            if not increment:
+                raise Http2Error(PROTOCOL_ERROR, 'Invalid window increment')
+            self.send_window += increment
+            if self.send_window > MAX_WINDOW_SIZE:
+                raise Http2Error(FLOW_CONTROL_ERROR, 'Window too large')
+        else:
+            stream = self.streams.get(stream_id)
+            if not increment:
+                raise StreamError(PROTOCOL_ERROR, stream_id)
+            if stream is None:
+                return
+            stream.send_window += increment
+            if stream.send_window > MAX_WINDOW_SIZE:
+                raise StreamError(FLOW_CONTROL_ERROR, stream_id)
+        self._unblock()
+
+    def _environ(self, stream_id, headers):
+        connection = self.connection
+        producer = self.producer
+        server_address = connection.transport.get_extra_info('sockname')
+        environ = {
+            'wsgi.async': True,
+            'wsgi.timestamp': producer.current_time,
+            'wsgi.errors': sys.stderr,
+            'wsgi.version': (1, 0),
+            'wsgi.run_once': False,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.url_scheme': URL_SCHEME,
+            'SCRIPT_NAME': OS_SCRIPT_NAME,
+            'SERVER_SOFTWARE': producer.server_software,
+            'SERVER_PROTOCOL': SERVER_PROTOCOL,
+            'wsgi.file_wrapper': FileWrapper,
+            'CONTENT_TYPE': '',
+            'SERVER_NAME': server_address[0],
+            'SERVER_PORT': str(server_address[1])
+        }
+        regular = False
+        path = None
+        for name, value in headers:
+            name = name.decode(CHARSET)
+            value = value.decode(CHARSET)
+            if name[:1] == ':':
+                if regular:
+                    raise StreamError(PROTOCOL_ERROR, stream_id)
+                if name == ':method':
+                    environ['REQUEST_METHOD'] = value
+                elif name == ':path':
+                    path = value
+                elif name == ':scheme':
+                    environ['wsgi.url_scheme'] = value
+                elif name == ':authority':
+                    environ['HTTP_HOST'] = value
+                else:
+                    raise StreamError(PROTOCOL_ERROR, stream_id)
+                continue
+            regular = True
+            if (name in CONNECTION_HEADERS or name != name.lower() or
+                    (name == 'te' and value != 'trailers')):
+                raise StreamError(PROTOCOL_ERROR, stream_id)
+            key = name.upper().replace('-', '_')
+            hnd = ENVIRON_HEADERS.get(key)
+            if hnd and hnd(environ, value):
+                continue
+            if key == 'EXPECT':
+                # the client does not wait for a 100 Continue
+                continue
+            key = 'HTTP_%s' % key
+            if key in environ:
+                separator = '; ' if key == 'HTTP_COOKIE' else ', '
+                value = '%s%s%s' % (environ[key], separator, value)
+            environ[key] = value
+        if 'REQUEST_METHOD' not in environ or not path:
+            raise StreamError(PROTOCOL_ERROR, stream_id)
+        path_info, _, query = path.partition('?')
+        environ['RAW_URI'] = path
+        environ['QUERY_STRING'] = query
+        script_name = environ['SCRIPT_NAME']
+        if script_name:
+            path_info = path_info.split(script_name, 1)[1]
+        environ['PATH_INFO'] = unquote(path_info)
+        self._client_address(environ)
+        return environ
+
+    def _client_address(self, environ):
+        client_address = self.connection.address
+        forward = environ.get('HTTP_X_FORWARDED_FOR')
+        if forward:
+            if forward.find(",") >= 0:
+                forward = forward.rsplit(",", 1)[1].strip()
+            client_address = forward.split(":")
+            if len(client_address) < 2:
+                client_address.append('80')
+        if environ.get('wsgi.url_scheme') == 'https':
+            environ['HTTPS'] = 'on'
+        environ['REMOTE_ADDR'] = client_address[0]
+        environ['REMOTE_PORT'] = str(client_address[1])
+
+    def _upgraded(self, environ):
+        """Serve the upgraded HTTP/1.1 request as stream 1
+        """
+        environ = dict(environ)
+        for key in UPGRADE_HEADERS:
+            environ.pop(key, None)
+        environ['SERVER_PROTOCOL'] = SERVER_PROTOCOL
+        self.last_stream_id = 1
+        self._start_stream(Http2Stream(self, 1, environ), True)
+
+    def _start_stream(self, stream, end_stream):
+        self.streams[stream.id] = stream
+        self.connection.processed += 1
+        self.producer.requests_processed += 1
+        if end_stream:
+            stream.feed_data(b'', True)
+        stream.task = self._loop.create_task(stream.write_response())
+
+    def _close_stream(self, stream):
+        if self.streams.pop(stream.id, None) is not None:
+            if stream in self._blocked:
+                self._blocked.remove(stream)
+            if not self.streams and not self.max_streams:
+                # GOAWAY received and no more streams
+                self.closing = True
+                self.connection.close()
+
+    def _unblock(self):
+        blocked, self._blocked = self._blocked, []
+        for stream in blocked:
+            if self.send_window <= 0:
+                self._blocked.append(stream)
+            elif not stream.local_closed:
+                self.send_data(stream)
+
+    def _connection_closed(self, _, exc=None):
+        self.closing = True
+        streams = list(self.streams.values())
+        self.streams.clear()
+        for stream in streams:
+            stream.reset()
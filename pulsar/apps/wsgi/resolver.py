@@ -0,0 +1,220 @@
+'''Segment trie for resolving urls into :class:`.Router` handlers.
+
+The router tree is compiled into a trie where each edge matches one
+url segment, either a static string (dictionary lookup) or a typed
+converter (``string``, ``int``, ``float``, ``uuid``, ``any``).
+A ``path`` converter at the end of a leaf route matches all the remaining
+segments. Routers with rules which cannot be expressed this way (regular
+expressions or custom converters) are resolved with
+:meth:`.Router._resolve`, together with their children.
+
+All routers matching a path are collected and the one with the lowest
+depth-first position in the router tree wins, which is the same result
+the recursive :meth:`.Router._resolve` would give.
+'''
+import re
+
+from pulsar.api import Http404
+
+from .route import (StringConverter, AnyConverter, PathConverter,
+                    IntegerConverter, FloatConverter, UUIDConverter)
+
+
+SEGMENT_CONVERTERS = (StringConverter, AnyConverter, FloatConverter,
+                      UUIDConverter)
+RE_CHARS = frozenset('.^$*+?{}[]\\|()')
+MISS = object()
+
+
+class Node:
+    __slots__ = ('static', 'dynamic', 'leaves', 'folders', 'rests',
+                 'fallbacks')
+
+    def __init__(self):
+        self.static = {}
+        self.dynamic = []
+        # leaf routers ending at this node
+        self.leaves = []
+        # non-leaf routers ending at this node
+        self.folders = []
+        # leaf routers ending with a path converter at this node
+        self.rests = []
+        # routers resolved via regular expressions
+        self.fallbacks = []
+
+
+class Dynamic:
+    __slots__ = ('variable', 'key', 'match', 'node')
+
+    def __init__(self, variable, key, match):
+        self.variable = variable
+        self.key = key
+        self.match = match
+        self.node = Node()
+
+
+class RouteTrie:
+    '''Compiled router tree
+
+    .. attribute:: version
+
+        Version of the router tree when this trie was compiled
+    '''
+    def __init__(self, router, version=None):
+        self.version = version
+        self.count = 0
+        self.root = Node()
+        self._add(router, self.root)
+
+    def resolve(self, path, method):
+        '''Resolve a ``path`` for a ``method``
+
+        :return: a :class:`.Handler` or ``None``
+        '''
+        segments = path.split('/')
+        matches = []
+        _collect(self.root, segments, 0, len(segments), {}, matches)
+        if len(matches) > 1:
+            matches.sort(key=_order)
+        for _, router, urlargs, remaining in matches:
+            if remaining is None:
+                return router._handler(method, urlargs)
+            handler = router._resolve(remaining, method, dict(urlargs))
+            if handler is not None:
+                return handler
+
+    def _add(self, router, base):
+        order = self.count
+        self.count += 1
+        route = router.route
+        steps = route_steps(route)
+        if steps is None:
+            base.fallbacks.append((order, router))
+            return
+        node = base
+        rest = None
+        for variable, key, match in steps:
+            if match is None:
+                node = node.static.setdefault(key, Node())
+            elif match is PathConverter:
+                rest = variable
+            else:
+                for edge in node.dynamic:
+                    if edge.variable == variable and edge.key == key:
+                        break
+                else:
+                    edge = Dynamic(variable, key, match)
+                    node.dynamic.append(edge)
+                node = edge.node
+        if rest:
+            node.rests.append((order, router, rest))
+        elif route.is_leaf:
+            node.leaves.append((order, router))
+        else:
+            node.folders.append((order, router))
+        base = base if route.is_leaf else node
+        for child in router.routes:
+            self._add(child, base)
+
+
+def route_steps(route):
+    '''Segment matchers for a :class:`.Route`
+
+    :return: a list of three-elements tuples ``(variable, key, match)``
+        or ``None`` if the route cannot be split into segments.
+    '''
+    steps = []
+    last = len(route.breadcrumbs) - 1
+    for index, (dynamic, bit) in enumerate(route.breadcrumbs):
+        if not dynamic:
+            if route.is_re and not RE_CHARS.isdisjoint(bit):
+                return
+            steps.append((None, bit, None))
+            continue
+        converter = route._converters[bit]
+        cls = type(converter)
+        if cls is PathConverter:
+            if index < last or not route.is_leaf:
+                return
+            match = PathConverter
+        elif cls is IntegerConverter:
+            match = integer_matcher(converter)
+        elif cls in SEGMENT_CONVERTERS:
+            if cls is AnyConverter and '/' in converter.regex:
+                return
+            match = regex_matcher(converter)
+        else:
+            return
+        key = (cls, converter.regex,
+               tuple(sorted(converter.__dict__.items())))
+        steps.append((bit, key, match))
+    return steps
+
+
+def integer_matcher(converter):
+    to_python = converter.to_python
+
+    def match(segment):
+        if segment.isdecimal():
+            try:
+                return to_python(segment)
+            except Http404:
+                pass
+        return MISS
+
+    return match
+
+
+def regex_matcher(converter):
+    if type(converter) is StringConverter and converter.regex == '[^/]{1,}':
+        return _segment
+    regex = re.compile('(?:%s)$' % converter.regex, re.UNICODE).match
+    to_python = converter.to_python
+
+    def match(segment):
+        if regex(segment):
+            try:
+                return to_python(segment)
+            except (Http404, ValueError):
+                pass
+        return MISS
+
+    return match
+
+
+def _segment(segment):
+    return segment or MISS
+
+
+def _order(match):
+    return match[0]
+
+
+def _collect(node, segments, index, size, urlargs, matches):
+    if index == size:
+        for order, router in node.leaves:
+            matches.append((order, router, urlargs, None))
+        return
+    if node.folders and index == size - 1 and not segments[index]:
+        for order, router in node.folders:
+            matches.append((order, router, urlargs, None))
+    if node.rests:
+        remaining = '/'.join(segments[index:])
+        for order, router, variable in node.rests:
+            args = urlargs.copy()
+            args[variable] = remaining
+            matches.append((order, router, args, None))
+    if node.fallbacks:
+        remaining = '/'.join(segments[index:])
+        for order, router in node.fallbacks:
+            matches.append((order, router, urlargs, remaining))
+    segment = segments[index]
+    child = node.static.get(segment)
+    if child is not None:
+        _collect(child, segments, index + 1, size, urlargs, matches)
+    for edge in node.dynamic:
+        value = edge.match(segment)
+        if value is not MISS:
+            args = urlargs.copy()
+            args[edge.variable] = value
+            _collect(edge.node, segments, index + 1, size, args, matches)
@@ -28,13 +28,21 @@ AccessControl
 
 '''
 import re
+import zlib
 from io import BytesIO
 from gzip import GzipFile
+from inspect import isawaitable
+
+from .wrappers import file_wrapper
 
 
 re_accepts_gzip = re.compile(r'\bgzip\b')
+re_accepts_deflate = re.compile(r'\bdeflate\b')
 re_media_type = re.compile(r'^(image|audio|video)/.+')
 
+BUFFER_SIZE = 2**14
+WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
 
 class ResponseMiddleware:
     '''Base class for response middlewares.
@@ -89,31 +97,70 @@ class AccessControl(ResponseMiddleware):
 
 class GZipMiddleware(ResponseMiddleware):
     """A :class:`ResponseMiddleware` for compressing content if the request
-allows gzip compression. It sets the Vary header accordingly.
-
-The compression implementation is from
-http://jython.xhaus.com/http-compression-in-python-and-jython
+allows gzip or deflate compression. It sets the Vary header accordingly.
+
+Responses with a known length are compressed in one go while streamed
+responses are compressed incrementally, chunk by chunk, as they are
+written to the client (using chunked transfer encoding).
+
+:param min_length: responses shorter than this are not compressed
+:param level: compression level, from 1 (fastest) to 9 (smallest)
+:param content_types: optional dictionary mapping content types to a
+    ``(level, min_length)`` two-elements tuple overriding the defaults.
+    Keys can be a full content type (``application/json``) or a
+    major type (``text/*``). A level of ``0`` switches compression off.
     """
-    def __init__(self, min_length=200):
+    def __init__(self, min_length=200, level=6, content_types=None):
         self.min_length = min_length
+        self.level = level
+        self.content_types = dict(content_types or ())
+
+    def options(self, ctype):
+        """The ``(level, min_length)`` for a content type"""
+        if self.content_types:
+            ctype = ctype.split(';')[0].strip()
+            options = self.content_types.get(ctype)
+            if options is None:
+                options = self.content_types.get(
+                    '%s/*' % ctype.split('/')[0])
+            if options is not None:
+                return options
+        return self.level, self.min_length
+
+    def encoding(self, environ):
+        ae = environ.get('HTTP_ACCEPT_ENCODING', '')
+        if re_accepts_gzip.search(ae):
+            return 'gzip'
+        elif re_accepts_deflate.search(ae):
+            return 'deflate'
 
     def available(self, environ, response):
         # It's not worth compressing non-OK or really short responses
         if response.status_code == 200:
-            if (response.length() or 0) < self.min_length:
-                return False
             headers = response.headers
-            ctype = headers.get('Content-Type', '').lower()
             # Avoid gzipping if we've already got a content-encoding.
             if 'Content-Encoding' in headers:
                 return False
+            ctype = headers.get('Content-Type', '').lower()
+            level, min_length = self.options(ctype)
+            if not level:
+                return False
+            length = response.length()
+            if length is None:
+                # streamed response, files are better served via sendfile
+                if file_wrapper(response):
+                    return False
+                length = headers.get('Content-Length')
+                if length is not None and int(length) < min_length:
+                    return False
+            elif length < min_length:
+                return False
             # MSIE have issues with gzipped response of various
             # content types.
             if "msie" in environ.get('HTTP_USER_AGENT', '').lower():
                 if not ctype.startswith("text/") or "javascript" in ctype:
                     return False
-            ae = environ.get('HTTP_ACCEPT_ENCODING', '')
-            if not re_accepts_gzip.search(ae):
+            if not self.encoding(environ):
                 return False
             if re_media_type.match(ctype):
                 return False
@@ -121,9 +168,17 @@ http://jython.xhaus.com/http-compression-in-python-and-jython
 
     def execute(self, environ, response):
         headers = response.headers
+        encoding = self.encoding(environ)
+        level = self.options(headers.get('Content-Type', '').lower())[0]
+        compressor = zlib.compressobj(level, zlib.DEFLATED, WBITS[encoding])
         headers.add('Vary', 'Accept-Encoding')
-        response.content = self.compress_string(b''.join(response.content))
-        response.headers['Content-Encoding'] = 'gzip'
+        if response.is_streamed():
+            headers.pop('Content-Length', None)
+            response.content = CompressedStream(response.content, compressor)
+        else:
+            stream = CompressedStream(response.content, compressor)
+            response.content = b''.join(stream)
+        headers['Content-Encoding'] = encoding
 
     def compress_string(self, s):
         zbuf = BytesIO()
@@ -131,3 +186,41 @@ http://jython.xhaus.com/http-compression-in-python-and-jython
         zfile.write(s)
         zfile.close()
         return zbuf.getvalue()
+
+
+class CompressedStream:
+    """Compress an iterable over bytes with a ``zlib`` compressor.
+
+    Small chunks are coalesced into a buffer of :data:`BUFFER_SIZE` bytes
+    before being compressed. Asynchronous chunks are compressed once
+    available and flushed so that data trickling in reaches the client
+    without waiting for the compressor buffer to fill.
+    """
+    def __init__(self, iterable, compressor):
+        self.iterable = iterable
+        self.compressor = compressor
+
+    def __iter__(self):
+        compress = self.compressor.compress
+        buffer = bytearray()
+        for chunk in self.iterable:
+            if not isinstance(chunk, bytes) and isawaitable(chunk):
+                if buffer:
+                    yield compress(buffer)
+                    buffer.clear()
+                yield self._compress(chunk)
+            else:
+                buffer.extend(chunk)
+                if len(buffer) >= BUFFER_SIZE:
+                    yield compress(buffer)
+                    buffer.clear()
+        yield compress(buffer) + self.compressor.flush()
+
+    def close(self):
+        if hasattr(self.iterable, 'close'):
+            self.iterable.close()
+
+    async def _compress(self, chunk):
+        chunk = await chunk
+        compressor = self.compressor
+        return compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
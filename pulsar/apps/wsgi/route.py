@@ -1,4 +1,5 @@
 import re
+from uuid import UUID
 from collections import namedtuple
 
 from pulsar.api import Http404
@@ -204,12 +205,17 @@ class Route:
         a set of  variable names for this route. If the route has no
         variables, the set is empty.
 
+    .. attribute:: is_re
+
+        If ``True``, static bits of the :attr:`rule` are regular expressions.
+
     .. _werkzeug: https://github.com/mitsuhiko/werkzeug
     '''
 
     def __init__(self, rule, defaults=None, is_re=False):
         rule = remove_double_slash('/%s' % rule)
         self.defaults = defaults if defaults is not None else {}
+        self.is_re = is_re
         self.is_leaf = not rule.endswith('/')
         self.rule = rule[1:]
         self.variables = set(map(str, self.defaults))
@@ -511,6 +517,21 @@ class FloatConverter(NumberConverter):
         super().__init__(0, min, max)
 
 
+class UUIDConverter(BaseConverter):
+    """This converter only accepts UUID strings::
+
+        Rule('/object/<uuid:identifier>')
+    """
+    regex = (r'[A-Fa-f0-9]{8}-[A-Fa-f0-9]{4}-'
+             r'[A-Fa-f0-9]{4}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{12}')
+
+    def to_python(self, value):
+        return UUID(value)
+
+    def to_url(self, value):
+        return str(value)
+
+
 def parse_converter_args(argstr):
     argstr += ','
     args = []
@@ -548,5 +569,6 @@ _CONVERTERS = {
     'any':              AnyConverter,
     'path':             PathConverter,
     'int':              IntegerConverter,
-    'float':            FloatConverter
+    'float':            FloatConverter,
+    'uuid':             UUIDConverter
 }
@@ -3,17 +3,18 @@ import re
 import stat
 import mimetypes
 from collections import OrderedDict
-from functools import partial, lru_cache
+from functools import partial
 
 from email.utils import parsedate_tz, mktime_tz
 
-from pulsar.utils.httpurl import CacheControl
+from pulsar.utils.httpurl import CacheControl, choose_boundary
 from pulsar.utils.slugify import slugify
 from pulsar.utils.security import digest
 from pulsar.utils.lib import http_date
 from pulsar.api import Http404, MethodNotAllowed
 
 from .route import Route
+from .resolver import RouteTrie
 from .utils import wsgi_request
 from .content import Html
 
@@ -164,7 +165,9 @@ class Router(metaclass=RouterType):
 
     '''
     _creation_count = 0
+    _version = 0
     _parent = None
+    _trie = None
     name = None
     SkipRoute = SkipRoute
 
@@ -319,9 +322,19 @@ class Router(metaclass=RouterType):
             except self.SkipRoute:
                 pass
 
-    @lru_cache(maxsize=1024)
     def resolve(self, url, method):
-        return self._resolve(url[1:], method.lower())
+        '''Resolve a ``url`` for a ``method`` and return a ``Handler``
+        or ``None`` if the url could not be resolved.
+
+        The router tree is compiled into a :class:`.RouteTrie` the first
+        time this method is called and every time routers are added or
+        removed from the tree afterwards.
+        '''
+        trie = self._trie
+        if trie is None or trie.version != Router._version:
+            trie = RouteTrie(self, Router._version)
+            self._trie = trie
+        return trie.resolve(url[1:], method.lower())
 
     def _resolve(self, path, method, urlargs=None):
         '''Resolve a path and return a ``(handler, urlargs)`` tuple or
@@ -335,13 +348,7 @@ class Router(metaclass=RouterType):
             path = match.pop('__remaining__')
             urlargs = update_args(urlargs, match)
         else:
-            handler = getattr(self, method, None)
-            if handler is None:
-                raise MethodNotAllowed
-            response_wrapper = self.response_wrapper
-            if response_wrapper:
-                handler = partial(response_wrapper, handler)
-            return Handler(self, handler, update_args(urlargs, match))
+            return self._handler(method, update_args(urlargs, match))
         #
         for handler in self.routes:
             view_args = handler._resolve(path, method, urlargs)
@@ -349,6 +356,15 @@ class Router(metaclass=RouterType):
                 continue
             return view_args
 
+    def _handler(self, method, urlargs):
+        handler = getattr(self, method, None)
+        if handler is None:
+            raise MethodNotAllowed
+        response_wrapper = self.response_wrapper
+        if response_wrapper:
+            handler = partial(response_wrapper, handler)
+        return Handler(self, handler, urlargs)
+
     def add_route(self, router, index=None):
         '''Add a new :class:`Router` to the :attr:`routes` list.
         '''
@@ -370,6 +386,7 @@ class Router(metaclass=RouterType):
             self.routes.append(router)
         else:
             self.routes.insert(index, router)
+        Router._version += 1
         return router
     add_child = add_route
 
@@ -378,6 +395,7 @@ class Router(metaclass=RouterType):
         if router in self.routes:
             self.routes.remove(router)
             router._parent = None
+            Router._version += 1
 
     def get_route(self, name):
         '''Get a child :class:`Router` by its :attr:`name`.
@@ -499,11 +517,16 @@ class MediaRouter(Router, MediaMixin):
     .. attribute:: default_file
 
         The default file to serve when a directory is requested.
+
+    .. attribute:: cache
+
+        Optional :class:`.AssetCache` for serving small files from memory.
     '''
     def __init__(self, rule, path=None, show_indexes=False,
                  default_suffix=None, default_file='index.html',
-                 serve_only=None, **params):
+                 serve_only=None, cache=None, **params):
         super().__init__('%s/<path:path>' % rule, **params)
+        self.cache = cache
         self._serve_only = set(serve_only or ())
         self._default_suffix = default_suffix
         self._default_file = default_file
@@ -523,6 +546,15 @@ class MediaRouter(Router, MediaMixin):
             if suffix not in self._serve_only:
                 raise self.SkipRoute
 
+        cache = self.cache
+        if cache is not None:
+            if request.get('HTTP_RANGE'):
+                cache = None
+            else:
+                asset = cache.get(request.path)
+                if asset is not None:
+                    return cache.response(request, asset, self.cache_control)
+
         fullpath = self.filesystem_path(request)
 
         if not self._serve_only:
@@ -548,6 +580,10 @@ class MediaRouter(Router, MediaMixin):
                 else:
                     raise Http404
         #
+        if cache is not None:
+            asset = cache.load(request.path, fullpath)
+            if asset is not None:
+                return cache.response(request, asset, self.cache_control)
         try:
             return self.serve_file(request, fullpath)
         except Http404:
@@ -588,6 +624,45 @@ def was_modified_since(header=None, mtime=0, size=0):
     return True
 
 
+def parse_range_header(header, size):
+    """Parse the value of a ``Range`` header for a resource of ``size`` bytes
+
+    :return: a list of ``(start, end)`` inclusive byte positions or ``None``
+        if the header is not a valid ``bytes`` range specifier.
+        An empty list is returned when no range is satisfiable.
+    """
+    if not header:
+        return
+    unit, _, specs = header.partition('=')
+    if unit.strip().lower() != 'bytes':
+        return
+    ranges = []
+    for spec in specs.split(','):
+        start, sep, end = spec.strip().partition('-')
+        if not sep:
+            return
+        try:
+            if not start:
+                # suffix range: last ``end`` bytes
+                length = int(end)
+                if length <= 0:
+                    continue
+                start, end = max(size - length, 0), size - 1
+            else:
+                start = int(start)
+                if not end:
+                    end = size - 1
+                elif int(end) < start:
+                    return
+                else:
+                    end = int(end)
+        except ValueError:
+            return
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+    return ranges
+
+
 def file_response(request, filepath, block=None, status_code=None,
                   content_type=None, encoding=None, cache_control=None):
     """Utility for serving a local file
@@ -601,6 +676,10 @@ def file_response(request, filepath, block=None, status_code=None,
             def get(self, request):
                 return wsgi.file_response(request, "<filepath>")
 
+    ``Range`` requests are supported: a single range is served with a
+    ``206`` response while several ranges are served with a ``206``
+    ``multipart/byteranges`` response.
+
     :param request: Wsgi request
     :param filepath: full path of file to serve
     :param block: Optional block size (default 1MB)
@@ -619,17 +698,71 @@ def file_response(request, filepath, block=None, status_code=None,
         else:
             if not content_type:
                 content_type, encoding = mimetypes.guess_type(filepath)
+            etag = digest('modified: %d - size: %d' % (modified, size))
+            last_modified = http_date(modified)
+            ranges = None
+            if not status_code:
+                response.headers['Accept-Ranges'] = 'bytes'
+                if_range = request.get('HTTP_IF_RANGE')
+                if not if_range or if_range in ('"%s"' % etag, last_modified):
+                    ranges = parse_range_header(request.get('HTTP_RANGE'),
+                                                size)
+            if ranges is not None and not ranges:
+                response.status_code = 416
+                response.headers['Content-Range'] = 'bytes */%d' % size
+                return response
             file = open(filepath, 'rb')
-            response.headers['content-length'] = str(size)
-            response.content = file_wrapper(file, block)
+            if not ranges:
+                response.headers['content-length'] = str(size)
+                response.content = file_wrapper(file, block)
+            elif len(ranges) == 1:
+                start, end = ranges[0]
+                response.status_code = 206
+                response.headers['Content-Range'] = 'bytes %d-%d/%d' % (
+                    start, end, size)
+                response.headers['content-length'] = str(end - start + 1)
+                response.content = file_wrapper(
+                    file, block, [(start, end - start + 1)])
+            else:
+                boundary = choose_boundary()
+                parts, length = byteranges(ranges, size, boundary,
+                                           content_type)
+                response.status_code = 206
+                response.headers['content-length'] = str(length)
+                response.content = file_wrapper(file, block, parts)
+                content_type = 'multipart/byteranges; boundary=%s' % boundary
+                encoding = None
             response.content_type = content_type
             response.encoding = encoding
             if status_code:
                 response.status_code = status_code
             else:
-                response.headers["Last-Modified"] = http_date(modified)
+                response.headers["Last-Modified"] = last_modified
             if cache_control:
-                etag = digest('modified: %d - size: %d' % (modified, size))
                 cache_control(response.headers, etag=etag)
         return response
     raise Http404
+
+
+def byteranges(ranges, size, boundary, content_type=None):
+    """Build the parts of a ``multipart/byteranges`` body
+
+    :return: a two-elements tuple containing the list of parts for
+        a :class:`.FileWrapper` and the total length of the body
+    """
+    parts = []
+    length = 0
+    for start, end in ranges:
+        header = ['--%s' % boundary]
+        if content_type:
+            header.append('Content-Type: %s' % content_type)
+        header.append('Content-Range: bytes %d-%d/%d' % (start, end, size))
+        header = ('%s\r\n\r\n' % '\r\n'.join(header)).encode('ascii')
+        if parts:
+            header = b'\r\n' + header
+        count = end - start + 1
+        parts.extend((header, (start, count)))
+        length += len(header) + count
+    parts.append(('\r\n--%s--\r\n' % boundary).encode('ascii'))
+    length += len(parts[-1])
+    return parts, length
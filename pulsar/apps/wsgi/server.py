@@ -9,23 +9,23 @@ HTTP Protocol Consumer
 """
 import os
 import sys
+from functools import partial
 
 from pulsar.api import BadRequest, ProtocolConsumer, isawaitable
 from pulsar.utils.lib import WsgiProtocol
 from pulsar.utils import http
 from pulsar.async.timeout import timeout
 
-from .utils import handle_wsgi_error, log_wsgi_info, LOGGER
+from .utils import handle_wsgi_error, log_wsgi_info, AbortWsgi, LOGGER
 from .formdata import HttpBodyReader
-from .wrappers import FileWrapper, close_object
+from .wrappers import FileWrapper, file_wrapper, close_object
 from .headers import CONTENT_LENGTH
+from .http2 import Http2ServerProtocol, PREFACE, h2c_settings
 
 
 PULSAR_TEST = 'PULSAR_TEST'
-
-
-class AbortWsgi(Exception):
-    pass
+SWITCHING_PROTOCOLS = (b'HTTP/1.1 101 Switching Protocols\r\n'
+                       b'Connection: Upgrade\r\nUpgrade: h2c\r\n\r\n')
 
 
 class HttpServerResponse(ProtocolConsumer):
@@ -36,19 +36,28 @@ class HttpServerResponse(ProtocolConsumer):
         The wsgi callable handling requests.
     '''
     ONE_TIME_EVENTS = ProtocolConsumer.ONE_TIME_EVENTS + ('on_headers',)
+    _preface = b''
 
     def create_request(self):
+        # loop time when the request headers are complete, set by the
+        # WsgiProtocol before adding this consumer to the pipeline
+        self.queued = None
         self.parse_url = http.parse_url
         self.create_parser = http.HttpRequestParser
         self.cfg = self.producer.cfg
         self.logger = LOGGER
+        self.access_log = getattr(self.producer, 'access_log', None)
+        # only the first request of a connection can be an HTTP/2 preface
+        self.prior_knowledge = (self.cfg.http2 and
+                                self.connection.processed == 1)
         return WsgiProtocol(self, self.producer.cfg, FileWrapper)
 
     def body_reader(self, environ):
         return HttpBodyReader(
             self.connection.transport,
             self.producer.cfg.stream_buffer,
-            environ)
+            environ,
+            self.connection.write)
 
     def __repr__(self):
         return '%s - %d - %s' % (
@@ -61,6 +70,18 @@ class HttpServerResponse(ProtocolConsumer):
     ########################################################################
     #    INTERNALS
     def feed_data(self, data):
+        if self.prior_knowledge:
+            if self._preface:
+                data = self._preface + data
+                self._preface = b''
+            if PREFACE.startswith(data[:len(PREFACE)]):
+                if len(data) < len(PREFACE):
+                    # not enough data to tell HTTP/2 from HTTP/1
+                    self._preface = bytes(data)
+                    return
+                self.prior_knowledge = False
+                return self._upgrade_h2(data)
+            self.prior_knowledge = False
         try:
             return self.request.parser.feed_data(data)
         except http.HttpParserUpgrade:
@@ -85,11 +106,22 @@ class HttpServerResponse(ProtocolConsumer):
         producer = self.producer
         wsgi_callable = producer.wsgi_callable
         keep_alive = producer.keep_alive or None
+        timer = producer.timer
         environ = wsgi.environ
         exc_info = None
         response = None
         done = False
+        size = 0
         #
+        if self.cfg.http2:
+            settings = h2c_settings(environ)
+            if settings is not None:
+                self.connection.write(SWITCHING_PROTOCOLS)
+                return self._upgrade_h2(None, settings, environ)
+        retry_after = producer.admit(self.queued)
+        if retry_after:
+            return self._shed(retry_after)
+        producer.inflight += 1
         try:
             while not done:
                 done = True
@@ -101,12 +133,12 @@ class HttpServerResponse(ProtocolConsumer):
                         response = wsgi_callable(environ,
                                                  wsgi.start_response)
                         if isawaitable(response):
-                            with timeout(loop, keep_alive):
+                            with timeout(loop, keep_alive, timer):
                                 response = await response
                     else:
                         response = handle_wsgi_error(environ, exc_info)
                         if isawaitable(response):
-                            with timeout(loop, keep_alive):
+                            with timeout(loop, keep_alive, timer):
                                 response = await response
                     #
                     if exc_info:
@@ -117,14 +149,28 @@ class HttpServerResponse(ProtocolConsumer):
                         )
                     #
                     # Do the actual writing
-                    for chunk in response:
-                        if isawaitable(chunk):
-                            with timeout(loop, keep_alive):
-                                chunk = await chunk
-                        waiter = wsgi.write(chunk)
-                        if waiter:
-                            with timeout(loop, keep_alive):
-                                await waiter
+                    wrapper = file_wrapper(response)
+                    if (wrapper and
+                            await self._sendfile(wrapper, keep_alive)):
+                        size = int(wsgi.headers.get(CONTENT_LENGTH, 0))
+                    elif wrapper:
+                        # read the file in the executor
+                        async for chunk in wrapper:
+                            size += len(chunk)
+                            waiter = wsgi.write(chunk)
+                            if waiter:
+                                with timeout(loop, keep_alive, timer):
+                                    await waiter
+                    else:
+                        for chunk in response:
+                            if isawaitable(chunk):
+                                with timeout(loop, keep_alive, timer):
+                                    chunk = await chunk
+                            size += len(chunk)
+                            waiter = wsgi.write(chunk)
+                            if waiter:
+                                with timeout(loop, keep_alive, timer):
+                                    await waiter
                     #
                     # make sure we write headers and last chunk if needed
                     wsgi.write(b'', True)
@@ -152,17 +198,70 @@ class HttpServerResponse(ProtocolConsumer):
                                 'No keep alive, closing connection %s',
                                 self.connection
                             )
+                    if self.access_log:
+                        self.access_log.log(environ, wsgi.status, size,
+                                            loop.time() - self.queued)
                     self.event('post_request').fire()
                     if not wsgi.keep_alive:
                         self.connection.close()
                 finally:
                     close_object(response)
         finally:
+            producer.inflight -= 1
             # help GC
             if PULSAR_TEST not in os.environ:
                 environ.clear()
             self = None
 
+    def _upgrade_h2(self, data, settings=None, environ=None):
+        """Switch the connection to HTTP/2
+
+        Return ``data`` so that it is fed to the
+        :class:`.Http2ServerProtocol`
+        """
+        self.connection.upgrade(
+            partial(Http2ServerProtocol.create, settings, environ))
+        self.event('post_request').fire()
+        return data
+
+    def _shed(self, retry_after):
+        """Reject the request with a 503 response and close the connection
+        """
+        wsgi = self.request
+        wsgi.start_response('503 Service Unavailable',
+                            [('Retry-After', str(retry_after)),
+                             (CONTENT_LENGTH, '0')])
+        wsgi.write(b'', True)
+        if self.access_log:
+            self.access_log.log(wsgi.environ, wsgi.status, 0,
+                                self._loop.time() - self.queued)
+        self.event('post_request').fire()
+        self.connection.close()
+
+    async def _sendfile(self, wrapper, keep_alive):
+        """Send a :class:`.FileWrapper` using the ``sendfile`` system call.
+
+        Headers are written first, return ``False`` if the file
+        cannot be sent via ``sendfile`` (chunked responses, TLS transports)
+        so that the wrapper is iterated instead.
+        """
+        wsgi = self.request
+        if wsgi.environ['REQUEST_METHOD'] == 'HEAD':
+            return False
+        waiter = wsgi.write(b'')
+        if waiter:
+            with timeout(self._loop, keep_alive, self.producer.timer):
+                await waiter
+        connection = self.connection
+        if wsgi.chunked:
+            return False
+        # headers may be waiting in the connection output buffer
+        connection.flush()
+        if not wrapper.can_sendfile(connection.transport):
+            return False
+        await wrapper.sendfile(connection)
+        return True
+
     def _cancel_task(self, task):
         task.cancel()
 
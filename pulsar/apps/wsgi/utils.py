@@ -35,6 +35,10 @@ error_css = '''
 _RequestClass = None
 
 
+class AbortWsgi(Exception):
+    pass
+
+
 def wsgi_request(environ, app_handler=None, urlargs=None):
     global _RequestClass
     return _RequestClass(environ, app_handler=app_handler, urlargs=urlargs)
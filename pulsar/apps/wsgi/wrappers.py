@@ -46,11 +46,14 @@ Wsgi File Wrapper
 .. _AJAX: http://en.wikipedia.org/wiki/Ajax_(programming)
 .. _TLS: http://en.wikipedia.org/wiki/Transport_Layer_Security
 """
+import os
+from asyncio import get_event_loop
+from asyncio.selector_events import BaseSelectorEventLoop
 from functools import partial
 from inspect import isawaitable
 from http.cookies import SimpleCookie
 
-from pulsar.api import chain_future, HttpException, create_future
+from pulsar.api import chain_future, HttpException
 from pulsar.utils.lib import WsgiResponse, wsgi_cached
 from pulsar.utils.system import json
 from pulsar.utils.httpurl import (
@@ -435,19 +438,236 @@ class FileWrapper:
     Available directly from the ``wsgi.file_wrapper`` key in the WSGI environ
     dictionary. Alternatively one can use the :func:`~.file_response`
     high level function for serving local files.
+
+    When the response is sent over a plain TCP transport, the
+    :class:`.HttpServerResponse` sends the file with :meth:`sendfile`
+    so that data is copied by the kernel rather than by python.
+    Otherwise the server iterates the file asynchronously, ``async for``,
+    and each block is read in the event loop executor. Plain iteration
+    reads blocks synchronously, as any WSGI iterable.
+
+    :param file: a file-like object opened in binary mode
+    :param block: the size of blocks read (or sent) at each iteration
+    :param ranges: optional list of parts to send. Each part is either
+        ``bytes`` or a two-elements tuple ``(offset, count)`` specifying
+        a segment of the file. When not provided the whole file
+        is sent, starting from its current position.
     """
-    def __init__(self, file, block=None):
+    def __init__(self, file, block=None, ranges=None):
         self.file = file
         self.block = max(block or ONEMB, MAX_BUFFER_SIZE)
+        self.ranges = ranges
 
     def __iter__(self):
+        reads = self._reads()
+        data = None
         while True:
-            data = self.file.read(self.block)
-            if not data:
+            try:
+                item = reads.send(data)
+            except StopIteration:
                 break
-            future = create_future()
-            future.set_result(data)
-            yield future
+            if isinstance(item, bytes):
+                data = None
+                yield item
+            else:
+                data = self.file.read(item)
+                if data:
+                    yield data
+
+    def __aiter__(self):
+        return FileReader(self)
+
+    def parts(self):
+        """Iterator over the parts of this file wrapper
+        """
+        return iter(self.ranges or ((None, None),))
+
+    def _reads(self):
+        # generator of the bytes parts and of the sizes of the blocks to
+        # read, the data read is sent back to it
+        for part in self.parts():
+            if isinstance(part, bytes):
+                yield part
+                continue
+            offset, count = part
+            if offset is not None:
+                self.file.seek(offset)
+            if count is None:
+                count = self._remaining()
+            while count is None or count > 0:
+                data = yield (self.block if count is None else
+                              min(count, self.block))
+                if not data:
+                    break
+                if count is not None:
+                    count -= len(data)
+
+    def _remaining(self):
+        try:
+            file = self.file
+            return os.fstat(file.fileno()).st_size - file.tell()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    def can_sendfile(self, transport):
+        """Check if this file wrapper can be sent with :meth:`sendfile`
+        over ``transport``.
+
+        Only plain (not TLS) socket transports with an empty write buffer
+        are supported, and the :attr:`file` must have a valid file
+        descriptor.
+        """
+        if not hasattr(os, 'sendfile'):
+            return False
+        if transport.get_extra_info('sslcontext'):
+            return False
+        if not transport.get_extra_info('socket'):
+            return False
+        loop = get_event_loop()
+        if not (hasattr(loop, 'sendfile') or
+                isinstance(loop, BaseSelectorEventLoop)):
+            return False
+        if transport.get_write_buffer_size():
+            return False
+        try:
+            self.file.fileno()
+        except (AttributeError, OSError, ValueError):
+            return False
+        return True
+
+    async def sendfile(self, connection):
+        """Send the file to the ``connection`` transport with
+        the ``sendfile`` system call.
+
+        :param connection: the :class:`.Connection` serving the response
+        """
+        file = self.file
+        for part in self.parts():
+            if isinstance(part, bytes):
+                await _sendall(connection, part)
+                continue
+            offset, count = part
+            if offset is None:
+                offset = file.tell()
+            if count is None:
+                count = self._remaining()
+            while count > 0:
+                sent = await _sendfile(connection, file, offset,
+                                       min(count, self.block))
+                if not sent:
+                    break
+                offset += sent
+                count -= sent
+                connection.changed()
+            file.seek(offset)
 
     def close(self):
         close_object(self.file)
+
+
+class FileReader:
+    """An asynchronous iterator over the blocks of a :class:`FileWrapper`
+
+    Blocks are read in the event loop executor.
+    """
+    def __init__(self, wrapper):
+        self.wrapper = wrapper
+        self._loop = get_event_loop()
+        self._reads = wrapper._reads()
+        self._data = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            try:
+                item = self._reads.send(self._data)
+            except StopIteration:
+                raise StopAsyncIteration from None
+            self._data = None
+            if isinstance(item, bytes):
+                return item
+            self._data = data = await self._loop.run_in_executor(
+                None, self.wrapper.file.read, item)
+            if data:
+                return data
+
+
+def file_wrapper(response):
+    """Return the :class:`FileWrapper` of a WSGI ``response`` if available
+    """
+    if isinstance(response, FileWrapper):
+        return response
+    content = getattr(response, 'content', None)
+    if isinstance(content, FileWrapper):
+        return content
+
+
+async def _sendfile(connection, file, offset, count):
+    loop = connection._loop
+    transport = connection.transport
+    if hasattr(loop, 'sendfile'):   # python 3.7 or above
+        return await loop.sendfile(transport, file, offset, count)
+    fd = transport.get_extra_info('socket').fileno()
+    while True:
+        if transport.is_closing():
+            raise ConnectionResetError(
+                'Transport closed - cannot write on %s' % connection
+            )
+        try:
+            return os.sendfile(fd, file.fileno(), offset, count)
+        except (BlockingIOError, InterruptedError):
+            await _writable(connection, fd)
+
+
+async def _sendall(connection, data):
+    loop = connection._loop
+    transport = connection.transport
+    if hasattr(loop, 'sendfile'):
+        waiter = connection.write(data)
+        if waiter:
+            await waiter
+        return
+    sock = transport.get_extra_info('socket')
+    data = memoryview(data)
+    while data:
+        if transport.is_closing():
+            raise ConnectionResetError(
+                'Transport closed - cannot write on %s' % connection
+            )
+        try:
+            sent = sock.send(data)
+        except (BlockingIOError, InterruptedError):
+            await _writable(connection, sock.fileno())
+        else:
+            data = data[sent:]
+
+
+def _writable(connection, fd):
+    """A future called back once the socket ``fd`` is writable or
+    the ``connection`` is lost.
+
+    The socket belongs to the connection transport which has no pending
+    writes, hence the private selector API is used (the public one refuses
+    file descriptors owned by transports).
+    """
+    loop = connection._loop
+    lost = connection.event('connection_lost')
+    waiter = loop.create_future()
+
+    def ready(*args, **kw):
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def done(_):
+        loop._remove_writer(fd)
+        lost.unbind(ready)
+
+    if lost.fired():
+        ready()
+    else:
+        lost.bind(ready)
+        loop._add_writer(fd, ready)
+    waiter.add_done_callback(done)
+    return waiter
@@ -1,4 +1,5 @@
 import logging
+from collections import OrderedDict, deque
 from functools import reduce
 import asyncio
 
@@ -6,11 +7,118 @@ from .timeout import timeout
 
 from .futures import AsyncObject, Bench
 from .protocols import Producer
+from .resolver import get_resolver
 
 
 logger = logging.getLogger('pulsar.clients')
 
 
+class ConnectionLimit:
+    '''A limit on the number of connections opened by a group of
+    :class:`Pool`.
+
+    Pools sharing a limit acquire a slot before creating a new connection,
+    the slot is released once the connection is lost. When no slot is
+    available, the idle connection least recently used by any pool of the
+    group is closed, and clients wait for a slot in first-in first-out
+    order.
+
+    .. attribute:: max_connections
+
+        Maximum number of open connections
+
+    .. attribute:: open
+
+        Number of open connections
+
+    .. attribute:: peak
+
+        Largest number of connections open at the same time
+
+    .. attribute:: evictions
+
+        Number of idle connections closed to free a slot
+    '''
+    def __init__(self, max_connections, loop=None):
+        self.max_connections = max_connections
+        self.open = 0
+        self.peak = 0
+        self.evictions = 0
+        self._loop = loop or asyncio.get_event_loop()
+        self._waiters = deque()
+        self._pools = OrderedDict()
+
+    def __repr__(self):
+        return '%s(%d/%d)' % (self.__class__.__name__, self.open,
+                              self.max_connections)
+    __str__ = __repr__
+
+    @property
+    def waiting(self):
+        '''Number of clients waiting for a connection slot
+        '''
+        return len(self._waiters)
+
+    def register(self, pool):
+        self._pools[pool] = None
+
+    def unregister(self, pool):
+        self._pools.pop(pool, None)
+
+    def touch(self, pool):
+        '''Mark ``pool`` as the most recently used
+        '''
+        if pool in self._pools:
+            self._pools.move_to_end(pool)
+
+    async def acquire(self):
+        '''Acquire a slot for a new connection
+
+        Return ``True`` if the slot was not available straight away
+        '''
+        if self.open < self.max_connections and not self._waiters:
+            self._opened()
+            return False
+        waiter = self._loop.create_future()
+        self._waiters.append(waiter)
+        self._evict()
+        try:
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over to this waiter, pass it on
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+        return True
+
+    def release(self, *args, **kw):
+        '''Release a slot
+        '''
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.open -= 1
+
+    def _opened(self):
+        self.open += 1
+        if self.open > self.peak:
+            self.peak = self.open
+
+    def _evict(self):
+        for pool in self._pools:
+            if pool._evict():
+                self.evictions += 1
+                return True
+        return False
+
+
 class Pool(AsyncObject):
     '''An asynchronous pool of open connections.
 
@@ -19,7 +127,8 @@ class Pool(AsyncObject):
 
     This class is not thread safe.
     '''
-    def __init__(self, creator, pool_size=10, loop=None, timeout=None, **kw):
+    def __init__(self, creator, pool_size=10, loop=None, timeout=None,
+                 limit=None, **kw):
         '''
         Construct an asynchronous Pool.
 
@@ -33,6 +142,9 @@ class Pool(AsyncObject):
 
         :param timeout: The number of seconds to wait before giving up
           on returning a connection. Defaults to 30.
+
+        :param limit: optional :class:`ConnectionLimit` shared with other
+          pools.
         '''
         self._creator = creator
         self._closed = False
@@ -42,6 +154,15 @@ class Pool(AsyncObject):
         self._loop = self._queue._loop
         self._logger = logger
         self._in_use_connections = set()
+        self._limit = limit
+        self.created = 0
+        self.reused = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.last_used = self._loop.time()
+        if limit is not None:
+            limit.register(self)
 
     @property
     def pool_size(self):
@@ -74,6 +195,27 @@ class Pool(AsyncObject):
         """
         return bool(self._closed)
 
+    @property
+    def open(self):
+        '''Number of open connections, in use or available
+        '''
+        return self.in_use + self.available
+
+    def info(self):
+        used = self.created + self.reused
+        return dict(pool_size=self.pool_size,
+                    open=self.open,
+                    in_use=self.in_use,
+                    available=self.available,
+                    connecting=self._connecting,
+                    created=self.created,
+                    reused=self.reused,
+                    reuse_ratio=self.reused / used if used else 0.0,
+                    waits=self.waits,
+                    wait_time=self.wait_time,
+                    max_wait=self.max_wait,
+                    idle=self._loop.time() - self.last_used)
+
     def __contains__(self, connection):
         if connection not in self._in_use_connections:
             return connection in self._queue._queue
@@ -111,24 +253,30 @@ class Pool(AsyncObject):
             for connection in in_use:
                 if connection:
                     waiters.append(connection.close())
+            if self._limit is not None:
+                self._limit.unregister(self)
             self._closed = asyncio.gather(*waiters, loop=self._loop)
         return self._closed
 
     async def _get(self):
         queue = self._queue
+        created = False
         # grab the connection without waiting, important!
         if queue.qsize():
             connection = queue.get_nowait()
         # wait for one to be available
         elif self.in_use + self._connecting >= queue._maxsize:
+            start = self._loop.time()
             with timeout(self._loop, self._timeout):
                 connection = await queue.get()
+            self._waited(start)
         else:   # must create a new connection
             self._connecting += 1
             try:
-                connection = await self._creator()
+                connection = await self._create()
             finally:
                 self._connecting -= 1
+            created = True
         # None signal that a connection was removed form the queue
         # Go again
         if connection is None:
@@ -138,9 +286,59 @@ class Pool(AsyncObject):
                 connection = await self._get()
             else:
                 self._in_use_connections.add(connection)
+                if created:
+                    self.created += 1
+                else:
+                    self.reused += 1
+        return connection
+
+    async def _create(self):
+        limit = self._limit
+        if limit is None:
+            return await self._creator()
+        start = self._loop.time()
+        with timeout(self._loop, self._timeout):
+            waited = await limit.acquire()
+        if waited:
+            self._waited(start)
+        try:
+            connection = await self._creator()
+        except BaseException:
+            limit.release()
+            raise
+        lost = connection.event('connection_lost')
+        if lost.fired():
+            limit.release()
+        else:
+            lost.bind(limit.release)
         return connection
 
+    def _waited(self, start):
+        wait = self._loop.time() - start
+        self.waits += 1
+        self.wait_time += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def _evict(self):
+        # close the least recently released available connection
+        queue = self._queue
+        while not self.closed and queue.qsize():
+            connection = queue.get_nowait()
+            if connection is not None and not connection.closed:
+                connection.close()
+                return True
+        return False
+
     def _put(self, conn, discard=False):
+        self.last_used = self._loop.time()
+        limit = self._limit
+        if limit is not None:
+            limit.touch(self)
+            if (conn and not discard and limit.waiting and
+                    not self._queue._getters):
+                # hand the connection slot over to a waiting client
+                conn.close()
+                discard = True
         if not self.closed:
             try:
                 # None signal that a connection was removed form the queue
@@ -237,6 +435,21 @@ class ClientMixin:
 class AbstractClient(Producer, ClientMixin):
     """A :class:`.Producer` for client connections.
     """
+    _resolver = None
+
+    @property
+    def resolver(self):
+        """The :class:`.Resolver` for host names of remote addresses
+
+        The shared resolver of the event loop unless set to a different one
+        """
+        resolver = self._resolver
+        return get_resolver(self._loop) if resolver is None else resolver
+
+    @resolver.setter
+    def resolver(self, resolver):
+        self._resolver = resolver
+
     def connect(self):
         '''Abstract method for creating a connection.
         '''
@@ -249,9 +462,11 @@ class AbstractClient(Producer, ClientMixin):
         loop = self._loop
         protocol_factory = protocol_factory or self.create_protocol
         if isinstance(address, tuple):
-            kwargs['host'] = address[0]
-            kwargs['port'] = address[1]
-        _, protocol = await loop.create_connection(protocol_factory, **kwargs)
+            _, protocol = await self.resolver.create_connection(
+                protocol_factory, address[0], address[1], **kwargs)
+        else:
+            _, protocol = await loop.create_connection(protocol_factory,
+                                                       **kwargs)
         event = protocol.event('connection_made')
         if not event.fired():
             await event.waiter()
@@ -2,6 +2,8 @@ import time
 
 from asyncio import Queue, CancelledError
 
+from .timeout import timer_wheel
+
 
 DEFAULT_LIMIT = 2**16
 
@@ -11,11 +13,18 @@ class FlowControl:
 
     This implements the protocol methods :meth:`pause_writing`,
     :meth:`resume_writing`.
+
+    Small writes are coalesced: they are collected in an output buffer
+    which is written to the transport, with a single ``write``, at the
+    end of the event loop iteration or once it reaches ``_limit`` bytes.
     """
+    _limit = DEFAULT_LIMIT
     _b_limit = 2*DEFAULT_LIMIT
     _paused = False
     _buffer_size = 0
     _waiter = None
+    _output = None
+    _output_size = 0
 
     def write(self, data):
         """Write ``data`` into the wire.
@@ -29,24 +38,39 @@ class FlowControl:
             )
         else:
             t = self.transport
-            if self._paused or self._buffer:
-                self._buffer.appendleft(data)
-                self._buffer_size += len(data)
-                self._write_from_buffer()
-                if self._buffer_size > 2 * self._b_limit:
-                    if self._waiter and not self._waiter.cancelled():
-                        self.logger.warning(
-                            '%s buffer size is %d: limit is %d ',
-                            self._buffer_size, self._b_limit
-                        )
-                    else:
-                        t.pause_reading()
-                        self._waiter = self._loop.create_future()
-            else:
+            output = self._output
+            if output:
+                output.append(bytes(data))
+                self._output_size += len(data)
+                if self._output_size >= self._limit:
+                    self.flush()
+            elif self._paused or self._buffer:
+                self._write_buffered(bytes(data))
+            elif len(data) >= self._limit:
                 t.write(data)
+            elif data:
+                # copy, the caller may reuse a mutable buffer
+                self._output = [bytes(data)]
+                self._output_size = len(data)
+                self._loop.call_soon(self.flush)
             self.changed()
             return self._waiter
 
+    def flush(self):
+        """Write the output buffer into the transport
+        """
+        output = self._output
+        if output:
+            self._output = None
+            data = output[0] if len(output) == 1 else b''.join(output)
+            t = self.transport
+            if not t or t.is_closing():
+                return
+            elif self._paused or self._buffer:
+                self._write_buffered(data)
+            else:
+                t.write(data)
+
     def pause_writing(self):
         '''Called by the transport when the buffer goes over the
         high-water mark
@@ -77,6 +101,20 @@ class FlowControl:
         self._write_from_buffer()
 
     # INTERNAL CALLBACKS
+    def _write_buffered(self, data):
+        self._buffer.appendleft(data)
+        self._buffer_size += len(data)
+        self._write_from_buffer()
+        if self._buffer_size > 2 * self._b_limit:
+            if self._waiter and not self._waiter.cancelled():
+                self.logger.warning(
+                    '%s buffer size is %d: limit is %d ',
+                    self, self._buffer_size, self._b_limit
+                )
+            else:
+                self.transport.pause_reading()
+                self._waiter = self._loop.create_future()
+
     def _write_from_buffer(self):
         t = self.transport
         if not t:
@@ -104,6 +142,10 @@ class FlowControl:
 
 class Timeout:
     '''Adds a timeout for idle connections to protocols
+
+    The timeout is scheduled in the :class:`.TimerWheel` of the
+    :attr:`producer`, if available, otherwise in the default timer wheel
+    of the event loop.
     '''
     _timeout = None
     _timeout_handler = None
@@ -137,7 +179,9 @@ class Timeout:
             self._cancel_timeout(_, exc=exc)
             timeout = timeout or self._timeout
             if timeout and not exc:
-                self._timeout_handler = self._loop.call_later(
+                timer = (getattr(self.producer, 'timer', None) or
+                         timer_wheel(self._loop))
+                self._timeout_handler = timer.call_later(
                     timeout, self._timed_out
                 )
 
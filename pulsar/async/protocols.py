@@ -1,16 +1,21 @@
 import asyncio
 from collections import deque
+from math import ceil
 
 import pulsar
 
 from .access import LOGGER
 from .mixins import FlowControl, Timeout, Pipeline, DEFAULT_LIMIT
-from .timeout import timeout
+from .timeout import timeout, timer_wheel
 from ..utils.lib import Protocol, Producer
 from ..utils.internet import nice_address, format_address
 
 
 CLOSE_TIMEOUT = 3
+# seconds before accepting again after an accept error, as asyncio does
+ACCEPT_RETRY_DELAY = 1
+ADMISSION_COUNTERS = ('shed_connections', 'shed_inflight', 'shed_lag',
+                      'paused_accepting')
 
 
 class PulsarProtocol(Protocol, FlowControl, Timeout, Pipeline):
@@ -46,6 +51,7 @@ class PulsarProtocol(Protocol, FlowControl, Timeout, Pipeline):
             if self.transport:
                 if self._loop.get_debug():
                     self.logger.debug('Closing connection %s', self)
+                self.flush()
                 if self.transport.can_write_eof():
                     try:
                         self.transport.write_eof()
@@ -67,6 +73,7 @@ class PulsarProtocol(Protocol, FlowControl, Timeout, Pipeline):
     def abort(self):
         """Abort by aborting the :attr:`transport`
         """
+        self._output = None
         if self.transport:
             self.transport.abort()
         self.event('connection_lost').fire()
@@ -146,26 +153,51 @@ class TcpServer(Producer):
         A :class:`.Server` managed by this Tcp wrapper.
 
         Available once the :meth:`start_serving` method has returned.
+
+    .. attribute:: max_connections
+
+        Stop accepting new connections when the number of concurrent
+        connections reaches this value
+
+    .. attribute:: max_inflight
+
+        Maximum number of requests processed concurrently,
+        checked by :meth:`admit`
+
+    .. attribute:: max_lag
+
+        Maximum time, in seconds, a request can wait before being processed,
+        checked by :meth:`admit`
     """
     ONE_TIME_EVENTS = ('start', 'stop')
 
     def __init__(self, protocol_factory, *, loop=None,
                  name=None, keep_alive=None, logger=None,
-                 max_requests=None, cfg=None,
+                 max_requests=None, cfg=None, timer_tick=None,
+                 max_connections=None, max_inflight=None, max_lag=None,
                  server_software=None, **kwargs):
         super().__init__(protocol_factory, loop=loop, name=name)
         self.keep_alive = max(keep_alive or 0, 0)
+        self.timer = timer_wheel(self._loop, timer_tick)
         self._concurrent_connections = set()
         self._server = None
         self._started = None
+        self._paused_sockets = None
+        self._sslcontext = None
+        self._backlog = 100
         self.max_requests = max_requests
+        self.max_connections = max_connections or 0
+        self.max_inflight = max_inflight or 0
+        self.max_lag = max_lag or 0
+        self.inflight = 0
+        self.admission = dict(((key, 0) for key in ADMISSION_COUNTERS))
         self.logger = logger or LOGGER
         self.cfg = cfg
         self.server_software = server_software or pulsar.SERVER_SOFTWARE
-        if max_requests:
-            self.events('connection_made').bind(self._max_requests)
         self.event('connection_made').bind(self._connection_made)
         self.event('connection_lost').bind(self._connection_lost)
+        if max_requests:
+            self.event('connection_made').bind(self._max_requests)
 
     def __repr__(self):
         address = self.address
@@ -182,7 +214,7 @@ class TcpServer(Producer):
 
         It is obtained from the first socket ``getsockname`` method.
         """
-        if self._server is not None:
+        if self._server is not None and self._server.sockets:
             return self._server.sockets[0].getsockname()
 
     @property
@@ -203,11 +235,37 @@ class TcpServer(Producer):
                              format_address(address))
         self._loop.call_soon(self.event('start').fire)
 
-    def _max_requests(self, _, exc):
-        if self._server and self.sessions >= self.max_requests:
+    def _max_requests(self, _, exc=None):
+        server = self._server
+        if server and server.sockets and self.sessions >= self.max_requests:
             self.logger.info('Reached maximum number of connections %s. '
                              'Stop serving.' % self.max_requests)
-            self.close()
+            # stop accepting and close once current connections are done
+            server.close()
+            for connection in self._concurrent_connections:
+                connection.event('connection_lost').bind(
+                    self._close_when_idle)
+            self._close_when_idle()
+
+    def _close_when_idle(self, *args, **kw):
+        if self._server and not self._concurrent_connections:
+            self._loop.create_task(self.close())
+
+    def admit(self, queued=None):
+        """Check if a new request can be processed.
+
+        :param queued: optional loop time when the request was received
+        :return: ``None`` if the request is admitted, otherwise the number
+            of seconds after which the client should retry.
+        """
+        if self.max_inflight and self.inflight >= self.max_inflight:
+            self.admission['shed_inflight'] += 1
+            return 1
+        if self.max_lag and queued is not None:
+            lag = self._loop.time() - queued
+            if lag > self.max_lag:
+                self.admission['shed_lag'] += 1
+                return max(int(ceil(lag)), 1)
 
     async def start_serving(self, address=None, sockets=None,
                             backlog=100, sslcontext=None):
@@ -222,6 +280,8 @@ class TcpServer(Producer):
             raise RuntimeError('Already serving')
         create_server = self._loop.create_server
         server = None
+        self._sslcontext = sslcontext
+        self._backlog = backlog
         if sockets:
             for sock in sockets:
                 srv = await create_server(self.create_protocol,
@@ -264,20 +324,106 @@ class TcpServer(Producer):
         clients = {'processed_clients': self.sessions,
                    'connected_clients': len(self._concurrent_connections),
                    'requests_processed': self.requests_processed}
+        admission = {'max_connections': self.max_connections,
+                     'max_inflight': self.max_inflight,
+                     'max_lag': self.max_lag,
+                     'inflight': self.inflight,
+                     'accepting': self._paused_sockets is None}
+        admission.update(self.admission)
         if self._server:
-            for sock in self._server.sockets:
+            for sock in self._server.sockets or ():
                 sockets.append({
                     'address': format_address(sock.getsockname())})
         return {'server': server,
-                'clients': clients}
+                'clients': clients,
+                'admission': admission}
 
     #    INTERNALS
     def _connection_made(self, connection, exc=None):
         if not exc:
-            self._concurrent_connections.add(connection)
+            connections = self._concurrent_connections
+            if self.max_connections:
+                if len(connections) >= self.max_connections:
+                    # accepted in the same batch before accepting was paused
+                    self.admission['shed_connections'] += 1
+                    connection.abort()
+                    return
+                connections.add(connection)
+                if len(connections) >= self.max_connections:
+                    self._pause_accepting()
+            else:
+                connections.add(connection)
 
     def _connection_lost(self, connection, exc=None):
         self._concurrent_connections.discard(connection)
+        if (self._paused_sockets is not None and
+                len(self._concurrent_connections) < self.max_connections):
+            self._resume_accepting()
+
+    def _pause_accepting(self):
+        server = self._server
+        if self._paused_sockets is not None or not server:
+            return
+        sockets = []
+        for sock in server.sockets or ():
+            try:
+                if self._loop.remove_reader(sock.fileno()):
+                    sockets.append(sock)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # loops which do not accept through a reader callback
+                continue
+        if sockets:
+            self._paused_sockets = sockets
+            self.admission['paused_accepting'] += 1
+            self.logger.debug('%s reached %d connections, stop accepting',
+                              self, self.max_connections)
+
+    def _resume_accepting(self):
+        sockets, self._paused_sockets = self._paused_sockets, None
+        server = self._server
+        if server:
+            serving = server.sockets or ()
+            for sock in sockets:
+                if sock in serving:
+                    self._loop.add_reader(sock.fileno(), self._accept, sock)
+
+    def _accept(self, sock):
+        # accept connections on a listening socket after a pause, the
+        # server reader was removed by _pause_accepting
+        loop = self._loop
+        for _ in range(self._backlog):
+            if self._paused_sockets is not None:
+                return
+            try:
+                conn, _ = sock.accept()
+            except (BlockingIOError, InterruptedError, ConnectionAbortedError):
+                return
+            except OSError as exc:
+                # out of file descriptors or buffers, the socket stays
+                # ready, stop accepting for a while rather than spinning
+                self.logger.error('%s could not accept: %s', self, exc)
+                loop.remove_reader(sock.fileno())
+                loop.call_later(ACCEPT_RETRY_DELAY, self._retry_accept, sock)
+                return
+            conn.setblocking(False)
+            task = loop.create_task(loop.connect_accepted_socket(
+                self.create_protocol, conn, ssl=self._sslcontext))
+            task.add_done_callback(self._accepted)
+
+    def _retry_accept(self, sock):
+        server = self._server
+        if not server or sock not in (server.sockets or ()):
+            return
+        if self._paused_sockets is not None:
+            # paused in the meantime, resumed with the other sockets
+            self._paused_sockets.append(sock)
+        else:
+            self._loop.add_reader(sock.fileno(), self._accept, sock)
+
+    def _accepted(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error('%s could not set up an accepted '
+                              'connection: %s', self, task.exception())
 
     def _close_connections(self, connection=None, timeout=5):
         """Close ``connection`` if specified, otherwise close all connections.
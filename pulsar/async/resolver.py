@@ -0,0 +1,320 @@
+"""Asynchronous resolution of host names.
+
+A :class:`Resolver` sits between clients and the event loop. It caches the
+result of ``getaddrinfo`` calls, both successful and failed, for a limited
+time, it coalesces concurrent lookups of the same host and it connects to
+the resolved addresses with a Happy Eyeballs style fallback (:rfc:`8305`).
+
+Lookups are executed in a small dedicated thread pool rather than the
+event loop default executor, so that a busy executor does not delay new
+connections.
+
+Each event loop has its own shared resolver, returned by
+:func:`get_resolver`. Clients accept a ``resolver`` parameter for
+overriding it, for example with a resolver using a fake ``getaddrinfo``::
+
+    async def getaddrinfo(host, port, family, type):
+        return [(socket.AF_INET, type, 0, '', ('127.0.0.1', port))]
+
+    client = HttpClient(resolver=Resolver(getaddrinfo=getaddrinfo))
+"""
+import asyncio
+import socket
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from weakref import WeakKeyDictionary
+
+
+DNS_TTL = 60
+DNS_NEGATIVE_TTL = 5
+DNS_CACHE_SIZE = 1000
+DNS_THREADS = 4
+HAPPY_EYEBALLS_DELAY = 0.25
+
+_resolvers = WeakKeyDictionary()
+_executor = None
+
+
+def is_ip_address(host):
+    """Check if ``host`` is an IPv4 or IPv6 address
+    """
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+        except (OSError, ValueError, TypeError):
+            continue
+        return True
+    return False
+
+
+def interleave(infos):
+    """Alternate the address families of ``infos``, preserving the order
+    within each family and starting with the family of the first address
+    """
+    if len(infos) < 2:
+        return infos
+    families = OrderedDict()
+    for info in infos:
+        families.setdefault(info[0], []).append(info)
+    if len(families) == 1:
+        return infos
+    result = []
+    groups = list(families.values())
+    for index in range(max(len(g) for g in groups)):
+        result.extend(g[index] for g in groups if index < len(g))
+    return result
+
+
+def get_resolver(loop=None):
+    """The shared :class:`Resolver` of an event ``loop``
+    """
+    loop = loop or asyncio.get_event_loop()
+    resolver = _resolvers.get(loop)
+    if resolver is None:
+        resolver = _resolvers[loop] = Resolver(loop)
+    return resolver
+
+
+def _close_socket(task):
+    if not task.cancelled() and task.exception() is None:
+        task.result().close()
+
+
+def _retrieve_exception(task):
+    # a lookup error is raised to the callers, if any is left
+    if not task.cancelled():
+        task.exception()
+
+
+class DnsEntry:
+    __slots__ = ('expires', 'infos', 'error', 'index')
+
+    def __init__(self, expires, infos=None, error=None):
+        self.expires = expires
+        self.infos = infos
+        self.error = error
+        self.index = 0
+
+    def next(self):
+        """Addresses rotated by one position at each call
+        """
+        infos = self.infos
+        index = self.index
+        self.index = (index + 1) % len(infos)
+        return infos[index:] + infos[:index]
+
+
+class Resolver:
+    """An asynchronous DNS resolver with a cache.
+
+    :param loop: the event loop, the current event loop if not provided
+    :param ttl: seconds a successful lookup is cached
+    :param negative_ttl: seconds a failed lookup is cached
+    :param max_size: maximum number of cached lookups
+    :param delay: seconds to wait for a connection attempt before trying
+        the next address
+    :param getaddrinfo: optional coroutine function with the signature
+        ``(host, port, family, type)`` replacing the system resolver
+    :param executor: executor for system lookups, a shared pool of
+        :data:`DNS_THREADS` threads if not provided
+
+    .. attribute:: hits
+
+        Number of lookups served from the cache
+
+    .. attribute:: misses
+
+        Number of lookups which called ``getaddrinfo``
+
+    .. attribute:: coalesced
+
+        Number of lookups which waited for a concurrent lookup of the
+        same host
+    """
+    def __init__(self, loop=None, ttl=DNS_TTL, negative_ttl=DNS_NEGATIVE_TTL,
+                 max_size=DNS_CACHE_SIZE, delay=HAPPY_EYEBALLS_DELAY,
+                 getaddrinfo=None, executor=None):
+        self._loop = loop or asyncio.get_event_loop()
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.delay = delay
+        self.executor = executor
+        if getaddrinfo:
+            self.getaddrinfo = getaddrinfo
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self._cache = OrderedDict()
+        self._inflight = {}
+
+    def __repr__(self):
+        return '%s(%d)' % (self.__class__.__name__, len(self._cache))
+    __str__ = __repr__
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        self._cache.clear()
+
+    def info(self):
+        return dict(entries=len(self._cache),
+                    hits=self.hits,
+                    misses=self.misses,
+                    negative_hits=self.negative_hits,
+                    coalesced=self.coalesced,
+                    errors=self.errors,
+                    fallbacks=self.fallbacks,
+                    inflight=len(self._inflight))
+
+    async def getaddrinfo(self, host, port, family, type):
+        """Resolve ``host`` via the system resolver
+        """
+        executor = self.executor
+        if executor is None:
+            global _executor
+            if _executor is None:
+                _executor = ThreadPoolExecutor(DNS_THREADS)
+            executor = _executor
+        return await self._loop.run_in_executor(
+            executor, socket.getaddrinfo, host, port, family, type)
+
+    async def resolve(self, host, port, family=0, type=socket.SOCK_STREAM):
+        """Resolve ``host`` and ``port`` into a list of address infos
+
+        Successive calls rotate the list of addresses of a host so that
+        connections are distributed across them.
+
+        :raise: :class:`socket.gaierror` when the host cannot be resolved
+        """
+        key = (host, port, family, type)
+        entry = self._cache.get(key)
+        if entry is not None:
+            if entry.expires > self._loop.time():
+                self._cache.move_to_end(key)
+                if entry.error is not None:
+                    self.negative_hits += 1
+                    raise socket.gaierror(*entry.error.args)
+                self.hits += 1
+                return entry.next()
+            self._cache.pop(key)
+        lookup = self._inflight.get(key)
+        if lookup is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            lookup = self._inflight[key] = self._loop.create_task(
+                self._lookup(key))
+            lookup.add_done_callback(_retrieve_exception)
+        # the lookup is shared, cancelling a caller does not cancel it
+        infos = await asyncio.shield(lookup, loop=self._loop)
+        entry = self._cache.get(key)
+        return entry.next() if entry and entry.infos else infos
+
+    async def create_connection(self, protocol_factory, host, port, *,
+                                ssl=None, server_hostname=None, family=0,
+                                local_addr=None, **kwargs):
+        """Connect to ``host`` and ``port``
+
+        Same as :meth:`asyncio.AbstractEventLoop.create_connection` but
+        ``host`` is resolved via :meth:`resolve`. When a connection to an
+        address does not succeed within :attr:`delay` seconds, a connection
+        to the next address is attempted in parallel and the first one
+        to succeed is used.
+        """
+        loop = self._loop
+        if ssl and server_hostname is None:
+            server_hostname = host
+        if server_hostname is not None:
+            kwargs['server_hostname'] = server_hostname
+        if is_ip_address(host):
+            return await loop.create_connection(
+                protocol_factory, host, port, ssl=ssl, family=family,
+                local_addr=local_addr, **kwargs)
+        infos = interleave(await self.resolve(host, port, family))
+        sock = await self._connect(infos, local_addr)
+        return await loop.create_connection(protocol_factory, sock=sock,
+                                            ssl=ssl, **kwargs)
+
+    # INTERNALS
+    async def _lookup(self, key):
+        host, port, family, type = key
+        try:
+            infos = await self.getaddrinfo(host, port, family, type)
+            if not infos:
+                raise socket.gaierror(socket.EAI_NONAME,
+                                      'No address found for %s' % host)
+        except socket.gaierror as exc:
+            self.errors += 1
+            self._store(key, DnsEntry(self._loop.time() + self.negative_ttl,
+                                      error=exc))
+            raise
+        else:
+            entry = DnsEntry(self._loop.time() + self.ttl, list(infos))
+            self._store(key, entry)
+            return entry.infos
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key, entry):
+        cache = self._cache
+        cache[key] = entry
+        while len(cache) > self.max_size:
+            cache.popitem(last=False)
+
+    async def _connect(self, infos, local_addr):
+        if len(infos) == 1:
+            return await self._sock_connect(infos[0], local_addr)
+        loop = self._loop
+        infos = iter(infos)
+        pending = set()
+        errors = []
+        try:
+            while True:
+                info = next(infos, None)
+                if info is not None:
+                    if pending:
+                        self.fallbacks += 1
+                    pending.add(loop.create_task(
+                        self._sock_connect(info, local_addr)))
+                elif not pending:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, loop=loop,
+                    timeout=self.delay if info is not None else None,
+                    return_when=asyncio.FIRST_COMPLETED)
+                sock = None
+                for task in done:
+                    if task.exception():
+                        errors.append(task.exception())
+                    elif sock is None:
+                        sock = task.result()
+                    else:
+                        task.result().close()
+                if sock is not None:
+                    return sock
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(_close_socket)
+        if len(errors) == 1:
+            raise errors[0]
+        raise OSError('Multiple exceptions: %s' % ', '.join(
+            (str(exc) for exc in errors)))
+
+    async def _sock_connect(self, info, local_addr):
+        family, type, proto, _, address = info
+        sock = socket.socket(family, type, proto)
+        try:
+            sock.setblocking(False)
+            if local_addr:
+                sock.bind(local_addr)
+            await self._loop.sock_connect(sock, address)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
@@ -1,14 +1,27 @@
 from asyncio import Task, CancelledError, TimeoutError
+from math import ceil
+from weakref import WeakKeyDictionary
+
+
+TIMER_TICK = 0.1
+TIMER_SLOTS = 512
+
+_wheels = WeakKeyDictionary()
 
 
 class timeout:
     """timeout context manager.
+
+    When ``timer`` is given (a :class:`TimerWheel` for example) it is used,
+    in place of the event ``loop``, to schedule the cancellation.
     """
-    __slots__ = ('_loop', '_timeout', '_cancelled', '_task', '_cancel_handler')
+    __slots__ = ('_loop', '_timeout', '_cancelled', '_task', '_cancel_handler',
+                 '_timer')
 
-    def __init__(self, loop, timeout):
+    def __init__(self, loop, timeout, timer=None):
         self._loop = loop
         self._timeout = timeout
+        self._timer = timer or loop
         self._task = None
         self._cancelled = False
         self._cancel_handler = None
@@ -18,7 +31,7 @@ class timeout:
             return self
         self._task = Task.current_task(self._loop)
         tm = self._loop.time() + self._timeout
-        self._cancel_handler = self._loop.call_at(tm, self._cancel_task)
+        self._cancel_handler = self._timer.call_at(tm, self._cancel_task)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -34,3 +47,132 @@ class timeout:
     def _cancel_task(self):
         self._task.cancel()
         self._cancelled = True
+
+
+class WheelTimer:
+    """A timer scheduled in a :class:`TimerWheel`
+    """
+    __slots__ = ('_slot', '_tick', '_callback', '_args', '_wheel')
+
+    def __init__(self, wheel, tick, callback, args):
+        self._wheel = wheel
+        self._tick = tick
+        self._callback = callback
+        self._args = args
+        self._slot = None
+
+    def cancel(self):
+        slot = self._slot
+        if slot is not None:
+            self._slot = None
+            slot.discard(self)
+            self._wheel._count -= 1
+        self._callback = None
+        self._args = None
+
+    def cancelled(self):
+        return self._callback is None
+
+
+class TimerWheel:
+    """A hashed timer wheel for coarse-grained timeouts.
+
+    Timers are stored in ``slots`` buckets, one for each ``tick`` of the
+    event loop clock, so that scheduling and cancelling a timer are
+    ``O(1)`` operations which do not touch the event loop heap.
+    A single loop callback per ``tick`` runs the expired timers, and only
+    while there are timers in the wheel.
+
+    A timer never fires before its deadline and fires at most one
+    ``tick`` after it. It has the same API as the event loop
+    :meth:`~asyncio.AbstractEventLoop.call_later` and
+    :meth:`~asyncio.AbstractEventLoop.call_at` methods and the returned
+    :class:`WheelTimer` can be cancelled.
+
+    Use :func:`timer_wheel` to obtain the wheel shared by all protocols
+    running in an event loop.
+    """
+    def __init__(self, loop, tick=None, slots=None):
+        self._loop = loop
+        self.tick = tick or TIMER_TICK
+        self._slots = [set() for _ in range(slots or TIMER_SLOTS)]
+        self._count = 0
+        self._current = 0
+        self._handle = None
+
+    def __repr__(self):
+        return '%s(tick=%s, timers=%d)' % (self.__class__.__name__,
+                                           self.tick, self._count)
+    __str__ = __repr__
+
+    def __len__(self):
+        return self._count
+
+    def call_later(self, delay, callback, *args):
+        """Run ``callback`` after at least ``delay`` seconds
+        """
+        return self.call_at(self._loop.time() + delay, callback, *args)
+
+    def call_at(self, when, callback, *args):
+        """Run ``callback`` once the loop time reaches ``when``
+        """
+        if self._handle is None:
+            self._current = int(self._loop.time() / self.tick)
+            self._schedule()
+        tick = max(int(ceil(when / self.tick)), self._current + 1)
+        timer = WheelTimer(self, tick, callback, args)
+        slot = self._slots[tick % len(self._slots)]
+        slot.add(timer)
+        timer._slot = slot
+        self._count += 1
+        return timer
+
+    # INTERNALS
+    def _schedule(self):
+        self._handle = self._loop.call_at((self._current + 1) * self.tick,
+                                          self._run)
+
+    def _run(self):
+        slots = self._slots
+        size = len(slots)
+        # this callback never runs before the next tick
+        target = max(int(self._loop.time() / self.tick), self._current + 1)
+        start = max(self._current + 1, target - size + 1)
+        self._current = target
+        expired = []
+        for tick in range(start, target + 1):
+            slot = slots[tick % size]
+            if slot:
+                for timer in tuple(slot):
+                    if timer._tick <= target:
+                        slot.discard(timer)
+                        expired.append(timer)
+        self._count -= len(expired)
+        for timer in expired:
+            timer._slot = None
+            callback, args = timer._callback, timer._args
+            timer._callback = timer._args = None
+            try:
+                callback(*args)
+            except Exception as exc:
+                self._loop.call_exception_handler({
+                    'message': 'Exception in timer callback %r' % callback,
+                    'exception': exc
+                })
+        if self._count:
+            self._schedule()
+        else:
+            self._handle = None
+
+
+def timer_wheel(loop, tick=None):
+    """The :class:`TimerWheel` of an event ``loop`` for a given ``tick``
+    """
+    tick = tick or TIMER_TICK
+    wheels = _wheels.get(loop)
+    if wheels is None:
+        wheels = _wheels[loop] = {}
+    wheel = wheels.get(tick)
+    if wheel is None:
+        wheel = wheels[tick] = TimerWheel(loop, tick)
+    return wheel
@@ -799,6 +799,75 @@ class HttpKeepAlive(Global):
         """
 
 
+class Http2(Global):
+    name = "http2"
+    flags = ["--http2"]
+    validator = validate_bool
+    action = "store_true"
+    default = False
+    desc = """\
+        Serve cleartext HTTP/2 (h2c) requests
+
+        Clients can start an HTTP/2 connection either with prior knowledge,
+        by sending the HTTP/2 connection preface, or by upgrading an
+        HTTP/1.1 request with the ``Upgrade: h2c`` header.
+        """
+
+
+class Http2MaxStreams(Global):
+    name = "http2_max_streams"
+    flags = ["--http2-max-streams"]
+    validator = validate_pos_int
+    type = int
+    default = 100
+    desc = """\
+        Maximum number of concurrent streams in an HTTP/2 connection
+
+        Advertised to clients with the ``SETTINGS_MAX_CONCURRENT_STREAMS``
+        setting, streams above this limit are refused.
+        """
+
+
+class AccessLog(Global):
+    name = "access_log"
+    flags = ["--access-log"]
+    validator = validate_string
+    default = ''
+    desc = """\
+        File where HTTP servers write their access log, ``-`` for stdout
+
+        Records are written in batches by a background thread so that a
+        slow disk or pipe does not block the event loop. The access log
+        is disabled when empty.
+        """
+
+
+class AccessLogFormat(Global):
+    name = "access_log_format"
+    flags = ["--access-log-format"]
+    validator = validate_string
+    default = 'combined'
+    desc = """\
+        Format of the access log records
+
+        Either ``common``, ``combined``, ``json`` or a format string with
+        Apache directives such as ``%h %t "%r" %>s %b %D``.
+        """
+
+
+class AccessLogQueue(Global):
+    name = "access_log_queue"
+    flags = ["--access-log-queue"]
+    validator = validate_pos_int
+    type = int
+    default = 10000
+    desc = """\
+        Maximum number of access log records waiting to be written
+
+        Records are dropped, and counted, when the queue is full.
+        """
+
+
 class Debug(Global):
     flags = ["--debug"]
     validator = validate_bool
@@ -0,0 +1,471 @@
+"""Pure python HPACK, header compression for HTTP/2 (RFC 7541)
+
+:class:`Encoder` and :class:`Decoder` keep the dynamic table of one
+direction of an HTTP/2 connection. Header names and values are bytes,
+names are lowercase.
+
+The Huffman code is canonical, it is rebuilt at import time from the
+bit length of each symbol. Decoding walks a state machine four bits
+at a time.
+"""
+from collections import deque
+
+from ..exceptions import ProtocolError
+
+
+DEFAULT_TABLE_SIZE = 4096
+ENTRY_OVERHEAD = 32
+MAX_INTEGER_SHIFT = 28
+NEVER_INDEX = frozenset((b'authorization', b'proxy-authorization',
+                         b'cookie', b'set-cookie'))
+
+STATIC_TABLE = (
+    (b':authority', b''),
+    (b':method', b'GET'),
+    (b':method', b'POST'),
+    (b':path', b'/'),
+    (b':path', b'/index.html'),
+    (b':scheme', b'http'),
+    (b':scheme', b'https'),
+    (b':status', b'200'),
+    (b':status', b'204'),
+    (b':status', b'206'),
+    (b':status', b'304'),
+    (b':status', b'400'),
+    (b':status', b'404'),
+    (b':status', b'500'),
+    (b'accept-charset', b''),
+    (b'accept-encoding', b'gzip, deflate'),
+    (b'accept-language', b''),
+    (b'accept-ranges', b''),
+    (b'accept', b''),
+    (b'access-control-allow-origin', b''),
+    (b'age', b''),
+    (b'allow', b''),
+    (b'authorization', b''),
+    (b'cache-control', b''),
+    (b'content-disposition', b''),
+    (b'content-encoding', b''),
+    (b'content-language', b''),
+    (b'content-length', b''),
+    (b'content-location', b''),
+    (b'content-range', b''),
+    (b'content-type', b''),
+    (b'cookie', b''),
+    (b'date', b''),
+    (b'etag', b''),
+    (b'expect', b''),
+    (b'expires', b''),
+    (b'from', b''),
+    (b'host', b''),
+    (b'if-match', b''),
+    (b'if-modified-since', b''),
+    (b'if-none-match', b''),
+    (b'if-range', b''),
+    (b'if-unmodified-since', b''),
+    (b'last-modified', b''),
+    (b'link', b''),
+    (b'location', b''),
+    (b'max-forwards', b''),
+    (b'proxy-authenticate', b''),
+    (b'proxy-authorization', b''),
+    (b'range', b''),
+    (b'referer', b''),
+    (b'refresh', b''),
+    (b'retry-after', b''),
+    (b'server', b''),
+    (b'set-cookie', b''),
+    (b'strict-transport-security', b''),
+    (b'transfer-encoding', b''),
+    (b'user-agent', b''),
+    (b'vary', b''),
+    (b'via', b''),
+    (b'www-authenticate', b'')
+)
+STATIC_LENGTH = len(STATIC_TABLE)
+
+# bit length of the Huffman code of each symbol, the last one is EOS
+HUFFMAN_LENGTHS = (
+    13, 23, 28, 28, 28, 28, 28, 28, 28, 24, 30, 28, 28, 30, 28, 28, 28, 28,
+    28, 28, 28, 28, 30, 28, 28, 28, 28, 28, 28, 28, 28, 28, 6, 10, 10, 12, 13,
+    6, 8, 11, 10, 10, 8, 11, 8, 6, 6, 6, 5, 5, 5, 6, 6, 6, 6, 6, 6, 6, 7, 8,
+    15, 6, 12, 10, 13, 6, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 7,
+    7, 7, 7, 7, 7, 8, 7, 8, 13, 19, 13, 14, 6, 15, 5, 6, 5, 6, 5, 6, 6, 6, 5,
+    7, 7, 6, 6, 6, 5, 6, 7, 6, 5, 5, 6, 7, 7, 7, 7, 7, 15, 11, 14, 13, 28, 20,
+    22, 20, 20, 22, 22, 22, 23, 22, 23, 23, 23, 23, 23, 24, 23, 24, 24, 22,
+    23, 24, 23, 23, 23, 23, 21, 22, 23, 22, 23, 23, 24, 22, 21, 20, 22, 22,
+    23, 23, 21, 23, 22, 22, 24, 21, 22, 23, 23, 21, 21, 22, 21, 23, 22, 23,
+    23, 20, 22, 22, 22, 23, 22, 22, 23, 26, 26, 20, 19, 22, 23, 22, 25, 26,
+    26, 26, 27, 27, 26, 24, 25, 19, 21, 26, 27, 27, 26, 27, 24, 21, 21, 26,
+    26, 28, 27, 27, 27, 20, 24, 20, 21, 22, 21, 21, 23, 22, 22, 25, 25, 24,
+    24, 26, 23, 26, 27, 26, 26, 27, 27, 27, 27, 27, 28, 27, 27, 27, 27, 27,
+    26, 30,
+)
+EOS = 256
+
+
+class HPACKError(ProtocolError):
+    pass
+
+
+def _static_index():
+    fields = {}
+    names = {}
+    for index, field in enumerate(STATIC_TABLE, 1):
+        fields.setdefault(field, index)
+        names.setdefault(field[0], index)
+    return fields, names
+
+
+STATIC_FIELDS, STATIC_NAMES = _static_index()
+
+
+def _huffman():
+    codes = [None] * len(HUFFMAN_LENGTHS)
+    code = 0
+    previous = 0
+    for length, symbol in sorted((length, symbol) for symbol, length
+                                 in enumerate(HUFFMAN_LENGTHS)):
+        code <<= length - previous
+        previous = length
+        codes[symbol] = (code, length)
+        code += 1
+    #
+    # binary tree, internal nodes have children, leaves a symbol
+    children = [[None, None]]
+    symbols = [None]
+    for symbol, (code, length) in enumerate(codes):
+        node = 0
+        for shift in range(length - 1, -1, -1):
+            bit = (code >> shift) & 1
+            child = children[node][bit]
+            if child is None:
+                child = len(children)
+                children.append([None, None])
+                symbols.append(None)
+                children[node][bit] = child
+            node = child
+        symbols[node] = symbol
+    #
+    # padding is the most significant bits of EOS, up to 7 bits
+    accept = set((0,))
+    node = 0
+    for _ in range(7):
+        node = children[node][1]
+        accept.add(node)
+    #
+    # decoding state machine, four bits at a time
+    states = [None] * len(children)
+    for state, child in enumerate(children):
+        if symbols[state] is not None:
+            continue
+        transitions = []
+        for nibble in range(16):
+            node = state
+            emit = bytearray()
+            for shift in (3, 2, 1, 0):
+                node = children[node][(nibble >> shift) & 1]
+                symbol = symbols[node]
+                if symbol is not None:
+                    if symbol == EOS:
+                        node = None
+                        break
+                    emit.append(symbol)
+                    node = 0
+            transitions.append((node, bytes(emit)))
+        states[state] = tuple(transitions)
+    return tuple(codes), tuple(states), frozenset(accept)
+
+
+HUFFMAN_CODES, HUFFMAN_STATES, HUFFMAN_ACCEPT = _huffman()
+
+
+def huffman_encode(data):
+    """Huffman encode bytes
+    """
+    codes = HUFFMAN_CODES
+    value = 0
+    bits = 0
+    for byte in data:
+        code, length = codes[byte]
+        value = (value << length) | code
+        bits += length
+    padding = -bits % 8
+    value = (value << padding) | ((1 << padding) - 1)
+    return value.to_bytes((bits + padding) // 8, 'big')
+
+
+def huffman_length(data):
+    """Length in bytes of the Huffman encoded ``data``
+    """
+    codes = HUFFMAN_CODES
+    return (sum(codes[byte][1] for byte in data) + 7) // 8
+
+
+def huffman_decode(data):
+    """Decode Huffman encoded bytes
+    """
+    states = HUFFMAN_STATES
+    state = 0
+    output = []
+    for byte in data:
+        state, emit = states[state][byte >> 4]
+        if state is None:
+            raise HPACKError('EOS in Huffman string')
+        if emit:
+            output.append(emit)
+        state, emit = states[state][byte & 15]
+        if state is None:
+            raise HPACKError('EOS in Huffman string')
+        if emit:
+            output.append(emit)
+    if state not in HUFFMAN_ACCEPT:
+        raise HPACKError('Invalid Huffman padding')
+    return b''.join(output)
+
+
+def encode_integer(value, prefix, flags=0):
+    """Encode an integer with a ``prefix`` bits prefix
+    """
+    limit = (1 << prefix) - 1
+    if value < limit:
+        return bytearray((flags | value,))
+    output = bytearray((flags | limit,))
+    value -= limit
+    while value >= 128:
+        output.append((value & 127) | 128)
+        value >>= 7
+    output.append(value)
+    return output
+
+
+def decode_integer(data, offset, prefix):
+    """Decode an integer with a ``prefix`` bits prefix at ``offset``
+
+    :return: a two elements tuple with the integer and the new offset
+    """
+    limit = (1 << prefix) - 1
+    value = data[offset] & limit
+    offset += 1
+    if value == limit:
+        shift = 0
+        while True:
+            if offset >= len(data):
+                raise HPACKError('Incomplete integer')
+            byte = data[offset]
+            offset += 1
+            value += (byte & 127) << shift
+            if not byte & 128:
+                break
+            shift += 7
+            if shift > MAX_INTEGER_SHIFT:
+                raise HPACKError('Integer too large')
+    return value, offset
+
+
+class HeaderTable:
+    """Static and dynamic tables of HPACK
+
+    Entries in the dynamic table are numbered in insertion order so that
+    both lookups by index and by field are ``O(1)``.
+    """
+    def __init__(self, max_size=DEFAULT_TABLE_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self.entries = deque()
+        self._inserted = 0
+        self._fields = {}
+        self._names = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, index):
+        """Field at ``index``
+        """
+        if 0 < index <= STATIC_LENGTH:
+            return STATIC_TABLE[index - 1]
+        position = index - STATIC_LENGTH - 1
+        if 0 <= position < len(self.entries):
+            return self.entries[position]
+        raise HPACKError('Invalid table index %d' % index)
+
+    def add(self, name, value):
+        size = len(name) + len(value) + ENTRY_OVERHEAD
+        if size > self.max_size:
+            self.entries.clear()
+            self._fields.clear()
+            self._names.clear()
+            self.size = 0
+            return
+        self.size += size
+        self._evict()
+        self.entries.appendleft((name, value))
+        self._inserted += 1
+        self._fields[(name, value)] = self._inserted
+        self._names[name] = self._inserted
+
+    def search(self, name, value):
+        """Search a field in the tables
+
+        :return: a two elements tuple with index and ``True`` if the value
+            matched too. The index is 0 when the name is not found.
+        """
+        index = STATIC_FIELDS.get((name, value))
+        if index:
+            return index, True
+        index = self._index(self._fields.get((name, value)))
+        if index:
+            return index, True
+        index = STATIC_NAMES.get(name) or self._index(self._names.get(name))
+        return index or 0, False
+
+    def resize(self, max_size):
+        self.max_size = max_size
+        self._evict()
+
+    def _index(self, inserted):
+        if inserted:
+            position = self._inserted - inserted
+            if position < len(self.entries):
+                return position + STATIC_LENGTH + 1
+
+    def _evict(self):
+        entries = self.entries
+        while self.size > self.max_size and entries:
+            name, value = entries.pop()
+            self.size -= len(name) + len(value) + ENTRY_OVERHEAD
+            evicted = self._inserted - len(entries)
+            if self._fields.get((name, value)) == evicted:
+                self._fields.pop((name, value))
+            if self._names.get(name) == evicted:
+                self._names.pop(name)
+
+
+class Encoder:
+    """Encode header lists into header blocks
+    """
+    def __init__(self, max_table_size=DEFAULT_TABLE_SIZE):
+        self.table = HeaderTable(max_table_size)
+        self._size_update = None
+
+    @property
+    def max_table_size(self):
+        return self.table.max_size
+
+    @max_table_size.setter
+    def max_table_size(self, size):
+        """Set the maximum table size, the ``SETTINGS_HEADER_TABLE_SIZE``
+        of the remote peer
+        """
+        if size != self.table.max_size:
+            self.table.resize(size)
+            self._size_update = size
+
+    def encode(self, headers, huffman=True):
+        """Encode an iterable over ``(name, value)`` pairs of bytes
+        """
+        output = bytearray()
+        if self._size_update is not None:
+            output.extend(encode_integer(self._size_update, 5, 0x20))
+            self._size_update = None
+        table = self.table
+        for name, value in headers:
+            index, matched = table.search(name, value)
+            if matched:
+                output.extend(encode_integer(index, 7, 0x80))
+                continue
+            if name in NEVER_INDEX:
+                output.extend(encode_integer(index, 4, 0x10))
+            elif (len(name) + len(value) + ENTRY_OVERHEAD >
+                    table.max_size // 2):
+                output.extend(encode_integer(index, 4, 0))
+            else:
+                output.extend(encode_integer(index, 6, 0x40))
+                table.add(name, value)
+            if not index:
+                self._string(output, name, huffman)
+            self._string(output, value, huffman)
+        return bytes(output)
+
+    def _string(self, output, data, huffman):
+        if huffman and data:
+            encoded = huffman_encode(data)
+            if len(encoded) < len(data):
+                output.extend(encode_integer(len(encoded), 7, 0x80))
+                output.extend(encoded)
+                return
+        output.extend(encode_integer(len(data), 7))
+        output.extend(data)
+
+
+class Decoder:
+    """Decode header blocks into header lists
+
+    .. attribute:: max_table_size
+
+        The ``SETTINGS_HEADER_TABLE_SIZE`` advertised to the remote peer,
+        dynamic table size updates cannot exceed it
+    """
+    def __init__(self, max_table_size=DEFAULT_TABLE_SIZE,
+                 max_header_list_size=None):
+        self.table = HeaderTable(max_table_size)
+        self.max_table_size = max_table_size
+        self.max_header_list_size = max_header_list_size
+
+    def decode(self, data):
+        """Decode a header block
+
+        :return: a list of ``(name, value)`` pairs of bytes
+        """
+        table = self.table
+        headers = []
+        size = 0
+        offset = 0
+        length = len(data)
+        while offset < length:
+            byte = data[offset]
+            if byte & 0x80:
+                index, offset = decode_integer(data, offset, 7)
+                if not index:
+                    raise HPACKError('Invalid table index 0')
+                name, value = table.get(index)
+            elif byte & 0x40:
+                name, value, offset = self._literal(data, offset, 6)
+                table.add(name, value)
+            elif byte & 0x20:
+                max_size, offset = decode_integer(data, offset, 5)
+                if max_size > self.max_table_size:
+                    raise HPACKError('Invalid table size %d' % max_size)
+                table.resize(max_size)
+                continue
+            else:
+                name, value, offset = self._literal(data, offset, 4)
+            size += len(name) + len(value) + ENTRY_OVERHEAD
+            if (self.max_header_list_size and
+                    size > self.max_header_list_size):
+                raise HPACKError('Header list too large')
+            headers.append((name, value))
+        return headers
+
+    def _literal(self, data, offset, prefix):
+        index, offset = decode_integer(data, offset, prefix)
+        if index:
+            name = self.table.get(index)[0]
+        else:
+            name, offset = self._string(data, offset)
+        value, offset = self._string(data, offset)
+        return name, value, offset
+
+    def _string(self, data, offset):
+        if offset >= len(data):
+            raise HPACKError('Incomplete string')
+        huffman = data[offset] & 0x80
+        length, offset = decode_integer(data, offset, 7)
+        end = offset + length
+        if end > len(data):
+            raise HPACKError('Incomplete string')
+        value = bytes(data[offset:end])
+        if huffman:
+            value = huffman_decode(value)
+        return value, end
@@ -80,6 +80,16 @@ def parse_url(url):
 
 class HttpParser:
     """A python HTTP parser.
+
+    Data is accumulated in a single buffer together with the offset of the
+    first byte not yet parsed. The first line and the headers of a message
+    are parsed once fully received, body data is passed to the protocol as
+    soon as it arrives and parsed bytes are discarded only once per
+    :meth:`feed_data` call.
+
+    When a message is complete, :meth:`feed_data` returns the bytes
+    received after it (pipelined messages) so that they can be fed to the
+    parser of the next message.
     """
     status = None
     status_code = None
@@ -100,7 +110,12 @@ class HttpParser:
         #
         # private variables
         self._position = 0
+        self._offset = 0
+        self._scan = 0
         self._clen_rest = self.content_length
+        self._chunk_rest = 0
+        self._chunk_end = False
+        self._trailers = False
         # protocol callbacks
         self._on_header = getattr(protocol, 'on_header', passthrough)
         self._on_headers_complete = getattr(
@@ -123,7 +138,7 @@ class HttpParser:
         if self.version_major > 0 and self.version_minor > 0:
             if self.flags & F.CONNECTION_CLOSE.value:
                 return False
-        elif self.flags & F.CONNECTION_KEEP_ALIVE.value:
+        elif not self.flags & F.CONNECTION_KEEP_ALIVE.value:
             return False
         return not self.http_message_needs_eof()
 
@@ -159,127 +174,198 @@ class HttpParser:
         """ return True if Transfer-Encoding header value is chunked"""
         return self.flags & F.CHUNKED.value
 
+    def is_upgrade(self):
+        """ return True if the connection switches protocol after this
+        message """
+        if self.type == ParserType.HTTP_RESPONSE:
+            return self.status_code == 101
+        return bool(self.method == b'CONNECT' or (
+            self.flags & F.UPGRADE.value and
+            self.flags & F.CONNECTION_UPGRADE.value))
+
     def feed_data(self, data):
+        """Feed ``data`` into the parser
+
+        :return: the data received after the end of the message, if any
+        """
         # end of body can be passed manually by putting a length of 0
         if not data:
             if not self.is_message_complete():
-                self._position = 3
-                self._on_message_complete()
+                self._message_complete()
             return
         #
-        # start to parse
-        self.buf.extend(data)
-        while True:
-            if not self._position:
-                idx = self.buf.find(b'\r\n')
-                if idx < 0:
-                    break
-                else:
-                    self._position = 1
-                    self.parse_first_line(bytes(self.buf[:idx]))
-                    self.buf = self.buf[idx+2:]
-            elif not self.is_headers_complete():
-                if not self._parse_headers():
-                    break
-            elif not self.is_message_complete():
-                self._parse_body()
-                break
+        buf = self.buf
+        if self._position == 2 and not buf and not self._chunked():
+            # body data with nothing buffered, no need to copy it
+            offset = self._parse_body(data, 0)
+            return self._tail(data, offset)
+        #
+        buf.extend(data)
+        if self._position == 0:
+            self._parse_first_line()
+        if self._position == 1:
+            self._parse_headers()
+        if self._position == 2:
+            if self._chunked():
+                self._parse_chunked()
+            else:
+                self._offset = self._parse_body(buf, self._offset)
+        #
+        offset = self._offset
+        if self._position == 3:
+            return self._tail(buf, offset)
+        elif offset:
+            del buf[:offset]
+            self._scan = max(self._scan - offset, 0)
+            self._offset = 0
+
+    # INTERNALS
+    def _chunked(self):
+        return self.flags & F.CHUNKED.value
+
+    def _message_complete(self):
+        self._position = 3
+        self._on_message_complete()
+
+    def _tail(self, data, offset):
+        tail = bytes(data[offset:])
+        self.buf = bytearray()
+        self._offset = 0
+        if tail:
+            if self._position < 3 or self.is_upgrade():
+                self.buf.extend(tail)
+            else:
+                return tail
+
+    def _parse_first_line(self):
+        buf = self.buf
+        idx = buf.find(b'\r\n', self._offset)
+        if idx < 0:
+            return
+        line = bytes(buf[self._offset:idx])
+        self._offset = self._scan = idx + 2
+        self._position = 1
+        self._on_message_begin()
+        self.parse_first_line(line)
 
     def _parse_headers(self):
-        while True:
-            idx = self.buf.find(b'\r\n')
+        buf = self.buf
+        start = self._offset
+        if buf.startswith(b'\r\n', start):
+            self._offset = start + 2
+        else:
+            idx = buf.find(b'\r\n\r\n', max(self._scan, start))
             if idx < 0:
-                return False
-            chunk = bytes(self.buf[:idx])
-            self.buf = self.buf[idx+2:]
-            if not idx:
-                break
-
-            if chunk.find(b':') < 0:
-                raise HttpParserError('Invalid header')
-            name, value = chunk.split(b':', 1)
-            value = value.lstrip()
-            name = name.rstrip(b" \t").strip()
-            if HEADER_RE.search(name):
-                raise HttpParserError('Invalid header name')
-            self._on_header(name, value)
-            name = name.lower()
-            if name == b'connection':
-                self._connection(value)
-            elif name == b'content-length':
-                try:
-                    self.content_length = int(value)
-                except ValueError:
-                    continue
-                if self.content_length < 0:  # ignore negative lengths
-                    self.content_length = sys.maxsize
-            elif name == b'transfer-encoding':
-                if value.lower() == b'chunked':
-                    self.flags |= F.CHUNKED.value
+                self._scan = max(len(buf) - 3, start)
+                return
+            self._offset = idx + 4
+            for line in bytes(buf[start:idx]).split(b'\r\n'):
+                self._parse_header(line)
         #
+        if self._trailers:
+            self._message_complete()
+            return
         self._clen_rest = self.content_length
         self._position = 2
         self._on_headers_complete()
-        return True
+
+    def _parse_header(self, line):
+        name, sep, value = line.partition(b':')
+        if not sep:
+            raise HttpParserError('Invalid header')
+        name = name.strip()
+        if not name or HEADER_RE.search(name):
+            raise HttpParserError('Invalid header name')
+        value = value.strip()
+        self._on_header(name, value)
+        name = name.lower()
+        if name == b'connection':
+            self._connection(value)
+        elif name == b'content-length':
+            try:
+                self.content_length = int(value)
+            except ValueError:
+                return
+            if self.content_length < 0:  # ignore negative lengths
+                self.content_length = sys.maxsize
+        elif name == b'transfer-encoding':
+            if value.lower() == b'chunked':
+                self.flags |= F.CHUNKED.value
+        elif name == b'upgrade':
+            self.flags |= F.UPGRADE.value
 
     def _connection(self, value):
-        value = value.lower()
-        if value == 'keep-alive':
-            self.flags |= F.CONNECTION_KEEP_ALIVE.value
-        elif value == 'close':
-            self.flags |= F.CONNECTION_CLOSE.value
-        elif value == 'upgrade':
-            self.flags |= F.CONNECTION_UPGRADE.value
-
-    def _parse_body(self):
-        #
-        if self.flags & F.CHUNKED.value:
-            while True:
-                idx = self.buf.find(b'\r\n')
-                if idx < 0:
+        for token in value.lower().split(b','):
+            token = token.strip()
+            if token == b'keep-alive':
+                self.flags |= F.CONNECTION_KEEP_ALIVE.value
+            elif token == b'close':
+                self.flags |= F.CONNECTION_CLOSE.value
+            elif token == b'upgrade':
+                self.flags |= F.CONNECTION_UPGRADE.value
+
+    def _parse_body(self, data, offset):
+        rest = self._clen_rest
+        # Content length not given
+        if rest == sys.maxsize:
+            if self.http_message_needs_eof():
+                if len(data) > offset:
+                    self._on_body(bytes(data[offset:]))
+                return len(data)
+            self._message_complete()
+            return offset
+        size = min(len(data) - offset, rest)
+        if size:
+            self._clen_rest = rest - size
+            self._on_body(bytes(data[offset:offset+size]))
+        if not self._clen_rest:
+            self._message_complete()
+        return offset + size
+
+    def _parse_chunked(self):
+        if self._trailers:
+            self._parse_headers()
+            return
+        buf = self.buf
+        offset = self._offset
+        size = len(buf)
+        while True:
+            if self._chunk_rest:
+                n = min(size - offset, self._chunk_rest)
+                if not n:
                     break
-                line = bytes(self.buf[:idx])
-                rest = self.buf[idx+2:]
-                size = line.split(b';', 1)[0].strip()
-                try:
-                    size = int(size, 16)
-                except ValueError:
-                    raise HttpParserError(
-                        'Invalid chunk size %s' % size) from None
-                if size == 0:
-                    self.buf = rest
-                    self._parse_trailers()
-                    self._on_message_complete()
+                self._on_body(bytes(buf[offset:offset+n]))
+                offset += n
+                self._chunk_rest -= n
+                if self._chunk_rest:
                     break
-                elif len(rest) >= size + 2:
-                    self._on_body(bytes(rest[:size]))
-                    self.buf = rest[size+2:]
-                else:
+                self._chunk_end = True
+            if self._chunk_end:
+                if size - offset < 2:
                     break
-        else:
-            #
-            data = bytes(self.buf)
-            self.buf.clear()
-            #
-            # Content length not given
-            if self._clen_rest == sys.maxsize:
-                if not self.http_message_needs_eof():
-                    self._position = 3
-                    self._on_message_complete()
-            else:
-                size = min(len(data), self._clen_rest)
-                if size:
-                    self._clen_rest -= size
-                    self._on_body(data[:size])
-                if not self._clen_rest:
-                    self._position = 3
-                    self._on_message_complete()
-
-    def _parse_trailers(self):
-        idx = self.buf.find(b'\r\n\r\n')
-        if self.buf[:2] == b'\r\n':
-            self.buf = self.buf[:idx]
-            self._trailers = self._parse_headers()
+                if not buf.startswith(b'\r\n', offset):
+                    raise HttpParserError('Invalid chunk end')
+                offset += 2
+                self._chunk_end = False
+            idx = buf.find(b'\r\n', offset)
+            if idx < 0:
+                break
+            line = bytes(buf[offset:idx]).split(b';', 1)[0].strip()
+            try:
+                chunk_size = int(line, 16)
+            except ValueError:
+                chunk_size = -1
+            if chunk_size < 0:
+                raise HttpParserError('Invalid chunk size %s' % line)
+            offset = idx + 2
+            if not chunk_size:
+                # last chunk, followed by optional trailers
+                self._offset = self._scan = offset
+                self._trailers = True
+                self._parse_headers()
+                return
+            self._chunk_rest = chunk_size
+        self._offset = offset
 
 
 class HttpRequestParser(HttpParser):
@@ -333,7 +419,7 @@ class HttpResponseParser(HttpParser):
         # status
         matchs = STATUS_RE.match(bits[1])
         if matchs is None:
-            raise HttpParserInvalidStatusError("Invalid status %" % bits[1])
+            raise HttpParserInvalidStatusError("Invalid status %s" % bits[1])
 
         self._on_status(bits[1])
         self.version_major = int(matchv.group(1))
@@ -483,6 +483,17 @@ def has_vary_header(response, header_query):
     return header_query.lower() in existing_headers
 
 
+def cache_control(value):
+    '''Parse a ``Cache-Control`` header into a dictionary
+    '''
+    directives = {}
+    for directive in value.split(','):
+        name, _, arg = directive.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip().strip('"')
+    return directives
+
+
 class CacheControl:
     '''
     http://www.mnot.net/cache_docs/
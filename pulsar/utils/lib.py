@@ -9,7 +9,7 @@ else:
         from .clib import (
             EventHandler, ProtocolConsumer, Protocol, Producer, WsgiProtocol,
             AbortEvent, RedisParser, WsgiResponse, wsgi_cached, http_date,
-            FrameParser, has_empty_content, isawaitable, Event
+            fast_http_date, FrameParser, has_empty_content, isawaitable, Event
         )
     except ImportError:
         HAS_C_EXTENSIONS = False
@@ -20,7 +20,8 @@ if not HAS_C_EXTENSIONS:
 
     from .pylib.protocols import  ProtocolConsumer, Protocol, Producer  # noqa
     from .pylib.events import EventHandler, AbortEvent, Event   # noqa
-    from .pylib.wsgi import WsgiProtocol, http_date, has_empty_content  # noqa
+    from .pylib.wsgi import (WsgiProtocol, http_date,   # noqa
+                             fast_http_date, has_empty_content)
     from .pylib.wsgiresponse import WsgiResponse, wsgi_cached   # noqa
     from .pylib.redisparser import RedisParser                  # noqa
     from .pylib.websocket import FrameParser                    # noqa
@@ -37,6 +38,7 @@ __all__ = [
     'WsgiResponse',
     'wsgi_cached',
     'http_date',
+    'fast_http_date',
     'isawaitable',
     'has_empty_content',
     'RedisParser'
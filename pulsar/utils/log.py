@@ -4,8 +4,9 @@ Module containing utilities and mixins for logging and serialisation.
 import sys
 import logging
 from logging.config import dictConfig
+from collections import deque
 from copy import deepcopy, copy
-from threading import Lock
+from threading import Lock, Event, Thread
 from functools import wraps
 
 from .system import current_process
@@ -226,6 +227,110 @@ class Silence(logging.Handler):
         pass
 
 
+class BatchWriter:
+    """Write lines to a ``stream`` in batches, from a background thread.
+
+    :meth:`write` never blocks: lines are appended to a bounded queue
+    and dropped, and counted, when the queue is full. The thread wakes up
+    every ``interval`` seconds, or as soon as ``batch`` lines are waiting,
+    and writes all queued lines with a single ``write`` call.
+
+    .. attribute:: written
+
+        Number of lines written to the stream
+
+    .. attribute:: dropped
+
+        Number of lines dropped because the queue was full or the stream
+        failed
+    """
+    def __init__(self, stream, max_queue=10000, batch=1000, interval=0.1):
+        self.stream = stream
+        self.max_queue = max_queue
+        self.batch = batch
+        self.interval = interval
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self._queue = deque()
+        self._wakeup = Event()
+        self._thread = None
+        self._closed = False
+
+    def __len__(self):
+        return len(self._queue)
+
+    def write(self, line):
+        """Queue a ``line``, return ``False`` if it was dropped
+        """
+        queue = self._queue
+        if self._closed or len(queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+        queue.append(line)
+        if self._thread is None:
+            self._start()
+        elif len(queue) == self.batch:
+            self._wakeup.set()
+        return True
+
+    def info(self):
+        return {'queued': len(self._queue),
+                'written': self.written,
+                'dropped': self.dropped,
+                'batches': self.batches,
+                'errors': self.errors}
+
+    def close(self, timeout=1):
+        """Write queued lines and stop the thread, waiting at most
+        ``timeout`` seconds
+
+        Return ``True`` if the thread is stopped.
+        """
+        self._closed = True
+        thread = self._thread
+        if thread is not None:
+            self._wakeup.set()
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    # INTERNALS
+    def _start(self):
+        self._thread = Thread(target=self._run, name='pulsar-batch-writer',
+                              daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        wakeup = self._wakeup
+        while not self._closed:
+            wakeup.wait(self.interval)
+            wakeup.clear()
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        queue = self._queue
+        lines = []
+        popleft = queue.popleft
+        try:
+            while True:
+                lines.append(popleft())
+        except IndexError:
+            pass
+        if lines:
+            try:
+                self.stream.write(''.join(lines))
+                self.stream.flush()
+            except Exception:
+                self.errors += 1
+                self.dropped += len(lines)
+            else:
+                self.written += len(lines)
+                self.batches += 1
+
+
 def clear_logger():
     process_global('_config_logging', None, True)
 
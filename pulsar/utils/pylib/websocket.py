@@ -1,17 +1,22 @@
 import os
-from struct import pack, unpack
-from array import array
+from struct import pack, unpack_from
 
 from ..string import to_bytes
 
 
 def websocket_mask(data, masking_key):
-    mask_size = len(masking_key)
-    key = array('B', masking_key)
-    data = array('B', data)
-    for i in range(len(data)):
-        data[i] ^= key[i % mask_size]
-    return data.tobytes()
+    '''XOR ``data`` with the repeated ``masking_key``.
+
+    ``data`` can be any bytes-like object. The masking is performed on two
+    integers as large as ``data`` rather than one byte at a time.
+    '''
+    length = len(data)
+    if not length:
+        return b''
+    key = masking_key * (length // len(masking_key) + 1)
+    value = (int.from_bytes(data, 'little') ^
+             int.from_bytes(key[:length], 'little'))
+    return value.to_bytes(length, 'little')
 
 
 class Frame:
@@ -63,6 +68,12 @@ class Frame:
 class FrameParser:
     '''Decoder and encoder for the websocket protocol.
 
+    Received data is accumulated in a single buffer together with the
+    offset of the first byte not yet decoded. Header fields are unpacked in
+    place, the payload is unmasked from a view of the buffer and decoded
+    bytes are discarded only when new data is received and more than half
+    of the buffer has been decoded.
+
     .. attribute:: version
 
         Optional protocol version (Default 13).
@@ -81,6 +92,7 @@ class FrameParser:
         self.kind = kind
         self.frame = None
         self.buffer = bytearray()
+        self._offset = 0
         self.ProtocolError = ProtocolError
         self._opcodes = (0, 1, 2, 8, 9, 10)
         self._encode_mask_length = 0
@@ -170,14 +182,19 @@ class FrameParser:
     def decode(self, data=None):
         frame = self.frame
         mask_length = self._decode_mask_length
+        buffer = self.buffer
 
         if data:
-            self.buffer.extend(data)
+            offset = self._offset
+            if offset and 2 * offset >= len(buffer):
+                del buffer[:offset]
+                self._offset = 0
+            buffer.extend(data)
         if frame is None:
-            if len(self.buffer) < 2:
+            if len(buffer) - self._offset < 2:
                 return
-            chunk = self._chunk(2)
-            first_byte, second_byte = unpack("BB", chunk)
+            first_byte, second_byte = unpack_from("BB", buffer, self._offset)
+            self._offset += 2
             fin = (first_byte >> 7) & 1
             # rsv1 = (first_byte >> 6) & 1
             # rsv2 = (first_byte >> 5) & 1
@@ -203,31 +220,42 @@ class FrameParser:
             self.frame = frame = Frame(opcode, bool(fin), payload_length)
 
         if frame._masking_key is None:
+            available = len(buffer) - self._offset
             if frame._payload_length == 0x7e:  # 126
-                if len(self.buffer) < 2 + mask_length:  # 2 + 4 for mask
+                if available < 2 + mask_length:  # 2 + 4 for mask
                     return
-                chunk = self._chunk(2)
-                frame._payload_length = unpack("!H", chunk)[0]
+                frame._payload_length = unpack_from(
+                    "!H", buffer, self._offset)[0]
+                self._offset += 2
             elif frame._payload_length == 0x7f:  # 127
-                if len(self.buffer) < 8 + mask_length:  # 8 + 4 for mask
+                if available < 8 + mask_length:  # 8 + 4 for mask
                     return
-                chunk = self._chunk(8)
-                frame._payload_length = unpack("!Q", chunk)[0]
-            elif len(self.buffer) < mask_length:
+                frame._payload_length = unpack_from(
+                    "!Q", buffer, self._offset)[0]
+                self._offset += 8
+            elif available < mask_length:
                 return
             if mask_length:
-                frame._masking_key = self._chunk(mask_length)
+                offset = self._offset
+                self._offset = offset + mask_length
+                frame._masking_key = bytes(buffer[offset:self._offset])
             else:
                 frame._masking_key = b''
 
-        if len(self.buffer) >= frame._payload_length:
+        if len(buffer) - self._offset >= frame._payload_length:
             self.frame = None
-            chunk = self._chunk(frame._payload_length)
-            if self._extensions:
-                for extension in self._extensions:
-                    chunk = extension.receive(frame, self.buffer)
-            if frame._masking_key:
-                chunk = websocket_mask(chunk, frame._masking_key)
+            chunk = view = self._chunk(frame._payload_length)
+            try:
+                if self._extensions:
+                    for extension in self._extensions:
+                        chunk = extension.receive(frame, chunk)
+                if frame._masking_key:
+                    chunk = websocket_mask(chunk, frame._masking_key)
+                else:
+                    chunk = bytes(chunk)
+            finally:
+                # the buffer cannot be resized while it is viewed
+                view.release()
             if frame.opcode == 1:
                 frame._body = chunk.decode("utf-8", "replace")
             else:
@@ -281,6 +309,8 @@ class FrameParser:
         return opcode, masking_key, data
 
     def _chunk(self, length):
-        chunk = bytes(self.buffer[:length])
-        self.buffer = self.buffer[length:]
-        return chunk
+        # a view of the next ``length`` bytes of the buffer
+        offset = self._offset
+        self._offset = offset + length
+        with memoryview(self.buffer) as view:
+            return view[offset:offset + length]
@@ -38,6 +38,31 @@ HOP_HEADERS = frozenset((
     PROXY_AUTHORIZATION, TE, TRAILERS,
     TRANSFER_ENCODING, UPGRADE
 ))
+HOP_NAMES = frozenset((h.lower().encode(CHARSET) for h in HOP_HEADERS))
+COMMON_HEADERS = (
+    'Accept', 'Accept-Charset', 'Accept-Encoding', 'Accept-Language',
+    'Authorization', 'Cache-Control', 'Connection', 'Content-Encoding',
+    'Content-Length', 'Content-Type', 'Cookie', 'Date', 'Dnt', 'Expect',
+    'Forwarded', 'Host', 'If-Match', 'If-Modified-Since', 'If-None-Match',
+    'If-Range', 'If-Unmodified-Since', 'Keep-Alive', 'Origin', 'Pragma',
+    'Proxy-Authorization', 'Range', 'Referer', 'Script_Name',
+    'Sec-Websocket-Extensions', 'Sec-Websocket-Key', 'Sec-Websocket-Protocol',
+    'Sec-Websocket-Version', 'Te', 'Trailers', 'Transfer-Encoding',
+    'Upgrade', 'Upgrade-Insecure-Requests', 'User-Agent', 'Via',
+    'X-Forwarded-For', 'X-Forwarded-Host', 'X-Forwarded-Proto',
+    'X-Forwarded-Protocol', 'X-Forwarded-Ssl', 'X-Real-Ip',
+    'X-Requested-With'
+)
+COMMON_RESPONSE_HEADERS = (
+    'Accept-Ranges', 'Access-Control-Allow-Origin', 'Age', 'Allow',
+    'Cache-Control', 'Connection', 'Content-Disposition',
+    'Content-Encoding', 'Content-Language', 'Content-Length',
+    'Content-Range', 'Content-Type', 'Date', 'ETag', 'Expires',
+    'Keep-Alive', 'Last-Modified', 'Location', 'Retry-After', 'Server',
+    'Set-Cookie', 'Transfer-Encoding', 'Vary', 'WWW-Authenticate'
+)
+# bound the caches filled with names coming from clients and applications
+MAX_CACHED_NAMES = 1000
 
 
 class Headers:
@@ -67,6 +92,80 @@ class Headers:
         return True
 
 
+def header_entry(name):
+    """Entry of the :data:`HEADER_TABLE` for the raw header ``name``
+
+    An entry is a tuple containing the header, the header name in the
+    ``environ`` without the ``HTTP_`` prefix, the ``environ`` key,
+    whether it is a hop header and whether :class:`Headers` handles it.
+    """
+    lower = name.lower()
+    entry = HEADER_TABLE.get(lower)
+    if entry is None:
+        header = istr(name.decode(CHARSET))
+        header_env = header.upper().replace('-', '_')
+        entry = (header, header_env, 'HTTP_%s' % header_env,
+                 lower in HOP_NAMES, hasattr(Headers, header_env))
+        if len(HEADER_TABLE) < MAX_CACHED_NAMES:
+            HEADER_TABLE[lower] = entry
+    if len(HEADER_TABLE) < MAX_CACHED_NAMES:
+        HEADER_TABLE[name] = entry
+    return entry
+
+
+def header_name(name):
+    """Serialised response header ``name``, including the colon
+    """
+    value = RESPONSE_HEADERS.get(name)
+    if value is None:
+        value = ('%s: ' % name).encode(CHARSET)
+        if len(RESPONSE_HEADERS) < MAX_CACHED_NAMES:
+            RESPONSE_HEADERS[name] = value
+    return value
+
+
+def status_line(protocol, status):
+    line = STATUS_LINES.get((protocol, status))
+    if line is None:
+        line = ('%s %s\r\n' % (protocol, status)).encode(CHARSET)
+        if len(STATUS_LINES) < MAX_CACHED_NAMES:
+            STATUS_LINES[(protocol, status)] = line
+    return line
+
+
+def base_environ(protocol, FileWrapper):
+    """The ``environ`` keys shared by all requests of a connection
+    """
+    connection = protocol.connection
+    transport = connection.transport
+    server_address = transport.get_extra_info('sockname')
+    return {
+        'wsgi.async': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.version': (1, 0),
+        'wsgi.run_once': False,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.url_scheme': ('https' if transport.get_extra_info('sslcontext')
+                            else URL_SCHEME),
+        'SCRIPT_NAME': OS_SCRIPT_NAME,
+        'SERVER_SOFTWARE': protocol.producer.server_software,
+        'wsgi.file_wrapper': FileWrapper,
+        'CONTENT_TYPE': '',
+        'SERVER_NAME': server_address[0],
+        'SERVER_PORT': str(server_address[1])
+    }
+
+
+HEADER_TABLE = {}
+RESPONSE_HEADERS = {}
+STATUS_LINES = {}
+for _name in COMMON_HEADERS:
+    header_entry(_name.encode(CHARSET))
+for _name in COMMON_RESPONSE_HEADERS:
+    header_name(_name)
+
+
 class WsgiProtocol:
     """"Pure python WSGI protocol implementation
     """
@@ -77,23 +176,14 @@ class WsgiProtocol:
 
     def __init__(self, protocol, cfg, FileWrapper):
         connection = protocol.connection
-        server_address = connection.transport.get_extra_info('sockname')
-        self.environ = {
-            'wsgi.async': True,
-            'wsgi.timestamp': protocol.producer.current_time,
-            'wsgi.errors': sys.stderr,
-            'wsgi.version': (1, 0),
-            'wsgi.run_once': False,
-            'wsgi.multithread': True,
-            'wsgi.multiprocess': True,
-            'SCRIPT_NAME': OS_SCRIPT_NAME,
-            'SERVER_SOFTWARE': protocol.producer.server_software,
-            'wsgi.file_wrapper': FileWrapper,
-            'CONTENT_TYPE': '',
-            'SERVER_NAME': server_address[0],
-            'SERVER_PORT': str(server_address[1]),
-            PULSAR_CACHE: protocol
-        }
+        # the constant part of the environ is built once per connection
+        base = getattr(connection, 'wsgi_environ', None)
+        if base is None:
+            base = connection.wsgi_environ = base_environ(protocol,
+                                                          FileWrapper)
+        self.environ = base.copy()
+        self.environ['wsgi.timestamp'] = protocol.producer.current_time
+        self.environ[PULSAR_CACHE] = protocol
         self.body_reader = protocol.body_reader(self.environ)
         self.environ['wsgi.input'] = self.body_reader
         self.cfg = cfg
@@ -105,46 +195,40 @@ class WsgiProtocol:
         self.header_wsgi = Headers()
 
     def on_url(self, url):
-        proto = self.protocol
-        transport = self.connection.transport
-        parsed_url = proto.parse_url(url)
-        query = parsed_url.query or b''
-        scheme = ('https' if transport.get_extra_info('sslcontext')
-                  else URL_SCHEME)
+        parsed_url = self.protocol.parse_url(url)
+        environ = self.environ
+        query = parsed_url.query
         if parsed_url.schema:
-            scheme = parsed_url.schema.decode(CHARSET)
+            environ['wsgi.url_scheme'] = parsed_url.schema.decode(CHARSET)
 
         self.parsed_url = parsed_url
-        self.environ.update((
-            ('RAW_URI', url.decode(CHARSET)),
-            ('RAW_URI', url.decode(CHARSET)),
-            ('REQUEST_METHOD', self.parser.get_method().decode(CHARSET)),
-            ('QUERY_STRING', query.decode(CHARSET)),
-            ('wsgi.url_scheme', scheme)
-        ))
+        environ['RAW_URI'] = url.decode(CHARSET)
+        environ['REQUEST_METHOD'] = self.parser.get_method().decode(CHARSET)
+        environ['QUERY_STRING'] = query.decode(CHARSET) if query else ''
 
     def on_header(self, name, value):
-        header = istr(name.decode(CHARSET))
+        header, header_env, key, hop, special = (HEADER_TABLE.get(name) or
+                                                 header_entry(name))
         header_value = value.decode(CHARSET)
-        header_env = header.upper().replace('-', '_')
+        environ = self.environ
 
-        if 'SERVER_PROTOCOL' not in self.environ:
-            self.environ['SERVER_PROTOCOL'] = (
+        if 'SERVER_PROTOCOL' not in environ:
+            environ['SERVER_PROTOCOL'] = (
                 "HTTP/%s" % self.parser.get_http_version())
 
-        if header in HOP_HEADERS:
+        if hop:
             if header == CONNECTION:
-                if (self.environ['SERVER_PROTOCOL'] == 'HTTP/1.0'
+                if (environ['SERVER_PROTOCOL'] == 'HTTP/1.0'
                         or header_value.lower() != 'keep-alive'):
                     self.headers[header] = header_value
             else:
                 self.headers[header] = header_value
-        else:
-            hnd = getattr(self.header_wsgi, header_env, None)
-            if hnd and hnd(self.environ, header_value):
+        elif special:
+            hnd = getattr(self.header_wsgi, header_env)
+            if hnd(environ, header_value):
                 return
 
-        self.environ['HTTP_%s' % header_env] = header_value
+        environ[key] = header_value
 
     def on_headers_complete(self):
         if 'SERVER_PROTOCOL' not in self.environ:
@@ -175,7 +259,8 @@ class WsgiProtocol:
                 path_info = path_info.split(script_name, 1)[1]
             self.environ['PATH_INFO'] = unquote(path_info)
 
-        # add the protocol to the pipeline
+        # add the protocol to the pipeline, queued from now
+        self.protocol.queued = self.protocol._loop.time()
         self.connection.pipeline(self.protocol)
 
     def on_body(self, body):
@@ -225,10 +310,11 @@ class WsgiProtocol:
 
         if not self.headers_sent:
             self.headers_sent = self.get_headers()
-            buffer = bytearray(('%s %s\r\n' % (env['SERVER_PROTOCOL'],
-                                               self.status)).encode(CHARSET))
+            buffer = bytearray(status_line(env['SERVER_PROTOCOL'],
+                                           self.status))
             for k, v in self.headers_sent.items():
-                buffer.extend(('%s: %s\r\n' % (k, v)).encode(CHARSET))
+                buffer.extend(RESPONSE_HEADERS.get(k) or header_name(k))
+                buffer.extend(('%s\r\n' % v).encode(CHARSET))
             buffer.extend(CRLF)
             proto.event('on_headers').fire(data=buffer)
 
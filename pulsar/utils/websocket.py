@@ -40,6 +40,7 @@ from base64 import b64encode
 from .exceptions import ProtocolError
 from .httpurl import CHARSET
 from .lib import FrameParser
+from .pylib.websocket import FrameParser as PyFrameParser
 
 
 CLOSE_CODES = {
@@ -88,7 +89,8 @@ class Extension:
         return data
 
 
-def frame_parser(version=None, kind=0, extensions=None, protocols=None):
+def frame_parser(version=None, kind=0, extensions=None, protocols=None,
+                 pyparser=False):
     '''Create a new :class:`FrameParser` instance.
 
     :param version: protocol version, the default is 13
@@ -101,8 +103,9 @@ def frame_parser(version=None, kind=0, extensions=None, protocols=None):
         implementation.
     '''
     version = get_version(version)
+    Parser = PyFrameParser if pyparser else FrameParser
     # extensions, protocols
-    return FrameParser(version, kind, ProtocolError, close_codes=CLOSE_CODES)
+    return Parser(version, kind, ProtocolError, close_codes=CLOSE_CODES)
 
 
 def parse_close(data):
@@ -0,0 +1,192 @@
+import time
+import errno
+import socket
+import asyncio
+import unittest
+from unittest import mock
+from functools import partial
+
+from pulsar.async import protocols
+from pulsar.async.protocols import TcpServer, Connection
+from pulsar.apps.wsgi import WSGIServer, HttpServerResponse
+from pulsar.apps.test import sequential
+
+
+REQUEST = b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n'
+
+
+def hello(environ, start_response):
+    data = b'Hello World!\n'
+    start_response('200 OK', [('Content-Length', str(len(data)))])
+    return [data]
+
+
+class SlowApp:
+
+    def __init__(self, delay=0, block=0):
+        self.delay = delay
+        self.block = block
+
+    def __call__(self, environ, start_response):
+        if self.block:
+            time.sleep(self.block)
+        if self.delay:
+            return self.respond(environ, start_response)
+        return hello(environ, start_response)
+
+    async def respond(self, environ, start_response):
+        await asyncio.sleep(self.delay)
+        return hello(environ, start_response)
+
+
+@sequential
+class TestAdmission(unittest.TestCase):
+
+    def setUp(self):
+        self.servers = []
+        self.writers = []
+
+    async def tearDown(self):
+        for writer in self.writers:
+            writer.close()
+        for server in self.servers:
+            await server.close()
+
+    async def server(self, app, **kw):
+        loop = asyncio.get_event_loop()
+        server = TcpServer(partial(Connection, HttpServerResponse),
+                           loop=loop, cfg=WSGIServer(hello).cfg, **kw)
+        server.wsgi_callable = app
+        await server.start_serving(address=('127.0.0.1', 0))
+        self.servers.append(server)
+        return server
+
+    async def connect(self, server):
+        reader, writer = await asyncio.open_connection(*server.address)
+        self.writers.append(writer)
+        return reader, writer
+
+    async def response(self, reader):
+        headers = await reader.readuntil(b'\r\n\r\n')
+        status = int(headers.split(b' ', 2)[1])
+        if status == 200:
+            await reader.readexactly(13)
+        return status, headers
+
+    async def test_info(self):
+        server = await self.server(hello)
+        info = server.info()['admission']
+        self.assertEqual(info['max_connections'], 0)
+        self.assertEqual(info['max_inflight'], 0)
+        self.assertEqual(info['max_lag'], 0)
+        self.assertEqual(info['inflight'], 0)
+        self.assertEqual(info['accepting'], True)
+        self.assertEqual(info['shed_inflight'], 0)
+        self.assertEqual(info['shed_lag'], 0)
+        self.assertEqual(info['shed_connections'], 0)
+        self.assertEqual(info['paused_accepting'], 0)
+
+    async def test_max_inflight(self):
+        server = await self.server(SlowApp(delay=0.2), max_inflight=2)
+        clients = [await self.connect(server) for _ in range(4)]
+        for _, writer in clients:
+            writer.write(REQUEST)
+        responses = await asyncio.gather(*[self.response(reader)
+                                           for reader, _ in clients])
+        statuses = sorted((status for status, _ in responses))
+        self.assertEqual(statuses, [200, 200, 503, 503])
+        for status, headers in responses:
+            if status == 503:
+                self.assertIn(b'Retry-After: 1\r\n', headers)
+        info = server.info()['admission']
+        self.assertEqual(info['shed_inflight'], 2)
+        self.assertEqual(info['inflight'], 0)
+
+    async def test_max_lag(self):
+        server = await self.server(SlowApp(block=0.3), max_lag=0.1)
+        clients = [await self.connect(server) for _ in range(2)]
+        for _, writer in clients:
+            writer.write(REQUEST)
+        responses = await asyncio.gather(*[self.response(reader)
+                                           for reader, _ in clients])
+        statuses = sorted((status for status, _ in responses))
+        self.assertEqual(statuses, [200, 503])
+        self.assertEqual(server.info()['admission']['shed_lag'], 1)
+        # the connection of a shed request is closed
+        for (status, _), (reader, _) in zip(responses, clients):
+            if status == 503:
+                self.assertEqual(await reader.read(), b'')
+
+    async def test_max_lag_slow_headers(self):
+        # the lag is counted from the end of the request headers
+        server = await self.server(hello, max_lag=0.1)
+        reader, writer = await self.connect(server)
+        writer.write(REQUEST[:10])
+        await asyncio.sleep(0.3)
+        writer.write(REQUEST[10:])
+        status, _ = await self.response(reader)
+        self.assertEqual(status, 200)
+        self.assertEqual(server.info()['admission']['shed_lag'], 0)
+
+    async def test_max_connections(self):
+        server = await self.server(hello, max_connections=2)
+        clients = [await self.connect(server) for _ in range(2)]
+        for reader, writer in clients:
+            writer.write(REQUEST)
+            status, _ = await self.response(reader)
+            self.assertEqual(status, 200)
+        info = server.info()['admission']
+        self.assertEqual(info['accepting'], False)
+        self.assertEqual(info['paused_accepting'], 1)
+        # the third connection waits in the listen backlog
+        reader, writer = await self.connect(server)
+        writer.write(REQUEST)
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(self.response(reader), 0.2)
+        clients[0][1].close()
+        status, _ = await asyncio.wait_for(self.response(reader), 2)
+        self.assertEqual(status, 200)
+        info = server.info()['admission']
+        self.assertEqual(info['accepting'], False)
+        self.assertEqual(info['paused_accepting'], 2)
+
+    async def test_accept_error(self):
+        server = await self.server(hello)
+        sock = server.sockets[0]
+        loop = asyncio.get_event_loop()
+        error = OSError(errno.EMFILE, 'Too many open files')
+        with mock.patch.object(protocols, 'ACCEPT_RETRY_DELAY', 0.2):
+            with mock.patch.object(socket.socket, 'accept',
+                                   side_effect=error) as accept:
+                server._accept(sock)
+            self.assertEqual(accept.call_count, 1)
+            # the reader is removed until the retry delay has elapsed
+            self.assertFalse(loop.remove_reader(sock.fileno()))
+            await asyncio.sleep(0.3)
+        reader, writer = await self.connect(server)
+        writer.write(REQUEST)
+        status, _ = await asyncio.wait_for(self.response(reader), 2)
+        self.assertEqual(status, 200)
+
+    async def test_overload(self):
+        # 100 requests at once, each blocking the loop for 5 milliseconds
+        server = await self.server(SlowApp(block=0.005), max_lag=0.1)
+        clients = [await self.connect(server) for _ in range(100)]
+        loop = asyncio.get_event_loop()
+
+        async def request(reader, writer):
+            start = loop.time()
+            writer.write(REQUEST)
+            status, _ = await self.response(reader)
+            return status, loop.time() - start
+
+        responses = await asyncio.gather(*[request(*c) for c in clients])
+        latencies = sorted((t for status, t in responses if status == 200))
+        shed = [t for status, t in responses if status == 503]
+        self.assertTrue(latencies)
+        self.assertTrue(shed)
+        self.assertEqual(len(latencies) + len(shed), 100)
+        self.assertEqual(server.info()['admission']['shed_lag'], len(shed))
+        # without admission control the last request waits 0.5 seconds
+        p99 = latencies[int(0.99 * (len(latencies) - 1))]
+        self.assertLess(p99, 0.3)
@@ -0,0 +1,99 @@
+import socket
+import asyncio
+import unittest
+
+from pulsar.api import send
+from pulsar.utils.system import platform
+
+from examples.helloworld.manage import server
+
+
+async def get(address):
+    reader, writer = await asyncio.open_connection(*address)
+    writer.write(b'GET / HTTP/1.1\r\nHost: localhost\r\n'
+                 b'Connection: close\r\n\r\n')
+    data = await reader.read()
+    writer.close()
+    return data
+
+
+@unittest.skipUnless(hasattr(socket, 'SO_REUSEPORT') and
+                     platform.has_multiprocessing_socket,
+                     'Requires SO_REUSEPORT')
+class TestReusePort(unittest.TestCase):
+    workers = 4
+    max_requests = 0
+
+    @classmethod
+    async def setUpClass(cls):
+        s = server(bind='127.0.0.1:0',
+                   name='reuseport-%s' % cls.__name__.lower(),
+                   concurrency='process', workers=cls.workers,
+                   max_requests=cls.max_requests, reuse_port=True,
+                   parse_console=False)
+        cls.app_cfg = await send('arbiter', 'run', s)
+        cls.address = cls.app_cfg.addresses[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        return send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def get(self):
+        # workers may be starting or respawning
+        for _ in range(200):
+            try:
+                data = await get(self.address)
+            except ConnectionRefusedError:
+                await asyncio.sleep(0.05)
+            else:
+                self.assertTrue(data.startswith(b'HTTP/1.1 200'))
+                return
+        raise AssertionError('No worker listening on %s:%s' % self.address)
+
+    async def workers_info(self):
+        for _ in range(100):
+            info = await send(self.app_cfg.name, 'info')
+            workers = info['workers']
+            if len(workers) == self.workers:
+                return workers
+            await asyncio.sleep(0.05)
+        raise AssertionError('Workers not running')
+
+    async def processed(self):
+        processed = []
+        for worker in await self.workers_info():
+            info = await send(worker['actor']['actor_id'], 'info')
+            server = info['%sserver' % self.app_cfg.name]
+            processed.append(server['clients']['processed_clients'])
+        return processed
+
+    async def test_spread(self):
+        await self.get()
+        before = await self.processed()
+        requests = 400
+        for _ in range(requests):
+            await self.get()
+        processed = [b - a for a, b in zip(before, await self.processed())]
+        self.assertEqual(sum(processed), requests)
+        # each worker serves at least half of its fair share
+        fair = requests / self.workers
+        self.assertGreater(min(processed), fair / 2)
+
+
+class TestReusePortRespawn(TestReusePort):
+    workers = 2
+    max_requests = 5
+
+    async def test_spread(self):
+        pass
+
+    async def test_respawn(self):
+        await self.get()
+        workers = await self.workers_info()
+        before = set((w['actor']['actor_id'] for w in workers))
+        for _ in range(3 * self.max_requests):
+            await self.get()
+        # workers were respawned and the port was never released
+        workers = await self.workers_info()
+        after = set((w['actor']['actor_id'] for w in workers))
+        self.assertNotEqual(before, after)
@@ -0,0 +1,203 @@
+import asyncio
+import socket
+import unittest
+from functools import partial
+
+from pulsar.api import Resolver, get_resolver
+from pulsar.async.protocols import TcpServer, Connection
+from pulsar.async.resolver import interleave
+from pulsar.apps.http import HttpClient
+from pulsar.apps.wsgi import WSGIServer, HttpServerResponse
+from pulsar.apps.test import sequential
+
+
+def info(host, port, family=socket.AF_INET):
+    return (family, socket.SOCK_STREAM, 6, '', (host, port))
+
+
+class FakeDns:
+
+    def __init__(self, hosts, delay=0):
+        self.hosts = hosts
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, host, port, family, type):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        addresses = self.hosts.get(host)
+        if not addresses:
+            raise socket.gaierror(socket.EAI_NONAME, 'Name not known')
+        return [info(address, port) for address in addresses]
+
+
+class HangingResolver(Resolver):
+    """Connections to ``hang`` addresses never complete
+    """
+    hang = ()
+
+    async def _sock_connect(self, info, local_addr):
+        if info[4][0] in self.hang:
+            await asyncio.sleep(10)
+        return await super()._sock_connect(info, local_addr)
+
+
+def hello(environ, start_response):
+    start_response('200 OK', [('Content-Length', '5')])
+    return [b'hello']
+
+
+class TestResolver(unittest.TestCase):
+
+    def resolver(self, hosts=None, **kw):
+        dns = FakeDns(hosts or {'a.test': ['127.0.0.1']}, kw.pop('delay', 0))
+        return Resolver(getaddrinfo=dns, **kw), dns
+
+    def test_get_resolver(self):
+        loop = asyncio.get_event_loop()
+        resolver = get_resolver(loop)
+        self.assertIsInstance(resolver, Resolver)
+        self.assertIs(get_resolver(loop), resolver)
+        self.assertTrue(str(resolver))
+
+    def test_interleave(self):
+        v6 = [info('::%d' % i, 80, socket.AF_INET6) for i in range(3)]
+        v4 = [info('10.0.0.%d' % i, 80) for i in range(2)]
+        result = interleave(v6 + v4)
+        self.assertEqual(result, [v6[0], v4[0], v6[1], v4[1], v6[2]])
+        self.assertEqual(interleave(v4), v4)
+
+    async def test_cache(self):
+        resolver, dns = self.resolver(ttl=0.1)
+        infos = await resolver.resolve('a.test', 80)
+        self.assertEqual(infos, [info('127.0.0.1', 80)])
+        self.assertEqual(await resolver.resolve('a.test', 80), infos)
+        self.assertEqual(dns.calls, 1)
+        self.assertEqual(len(resolver), 1)
+        await asyncio.sleep(0.15)
+        await resolver.resolve('a.test', 80)
+        self.assertEqual(dns.calls, 2)
+        info_ = resolver.info()
+        self.assertEqual(info_['hits'], 1)
+        self.assertEqual(info_['misses'], 2)
+
+    async def test_negative_cache(self):
+        resolver, dns = self.resolver(negative_ttl=0.1)
+        for _ in range(3):
+            with self.assertRaises(socket.gaierror):
+                await resolver.resolve('missing.test', 80)
+        self.assertEqual(dns.calls, 1)
+        self.assertEqual(resolver.negative_hits, 2)
+        self.assertEqual(resolver.errors, 1)
+        await asyncio.sleep(0.15)
+        with self.assertRaises(socket.gaierror):
+            await resolver.resolve('missing.test', 80)
+        self.assertEqual(dns.calls, 2)
+
+    async def test_coalesce(self):
+        resolver, dns = self.resolver(delay=0.05)
+        results = await asyncio.gather(*[
+            resolver.resolve('a.test', 80) for _ in range(10)])
+        self.assertEqual(dns.calls, 1)
+        self.assertEqual(resolver.coalesced, 9)
+        self.assertEqual(resolver.info()['inflight'], 0)
+        for infos in results:
+            self.assertEqual(infos, [info('127.0.0.1', 80)])
+        errors = await asyncio.gather(*[
+            resolver.resolve('missing.test', 80) for _ in range(5)],
+            return_exceptions=True)
+        self.assertEqual(dns.calls, 2)
+        for error in errors:
+            self.assertIsInstance(error, socket.gaierror)
+
+    async def test_coalesce_owner_cancelled(self):
+        resolver, dns = self.resolver(delay=0.05)
+        owner = asyncio.ensure_future(resolver.resolve('a.test', 80))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(resolver.resolve('a.test', 80))
+                   for _ in range(3)]
+        await asyncio.sleep(0)
+        owner.cancel()
+        results = await asyncio.gather(*waiters)
+        self.assertTrue(owner.cancelled())
+        self.assertEqual(dns.calls, 1)
+        self.assertEqual(resolver.coalesced, 3)
+        for infos in results:
+            self.assertEqual(infos, [info('127.0.0.1', 80)])
+        self.assertEqual(len(resolver), 1)
+
+    async def test_round_robin(self):
+        resolver, dns = self.resolver(
+            {'b.test': ['10.0.0.1', '10.0.0.2', '10.0.0.3']})
+        first = []
+        for _ in range(4):
+            infos = await resolver.resolve('b.test', 80)
+            self.assertEqual(len(infos), 3)
+            first.append(infos[0][4][0])
+        self.assertEqual(first, ['10.0.0.1', '10.0.0.2', '10.0.0.3',
+                                 '10.0.0.1'])
+
+    async def test_max_size(self):
+        resolver, dns = self.resolver(
+            dict((('%d.test' % i, ['127.0.0.1']) for i in range(5))),
+            max_size=3)
+        for i in range(5):
+            await resolver.resolve('%d.test' % i, 80)
+        self.assertEqual(len(resolver), 3)
+
+
+@sequential
+class TestResolverConnect(unittest.TestCase):
+
+    async def setUp(self):
+        loop = asyncio.get_event_loop()
+        self.server = TcpServer(partial(Connection, HttpServerResponse),
+                                loop=loop, cfg=WSGIServer(hello).cfg)
+        self.server.wsgi_callable = hello
+        await self.server.start_serving(address=('127.0.0.1', 0))
+        self.port = self.server.address[1]
+
+    async def tearDown(self):
+        await self.server.close()
+
+    async def test_http_client(self):
+        dns = FakeDns({'app.test': ['127.0.0.1']})
+        resolver = Resolver(getaddrinfo=dns)
+        client = HttpClient(resolver=resolver, close_connections=True)
+        self.assertIs(client.resolver, resolver)
+        url = 'http://app.test:%d/' % self.port
+        for _ in range(3):
+            response = await client.get(url)
+            self.assertEqual(response.content, b'hello')
+        self.assertEqual(dns.calls, 1)
+        self.assertEqual(resolver.hits, 2)
+        with self.assertRaises(socket.gaierror):
+            await client.get('http://missing.test/')
+        await client.close()
+
+    async def test_fallback(self):
+        dns = FakeDns({'app.test': ['127.0.0.2', '127.0.0.1']})
+        resolver = HangingResolver(getaddrinfo=dns, delay=0.05)
+        resolver.hang = ('127.0.0.2',)
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        transport, _ = await resolver.create_connection(
+            asyncio.Protocol, 'app.test', self.port)
+        self.assertEqual(transport.get_extra_info('peername'),
+                         ('127.0.0.1', self.port))
+        self.assertLess(loop.time() - start, 1)
+        self.assertEqual(resolver.fallbacks, 1)
+        transport.close()
+
+    async def test_connection_errors(self):
+        # nothing listens on the port
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        closed_port = sock.getsockname()[1]
+        sock.close()
+        dns = FakeDns({'app.test': ['127.0.0.1']})
+        resolver = Resolver(getaddrinfo=dns)
+        with self.assertRaises(ConnectionRefusedError):
+            await resolver.create_connection(asyncio.Protocol, 'app.test',
+                                             closed_port)
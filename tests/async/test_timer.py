@@ -0,0 +1,131 @@
+import asyncio
+import unittest
+
+from pulsar.api import send
+from pulsar.async.timeout import TimerWheel, timer_wheel, timeout
+
+from examples.helloworld.manage import server
+
+
+class TestTimerWheel(unittest.TestCase):
+    tick = 0.05
+
+    def wheel(self, **kw):
+        return TimerWheel(asyncio.get_event_loop(), self.tick, **kw)
+
+    def test_timer_wheel(self):
+        loop = asyncio.get_event_loop()
+        wheel = timer_wheel(loop)
+        self.assertIsInstance(wheel, TimerWheel)
+        self.assertEqual(timer_wheel(loop), wheel)
+        self.assertEqual(wheel.tick, 0.1)
+        other = timer_wheel(loop, 0.5)
+        self.assertNotEqual(other, wheel)
+        self.assertEqual(other.tick, 0.5)
+        self.assertTrue(str(wheel))
+
+    async def test_accuracy(self):
+        loop = asyncio.get_event_loop()
+        wheel = self.wheel()
+        fired = {}
+
+        def done(delay):
+            fired[delay] = loop.time()
+
+        start = loop.time()
+        delays = (0.01, 0.05, 0.12, 0.26, 0.3)
+        for delay in delays:
+            wheel.call_later(delay, done, delay)
+        self.assertEqual(len(wheel), 5)
+        await asyncio.sleep(0.5)
+        self.assertEqual(len(wheel), 0)
+        self.assertEqual(sorted(fired), list(delays))
+        for delay, when in fired.items():
+            late = when - start - delay
+            self.assertGreaterEqual(late, -loop._clock_resolution)
+            # within one tick, plus some slack for a busy loop
+            self.assertLess(late, self.tick + 0.02)
+
+    async def test_cancel(self):
+        wheel = self.wheel()
+        fired = []
+        t1 = wheel.call_later(0.05, fired.append, 1)
+        wheel.call_later(0.05, fired.append, 2)
+        t1.cancel()
+        self.assertTrue(t1.cancelled())
+        self.assertEqual(len(wheel), 1)
+        t1.cancel()
+        self.assertEqual(len(wheel), 1)
+        await asyncio.sleep(0.2)
+        self.assertEqual(fired, [2])
+        # no timers, the wheel stops ticking
+        self.assertEqual(wheel._handle, None)
+
+    async def test_wrap_around(self):
+        loop = asyncio.get_event_loop()
+        wheel = self.wheel(slots=4)
+        fired = []
+        start = loop.time()
+        wheel.call_later(0.32, lambda: fired.append(loop.time() - start))
+        wheel.call_later(0.02, fired.append, 0)
+        await asyncio.sleep(0.45)
+        self.assertEqual(len(fired), 2)
+        self.assertEqual(fired[0], 0)
+        self.assertGreaterEqual(fired[1], 0.32 - loop._clock_resolution)
+
+    async def test_callback_error(self):
+        wheel = self.wheel()
+        fired = []
+        wheel.call_later(0.01, lambda: 1/0)
+        wheel.call_later(0.01, fired.append, 1)
+        handler = asyncio.get_event_loop().get_exception_handler()
+        errors = []
+        asyncio.get_event_loop().set_exception_handler(
+            lambda loop, context: errors.append(context))
+        try:
+            await asyncio.sleep(0.15)
+        finally:
+            asyncio.get_event_loop().set_exception_handler(handler)
+        self.assertEqual(fired, [1])
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0]['exception'], ZeroDivisionError)
+
+    async def test_timeout(self):
+        loop = asyncio.get_event_loop()
+        wheel = self.wheel()
+        start = loop.time()
+        with self.assertRaises(asyncio.TimeoutError):
+            with timeout(loop, 0.1, wheel):
+                await asyncio.sleep(1)
+        self.assertLess(loop.time() - start, 0.1 + self.tick + 0.02)
+        with timeout(loop, 0.1, wheel):
+            await asyncio.sleep(0.01)
+        self.assertEqual(len(wheel), 0)
+
+
+class TestIdleTimeout(unittest.TestCase):
+
+    @classmethod
+    async def setUpClass(cls):
+        s = server(bind='127.0.0.1:0', name=cls.__name__.lower(),
+                   http_keep_alive=1, timer_tick=0.05,
+                   parse_console=False)
+        cls.app_cfg = await send('arbiter', 'run', s)
+
+    @classmethod
+    def tearDownClass(cls):
+        return send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def test_idle_connection(self):
+        loop = asyncio.get_event_loop()
+        reader, writer = await asyncio.open_connection(
+            *self.app_cfg.addresses[0])
+        writer.write(b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        await reader.readuntil(b'\r\n\r\n')
+        start = loop.time()
+        data = await reader.read()
+        elapsed = loop.time() - start
+        self.assertEqual(data, b'Hello World!\n')
+        self.assertGreaterEqual(elapsed, 0.9)
+        self.assertLess(elapsed, 1.5)
+        writer.close()
@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+
+from pulsar.api import send
+from pulsar.apps import wsgi
+from pulsar.apps.http import HttpClient
+from pulsar.apps.test import sequential
+
+
+REQUESTS = 1000
+CONCURRENCY = 50
+
+
+class HelloSite(wsgi.LazyWsgi):
+
+    def setup(self, environ=None):
+        return self
+
+    def __call__(self, environ, start_response):
+        start_response('200 OK', [('Content-Length', '5')])
+        return [b'hello']
+
+
+@sequential
+class TestFetchMany(unittest.TestCase):
+    """Send 1000 requests to a server with 2 workers
+    """
+    __benchmark__ = True
+    __number__ = 1
+
+    @classmethod
+    async def setUpClass(cls):
+        s = wsgi.WSGIServer(callable=HelloSite(), name=cls.__name__.lower(),
+                            bind='127.0.0.1:0', workers=2)
+        cls.app_cfg = await send('arbiter', 'run', s)
+        cls.uri = 'http://{0}:{1}/'.format(*cls.app_cfg.addresses[0])
+        cls.client = HttpClient(pool_size=CONCURRENCY)
+
+    @classmethod
+    async def tearDownClass(cls):
+        await cls.client.close()
+        await send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def test_fetch_many(self):
+        urls = (self.uri for _ in range(REQUESTS))
+        fetch = self.client.fetch_many(urls, concurrency=CONCURRENCY)
+        async for _, response in fetch:
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(fetch.completed, REQUESTS)
+
+    async def test_gather(self):
+        # the hand-rolled alternative: a task per request and a semaphore
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def get(url):
+            async with semaphore:
+                return await self.client.get(url)
+
+        responses = await asyncio.gather(*[get(self.uri)
+                                           for _ in range(REQUESTS)])
+        self.assertEqual(len(responses), REQUESTS)
@@ -0,0 +1,38 @@
+import json
+import unittest
+
+from pulsar.apps.wsgi import WsgiResponse, GZipMiddleware
+
+
+class TestGZip(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 100
+    _sizes = {'tiny': 10,
+              'small': 100,
+              'normal': 1000,
+              'big': 10000,
+              'huge': 100000}
+
+    @classmethod
+    def setUpClass(cls):
+        size = cls._sizes[cls.cfg.size]
+        cls.chunks = [json.dumps({'id': i, 'name': 'record %d' % i,
+                                  'values': list(range(20))}).encode('utf-8')
+                      for i in range(size)]
+        cls.environ = {'REQUEST_METHOD': 'GET',
+                       'HTTP_ACCEPT_ENCODING': 'gzip, deflate'}
+        cls.middleware = GZipMiddleware()
+
+    def test_compress_string(self):
+        self.middleware.compress_string(b''.join(self.chunks))
+
+    def test_content(self):
+        response = WsgiResponse(content=self.chunks,
+                                content_type='application/json')
+        b''.join(self.middleware(self.environ, response).content)
+
+    def test_stream(self):
+        response = WsgiResponse(content=iter(self.chunks),
+                                content_type='application/json')
+        for chunk in self.middleware(self.environ, response).content:
+            pass
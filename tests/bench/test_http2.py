@@ -0,0 +1,70 @@
+import asyncio
+import unittest
+
+from pulsar.api import send
+from pulsar.apps.wsgi import http2
+from pulsar.utils.http import hpack
+
+from examples.helloworld.manage import server
+
+
+REQUEST = b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n'
+HEADERS = [(b':method', b'GET'), (b':scheme', b'http'), (b':path', b'/'),
+           (b':authority', b'localhost')]
+
+
+class TestHttp2(unittest.TestCase):
+    """Many small requests over one HTTP/2 connection or over one
+    HTTP/1.1 keep-alive connection
+    """
+    __benchmark__ = True
+    __number__ = 20
+    _sizes = {'tiny': 2,
+              'small': 10,
+              'normal': 20,
+              'big': 50,
+              'huge': 100}
+
+    @classmethod
+    async def setUpClass(cls):
+        cls.size = cls._sizes[cls.cfg.size]
+        s = server(bind='127.0.0.1:0', name=cls.__name__.lower(),
+                   http2=True, parse_console=False)
+        cls.app_cfg = await send('arbiter', 'run', s)
+
+    @classmethod
+    def tearDownClass(cls):
+        return send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def test_http11_keep_alive(self):
+        reader, writer = await asyncio.open_connection(
+            *self.app_cfg.addresses[0])
+        for _ in range(self.size):
+            writer.write(REQUEST)
+            await reader.readuntil(b'\r\n\r\n')
+            await reader.readexactly(13)
+        writer.close()
+
+    async def test_http2_streams(self):
+        reader, writer = await asyncio.open_connection(
+            *self.app_cfg.addresses[0])
+        encoder = hpack.Encoder()
+        decoder = hpack.Decoder()
+        frames = [http2.PREFACE, http2.frame(http2.SETTINGS, 0, 0)]
+        for stream_id in range(1, 2*self.size, 2):
+            frames.append(http2.frame(
+                http2.HEADERS, http2.END_HEADERS | http2.END_STREAM,
+                stream_id, encoder.encode(HEADERS)))
+        writer.write(b''.join(frames))
+        done = 0
+        while done < self.size:
+            header = await reader.readexactly(9)
+            head, flags, _ = http2.FRAME_HEADER.unpack(header)
+            payload = await reader.readexactly(head >> 8)
+            frame_type = head & 0xff
+            if frame_type == http2.HEADERS:
+                decoder.decode(payload)
+            if (frame_type in (http2.HEADERS, http2.DATA) and
+                    flags & http2.END_STREAM):
+                done += 1
+        writer.close()
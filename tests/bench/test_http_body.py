@@ -0,0 +1,88 @@
+import unittest
+
+from pulsar.api import send
+from pulsar.apps import wsgi
+from pulsar.apps.http import HttpClient
+from pulsar.apps.test import sequential
+
+
+BLOCK = b'x' * 2**16
+
+
+class BodySite(wsgi.LazyWsgi):
+    """Serve ``/<size>`` bytes with a Content-Length header and
+    ``/chunked/<size>`` bytes with chunked transfer encoding
+    """
+    def setup(self, environ=None):
+        return self
+
+    def __call__(self, environ, start_response):
+        path = environ['PATH_INFO'].split('/')
+        size = int(path[-1])
+        headers = [('Content-Type', 'application/octet-stream')]
+        if path[1] != 'chunked':
+            headers.append(('Content-Length', str(size)))
+        start_response('200 OK', headers)
+        return body(size)
+
+
+def body(size):
+    while size > 0:
+        chunk = BLOCK[:size]
+        size -= len(chunk)
+        yield chunk
+
+
+class BodyBench:
+    __benchmark__ = True
+
+    @classmethod
+    async def setUpClass(cls):
+        s = wsgi.WSGIServer(callable=BodySite(), name=cls.__name__.lower(),
+                            bind='127.0.0.1:0')
+        cls.app_cfg = await send('arbiter', 'run', s)
+        cls.uri = 'http://{0}:{1}/'.format(*cls.app_cfg.addresses[0])
+        cls.client = HttpClient()
+
+    @classmethod
+    async def tearDownClass(cls):
+        await cls.client.close()
+        await send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def fetch(self, size, chunked=False):
+        url = '%s%s%d' % (self.uri, 'chunked/' if chunked else '', size)
+        response = await self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.content), size)
+
+
+@sequential
+class TestHttpBody(BodyBench, unittest.TestCase):
+    """Fetch response bodies from 1KB to 32MB
+    """
+    __number__ = 5
+
+    def test_1kb(self):
+        return self.fetch(2**10)
+
+    def test_1mb(self):
+        return self.fetch(2**20)
+
+    def test_32mb(self):
+        return self.fetch(2**25)
+
+    def test_32mb_chunked(self):
+        return self.fetch(2**25, True)
+
+
+@sequential
+class TestHttpLargeBody(BodyBench, unittest.TestCase):
+    """Fetch response bodies of 500MB
+    """
+    __number__ = 1
+
+    def test_500mb(self):
+        return self.fetch(500*2**20)
+
+    def test_500mb_chunked(self):
+        return self.fetch(500*2**20, True)
@@ -0,0 +1,76 @@
+import unittest
+
+from pulsar.utils.http import parser
+
+try:
+    import httptools
+except ImportError:     # pragma    nocover
+    httptools = None
+
+
+class Protocol:
+
+    def __init__(self, Parser):
+        self.parser = Parser(self)
+
+    def on_url(self, url):
+        pass
+
+    def on_header(self, name, value):
+        pass
+
+    def on_headers_complete(self):
+        pass
+
+    def on_body(self, body):
+        pass
+
+    def on_message_complete(self):
+        pass
+
+
+class TestPythonHttpParser(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 1000
+    _sizes = {'tiny': 2,
+              'small': 10,
+              'normal': 20,
+              'big': 50,
+              'huge': 100}
+    Parser = parser.HttpRequestParser
+
+    @classmethod
+    def setUpClass(cls):
+        headers = b''.join((b'X-Header-%d: value %d\r\n' % (n, n)
+                            for n in range(cls._sizes[cls.cfg.size])))
+        body = b'x' * 2**14
+        cls.message = (b'POST /upload?id=5 HTTP/1.1\r\n' + headers +
+                       b'Content-Length: %d\r\n\r\n' % len(body) + body)
+        cls.pipeline = cls.message * 10
+
+    def feed(self, data, chunk_size):
+        parser = Protocol(self.Parser).parser
+        for start in range(0, len(data), chunk_size):
+            parser.feed_data(data[start:start+chunk_size])
+
+    def test_message(self):
+        Protocol(self.Parser).parser.feed_data(self.message)
+
+    def test_chunks_64(self):
+        self.feed(self.message, 64)
+
+    def test_chunks_1024(self):
+        self.feed(self.message, 1024)
+
+    def test_pipeline(self):
+        data = self.pipeline
+        while data:
+            data = Protocol(self.Parser).parser.feed_data(data)
+
+
+@unittest.skipUnless(httptools, 'Requires httptools')
+class TestHttptoolsParser(TestPythonHttpParser):
+    Parser = httptools.HttpRequestParser if httptools else None
+
+    def test_pipeline(self):
+        Protocol(self.Parser).parser.feed_data(self.pipeline)
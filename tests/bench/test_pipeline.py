@@ -0,0 +1,105 @@
+import os
+import asyncio
+import unittest
+
+from pulsar.api import send
+from pulsar.apps import wsgi
+from pulsar.apps.http import HttpClient
+from pulsar.apps.test import sequential
+
+
+REQUESTS = 100
+POOL_SIZE = 2
+PIPELINE = 16
+# seconds added to the data sent in each direction, a round trip takes
+# twice as much
+LATENCY = float(os.environ.get('PULSAR_BENCH_LATENCY', 0.01))
+
+
+class HelloSite(wsgi.LazyWsgi):
+
+    def setup(self, environ=None):
+        return self
+
+    def __call__(self, environ, start_response):
+        start_response('200 OK', [('Content-Length', '5')])
+        return [b'hello']
+
+
+class Latency:
+    """A TCP proxy delaying the data sent in each direction by
+    ``delay`` seconds
+    """
+    def __init__(self, address, delay):
+        self.address = address
+        self.delay = delay
+
+    async def __call__(self, reader, writer):
+        upstream_reader, upstream_writer = await asyncio.open_connection(
+            *self.address)
+        await asyncio.gather(self._pipe(reader, upstream_writer),
+                             self._pipe(upstream_reader, writer))
+
+    async def _pipe(self, reader, writer):
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue()
+        sender = loop.create_task(self._send(queue, writer))
+        data = True
+        while data:
+            try:
+                data = await reader.read(2**16)
+            except ConnectionError:
+                data = b''
+            queue.put_nowait((loop.time() + self.delay, data))
+        await sender
+
+    async def _send(self, queue, writer):
+        loop = asyncio.get_event_loop()
+        while True:
+            deadline, data = await queue.get()
+            await asyncio.sleep(deadline - loop.time())
+            if not data:
+                writer.close()
+                break
+            writer.write(data)
+
+
+@sequential
+class TestPipeline(unittest.TestCase):
+    """Send 100 requests on 2 connections to a server behind a link with
+    20 milliseconds of round trip time
+    """
+    __benchmark__ = True
+    __number__ = 1
+
+    @classmethod
+    async def setUpClass(cls):
+        s = wsgi.WSGIServer(callable=HelloSite(), name=cls.__name__.lower(),
+                            bind='127.0.0.1:0', workers=1)
+        cls.app_cfg = await send('arbiter', 'run', s)
+        proxy = Latency(cls.app_cfg.addresses[0], LATENCY)
+        cls.proxy = await asyncio.start_server(proxy, '127.0.0.1', 0)
+        address = cls.proxy.sockets[0].getsockname()
+        cls.uri = 'http://{0}:{1}/'.format(*address)
+
+    @classmethod
+    async def tearDownClass(cls):
+        cls.proxy.close()
+        await cls.proxy.wait_closed()
+        await send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def fetch(self, **kw):
+        client = HttpClient(pool_size=POOL_SIZE, **kw)
+        try:
+            responses = await asyncio.gather(
+                *[client.get(self.uri) for _ in range(REQUESTS)])
+        finally:
+            await client.close()
+        for response in responses:
+            self.assertEqual(response.content, b'hello')
+
+    async def test_pipelined(self):
+        await self.fetch(pipeline=PIPELINE)
+
+    async def test_not_pipelined(self):
+        await self.fetch()
@@ -0,0 +1,60 @@
+from random import randint, choice
+from uuid import uuid4
+import unittest
+
+from pulsar.apps.wsgi import Router
+
+
+def handler(request):
+    pass
+
+
+def api(resources):
+    root = Router('/', get=handler)
+    v1 = Router('api/v1/')
+    root.add_child(v1)
+    for name in resources:
+        v1.add_child(Router(name, get=handler, post=handler))
+        v1.add_child(Router('%s/<int:id>' % name, get=handler, put=handler))
+        v1.add_child(Router('%s/<int:id>/<field>' % name, get=handler))
+        v1.add_child(Router('%s/<uuid:uid>/history' % name, get=handler))
+    return root
+
+
+class TestRouter(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 10000
+    _sizes = {'tiny': 10,
+              'small': 50,
+              'normal': 100,
+              'big': 250,
+              'huge': 1000}
+
+    @classmethod
+    def setUpClass(cls):
+        size = cls._sizes[cls.cfg.size]
+        resources = ['resource%d' % i for i in range(size)]
+        cls.router = api(resources)
+        cls.urls = []
+        for _ in range(1000):
+            name = choice(resources)
+            cls.urls.append(choice((
+                '/api/v1/%s' % name,
+                '/api/v1/%s/%d' % (name, randint(1, 10**6)),
+                '/api/v1/%s/%d/field%d' % (name, randint(1, 10**6),
+                                           randint(1, 100)),
+                '/api/v1/%s/%s/history' % (name, uuid4())
+            )))
+
+    def setUp(self):
+        self.index = 0
+
+    def url(self):
+        self.index = (self.index + 1) % len(self.urls)
+        return self.urls[self.index]
+
+    def test_resolve(self):
+        self.router.resolve(self.url(), 'GET')
+
+    def test_recursive(self):
+        self.router._resolve(self.url()[1:], 'get')
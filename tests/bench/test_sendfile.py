@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from pulsar.api import send
+from pulsar.apps import wsgi
+from pulsar.apps.http import HttpClient
+
+
+class MediaSite(wsgi.LazyWsgi):
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def setup(self, environ=None):
+        return wsgi.WsgiHandler([wsgi.MediaRouter('/media', self.directory)])
+
+
+class TestSendfile(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 20
+    _sizes = {'tiny': 2**16,
+              'small': 2**20,
+              'normal': 2**23,
+              'big': 2**26,
+              'huge': 2**28}
+
+    @classmethod
+    async def setUpClass(cls):
+        size = cls._sizes[cls.cfg.size]
+        cls.directory = tempfile.mkdtemp()
+        path = os.path.join(cls.directory, 'data.bin')
+        with open(path, 'wb') as fp:
+            fp.write(os.urandom(size))
+        s = wsgi.WSGIServer(callable=MediaSite(cls.directory),
+                            name=cls.__name__.lower(), bind='127.0.0.1:0')
+        cls.app_cfg = await send('arbiter', 'run', s)
+        addr = cls.app_cfg.addresses[0]
+        cls.uri = 'http://{0}:{1}/media/data.bin'.format(*addr)
+        cls.size = size
+        cls.client = HttpClient()
+
+    @classmethod
+    async def tearDownClass(cls):
+        await send('arbiter', 'kill_actor', cls.app_cfg.name)
+        for name in os.listdir(cls.directory):
+            os.remove(os.path.join(cls.directory, name))
+        os.rmdir(cls.directory)
+
+    async def test_file(self):
+        response = await self.client.get(self.uri)
+        self.assertEqual(len(response.content), self.size)
+
+    async def test_range(self):
+        half = self.size // 2
+        response = await self.client.get(
+            self.uri, headers=[('range', 'bytes=%d-' % half)])
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(len(response.content), self.size - half)
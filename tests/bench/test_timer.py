@@ -0,0 +1,48 @@
+import asyncio
+import unittest
+
+from pulsar.async.timeout import TimerWheel, timeout
+
+
+def callback():
+    pass
+
+
+class TestTimers(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 1000
+    _sizes = {'tiny': 10,
+              'small': 100,
+              'normal': 1000,
+              'big': 10000,
+              'huge': 100000}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.size = cls._sizes[cls.cfg.size]
+        cls.loop = asyncio.get_event_loop()
+        cls.wheel = TimerWheel(cls.loop)
+        # pending timers, as many as open connections
+        cls.pending = [cls.loop.call_later(60, callback)
+                       for _ in range(cls.size)]
+        cls.pending.extend((cls.wheel.call_later(60, callback)
+                            for _ in range(cls.size)))
+
+    @classmethod
+    def tearDownClass(cls):
+        for timer in cls.pending:
+            timer.cancel()
+
+    def test_loop_arm_disarm(self):
+        self.loop.call_later(15, callback).cancel()
+
+    def test_wheel_arm_disarm(self):
+        self.wheel.call_later(15, callback).cancel()
+
+    async def test_loop_timeout(self):
+        with timeout(self.loop, 15):
+            await asyncio.sleep(0)
+
+    async def test_wheel_timeout(self):
+        with timeout(self.loop, 15, self.wheel):
+            await asyncio.sleep(0)
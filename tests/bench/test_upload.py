@@ -0,0 +1,81 @@
+import random
+import unittest
+
+from pulsar.api import send
+from pulsar.apps import wsgi
+from pulsar.apps.http import HttpClient
+from pulsar.apps.test import sequential, test_timeout
+
+
+UPLOAD_SIZE = 2**31
+# a block of bytes which does not compress
+BLOCK = random.Random(7).getrandbits(2**19).to_bytes(2**16, 'big')
+
+
+def rss():
+    """Resident set size in bytes of this process, ``None`` if unknown
+    """
+    try:
+        with open('/proc/self/status') as fp:
+            for line in fp:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+
+
+class SinkSite(wsgi.LazyWsgi):
+
+    def setup(self, environ=None):
+        return self
+
+    async def __call__(self, environ, start_response):
+        reader = environ['wsgi.input']
+        size = 0
+        while True:
+            data = await reader.read(2**16)
+            if not data:
+                break
+            size += len(data)
+        body = str(size).encode('ascii')
+        start_response('200 OK', [('Content-Length', str(len(body)))])
+        return [body]
+
+
+@sequential
+@test_timeout(600)
+class TestUpload(unittest.TestCase):
+    """Upload 2GB from a generator, the client memory stays bounded
+    """
+    __benchmark__ = True
+    __number__ = 1
+
+    @classmethod
+    async def setUpClass(cls):
+        s = wsgi.WSGIServer(callable=SinkSite(), name=cls.__name__.lower(),
+                            bind='127.0.0.1:0', workers=1)
+        cls.app_cfg = await send('arbiter', 'run', s)
+        cls.uri = 'http://{0}:{1}/'.format(*cls.app_cfg.addresses[0])
+        cls.client = HttpClient()
+
+    @classmethod
+    async def tearDownClass(cls):
+        await cls.client.close()
+        await send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def test_large_generator(self):
+        chunks = UPLOAD_SIZE // len(BLOCK)
+        start = rss()
+        peak = [start or 0]
+
+        def progress(sent, total):
+            if start and not sent % 2**26:
+                peak[0] = max(peak[0], rss())
+
+        response = await self.client.post(
+            self.uri, data=(BLOCK for _ in range(chunks)),
+            upload_progress=progress)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(int(response.content), UPLOAD_SIZE)
+        if start:
+            self.assertLess(peak[0] - start, 32*2**20)
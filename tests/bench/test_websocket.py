@@ -1,40 +1,78 @@
-from random import randint
+import os
 import unittest
 
 from pulsar.utils.websocket import frame_parser
 
 
-def i2b(args):
-    return bytes(bytearray(args))
+SIZES = {'1kb': 2**10,
+         '64kb': 2**16,
+         '1mb': 2**20}
+# frames are received in pieces of this size
+READ_SIZE = 2**16
 
 
 class TestCParser(unittest.TestCase):
+    """Encode and decode masked (client to server) and unmasked (server
+    to client) frames from 1KB to 1MB
+    """
     __benchmark__ = True
-    __number__ = 10000
-    _sizes = {'tiny': 10,
-              'small': 200,
-              'normal': 2000,
-              'large': 10000,
-              'huge': 100000}
+    __number__ = 100
 
     @classmethod
     def setUpClass(cls):
-        size = cls.cfg.size
-        nsize = cls._sizes[size]
-        cls.data = i2b((randint(0, 255) for v in range(nsize)))
+        server = cls.parser()
+        client = cls.parser(kind=1)
+        cls.data = dict(((name, os.urandom(size))
+                         for name, size in SIZES.items()))
+        cls.masked = dict(((name, client.encode(data, opcode=2))
+                           for name, data in cls.data.items()))
+        cls.unmasked = dict(((name, server.encode(data, opcode=2))
+                             for name, data in cls.data.items()))
 
-    def setUp(self):
-        self.server = self.parser()
-        self.client = self.parser(kind=1)
-
-    def parser(self, kind=0):
+    @classmethod
+    def parser(cls, kind=0):
         return frame_parser(kind=kind)
 
-    def test_masked_encode(self):
-        self.client.encode(self.data, opcode=2)
+    def encode(self, size):
+        self.parser(kind=1).encode(self.data[size], opcode=2)
+
+    def decode(self, size, masked=True):
+        chunk = (self.masked if masked else self.unmasked)[size]
+        parser = self.parser(kind=0 if masked else 1)
+        for start in range(0, len(chunk), READ_SIZE):
+            frame = parser.decode(chunk[start:start + READ_SIZE])
+        self.assertEqual(len(frame.body), SIZES[size])
+
+    def test_masked_encode_1kb(self):
+        self.encode('1kb')
+
+    def test_masked_encode_64kb(self):
+        self.encode('64kb')
+
+    def test_masked_encode_1mb(self):
+        self.encode('1mb')
+
+    def test_masked_decode_1kb(self):
+        self.decode('1kb')
+
+    def test_masked_decode_64kb(self):
+        self.decode('64kb')
+
+    def test_masked_decode_1mb(self):
+        self.decode('1mb')
+
+    def test_unmasked_decode_1kb(self):
+        self.decode('1kb', False)
+
+    def test_unmasked_decode_64kb(self):
+        self.decode('64kb', False)
+
+    def test_unmasked_decode_1mb(self):
+        self.decode('1mb', False)
 
 
 class TestPyParser(TestCParser):
 
-    def parser(self, kind=0):
+    @classmethod
+    def parser(cls, kind=0):
         return frame_parser(pyparser=True, kind=kind)
@@ -0,0 +1,113 @@
+import unittest
+
+from pulsar.api import EventHandler
+from pulsar.utils import http
+from pulsar.utils.lib import WsgiProtocol
+from pulsar.apps.wsgi.wrappers import FileWrapper
+
+
+COMMON = (b'Host: localhost:8000',
+          b'User-Agent: Mozilla/5.0 (X11; Linux x86_64) Firefox/55.0',
+          b'Accept: text/html,application/xhtml+xml',
+          b'Accept-Language: en-US,en;q=0.5',
+          b'Accept-Encoding: gzip, deflate',
+          b'Referer: http://localhost:8000/',
+          b'Cookie: session=3f29a1; theme=dark',
+          b'Connection: keep-alive',
+          b'Upgrade-Insecure-Requests: 1',
+          b'Cache-Control: max-age=0',
+          b'If-None-Match: "a6c1f9"',
+          b'If-Modified-Since: Tue, 15 Aug 2017 10:00:00 GMT',
+          b'Dnt: 1',
+          b'Origin: http://localhost:8000',
+          b'X-Requested-With: XMLHttpRequest',
+          b'X-Forwarded-Proto: http')
+RESPONSE_HEADERS = [('Content-Type', 'text/plain'),
+                    ('Content-Length', '13'),
+                    ('Cache-Control', 'no-cache'),
+                    ('Vary', 'Accept-Encoding'),
+                    ('X-Frame-Options', 'SAMEORIGIN')]
+
+
+def request(size):
+    headers = list(COMMON[:size])
+    headers.extend((b'X-Custom-Header-%d: value %d' % (n, n)
+                    for n in range(size - len(headers))))
+    return b'GET /path?page=1 HTTP/1.1\r\n%s\r\n\r\n' % b'\r\n'.join(headers)
+
+
+class Transport:
+
+    def get_extra_info(self, name):
+        if name == 'sockname':
+            return ('127.0.0.1', 8000)
+
+
+class Body:
+
+    def feed_data(self, data):
+        pass
+
+    def feed_eof(self):
+        pass
+
+
+class Producer:
+    current_time = 1500000000
+    server_software = 'pulsar'
+
+
+class Connection:
+    address = ('127.0.0.1', 45000)
+    transport = Transport()
+
+    def pipeline(self, protocol):
+        pass
+
+    def write(self, data):
+        pass
+
+
+class Protocol(EventHandler):
+    ONE_TIME_EVENTS = ('on_headers',)
+    create_parser = http.HttpRequestParser
+    parse_url = staticmethod(http.parse_url)
+    producer = Producer()
+    connection = Connection()
+
+    def body_reader(self, environ):
+        return Body()
+
+    def finished_reading(self):
+        pass
+
+
+class TestWsgiEnviron(unittest.TestCase):
+    """Build the WSGI environ of requests with 5, 20 and 50 headers and
+    serialise a response
+    """
+    __benchmark__ = True
+    __number__ = 2000
+
+    @classmethod
+    def setUpClass(cls):
+        cls.requests = dict(((size, request(size)) for size in (5, 20, 50)))
+
+    def environ(self, size):
+        wsgi = WsgiProtocol(Protocol(), None, FileWrapper)
+        wsgi.parser.feed_data(self.requests[size])
+        return wsgi
+
+    def test_headers_5(self):
+        self.environ(5)
+
+    def test_headers_20(self):
+        self.environ(20)
+
+    def test_headers_50(self):
+        self.environ(50)
+
+    def test_response(self):
+        wsgi = self.environ(5)
+        wsgi.start_response('200 OK', RESPONSE_HEADERS)
+        wsgi.write(b'Hello World!\n', True)
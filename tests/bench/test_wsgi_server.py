@@ -0,0 +1,50 @@
+import asyncio
+import unittest
+
+from pulsar.api import send
+
+from examples.helloworld.manage import server
+
+
+REQUEST = b'GET / HTTP/1.1\r\nHost: localhost\r\n\r\n'
+
+
+class TestWsgiServer(unittest.TestCase):
+    __benchmark__ = True
+    __number__ = 20
+    _sizes = {'tiny': 2,
+              'small': 10,
+              'normal': 20,
+              'big': 50,
+              'huge': 100}
+
+    @classmethod
+    async def setUpClass(cls):
+        cls.size = cls._sizes[cls.cfg.size]
+        s = server(bind='127.0.0.1:0', name=cls.__name__.lower(),
+                   parse_console=False)
+        cls.app_cfg = await send('arbiter', 'run', s)
+
+    @classmethod
+    def tearDownClass(cls):
+        return send('arbiter', 'kill_actor', cls.app_cfg.name)
+
+    async def responses(self, reader, number):
+        for _ in range(number):
+            await reader.readuntil(b'\r\n\r\n')
+            await reader.readexactly(13)
+
+    async def test_requests(self):
+        reader, writer = await asyncio.open_connection(
+            *self.app_cfg.addresses[0])
+        for _ in range(self.size):
+            writer.write(REQUEST)
+            await self.responses(reader, 1)
+        writer.close()
+
+    async def test_pipeline(self):
+        reader, writer = await asyncio.open_connection(
+            *self.app_cfg.addresses[0])
+        writer.write(REQUEST * self.size)
+        await self.responses(reader, self.size)
+        writer.close()
@@ -1,7 +1,9 @@
+import io
 import os
 import sys
 import socket
 import asyncio
+import tempfile
 import unittest
 from base64 import b64decode
 from functools import wraps
@@ -15,7 +17,7 @@ from pulsar.utils.system import platform
 from pulsar.apps.http import (
     HttpClient, TooManyRedirects, HttpResponse,
     HttpRequestException, HTTPDigestAuth, FORM_URL_ENCODED,
-    HttpWsgiClient
+    HttpWsgiClient, ResponseTooLarge
 )
 
 
@@ -352,11 +354,11 @@ class TestHttpClient(TestHttpClientBase, unittest.TestCase):
 
     async def test_upload_too_large_files(self):
         http = self._client
-        file_data = 'A' * (2 ** 18 + 2 ** 12)
-        data = (('bla', 'foo'), ('unz', 'whatz'),
+        field_data = 'A' * (2 ** 18 + 2 ** 12)
+        data = (('bla', field_data), ('unz', 'whatz'),
                 ('numero', '1'), ('numero', '2'))
         response = await http.put(self.httpbin('upload'), data=data,
-                                  files={'test': file_data})
+                                  files={'test': 'simple file'})
         self.assertEqual(response.status_code, 403)
         self.assertEqual(response.text,
                          'Request content length too large. Limit is 256.0KB')
@@ -703,6 +705,32 @@ class TestHttpClient(TestHttpClientBase, unittest.TestCase):
         self.assertEqual(response.status_code, 304)
         self.assertFalse('content-length' in response.headers)
 
+    async def test_media_file_range(self):
+        http = self._client
+        response = await http.get(self.httpbin('media/httpbin.js'))
+        self.assertEqual(response.status_code, 200)
+        data = response.content
+        size = len(data)
+        self.assertEqual(int(response.headers['content-length']), size)
+        response = await http.get(self.httpbin('media/httpbin.js'),
+                                  headers={'range': 'bytes=100-'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers['content-range'],
+                         'bytes 100-%d/%d' % (size - 1, size))
+        self.assertEqual(response.content, data[100:])
+        response = await http.get(self.httpbin('media/httpbin.js'),
+                                  headers={'range': 'bytes=0-9,20-29'})
+        self.assertEqual(response.status_code, 206)
+        body = response.content
+        self.assertEqual(int(response.headers['content-length']), len(body))
+        self.assertTrue(b'\r\n\r\n' + data[:10] + b'\r\n' in body)
+        self.assertTrue(b'\r\n\r\n' + data[20:30] + b'\r\n' in body)
+        #
+        # the connection can be reused
+        response = await http.get(self.httpbin('media/httpbin.js'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, data)
+
     @unittest.skipIf(platform.is_windows, 'windows test #291')
     async def test_http_get_timeit(self):
         N = 10
@@ -848,6 +876,39 @@ class TestHttpClient(TestHttpClientBase, unittest.TestCase):
         data = await raw.read()
         self.assertTrue(len(data), 300000)
 
+    @no_tls
+    async def test_raw_stream_save(self):
+        http = self._client
+        url = self.httpbin('stream/10000/3')
+        response = await http.get(url, stream=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'stream.bin')
+            size = await response.save(path)
+            self.assertEqual(size, 30000)
+            self.assertEqual(os.path.getsize(path), size)
+        self.assertTrue(response.raw.done)
+
+    async def test_max_body_size(self):
+        http = self._client
+        url = self.httpbin('stream/10000/3')
+        response = await http.get(url, max_body_size=30000)
+        self.assertEqual(len(response.content), 30000)
+        with self.assertRaises(ResponseTooLarge) as cm:
+            await http.get(url, max_body_size=20000)
+        self.assertEqual(cm.exception.response.status_code, 200)
+        # Content-Length is larger than the maximum size
+        with self.assertRaises(ResponseTooLarge):
+            await http.get(self.httpbin('plaintext'), max_body_size=5)
+        response = await http.get(self.httpbin('plaintext'))
+        self.assertEqual(response.content, b'Hello, World!')
+
+    async def test_save(self):
+        http = self._client
+        response = await http.get(self.httpbin('plaintext'))
+        fp = io.BytesIO()
+        self.assertEqual(await response.save(fp), 13)
+        self.assertEqual(fp.getvalue(), b'Hello, World!')
+
     async def test_post_iterator(self):
         http = self._client
         fut = asyncio.Future()
@@ -1,5 +1,1049 @@
+import asyncio
+import hashlib
+import io
+import os
+import random
+import re
+import socket
+import ssl
+import tempfile
+import time
+import zlib
+import unittest
+from email.utils import formatdate
+from functools import partial
+
+from pulsar.async.protocols import TcpServer, Connection
+from pulsar.api import HttpConnectionError
+from pulsar.apps.http import (
+    HttpClient, HttpRequest, DecompressionError, HttpCache, MemoryCache,
+    FileCache
+)
+from pulsar.apps.http.cache import CacheEntry
+from pulsar.apps.wsgi import WSGIServer, HttpServerResponse
+from pulsar.apps.test import sequential
+
 from tests.http import base
 
 
+CHUNK = 2**16
+CHUNKS = 512
+CERT_FILE = os.path.join(os.path.dirname(__file__), 'server.crt')
+KEY_FILE = os.path.join(os.path.dirname(__file__), 'server.key')
+# a block of bytes which does not compress
+BLOCK = random.Random(7).getrandbits(2**19).to_bytes(2**16, 'big')
+# larger than the memory bound of test_large_generator, the multi-GB
+# upload is in tests/bench/test_upload.py
+UPLOAD_SIZE = 2**27
+CONTENT_LENGTH = re.compile(rb'\r\ncontent-length: *(\d+)')
+
+
+def large_body(environ, start_response):
+    start_response('200 OK', [('Content-Length', str(CHUNK*CHUNKS)),
+                              ('Content-Type', 'application/octet-stream')])
+    return (b'x' * CHUNK for _ in range(CHUNKS))
+
+
+def small_body(environ, start_response):
+    start_response('200 OK', [('Content-Length', '5000')])
+    return [b'x' * 5000]
+
+
+def hello(environ, start_response):
+    start_response('200 OK', [('Content-Length', '5')])
+    return [b'hello']
+
+
+def rss():
+    """Resident set size in bytes of this process, ``None`` if unknown
+    """
+    try:
+        with open('/proc/self/status') as fp:
+            for line in fp:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+
+
 class TestHttpClient(base.TestHttpClient):
     pass
+
+
+@sequential
+class TestStreamBackpressure(unittest.TestCase):
+    high_water = 2**18
+
+    async def setUp(self):
+        loop = asyncio.get_event_loop()
+        self.server = TcpServer(partial(Connection, HttpServerResponse),
+                                loop=loop, cfg=WSGIServer(large_body).cfg)
+        self.server.wsgi_callable = large_body
+        await self.server.start_serving(address=('127.0.0.1', 0))
+        self.url = 'http://%s:%s/' % self.server.address
+        self.client = HttpClient(stream_buffer=self.high_water)
+
+    async def tearDown(self):
+        await self.client.close()
+        await self.server.close()
+
+    async def test_slow_consumer(self):
+        response = await self.client.get(self.url, stream=True)
+        self.assertEqual(response.status_code, 200)
+        raw = response.raw
+        self.assertEqual(raw.high_water, self.high_water)
+        start = rss()
+        peak_rss = start
+        peak = 0
+        paused = False
+        size = 0
+        async for chunk in raw:
+            size += len(chunk)
+            peak = max(peak, raw.buffered)
+            paused = paused or raw.paused
+            if start:
+                peak_rss = max(peak_rss, rss())
+            await asyncio.sleep(0.001)
+        self.assertEqual(size, CHUNK*CHUNKS)
+        self.assertTrue(paused)
+        self.assertLessEqual(peak, self.high_water + CHUNK)
+        if start:
+            # the body is 32MB, the client never holds more than a few
+            # high water marks of it
+            self.assertLess(peak_rss - start, 8*2**20)
+
+    async def test_save(self):
+        response = await self.client.get(self.url, stream=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'large.bin')
+            size = await response.save(path)
+            self.assertEqual(size, CHUNK*CHUNKS)
+            self.assertEqual(os.path.getsize(path), size)
+        self.assertFalse(response.raw.paused)
+
+    async def test_request_stream_buffer(self):
+        response = await self.client.get(self.url, stream=True,
+                                         stream_buffer=CHUNK)
+        raw = response.raw
+        self.assertEqual(raw.high_water, CHUNK)
+        self.assertEqual(raw.low_water, CHUNK // 4)
+        raw.close()
+        self.assertEqual(raw.buffered, 0)
+
+    async def test_unread_stream_reuse_connection(self):
+        # the body is buffered above high water when the message completes
+        self.server.wsgi_callable = small_body
+        response = await self.client.get(self.url, stream=True,
+                                         stream_buffer=1000)
+        raw = response.raw
+        while not raw.done:
+            await asyncio.sleep(0.01)
+        second = await asyncio.wait_for(self.client.get(self.url), 5)
+        self.assertEqual(second.content, b'x' * 5000)
+        self.assertEqual(second.connection, response.connection)
+        self.assertFalse(raw.paused)
+        self.assertEqual(await raw.read(), b'x' * 5000)
+
+
+@sequential
+class TestTlsSessions(unittest.TestCase):
+
+    async def setUp(self):
+        loop = asyncio.get_event_loop()
+        self.server = TcpServer(partial(Connection, HttpServerResponse),
+                                loop=loop, cfg=WSGIServer(hello).cfg)
+        self.server.wsgi_callable = hello
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(CERT_FILE, KEY_FILE)
+        await self.server.start_serving(address=('127.0.0.1', 0),
+                                        sslcontext=context)
+        self.url = 'https://localhost:%s/' % self.server.address[1]
+        self.client = HttpClient(verify=CERT_FILE, close_connections=True)
+
+    async def tearDown(self):
+        await self.client.close()
+        await self.server.close()
+
+    def test_context_cache(self):
+        client = self.client
+        context = client.ssl_context(verify=CERT_FILE)
+        self.assertIs(client.ssl_context(verify=CERT_FILE), context)
+        self.assertIsNot(client.ssl_context(verify=False), context)
+        self.assertEqual(len(client.ssl_contexts), 2)
+        self.assertEqual(context.verify_mode, ssl.CERT_REQUIRED)
+
+    async def test_session_resumption(self):
+        for _ in range(4):
+            response = await self.client.get(self.url)
+            self.assertEqual(response.content, b'hello')
+        info = self.client.tls_info()
+        self.assertEqual(info['contexts'], 1)
+        self.assertEqual(info['handshakes'], 4)
+        self.assertEqual(info['resumed'], 3)
+        self.assertEqual(info['resumption_ratio'], 0.75)
+        self.assertEqual(info['sessions'], 1)
+        self.assertGreater(info['handshake_latency'], 0)
+
+
+async def slow(environ, start_response):
+    await asyncio.sleep(0.05)
+    start_response('200 OK', [('Content-Length', '5')])
+    return [b'hello']
+
+
+@sequential
+class TestConnectionLimits(unittest.TestCase):
+    servers = 5
+
+    async def setUp(self):
+        loop = asyncio.get_event_loop()
+        self.urls = []
+        self._servers = []
+        for _ in range(self.servers):
+            server = TcpServer(partial(Connection, HttpServerResponse),
+                               loop=loop, cfg=WSGIServer(slow).cfg)
+            server.wsgi_callable = slow
+            await server.start_serving(address=('127.0.0.1', 0))
+            self._servers.append(server)
+            self.urls.append('http://%s:%s/' % server.address)
+
+    async def tearDown(self):
+        for server in self._servers:
+            await server.close()
+
+    async def test_max_connections(self):
+        client = HttpClient(max_connections=3, pool_size=4)
+        requests = [client.get(url) for url in self.urls for _ in range(4)]
+        responses = await asyncio.gather(*requests)
+        for response in responses:
+            self.assertEqual(response.content, b'hello')
+        stats = client.stats()
+        connections = stats['connections']
+        self.assertEqual(connections['max_connections'], 3)
+        self.assertEqual(connections['peak'], 3)
+        self.assertEqual(connections['waiting'], 0)
+        self.assertLessEqual(connections['open'], 3)
+        self.assertEqual(connections['in_use'], 0)
+        self.assertEqual(len(stats['hosts']), self.servers)
+        waits = sum(host['waits'] for host in stats['hosts'].values())
+        self.assertGreater(waits, 0)
+        for host in stats['hosts'].values():
+            self.assertEqual(host['created'] + host['reused'], 4)
+        await client.close()
+        self.assertEqual(client.connection_limit.open, 0)
+
+    async def test_evict_idle(self):
+        client = HttpClient(max_connections=2)
+        for url in self.urls[:3]:
+            response = await client.get(url)
+            self.assertEqual(response.content, b'hello')
+        stats = client.stats()
+        self.assertEqual(stats['connections']['evictions'], 1)
+        self.assertEqual(stats['connections']['peak'], 2)
+        # the least recently used connection was closed
+        first = stats['hosts'][self.urls[0][:-1]]
+        self.assertEqual(first['open'], 0)
+        self.assertEqual(stats['hosts'][self.urls[2][:-1]]['waits'], 1)
+        await client.close()
+
+    async def test_pool_size(self):
+        client = HttpClient(pool_size=2)
+        url = self.urls[0]
+        await asyncio.gather(*[client.get(url) for _ in range(6)])
+        info = client.stats()['hosts'][url[:-1]]
+        self.assertEqual(info['pool_size'], 2)
+        self.assertEqual(info['created'], 2)
+        self.assertEqual(info['reused'], 4)
+        self.assertEqual(info['open'], 2)
+        self.assertGreaterEqual(info['idle'], 0)
+        self.assertGreater(info['waits'], 0)
+        self.assertGreater(info['max_wait'], 0)
+        await client.close()
+
+    async def test_reuse_ratio(self):
+        client = HttpClient()
+        for _ in range(3):
+            await client.get(self.urls[0])
+        stats = client.stats()
+        info = stats['hosts'][self.urls[0][:-1]]
+        self.assertAlmostEqual(info['reuse_ratio'], 2/3)
+        self.assertEqual(stats['connections']['open'], 1)
+        self.assertEqual(stats['connections']['idle'], 1)
+        self.assertIsNone(stats['connections']['max_connections'])
+        self.assertIn('hits', stats['resolver'])
+        self.assertIn('handshakes', stats['tls'])
+        await client.close()
+
+    async def test_idle_pools(self):
+        client = HttpClient(idle_timeout=0.1)
+        await client.get(self.urls[0])
+        pool = tuple(client.connection_pools.values())[0]
+        await asyncio.sleep(0.2)
+        await client.get(self.urls[1])
+        self.assertTrue(pool.closed)
+        self.assertEqual(len(client.connection_pools), 1)
+        await client.close()
+
+
+def compressed(environ, start_response):
+    """Serve ``/<encoding>/<size>`` compressed bytes, streamed with chunked
+    transfer encoding. The ``bomb`` encoding is gzip of zeros.
+    """
+    _, encoding, size = environ['PATH_INFO'].split('/')
+    wbits = dict(gzip=16 + zlib.MAX_WBITS, deflate=zlib.MAX_WBITS,
+                 raw=-zlib.MAX_WBITS, bomb=16 + zlib.MAX_WBITS)[encoding]
+    block = bytes(2**16) if encoding == 'bomb' else BLOCK
+    encoding = dict(raw='deflate', bomb='gzip').get(encoding, encoding)
+    start_response('200 OK', [
+        ('Content-Encoding', encoding),
+        ('Content-Type', 'application/octet-stream')])
+    return compress_stream(int(size), wbits, block)
+
+
+def compress_stream(size, wbits, block):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, wbits)
+    while size > 0:
+        data = block[:size]
+        size -= len(data)
+        chunk = compressor.compress(data)
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+@sequential
+class TestDecompression(unittest.TestCase):
+
+    async def setUp(self):
+        loop = asyncio.get_event_loop()
+        self.server = TcpServer(partial(Connection, HttpServerResponse),
+                                loop=loop, cfg=WSGIServer(compressed).cfg)
+        self.server.wsgi_callable = compressed
+        await self.server.start_serving(address=('127.0.0.1', 0))
+        self.url = 'http://%s:%s/' % self.server.address
+        self.client = HttpClient()
+
+    async def tearDown(self):
+        await self.client.close()
+        await self.server.close()
+
+    def expected(self, size):
+        return (BLOCK * (size // len(BLOCK) + 1))[:size]
+
+    async def test_encodings(self):
+        size = 2**20 + 17
+        for encoding in ('gzip', 'deflate', 'raw'):
+            response = await self.client.get('%s%s/%d' % (self.url, encoding,
+                                                          size))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, self.expected(size))
+
+    async def test_no_decompress(self):
+        response = await self.client.get(self.url + 'gzip/1000',
+                                         decompress=False)
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertEqual(zlib.decompress(response.content,
+                                         16 + zlib.MAX_WBITS),
+                         self.expected(1000))
+
+    async def test_stream(self):
+        size = 2**22
+        response = await self.client.get(self.url + 'gzip/%d' % size,
+                                         stream=True, stream_buffer=2**16)
+        chunks = []
+        async for chunk in response.raw:
+            self.assertLessEqual(len(chunk), 2**16)
+            chunks.append(chunk)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks), self.expected(size))
+
+    async def test_max_body_size(self):
+        with self.assertRaises(DecompressionError):
+            await self.client.get(self.url + 'bomb/%d' % 2**20,
+                                  max_body_size=2**19)
+
+    async def test_ratio(self):
+        # 64MB of zeros compress about 1000 times
+        with self.assertRaises(DecompressionError) as cm:
+            await self.client.get(self.url + 'bomb/%d' % 2**26)
+        self.assertIsNotNone(cm.exception.response)
+        self.assertIn('times larger', str(cm.exception))
+        response = await self.client.get(self.url + 'bomb/%d' % 2**22,
+                                         max_decompress_ratio=None)
+        self.assertEqual(response.content, bytes(2**22))
+
+    async def test_stream_ratio(self):
+        response = await self.client.get(self.url + 'bomb/%d' % 2**26,
+                                         stream=True)
+        with self.assertRaises(DecompressionError):
+            await response.raw.read()
+
+
+class Counter:
+    """A WSGI application recording the number of concurrent requests
+    """
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.current = 0
+        self.peak = 0
+        self.requests = 0
+
+    async def __call__(self, environ, start_response):
+        self.requests += 1
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.current -= 1
+        start_response('200 OK', [('Content-Length', '5')])
+        return [b'hello']
+
+
+def trickle(environ, start_response):
+    start_response('200 OK', [('Content-Length', '10')])
+    return [b'hello', asyncio.sleep(0.05, result=b'world')]
+
+
+async def serve(app, port=0):
+    server = TcpServer(partial(Connection, HttpServerResponse),
+                       loop=asyncio.get_event_loop(), cfg=WSGIServer(app).cfg)
+    server.wsgi_callable = app
+    await server.start_serving(address=('127.0.0.1', port))
+    return server
+
+
+async def collect(fetch):
+    results = []
+    async for result in fetch:
+        results.append(result)
+    return results
+
+
+def closed_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@sequential
+class TestFetchMany(unittest.TestCase):
+
+    async def setUp(self):
+        self.apps = [Counter(), Counter()]
+        self.servers = [await serve(app) for app in self.apps]
+        self.urls = ['http://%s:%s/' % s.address for s in self.servers]
+        self.client = HttpClient()
+
+    async def tearDown(self):
+        await self.client.close()
+        for server in self.servers:
+            await server.close()
+
+    async def test_concurrency(self):
+        pulled = 0
+        total = 200
+
+        def requests():
+            nonlocal pulled
+            for i in range(total):
+                pulled += 1
+                yield self.urls[i % 2]
+
+        fetch = self.client.fetch_many(requests(), concurrency=10,
+                                       per_host=3)
+        results = 0
+        async for url, response in fetch:
+            results += 1
+            self.assertIn(url, self.urls)
+            self.assertEqual(response.content, b'hello')
+            # requests are pulled lazily
+            self.assertLessEqual(pulled - results, 20)
+        self.assertEqual(results, total)
+        self.assertEqual(fetch.completed, total)
+        self.assertEqual(fetch.failed, 0)
+        self.assertEqual(fetch.running, 0)
+        for app in self.apps:
+            self.assertEqual(app.requests, total // 2)
+            self.assertEqual(app.peak, 3)
+
+    async def test_global_concurrency(self):
+        urls = [self.urls[0]] * 20
+        fetch = self.client.fetch_many(urls, concurrency=4)
+        responses = await collect(fetch)
+        self.assertEqual(len(responses), 20)
+        self.assertEqual(self.apps[0].peak, 4)
+
+    async def test_retries(self):
+        url = 'http://127.0.0.1:%d/' % closed_port()
+        fetch = self.client.fetch_many([url, ('post', url)], retries=2,
+                                       backoff=0.01)
+        results = dict(await collect(fetch))
+        self.assertIsInstance(results[url], HttpConnectionError)
+        self.assertIsInstance(results[('post', url)], HttpConnectionError)
+        # only the idempotent request is retried
+        self.assertEqual(fetch.retried, 2)
+        self.assertEqual(fetch.failed, 2)
+
+    async def test_retry_success(self):
+        port = closed_port()
+        url = 'http://127.0.0.1:%d/' % port
+        app = Counter(0)
+
+        async def start():
+            await asyncio.sleep(0.05)
+            self.servers.append(await serve(app, port))
+
+        asyncio.get_event_loop().create_task(start())
+        fetch = self.client.fetch_many([url], retries=10, backoff=0.02,
+                                       max_backoff=0.05)
+        results = await collect(fetch)
+        self.assertEqual(results[0][1].content, b'hello')
+        self.assertGreater(fetch.retried, 0)
+
+    async def test_stream(self):
+        urls = [self.urls[1]] * 6
+        fetch = self.client.fetch_many(urls, concurrency=2, stream=True)
+        async for _, response in fetch:
+            self.assertLessEqual(fetch.running, 2)
+            self.assertEqual(await response.raw.read(), b'hello')
+        self.assertEqual(fetch.completed, 6)
+        self.assertLessEqual(self.apps[1].peak, 2)
+
+    async def test_params(self):
+        requests = [('get', self.urls[0], dict(headers={'x-test': '1'}))]
+        fetch = self.client.fetch_many(requests)
+        async for item, response in fetch:
+            self.assertIs(item, requests[0])
+            self.assertEqual(response.request.headers['x-test'], '1')
+
+    async def fetch_error(self, requests):
+        # the next request is pulled by a callback, once the body of the
+        # streamed response is received
+        server = await serve(trickle)
+        self.servers.append(server)
+        url = 'http://%s:%s/' % server.address
+        fetch = self.client.fetch_many(requests(url), concurrency=1,
+                                       stream=True)
+        _, response = await fetch.__anext__()
+        self.assertEqual(response.status_code, 200)
+        return await asyncio.wait_for(fetch.__anext__(), 5)
+
+    async def test_requests_error(self):
+        def requests(url):
+            yield url
+            raise ValueError('bad requests')
+
+        with self.assertRaises(ValueError):
+            await self.fetch_error(requests)
+
+    async def test_parse_error(self):
+        with self.assertRaises(TypeError):
+            await self.fetch_error(lambda url: [url, 5])
+
+
+async def sink(environ, start_response):
+    """Read the request body in chunks and respond with its size and md5
+    """
+    if environ.get('PATH_INFO') == '/no-continue':
+        # never send 100 Continue
+        environ.pop('HTTP_EXPECT', None)
+    elif environ.get('PATH_INFO') == '/reject':
+        start_response('413 Request Entity Too Large',
+                       [('Content-Length', '0')])
+        return []
+    reader = environ['wsgi.input']
+    md5 = hashlib.md5()
+    size = 0
+    while True:
+        data = await reader.read(2**16)
+        if not data:
+            break
+        size += len(data)
+        if environ.get('HTTP_X_MD5'):
+            md5.update(data)
+    body = ('%d %s' % (size, md5.hexdigest())).encode('ascii')
+    start_response('200 OK', [('Content-Length', str(len(body)))])
+    return [body]
+
+
+class AsyncBody:
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        try:
+            return next(self.chunks)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+@sequential
+class TestUpload(unittest.TestCase):
+
+    async def setUp(self):
+        self.server = await serve(sink)
+        self.url = 'http://%s:%s/' % self.server.address
+        self.client = HttpClient()
+
+    async def tearDown(self):
+        await self.client.close()
+        await self.server.close()
+
+    def check(self, response, data):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode('ascii'), '%d %s' % (
+            len(data), hashlib.md5(data).hexdigest()))
+
+    async def test_large_generator(self):
+        size = UPLOAD_SIZE
+        chunks = size // len(BLOCK)
+        start = rss()
+        peak = [start or 0]
+
+        def progress(sent, total):
+            self.assertIsNone(total)
+            if start and not sent % 2**24:
+                peak[0] = max(peak[0], rss())
+
+        response = await self.client.post(
+            self.url, data=(BLOCK for _ in range(chunks)),
+            upload_progress=progress)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(int(response.content.split()[0]), size)
+        if start:
+            self.assertLess(peak[0] - start, 32*2**20)
+
+    async def test_file(self):
+        data = BLOCK * 64
+        calls = []
+        with tempfile.TemporaryFile() as fp:
+            fp.write(data)
+            fp.seek(0)
+            response = await self.client.post(
+                self.url, data=fp, headers={'x-md5': 'yes'},
+                upload_progress=lambda *args: calls.append(args))
+        self.check(response, data)
+        self.assertEqual(response.request.headers['content-length'],
+                         str(len(data)))
+        self.assertEqual(len(calls), 64)
+        self.assertEqual(calls[-1], (len(data), len(data)))
+
+    async def test_bytes_io(self):
+        data = BLOCK * 3 + b'tail'
+        response = await self.client.put(self.url, data=io.BytesIO(data),
+                                         headers={'x-md5': 'yes'})
+        self.check(response, data)
+
+    async def test_async_iterable(self):
+        chunks = [BLOCK[:1000], BLOCK, b'', BLOCK[1000:]]
+        response = await self.client.post(self.url, data=AsyncBody(chunks),
+                                          headers={'x-md5': 'yes'})
+        self.check(response, b''.join(chunks))
+        self.assertEqual(response.request.headers['transfer-encoding'],
+                         'chunked')
+
+    async def test_http_stream(self):
+        # upload the streamed body of another response
+        server = await serve(large_body)
+        try:
+            url = 'http://%s:%s/' % server.address
+            source = await self.client.get(url, stream=True)
+            response = await self.client.post(self.url, data=source.raw,
+                                              headers={'x-md5': 'yes'})
+        finally:
+            await server.close()
+        self.check(response, b'x' * (CHUNK*CHUNKS))
+        self.assertEqual(response.request.headers['transfer-encoding'],
+                         'chunked')
+
+    async def test_awaitable_chunks(self):
+        loop = asyncio.get_event_loop()
+
+        def chunks():
+            for _ in range(4):
+                future = loop.create_future()
+                loop.call_soon(future.set_result, BLOCK)
+                yield future
+
+        response = await self.client.post(self.url, data=chunks(),
+                                          headers={'x-md5': 'yes'})
+        self.check(response, BLOCK * 4)
+
+    async def test_expect_continue(self):
+        data = BLOCK * 8
+        response = await self.client.post(
+            self.url, data=iter([data]), wait_continue=True,
+            headers={'x-md5': 'yes'})
+        self.check(response, data)
+
+    async def test_expect_rejected(self):
+        consumed = []
+
+        def body():
+            consumed.append(True)
+            yield BLOCK
+
+        response = await self.client.post(
+            self.url + 'reject', data=body(), wait_continue=True)
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(consumed)
+
+    async def test_continue_timeout(self):
+        data = BLOCK * 2
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        response = await self.client.post(
+            self.url + 'no-continue', data=iter([data]), wait_continue=True,
+            continue_timeout=0.1, headers={'x-md5': 'yes'})
+        self.check(response, data)
+        self.assertGreaterEqual(loop.time() - start, 0.1)
+
+
+class Origin:
+    """A WSGI application with cacheable responses, counting requests
+    by path
+    """
+    modified = formatdate(time.time() - 36000, usegmt=True)
+    headers = {
+        '/fresh': [('Cache-Control', 'max-age=60')],
+        '/slow': [('Cache-Control', 'max-age=60')],
+        '/etag': [('Cache-Control', 'no-cache'), ('ETag', '"v1"')],
+        '/modified': [('Cache-Control', 'max-age=0'),
+                      ('Last-Modified', modified)],
+        '/heuristic': [('Last-Modified', modified)],
+        '/vary': [('Cache-Control', 'max-age=60'),
+                  ('Vary', 'Accept-Language')],
+        '/swr': [('Cache-Control', 'max-age=0, stale-while-revalidate=60'),
+                 ('ETag', '"v1"')],
+        '/no-store': [('Cache-Control', 'no-store')]
+    }
+
+    def __init__(self):
+        self.hits = {}
+
+    async def __call__(self, environ, start_response):
+        path = environ['PATH_INFO']
+        if environ['REQUEST_METHOD'] != 'GET':
+            start_response('204 No Content', [])
+            return []
+        self.hits[path] = count = self.hits.get(path, 0) + 1
+        if path == '/slow':
+            await asyncio.sleep(0.05)
+        headers = self.headers.get(path, [])
+        validators = dict(((n.lower(), v) for n, v in headers))
+        etag = environ.get('HTTP_IF_NONE_MATCH')
+        since = environ.get('HTTP_IF_MODIFIED_SINCE')
+        if ((etag and etag == validators.get('etag')) or
+                (since and since == validators.get('last-modified'))):
+            start_response('304 Not Modified', headers)
+            return []
+        if path == '/vary':
+            body = environ.get('HTTP_ACCEPT_LANGUAGE', '').encode('ascii')
+        else:
+            body = str(count).encode('ascii')
+        start_response('200 OK', headers + [
+            ('Content-Length', str(len(body)))])
+        return [body]
+
+
+@sequential
+class TestHttpCache(unittest.TestCase):
+
+    async def setUp(self):
+        self.app = Origin()
+        self.server = await serve(self.app)
+        self.url = 'http://%s:%s' % self.server.address
+        self.cache = HttpCache()
+        self.client = HttpClient(cache=self.cache)
+
+    async def tearDown(self):
+        await self.client.close()
+        await self.server.close()
+
+    async def get(self, path, status, **kw):
+        response = await self.client.get(self.url + path, **kw)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cache_status, status)
+        return response
+
+    async def test_fresh(self):
+        response = await self.get('/fresh', 'MISS')
+        self.assertEqual(response.content, b'1')
+        response = await self.get('/fresh', 'HIT')
+        self.assertEqual(response.content, b'1')
+        self.assertEqual(response.text, '1')
+        # the Date header has a resolution of one second
+        self.assertLessEqual(int(response.headers['age']), 1)
+        self.assertEqual(self.app.hits['/fresh'], 1)
+        info = self.client.stats()['cache']
+        self.assertEqual(info['hits'], 1)
+        self.assertEqual(info['misses'], 1)
+        self.assertEqual(info['entries'], 1)
+
+    async def test_cached_response(self):
+        await self.get('/fresh', 'MISS')
+        response = await self.get('/fresh', 'HIT')
+        self.assertTrue(response.ok)
+        self.assertEqual(str(response), '<Response [200]>')
+        self.assertEqual(response.url, self.url + '/fresh')
+        self.assertTrue(response.event('post_request').fired())
+        self.assertEqual(await response.raw.read(), b'1')
+        response.raise_for_status()
+
+    async def test_request_no_cache(self):
+        await self.get('/fresh', 'MISS')
+        response = await self.get('/fresh', 'MISS',
+                                  headers={'cache-control': 'no-cache'})
+        self.assertEqual(response.content, b'2')
+        response = await self.get('/fresh', 'HIT',
+                                  headers={'cache-control': 'max-age=30'})
+        self.assertEqual(response.content, b'2')
+
+    async def test_revalidate_etag(self):
+        await self.get('/etag', 'MISS')
+        response = await self.get('/etag', 'REVALIDATED')
+        self.assertEqual(response.content, b'1')
+        self.assertEqual(response.request.headers['if-none-match'], '"v1"')
+        self.assertEqual(self.app.hits['/etag'], 2)
+        self.assertEqual(self.cache.revalidated, 1)
+
+    async def test_revalidate_caller_request(self):
+        await self.get('/etag', 'MISS')
+        client = self.client
+        params = dict(((name, getattr(client, name))
+                       for name in client.request_parameters))
+        request = HttpRequest(client, self.url + '/etag', 'GET', **params)
+        response = await self.cache.response(request, client._send)
+        self.assertEqual(response.cache_status, 'REVALIDATED')
+        # validators are sent on a copy of the request headers
+        self.assertNotIn('if-none-match', request.headers)
+        self.assertEqual(response.request.headers['if-none-match'], '"v1"')
+
+    async def test_revalidate_last_modified(self):
+        await self.get('/modified', 'MISS')
+        response = await self.get('/modified', 'REVALIDATED')
+        self.assertEqual(response.content, b'1')
+        self.assertEqual(response.headers['last-modified'],
+                         Origin.modified)
+        self.assertEqual(self.app.hits['/modified'], 2)
+
+    async def test_heuristic_freshness(self):
+        await self.get('/heuristic', 'MISS')
+        await self.get('/heuristic', 'HIT')
+        self.assertEqual(self.app.hits['/heuristic'], 1)
+
+    async def test_vary(self):
+        response = await self.get('/vary', 'MISS',
+                                  headers={'accept-language': 'en'})
+        self.assertEqual(response.content, b'en')
+        response = await self.get('/vary', 'HIT',
+                                  headers={'accept-language': 'en'})
+        self.assertEqual(response.content, b'en')
+        response = await self.get('/vary', 'MISS',
+                                  headers={'accept-language': 'fr'})
+        self.assertEqual(response.content, b'fr')
+        self.assertEqual(self.app.hits['/vary'], 2)
+
+    async def test_stale_while_revalidate(self):
+        await self.get('/swr', 'MISS')
+        response = await self.get('/swr', 'STALE')
+        self.assertEqual(response.content, b'1')
+        for _ in range(100):
+            if not self.cache.info()['revalidating']:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.app.hits['/swr'], 2)
+        self.assertEqual(self.cache.revalidated, 1)
+        await self.get('/swr', 'STALE')
+
+    async def test_coalesce(self):
+        responses = await asyncio.gather(*[
+            self.client.get(self.url + '/slow') for _ in range(10)])
+        self.assertEqual(self.app.hits['/slow'], 1)
+        self.assertEqual(self.cache.coalesced, 9)
+        for response in responses:
+            self.assertEqual(response.content, b'1')
+        self.assertEqual(sorted((r.cache_status for r in responses)),
+                         ['HIT'] * 9 + ['MISS'])
+
+    async def test_no_store(self):
+        await self.get('/no-store', 'MISS')
+        response = await self.get('/no-store', 'MISS')
+        self.assertEqual(response.content, b'2')
+        self.assertEqual(self.cache.info()['entries'], 0)
+
+    async def test_invalidate(self):
+        await self.get('/fresh', 'MISS')
+        response = await self.client.post(self.url + '/fresh', data=b'x')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.cache_status, None)
+        response = await self.get('/fresh', 'MISS')
+        self.assertEqual(response.content, b'2')
+
+    async def test_file_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            client = HttpClient(cache=HttpCache(FileCache(tmp)))
+            await client.get(self.url + '/fresh')
+            self.assertEqual(len(os.listdir(tmp)), 1)
+            client = HttpClient(cache=HttpCache(FileCache(tmp)))
+            response = await client.get(self.url + '/fresh')
+            self.assertEqual(response.cache_status, 'HIT')
+            self.assertEqual(response.content, b'1')
+            self.assertEqual(response.headers['cache-control'], 'max-age=60')
+            self.assertEqual(self.app.hits['/fresh'], 1)
+            await client.close()
+
+    async def test_memory_cache(self):
+        cache = MemoryCache(max_size=1000, max_entry_size=600)
+        now = time.time()
+        for i in range(5):
+            entry = CacheEntry('/%d' % i, 200, '1.1', (), b'x' * 300, {},
+                               True, now, now)
+            await cache.set(entry.url, entry)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.size, 900)
+        self.assertEqual(cache.evictions, 2)
+        self.assertIsNone(await cache.get('/0'))
+        entry = CacheEntry('/big', 200, '1.1', (), b'x' * 700, {},
+                           True, now, now)
+        await cache.set(entry.url, entry)
+        self.assertIsNone(await cache.get('/big'))
+
+    def test_freshness(self):
+        now = time.time()
+        entry = CacheEntry('/', 200, '1.1', [
+            ('Date', formatdate(now - 10, usegmt=True)),
+            ('Age', '5'),
+            ('Expires', formatdate(now + 50, usegmt=True))
+        ], b'', {}, True, now - 1, now)
+        self.assertAlmostEqual(entry.age(now), 10, delta=1)
+        self.assertAlmostEqual(entry.lifetime(), 60, delta=1)
+        entry.headers['Cache-Control'] = 'max-age=20, s-maxage=30'
+        self.assertEqual(entry.lifetime(), 20)
+        self.assertEqual(entry.lifetime(shared=True), 30)
+
+
+class Closing:
+    """A raw HTTP server answering with the request path, at most
+    ``responses`` requests on a connection before closing it
+
+    Unlike the pulsar server, pipelined requests are answered regardless
+    of the http parser in use.
+    """
+    def __init__(self, responses=None, close_header=False):
+        self.responses = responses
+        self.close_header = close_header
+        self.connections = 0
+
+    async def __call__(self, reader, writer):
+        self.connections += 1
+        answered = 0
+        while self.responses is None or answered < self.responses:
+            answered += 1
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = CONTENT_LENGTH.search(head.lower())
+                if length:
+                    await reader.readexactly(int(length.group(1)))
+            except asyncio.IncompleteReadError:
+                break
+            body = head.split(b' ', 2)[1]
+            headers = [b'HTTP/1.1 200 OK',
+                       b'Content-Length: ' + str(len(body)).encode('ascii')]
+            if self.close_header and answered == self.responses:
+                headers.append(b'Connection: close')
+            writer.write(b'\r\n'.join(headers) + b'\r\n\r\n' + body)
+        writer.close()
+
+
+@sequential
+class TestPipeline(unittest.TestCase):
+
+    async def setUp(self):
+        self.server = await asyncio.start_server(Closing(), '127.0.0.1', 0)
+        self.url = 'http://%s:%s' % self.server.sockets[0].getsockname()
+
+    async def tearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def fetch(self, client, url, paths, **kw):
+        responses = await asyncio.gather(
+            *[client.get(url + path, **kw) for path in paths])
+        for path, response in zip(paths, responses):
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, path.encode('ascii'))
+        info = client.stats()['hosts'][url]
+        await client.close()
+        return info
+
+    async def test_order(self):
+        client = HttpClient(pool_size=1, pipeline=8)
+        paths = ['/%d' % i for i in range(40)]
+        info = await self.fetch(client, self.url, paths)
+        self.assertEqual(info['created'], 1)
+        self.assertGreater(info['pipelined'], 20)
+        self.assertEqual(info['pipeline_retries'], 0)
+
+    async def test_connections(self):
+        client = HttpClient(pool_size=3, pipeline=4)
+        info = await self.fetch(client, self.url,
+                                ['/%d' % i for i in range(40)])
+        self.assertLessEqual(info['created'], 3)
+        self.assertGreater(info['pipelined'], 0)
+
+    async def test_request_parameter(self):
+        client = HttpClient(pool_size=1)
+        info = await self.fetch(client, self.url, ['/a', '/b', '/c', '/d'],
+                                pipeline=4)
+        self.assertGreater(info['pipelined'], 0)
+
+    async def test_not_pipelined(self):
+        client = HttpClient(pool_size=1, pipeline=4)
+        responses = await asyncio.gather(
+            *[client.post(self.url + '/post', data=b'x') for _ in range(4)])
+        for response in responses:
+            self.assertEqual(response.content, b'/post')
+        info = client.stats()['hosts'][self.url]
+        self.assertEqual(info['pipelined'], 0)
+        await client.close()
+
+    async def _closing(self, app):
+        server = await asyncio.start_server(app, '127.0.0.1', 0)
+        url = 'http://%s:%s' % server.sockets[0].getsockname()
+        client = HttpClient(pool_size=1, pipeline=5)
+        try:
+            info = await self.fetch(client, url,
+                                    ['/%d' % i for i in range(12)])
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
+        self.assertGreater(info['pipeline_retries'], 0)
+        self.assertGreater(app.connections, 1)
+
+    async def test_connection_lost(self):
+        await self._closing(Closing(3))
+
+    async def test_connection_close(self):
+        await self._closing(Closing(3, close_header=True))
+
+    async def test_retries_exhausted(self):
+        server = await asyncio.start_server(Closing(0), '127.0.0.1', 0)
+        url = 'http://%s:%s' % server.sockets[0].getsockname()
+        client = HttpClient(pool_size=1, pipeline=2)
+        try:
+            with self.assertRaises(HttpConnectionError):
+                await client.get(url + '/')
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
@@ -187,3 +187,60 @@ class TestPythonHttpParser(unittest.TestCase):
         ))
         self.assertTrue(p.headers_complete)
         self.assertFalse(p.message_complete)
+
+    def test_pipelined_requests(self):
+        p = self.request()
+        tail = p.feed_data(b'GET /a HTTP/1.1\r\nHost: a\r\n\r\n'
+                           b'POST /b HTTP/1.1\r\nContent-Length: 3\r\n\r\nabc'
+                           b'GET /c HTT')
+        self.assertTrue(p.message_complete)
+        self.assertEqual(p.url, b'/a')
+        p = self.request()
+        tail = p.feed_data(tail)
+        self.assertTrue(p.message_complete)
+        self.assertEqual(p.url, b'/b')
+        self.assertEqual(p.body, b'abc')
+        self.assertEqual(tail, b'GET /c HTT')
+        p = self.request()
+        self.assertEqual(p.feed_data(tail), None)
+        self.assertEqual(p.feed_data(b'P/1.1\r\n\r\n'), None)
+        self.assertEqual(p.url, b'/c')
+        self.assertTrue(p.message_complete)
+
+    def test_chunked_body(self):
+        p = self.response()
+        data = (b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n'
+                b'5\r\nhello\r\n7;ext=1\r\n, world\r\n0\r\n'
+                b'Expires: never\r\n\r\n')
+        for i in range(len(data)):
+            self.assertEqual(p.feed_data(data[i:i+1]), None)
+        self.assertTrue(p.message_complete)
+        self.assertEqual(p.body, b'hello, world')
+        self.assertEqual(p.headers['expires'], 'never')
+        p = self.response()
+        self.assertRaises(HttpParserError, p.feed_data,
+                          b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n'
+                          b'\r\nzz\r\n')
+
+    def test_upgrade_keeps_tail(self):
+        p = self.request()
+        tail = p.feed_data(b'GET /ws HTTP/1.1\r\nConnection: Upgrade\r\n'
+                           b'Upgrade: websocket\r\n\r\n\x81\x05')
+        self.assertTrue(p.message_complete)
+        self.assertTrue(p.parser.is_upgrade())
+        self.assertEqual(tail, None)
+        self.assertEqual(p.parser.buf, b'\x81\x05')
+
+    def test_keep_alive(self):
+        p = self.request()
+        p.feed_data(b'GET / HTTP/1.1\r\nConnection: close\r\n\r\n')
+        self.assertFalse(p.parser.should_keep_alive())
+        p = self.request()
+        p.feed_data(b'GET / HTTP/1.1\r\n\r\n')
+        self.assertTrue(p.parser.should_keep_alive())
+        p = self.request()
+        p.feed_data(b'GET / HTTP/1.0\r\n\r\n')
+        self.assertFalse(p.parser.should_keep_alive())
+        p = self.request()
+        p.feed_data(b'GET / HTTP/1.0\r\nConnection: keep-alive\r\n\r\n')
+        self.assertTrue(p.parser.should_keep_alive())
@@ -1,15 +1,18 @@
 '''tests the httpurl stand-alone script.'''
 import time
 import unittest
+from unittest import mock
 
 from pulsar.utils.lib import http_date
 from pulsar.utils.html import capfirst
-from pulsar.utils.httpurl import (CacheControl,
+from pulsar.utils.httpurl import (CacheControl, cache_control,
                                   urlquote, unquote_unreserved, requote_uri,
                                   remove_double_slash, appendslash,
                                   encode_multipart_formdata,
                                   cookiejar_from_dict)
 from pulsar.apps.http import Auth, HTTPBasicAuth, HTTPDigestAuth
+from pulsar.apps.http import decompress
+from pulsar.apps.http.client import HttpBody
 
 from multidict import CIMultiDict
 
@@ -121,3 +124,76 @@ class TestTools(unittest.TestCase):
         self.assertEqual(j, cookiejar_from_dict(None, j))
         j2 = cookiejar_from_dict({'pippo': 'pluto'}, None, j)
         self.assertEqual(len(j2), 2)
+
+    def test_cache_control(self):
+        self.assertEqual(cache_control(''), {})
+        self.assertEqual(cache_control('No-Cache, max-age="60", private=x'),
+                         {'no-cache': '', 'max-age': '60', 'private': 'x'})
+
+    def test_http_body(self):
+        body = HttpBody(10)
+        body.write(b'hello')
+        self.assertEqual(len(body), 5)
+        self.assertEqual(body.getvalue(), b'hello')
+        body.write(b'world')
+        self.assertEqual(body.getvalue(), b'helloworld')
+        # more data than announced
+        body.write(b'!')
+        self.assertEqual(body.getvalue(), b'helloworld!')
+        body = HttpBody()
+        for chunk in (b'a', b'bc', b'def'):
+            body.write(chunk)
+        self.assertEqual(body.getvalue(), b'abcdef')
+        self.assertEqual(HttpBody().getvalue(), b'')
+
+    def test_http_body_huge_length(self):
+        # the announced length is not trusted with the allocation
+        body = HttpBody(10**15)
+        self.assertEqual(len(body._data), 2**24)
+        body = HttpBody(10**15, 4)
+        body.write(b'hello')
+        body.write(b'world')
+        self.assertEqual(body.getvalue(), b'helloworld')
+
+
+class FakeBrotli:
+    """A brotli decompressor with an output buffer limit, each byte of
+    data decompresses into 1000 bytes
+    """
+    def __init__(self):
+        self.pending = 0
+        self.produced = 0
+
+    def process(self, data, output_buffer_limit=None):
+        self.pending += 1000 * len(data)
+        size = min(self.pending, output_buffer_limit or self.pending)
+        self.pending -= size
+        self.produced += size
+        return b'x' * size
+
+    def can_accept_more_data(self):
+        return not self.pending
+
+    def is_finished(self):
+        return False
+
+
+class TestDecoders(unittest.TestCase):
+
+    def brotli(self, **kw):
+        module = mock.Mock(Decompressor=FakeBrotli)
+        with mock.patch.object(decompress, 'brotli', module):
+            return decompress.BrotliDecoder(**kw)
+
+    def test_brotli_limited_output(self):
+        decoder = self.brotli()
+        self.assertEqual(len(decoder.decompress(b'a' * 200)), 200000)
+        self.assertEqual(decoder._obj.pending, 0)
+
+    def test_brotli_bomb(self):
+        decoder = self.brotli(max_size=2**17)
+        with self.assertRaises(decompress.DecompressionError):
+            decoder.decompress(b'a' * 2**20)
+        # the output stops at the limit, not at 1GB
+        self.assertLessEqual(decoder._obj.produced,
+                             2**17 + decompress.CHUNK_SIZE)
@@ -4,6 +4,7 @@ import unittest
 
 from pulsar.api import ProtocolError
 from pulsar.utils.websocket import frame_parser, parse_close
+from pulsar.utils.pylib.websocket import websocket_mask
 
 
 def i2b(args):
@@ -168,6 +169,33 @@ class FrameTest(unittest.TestCase):
         msg = b''.join((f.body for f in frames))
         self.assertEqual(msg, self.large_bdata)
 
+    def test_websocket_mask(self):
+        key = i2b((0x37, 0xfa, 0x21, 0x3d))
+        for length in list(range(18)) + [1000, 64*1024]:
+            data = self.large_bdata[:length]
+            masked = i2b((b ^ key[i % 4] for i, b in enumerate(data)))
+            self.assertEqual(websocket_mask(data, key), masked)
+            self.assertEqual(websocket_mask(memoryview(data), key), masked)
+            self.assertEqual(websocket_mask(masked, key), data)
+
+    def test_many_frames(self):
+        s = self.parser()
+        c = self.parser(kind=1)
+        sizes = (0, 1, 125, 126, 200, 65535, 65536, 70000, 3)
+        bodies = [self.large_bdata[:size] + b'x' * (size - 65536)
+                  for size in sizes]
+        data = b''.join((c.encode(body, opcode=2) for body in bodies))
+        frames = []
+        position = 0
+        while position < len(data):
+            step = randint(1, 20000)
+            frame = s.decode(data[position:position + step])
+            position += step
+            while frame:
+                frames.append(frame)
+                frame = s.decode()
+        self.assertEqual([f.body for f in frames], bodies)
+
     def test_bad_mask(self):
         s = self.parser()
         chunk = s.encode('hello')
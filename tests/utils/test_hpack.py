@@ -0,0 +1,201 @@
+import unittest
+
+from pulsar.utils.http import hpack
+
+
+def unhex(value):
+    return bytes.fromhex(value.replace(' ', ''))
+
+
+# RFC 7541 Appendix C.4, requests with Huffman coding
+REQUESTS = (
+    ([(b':method', b'GET'),
+      (b':scheme', b'http'),
+      (b':path', b'/'),
+      (b':authority', b'www.example.com')],
+     '8286 8441 8cf1 e3c2 e5f2 3a6b a0ab 90f4 ff'),
+    ([(b':method', b'GET'),
+      (b':scheme', b'http'),
+      (b':path', b'/'),
+      (b':authority', b'www.example.com'),
+      (b'cache-control', b'no-cache')],
+     '8286 84be 5886 a8eb 1064 9cbf'),
+    ([(b':method', b'GET'),
+      (b':scheme', b'https'),
+      (b':path', b'/index.html'),
+      (b':authority', b'www.example.com'),
+      (b'custom-key', b'custom-value')],
+     '8287 85bf 4088 25a8 49e9 5ba9 7d7f 8925 a849 e95b b8e8 b4bf')
+)
+
+# RFC 7541 Appendix C.6, responses with Huffman coding and eviction
+RESPONSES = (
+    ([(b':status', b'302'),
+      (b'cache-control', b'private'),
+      (b'date', b'Mon, 21 Oct 2013 20:13:21 GMT'),
+      (b'location', b'https://www.example.com')],
+     '4882 6402 5885 aec3 771a 4b61 96d0 7abe 9410 54d4 44a8 2005 9504 '
+     '0b81 66e0 82a6 2d1b ff6e 919d 29ad 1718 63c7 8f0b 97c8 e9ae 82ae '
+     '43d3'),
+    ([(b':status', b'307'),
+      (b'cache-control', b'private'),
+      (b'date', b'Mon, 21 Oct 2013 20:13:21 GMT'),
+      (b'location', b'https://www.example.com')],
+     '4883 640e ffc1 c0bf'),
+    ([(b':status', b'200'),
+      (b'cache-control', b'private'),
+      (b'date', b'Mon, 21 Oct 2013 20:13:22 GMT'),
+      (b'location', b'https://www.example.com'),
+      (b'content-encoding', b'gzip'),
+      (b'set-cookie', b'foo=ASDJKHQKBZXOQWEOPIUAXQWEOIU; max-age=3600; '
+                      b'version=1')],
+     '88c1 6196 d07a be94 1054 d444 a820 0595 040b 8166 e084 a62d 1bff '
+     'c05a 839b d9ab 77ad 94e7 821d d7f2 e6c7 b335 dfdf cd5b 3960 d5af '
+     '2708 7f36 72c1 ab27 0fb5 291f 9587 3160 65c0 03ed 4ee5 b106 3d50 07')
+)
+
+
+class TestHpack(unittest.TestCase):
+
+    def test_integer(self):
+        # RFC 7541 Appendix C.1
+        self.assertEqual(hpack.encode_integer(10, 5), b'\x0a')
+        self.assertEqual(hpack.encode_integer(1337, 5), b'\x1f\x9a\x0a')
+        self.assertEqual(hpack.encode_integer(42, 8), b'\x2a')
+        self.assertEqual(hpack.encode_integer(31, 5, 0x40), b'\x5f\x00')
+        self.assertEqual(hpack.decode_integer(b'\x1f\x9a\x0a', 0, 5),
+                         (1337, 3))
+        self.assertEqual(hpack.decode_integer(b'\x00\x2a', 1, 8), (42, 2))
+        for value in (0, 30, 31, 127, 128, 2**20, 2**28):
+            data = hpack.encode_integer(value, 5)
+            self.assertEqual(hpack.decode_integer(data, 0, 5),
+                             (value, len(data)))
+
+    def test_integer_errors(self):
+        self.assertRaises(hpack.HPACKError, hpack.decode_integer,
+                          b'\x1f\x9a', 0, 5)
+        self.assertRaises(hpack.HPACKError, hpack.decode_integer,
+                          b'\x1f' + b'\xff' * 10, 0, 5)
+
+    def test_huffman(self):
+        vectors = ((b'www.example.com', 'f1e3 c2e5 f23a 6ba0 ab90 f4ff'),
+                   (b'no-cache', 'a8eb 1064 9cbf'),
+                   (b'custom-key', '25a8 49e9 5ba9 7d7f'),
+                   (b'custom-value', '25a8 49e9 5bb8 e8b4 bf'))
+        for value, encoded in vectors:
+            self.assertEqual(hpack.huffman_encode(value), unhex(encoded))
+            self.assertEqual(hpack.huffman_decode(unhex(encoded)), value)
+            self.assertEqual(hpack.huffman_length(value),
+                             len(unhex(encoded)))
+
+    def test_huffman_all_bytes(self):
+        data = bytes(range(256)) * 2
+        self.assertEqual(hpack.huffman_decode(hpack.huffman_encode(data)),
+                         data)
+        self.assertEqual(hpack.huffman_encode(b''), b'')
+        self.assertEqual(hpack.huffman_decode(b''), b'')
+
+    def test_huffman_errors(self):
+        # padding longer than 7 bits
+        self.assertRaises(hpack.HPACKError, hpack.huffman_decode,
+                          hpack.huffman_encode(b'a') + b'\xff')
+        # padding not made of ones, "0" is 00000
+        self.assertRaises(hpack.HPACKError, hpack.huffman_decode, b'\x00')
+        # EOS
+        self.assertRaises(hpack.HPACKError, hpack.huffman_decode,
+                          b'\xff\xff\xff\xff')
+
+    def test_decode_requests(self):
+        decoder = hpack.Decoder()
+        for headers, encoded in REQUESTS:
+            self.assertEqual(decoder.decode(unhex(encoded)), headers)
+        self.assertEqual(decoder.table.size, 164)
+        self.assertEqual(decoder.table.entries[0],
+                         (b'custom-key', b'custom-value'))
+
+    def test_encode_requests(self):
+        encoder = hpack.Encoder()
+        for headers, encoded in REQUESTS:
+            self.assertEqual(encoder.encode(headers), unhex(encoded))
+        self.assertEqual(encoder.table.size, 164)
+
+    def test_decode_responses(self):
+        decoder = hpack.Decoder(256)
+        for headers, encoded in RESPONSES:
+            self.assertEqual(decoder.decode(unhex(encoded)), headers)
+        self.assertEqual(decoder.table.size, 215)
+        self.assertEqual(len(decoder.table), 3)
+
+    def test_encode_responses(self):
+        encoder = hpack.Encoder(256)
+        decoder = hpack.Decoder(256)
+        for headers, _ in RESPONSES:
+            self.assertEqual(decoder.decode(encoder.encode(headers)),
+                             headers)
+        # set-cookie is never indexed
+        self.assertEqual(encoder.table.search(b'set-cookie', b'foo'),
+                         (55, False))
+        self.assertEqual(len(encoder.table), len(decoder.table))
+
+    def test_literal_without_huffman(self):
+        encoder = hpack.Encoder()
+        data = encoder.encode([(b'custom-key', b'custom-header')],
+                              huffman=False)
+        # RFC 7541 Appendix C.2.1
+        self.assertEqual(data, unhex('400a 6375 7374 6f6d 2d6b 6579 0d63 '
+                                     '7573 746f 6d2d 6865 6164 6572'))
+        decoder = hpack.Decoder()
+        self.assertEqual(decoder.decode(data),
+                         [(b'custom-key', b'custom-header')])
+        # fully indexed the second time
+        self.assertEqual(encoder.encode([(b'custom-key', b'custom-header')]),
+                         b'\xbe')
+
+    def test_never_indexed(self):
+        encoder = hpack.Encoder()
+        headers = [(b'authorization', b'secret')]
+        data = encoder.encode(headers)
+        self.assertEqual(data[0] & 0xf0, 0x10)
+        self.assertEqual(len(encoder.table), 0)
+        self.assertEqual(hpack.Decoder().decode(data), headers)
+
+    def test_eviction(self):
+        table = hpack.HeaderTable(100)
+        table.add(b'a', b'1')
+        table.add(b'b', b'2')
+        table.add(b'c', b'3')
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.size, 68)
+        self.assertEqual(table.get(62), (b'c', b'3'))
+        self.assertEqual(table.get(63), (b'b', b'2'))
+        self.assertEqual(table.search(b'a', b'1'), (0, False))
+        self.assertEqual(table.search(b'b', b'2'), (63, True))
+        self.assertEqual(table.search(b'c', b'4'), (62, False))
+        self.assertRaises(hpack.HPACKError, table.get, 64)
+        # an entry larger than the table empties it
+        table.add(b'd', b'x' * 100)
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.size, 0)
+
+    def test_table_size_update(self):
+        encoder = hpack.Encoder()
+        decoder = hpack.Decoder()
+        encoder.encode([(b'custom-key', b'custom-value')])
+        encoder.max_table_size = 0
+        data = encoder.encode([(b'custom-key', b'custom-value')])
+        self.assertEqual(data[0], 0x20)
+        decoder.decode(data)
+        self.assertEqual(decoder.table.max_size, 0)
+        self.assertEqual(len(decoder.table), 0)
+        # cannot exceed the advertised size
+        self.assertRaises(hpack.HPACKError, decoder.decode,
+                          bytes(hpack.encode_integer(8192, 5, 0x20)))
+
+    def test_decode_errors(self):
+        decoder = hpack.Decoder()
+        self.assertRaises(hpack.HPACKError, decoder.decode, b'\x80')
+        self.assertRaises(hpack.HPACKError, decoder.decode, b'\xff\x00')
+        self.assertRaises(hpack.HPACKError, decoder.decode, b'\x40\x05ab')
+        decoder = hpack.Decoder(max_header_list_size=50)
+        self.assertRaises(hpack.HPACKError, decoder.decode,
+                          hpack.Encoder().encode([(b'a', b'x' * 20)]))
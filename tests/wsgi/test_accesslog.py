@@ -0,0 +1,147 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from functools import partial
+from io import StringIO
+
+from pulsar.async.protocols import TcpServer, Connection
+from pulsar.apps.wsgi import WSGIServer, HttpServerResponse, AccessLog
+from pulsar.apps.wsgi.accesslog import compile_format
+from pulsar.apps.test import sequential
+from pulsar.utils.log import BatchWriter
+
+
+ENVIRON = {'REMOTE_ADDR': '127.0.0.1',
+           'REQUEST_METHOD': 'GET',
+           'RAW_URI': '/path?a=1',
+           'PATH_INFO': '/path',
+           'QUERY_STRING': 'a=1',
+           'SERVER_PROTOCOL': 'HTTP/1.1',
+           'HTTP_REFERER': 'http://example.com/',
+           'HTTP_USER_AGENT': 'pulsar',
+           'wsgi.timestamp': 0}
+
+
+def app(environ, start_response):
+    start_response('200 OK', [('Content-Length', '5')])
+    return [b'hello']
+
+
+class StalledStream:
+    """A stream blocking on write until released
+    """
+    def __init__(self):
+        self.release = threading.Event()
+        self.lines = []
+
+    def write(self, data):
+        self.release.wait()
+        self.lines.extend(data.splitlines())
+
+    def flush(self):
+        pass
+
+
+class TestAccessLogFormat(unittest.TestCase):
+
+    def test_common(self):
+        line = compile_format('common')(ENVIRON, '200 OK', 5, 0.01)
+        self.assertEqual(line, '127.0.0.1 - - [01/Jan/1970:00:00:00 +0000] '
+                               '"GET /path?a=1 HTTP/1.1" 200 5\n')
+
+    def test_combined(self):
+        line = compile_format('combined')(ENVIRON, '404 Not Found', 0, 0)
+        self.assertTrue(line.endswith(
+            '" 404 - "http://example.com/" "pulsar"\n'))
+
+    def test_custom(self):
+        fmt = compile_format('%m %U%q %>s %B %D %{X-Id}i %{PATH_INFO}e 100%%')
+        line = fmt(ENVIRON, '201 Created', 0, 0.0015)
+        self.assertEqual(line, 'GET /path?a=1 201 0 1500 - /path 100%\n')
+
+    def test_json(self):
+        line = compile_format('json')(ENVIRON, '200 OK', 5, 0.5)
+        record = json.loads(line)
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['size'], 5)
+        self.assertEqual(record['duration'], 500000)
+        self.assertEqual(record['user_agent'], 'pulsar')
+
+    def test_unknown_directive(self):
+        self.assertRaises(ValueError, compile_format, '%h %Z')
+
+
+class TestBatchWriter(unittest.TestCase):
+
+    def test_batches(self):
+        stream = StringIO()
+        writer = BatchWriter(stream, interval=10)
+        for i in range(10):
+            self.assertTrue(writer.write('%d\n' % i))
+        self.assertTrue(writer.close())
+        self.assertEqual(stream.getvalue().split(),
+                         [str(i) for i in range(10)])
+        self.assertEqual(writer.written, 10)
+        self.assertFalse(writer.write('closed\n'))
+        self.assertEqual(writer.dropped, 1)
+
+    async def test_stalled_stream(self):
+        stream = StalledStream()
+        log = AccessLog(stream, 'common', max_queue=100, interval=0.01)
+        loop = asyncio.get_event_loop()
+        lag = []
+
+        async def ticker():
+            while len(lag) < 20:
+                start = loop.time()
+                await asyncio.sleep(0.005)
+                lag.append(loop.time() - start - 0.005)
+
+        task = asyncio.ensure_future(ticker())
+        slowest = 0
+        for i in range(5000):
+            start = time.time()
+            log.log(ENVIRON, '200 OK', i, 0.001)
+            slowest = max(slowest, time.time() - start)
+            if i % 100 == 0:
+                await asyncio.sleep(0)
+        await task
+        self.assertLess(slowest, 0.05)
+        self.assertLess(max(lag), 0.05)
+        info = log.info()
+        self.assertGreater(info['dropped'], 0)
+        self.assertLessEqual(info['queued'], 100)
+        stream.release.set()
+        await loop.run_in_executor(None, log.close)
+        info = log.info()
+        self.assertEqual(info['written'] + info['dropped'], 5000)
+        self.assertEqual(len(stream.lines), info['written'])
+
+
+@sequential
+class TestAccessLogServer(unittest.TestCase):
+
+    async def test_server(self):
+        loop = asyncio.get_event_loop()
+        cfg = WSGIServer(app, access_log_format='%r %>s %b').cfg
+        server = TcpServer(partial(Connection, HttpServerResponse),
+                           loop=loop, cfg=cfg)
+        server.wsgi_callable = app
+        stream = StringIO()
+        server.access_log = AccessLog(stream, cfg.access_log_format)
+        await server.start_serving(address=('127.0.0.1', 0))
+        reader, writer = await asyncio.open_connection(*server.address)
+        writer.write(b'GET /hello HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        await reader.readuntil(b'\r\n\r\n')
+        await reader.readexactly(5)
+        writer.close()
+        await server.close()
+        self.assertTrue(server.access_log.close())
+        self.assertEqual(stream.getvalue(), 'GET /hello HTTP/1.1 200 5\n')
+
+    def test_from_cfg(self):
+        cfg = WSGIServer(app).cfg
+        self.assertEqual(cfg.access_log, '')
+        self.assertEqual(AccessLog.from_cfg(cfg), None)
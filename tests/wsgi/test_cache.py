@@ -0,0 +1,206 @@
+import asyncio
+import unittest
+
+from pulsar.apps import wsgi
+
+
+class Handler:
+
+    def __init__(self, headers=None, delay=0.1):
+        self.calls = 0
+        self.headers = headers
+        self.delay = delay
+
+    async def __call__(self, environ, start_response):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.delay)
+        headers = self.headers
+        if headers is None:
+            headers = [('Cache-Control', 'max-age=60')]
+        return wsgi.WsgiResponse(200, 'call %d' % call,
+                                 response_headers=headers)
+
+
+def environ(path='/', method='GET', query='', **headers):
+    env = {'REQUEST_METHOD': method,
+           'PATH_INFO': path,
+           'QUERY_STRING': query}
+    env.update((('HTTP_%s' % k.upper(), v) for k, v in headers.items()))
+    return env
+
+
+class Response:
+    status = None
+    headers = None
+
+    def __init__(self, handler, env):
+        self.env = env
+        self.wsgi = None
+        self.task = handler(env, self.start_response)
+
+    def start_response(self, status, headers, exc_info=None):
+        self.status = status
+        self.headers = dict(headers)
+
+    async def __call__(self):
+        self.wsgi = await self.task
+        self.body = b''.join(self.wsgi)
+        return self
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def handler(self, upstream=None, **kw):
+        cache = wsgi.ResponseCache(**kw)
+        upstream = upstream or Handler()
+        handler = wsgi.WsgiHandler([cache.middleware, upstream],
+                                   response_middleware=[cache])
+        return cache, upstream, handler
+
+    def request(self, handler, **kw):
+        return Response(handler, environ(**kw))()
+
+    async def test_hit(self):
+        cache, upstream, handler = self.handler()
+        r1 = await self.request(handler, path='/a')
+        r2 = await self.request(handler, path='/a')
+        self.assertEqual(upstream.calls, 1)
+        self.assertEqual(r1.body, b'call 1')
+        self.assertEqual(r2.body, b'call 1')
+        self.assertEqual(r2.status, '200 OK')
+        self.assertTrue(r2.headers['ETag'])
+        self.assertEqual(r2.headers['Age'], '0')
+        r3 = await self.request(handler, path='/a', query='x=1')
+        self.assertEqual(r3.body, b'call 2')
+        info = cache.info()
+        self.assertEqual(info['hits'], 1)
+        self.assertEqual(info['misses'], 2)
+        self.assertEqual(info['entries'], 2)
+
+    async def test_collapse(self):
+        cache, upstream, handler = self.handler()
+        responses = await asyncio.gather(*[
+            self.request(handler, path='/slow') for _ in range(20)])
+        self.assertEqual(upstream.calls, 1)
+        for response in responses:
+            self.assertEqual(response.body, b'call 1')
+        info = cache.info()
+        self.assertEqual(info['misses'], 1)
+        self.assertEqual(info['collapsed'], 19)
+        self.assertEqual(info['hits'], 19)
+        self.assertEqual(info['inflight'], 0)
+
+    async def test_collapse_not_cacheable(self):
+        upstream = Handler([('Cache-Control', 'no-store')])
+        cache, upstream, handler = self.handler(upstream)
+        responses = await asyncio.gather(*[
+            self.request(handler, path='/slow') for _ in range(3)])
+        self.assertEqual(upstream.calls, 3)
+        self.assertEqual(len(set((r.body for r in responses))), 3)
+        self.assertEqual(len(cache), 0)
+
+    async def test_collapse_leader_fails(self):
+        class Failing(Handler):
+
+            async def __call__(self, environ, start_response):
+                self.calls += 1
+                call = self.calls
+                await asyncio.sleep(self.delay)
+                if call == 1:
+                    raise RuntimeError('leader failed')
+                return [b'call %d' % call]
+
+        cache, upstream, handler = self.handler(Failing())
+        leader = asyncio.ensure_future(self.request(handler, path='/slow'))
+        await asyncio.sleep(0)
+        followers = [self.request(handler, path='/slow') for _ in range(3)]
+        responses = await asyncio.wait_for(asyncio.gather(*followers), 2)
+        # the error response needs a server, the exception propagates
+        with self.assertRaises(Exception):
+            await leader
+        self.assertEqual(upstream.calls, 4)
+        self.assertEqual(len(set((r.body for r in responses))), 3)
+        self.assertEqual(cache.info()['inflight'], 0)
+
+    async def test_collapse_leader_cancelled(self):
+        cache, upstream, handler = self.handler()
+        leader = asyncio.ensure_future(self.request(handler, path='/slow'))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(self.request(handler, path='/slow'))
+        await asyncio.sleep(0)
+        leader.cancel()
+        response = await asyncio.wait_for(follower, 2)
+        self.assertEqual(response.body, b'call 2')
+        self.assertEqual(cache.info()['inflight'], 0)
+
+    async def test_cache_control(self):
+        for headers in ([('Cache-Control', 'private, max-age=60')],
+                        [('Cache-Control', 'no-cache')],
+                        [('Cache-Control', 'max-age=0')],
+                        [('Cache-Control', 'max-age=60'),
+                         ('Set-Cookie', 'a=b')],
+                        [('Cache-Control', 'max-age=60'),
+                         ('Vary', 'Cookie')],
+                        []):
+            cache, upstream, handler = self.handler(Handler(headers, 0))
+            await self.request(handler)
+            await self.request(handler)
+            self.assertEqual(upstream.calls, 2, headers)
+        # default max_age
+        cache, upstream, handler = self.handler(Handler([], 0), max_age=10)
+        await self.request(handler)
+        await self.request(handler)
+        self.assertEqual(upstream.calls, 1)
+
+    async def test_bypass(self):
+        cache, upstream, handler = self.handler(Handler(delay=0))
+        await self.request(handler)
+        await self.request(handler, authorization='Basic xyz')
+        await self.request(handler, cache_control='no-store')
+        await self.request(handler, method='POST')
+        self.assertEqual(upstream.calls, 4)
+        response = await self.request(handler, cache_control='no-cache')
+        self.assertEqual(response.body, b'call 5')
+        response = await self.request(handler)
+        self.assertEqual(response.body, b'call 5')
+
+    async def test_vary(self):
+        cache, upstream, handler = self.handler(Handler(delay=0))
+        await self.request(handler, accept_encoding='gzip')
+        await self.request(handler, accept_encoding='gzip')
+        await self.request(handler)
+        self.assertEqual(upstream.calls, 2)
+
+    async def test_not_modified(self):
+        upstream = Handler([('Cache-Control', 'max-age=60'),
+                            ('ETag', '"abc"'),
+                            ('Last-Modified',
+                             'Tue, 15 Nov 1994 12:45:26 GMT')], 0)
+        cache, upstream, handler = self.handler(upstream)
+        response = await self.request(handler, if_none_match='"abc"')
+        self.assertEqual(response.status, '304 Not Modified')
+        self.assertEqual(response.body, b'')
+        response = await self.request(handler, if_none_match='"xyz"')
+        self.assertEqual(response.status, '200 OK')
+        response = await self.request(
+            handler, if_modified_since='Tue, 15 Nov 1994 12:45:26 GMT')
+        self.assertEqual(response.status, '304 Not Modified')
+        self.assertEqual(response.headers['ETag'], '"abc"')
+        response = await self.request(
+            handler, if_modified_since='Tue, 15 Nov 1994 12:45:25 GMT')
+        self.assertEqual(response.status, '200 OK')
+        self.assertEqual(upstream.calls, 1)
+        self.assertEqual(cache.info()['not_modified'], 2)
+
+    async def test_lru(self):
+        cache, upstream, handler = self.handler(Handler(delay=0),
+                                                max_size=200)
+        for path in ('/a', '/b', '/a', '/c'):
+            await self.request(handler, path=path)
+        self.assertEqual(upstream.calls, 3)
+        self.assertLessEqual(cache.size, 200)
+        self.assertIn(('GET', '/a', '', None), cache)
+        self.assertNotIn(('GET', '/b', '', None), cache)
+        self.assertIn(('GET', '/c', '', None), cache)
+        self.assertEqual(cache.info()['evictions'], 1)
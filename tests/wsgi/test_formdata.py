@@ -0,0 +1,123 @@
+'''Tests multipart form data parsing'''
+import os
+import unittest
+from hashlib import md5
+
+from pulsar.api import HttpException
+from pulsar.apps.http import HttpWsgiClient
+from pulsar.apps.wsgi import Router, WsgiHandler, stream_form_data
+from pulsar.apps.wsgi.formdata import (
+    MultipartReader, BytesProducer, parse_form_data
+)
+from pulsar.utils.httpurl import encode_multipart_formdata
+
+
+class Upload(Router):
+
+    async def post(self, request):
+        data, files = await parse_form_data(request, max_field_size=1000,
+                                            spool_size=2**16)
+        return request.json_response({
+            'data': dict(((k, data.getall(k)) for k in data)),
+            'files': dict(((k, [(p.size,
+                                 md5(p.bytes()).hexdigest(),
+                                 p.file._rolled) for p in files.getall(k)])
+                           for k in files))
+        })
+
+    async def put(self, request):
+        parts = []
+        async for part in stream_form_data(request, max_parts=5):
+            size = 0
+            if part.filename:
+                async for chunk in part:
+                    size += len(chunk)
+            parts.append((part.name, part.filename, size))
+        return request.json_response(parts)
+
+
+class Chunks:
+
+    def __init__(self, data, size):
+        self.data = data
+        self.size = size
+
+    def read(self, n=-1):
+        data, self.data = self.data[:self.size], self.data[self.size:]
+        return data
+
+
+class TestFormData(unittest.TestCase):
+
+    def client(self):
+        return HttpWsgiClient(WsgiHandler((Upload('/'),)))
+
+    async def test_reader_boundary_across_chunks(self):
+        data = os.urandom(5000)
+        body, _ = encode_multipart_formdata({'a': ('a.bin', data)},
+                                            boundary='xyz')
+        for size in (1, 7, 100, 4096):
+            reader = MultipartReader(BytesProducer(Chunks(body, size)), 'xyz',
+                                     chunk_size=size)
+            headers = await reader.next_part()
+            self.assertTrue(headers)
+            chunks = []
+            chunk = await reader.read()
+            while chunk:
+                chunks.append(chunk)
+                chunk = await reader.read()
+            self.assertEqual(b''.join(chunks), data)
+            self.assertEqual(await reader.next_part(), None)
+
+    async def test_part_headers_too_large(self):
+        body = (b'--xyz\r\nContent-Disposition: form-data; name="a"\r\n' +
+                b'X-Large: ' + b'a' * 70000 + b'\r\n\r\nbla\r\n--xyz--\r\n')
+        reader = MultipartReader(BytesProducer(Chunks(body, 4096)), 'xyz',
+                                 chunk_size=4096)
+        with self.assertRaises(HttpException) as cm:
+            await reader.next_part()
+        self.assertEqual(cm.exception.status, 413)
+        self.assertEqual(str(cm.exception),
+                         'Part headers too large. Limit is 64.0KB')
+
+    async def test_fields_and_files(self):
+        image = os.urandom(300000)
+        text = b'a\r\nb\n'
+        response = await self.client().post(
+            'http://example.com/',
+            data=(('bla', 'foo'), ('numero', '1'), ('numero', '2')),
+            files={'image': ('image.png', image), 'text': text})
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result['data'], {'bla': ['foo'],
+                                          'numero': ['1', '2']})
+        self.assertEqual(result['files'], {
+            'image': [[len(image), md5(image).hexdigest(), True]],
+            'text': [[len(text), md5(text).hexdigest(), False]]
+        })
+
+    async def test_stream_parts(self):
+        data = os.urandom(200000)
+        response = await self.client().put(
+            'http://example.com/',
+            data={'bla': 'foo'},
+            files={'file': ('data.bin', data)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [['bla', None, 0],
+                                           ['file', 'data.bin', len(data)]])
+
+    async def test_too_many_parts(self):
+        data = [('field', str(i)) for i in range(10)]
+        response = await self.client().put('http://example.com/', data=data,
+                                           files={'f': 'x'})
+        self.assertEqual(response.status_code, 413)
+
+    async def test_large_field(self):
+        cli = self.client()
+        response = await cli.post('http://example.com/',
+                                  data={'bla': 'A' * 1001},
+                                  files={'f': 'x'})
+        self.assertEqual(response.status_code, 403)
+        response = await cli.post('http://example.com/',
+                                  files={'f': ('f.txt', 'A' * 1001)})
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,306 @@
+import asyncio
+import unittest
+from base64 import urlsafe_b64encode
+from functools import partial
+
+from pulsar.async.protocols import TcpServer, Connection
+from pulsar.apps.wsgi import WSGIServer, HttpServerResponse
+from pulsar.apps.wsgi import http2
+from pulsar.apps.test import sequential
+from pulsar.utils.http import hpack
+
+
+async def app(environ, start_response):
+    path = environ['PATH_INFO']
+    if path == '/slow':
+        await asyncio.sleep(0.2)
+    if path == '/big':
+        data = b'x' * 100000
+    else:
+        body = await environ['wsgi.input'].read()
+        data = ('%s %s %s %s %d' % (environ['SERVER_PROTOCOL'],
+                                    environ['REQUEST_METHOD'],
+                                    path,
+                                    environ['QUERY_STRING'],
+                                    len(body))).encode('utf-8')
+    start_response('200 OK', [('Content-Length', str(len(data))),
+                              ('Content-Type', 'text/plain')])
+    return [data]
+
+
+class Response:
+
+    def __init__(self):
+        self.headers = None
+        self.body = bytearray()
+        self.reset = None
+        self.done = asyncio.Future()
+
+    @property
+    def status(self):
+        return int(self.headers[0][1])
+
+
+class Client:
+    """A minimal HTTP/2 client
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.encoder = hpack.Encoder()
+        self.decoder = hpack.Decoder()
+        self.responses = {}
+        self.settings = {}
+        self.frames = []
+        self.goaway = asyncio.Future()
+        self.stream_id = 1
+        self.task = asyncio.ensure_future(self._read())
+
+    def send(self, frame_type, flags, stream_id, payload=b''):
+        self.writer.write(http2.frame(frame_type, flags, stream_id, payload))
+
+    def start(self):
+        self.writer.write(http2.PREFACE)
+        self.send(http2.SETTINGS, 0, 0)
+
+    def request(self, path, method='GET', body=None, stream_id=None):
+        if stream_id is None:
+            stream_id = self.stream_id
+            self.stream_id += 2
+        headers = [(b':method', method.encode()), (b':scheme', b'http'),
+                   (b':path', path.encode()), (b':authority', b'localhost')]
+        block = self.encoder.encode(headers)
+        flags = http2.END_HEADERS
+        if not body:
+            flags |= http2.END_STREAM
+        response = self.responses[stream_id] = Response()
+        self.send(http2.HEADERS, flags, stream_id, block)
+        if body:
+            self.send(http2.DATA, http2.END_STREAM, stream_id, body)
+        return response
+
+    async def _read(self):
+        while True:
+            header = await self.reader.readexactly(9)
+            head, flags, stream_id = http2.FRAME_HEADER.unpack(header)
+            frame_type = head & 0xff
+            payload = await self.reader.readexactly(head >> 8)
+            self.frames.append((frame_type, flags, stream_id))
+            response = self.responses.get(stream_id)
+            if frame_type == http2.SETTINGS and not flags:
+                self.settings.update(http2.parse_settings(payload))
+                self.send(http2.SETTINGS, http2.ACK, 0)
+            elif frame_type == http2.GOAWAY:
+                self.goaway.set_result(
+                    http2.GOAWAY_HEADER.unpack_from(payload))
+            elif frame_type == http2.RST_STREAM:
+                response.reset = http2.UINT32.unpack(payload)[0]
+                if not response.done.done():
+                    response.done.set_result(response)
+            elif frame_type == http2.HEADERS:
+                response.headers = self.decoder.decode(payload)
+            elif frame_type == http2.DATA:
+                response.body.extend(payload)
+            if (frame_type in (http2.HEADERS, http2.DATA) and
+                    flags & http2.END_STREAM):
+                response.done.set_result(response)
+
+
+@sequential
+class TestHttp2(unittest.TestCase):
+
+    def setUp(self):
+        self.servers = []
+        self.clients = []
+
+    async def tearDown(self):
+        for client in self.clients:
+            client.task.cancel()
+            client.writer.close()
+        for server in self.servers:
+            await server.close()
+
+    async def server(self, **kw):
+        loop = asyncio.get_event_loop()
+        cfg = WSGIServer(app, http2=True, **kw).cfg
+        server = TcpServer(partial(Connection, HttpServerResponse),
+                           loop=loop, cfg=cfg)
+        server.wsgi_callable = app
+        await server.start_serving(address=('127.0.0.1', 0))
+        self.servers.append(server)
+        return server
+
+    async def client(self, server=None, start=True):
+        server = server or await self.server()
+        reader, writer = await asyncio.open_connection(*server.address)
+        client = Client(reader, writer)
+        self.clients.append(client)
+        if start:
+            client.start()
+        return client
+
+    def wait(self, responses):
+        return asyncio.wait_for(
+            asyncio.gather(*[r.done for r in responses]), 5)
+
+    async def test_prior_knowledge(self):
+        client = await self.client()
+        response = client.request('/hello%20world?a=1')
+        await self.wait([response])
+        self.assertEqual(response.status, 200)
+        headers = dict(response.headers)
+        self.assertEqual(headers[b'content-type'], b'text/plain')
+        self.assertTrue(headers[b'server'])
+        self.assertTrue(headers[b'date'])
+        self.assertEqual(bytes(response.body),
+                         b'HTTP/2 GET /hello world a=1 0')
+        self.assertEqual(client.settings[http2.MAX_CONCURRENT_STREAMS], 100)
+
+    async def test_prior_knowledge_split(self):
+        client = await self.client(start=False)
+        for part in (b'P', b'RI', b' * HTTP/2.0', b'\r\n\r\nSM\r\n\r\n'):
+            client.writer.write(part)
+            await asyncio.sleep(0.05)
+        client.send(http2.SETTINGS, 0, 0)
+        response = client.request('/split')
+        await self.wait([response])
+        self.assertEqual(bytes(response.body), b'HTTP/2 GET /split  0')
+
+    async def test_http1_split_prefix(self):
+        server = await self.server()
+        reader, writer = await asyncio.open_connection(*server.address)
+        writer.write(b'P')
+        await asyncio.sleep(0.05)
+        writer.write(b'UT /put HTTP/1.1\r\nHost: localhost\r\n'
+                     b'Content-Length: 0\r\n\r\n')
+        data = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 5)
+        writer.close()
+        self.assertTrue(data.startswith(b'HTTP/1.1 200 OK'))
+
+    async def test_multiplexing(self):
+        client = await self.client()
+        slow = client.request('/slow')
+        fast = [client.request('/fast/%d' % i) for i in range(20)]
+        await self.wait(fast)
+        self.assertFalse(slow.done.done())
+        for i, response in enumerate(fast):
+            self.assertEqual(bytes(response.body),
+                             b'HTTP/2 GET /fast/%d  0' % i)
+        await self.wait([slow])
+        self.assertEqual(slow.status, 200)
+
+    async def test_post(self):
+        client = await self.client()
+        response = client.request('/upload', 'POST', b'x' * 10000)
+        await self.wait([response])
+        self.assertEqual(bytes(response.body),
+                         b'HTTP/2 POST /upload  10000')
+
+    async def test_head(self):
+        client = await self.client()
+        response = client.request('/big', 'HEAD')
+        await self.wait([response])
+        self.assertEqual(response.status, 200)
+        self.assertEqual(dict(response.headers)[b'content-length'],
+                         b'100000')
+        self.assertEqual(response.body, b'')
+
+    async def test_upgrade(self):
+        server = await self.server()
+        client = await self.client(server, False)
+        settings = http2.SETTING.pack(http2.INITIAL_WINDOW_SIZE, 1000)
+        client.task.cancel()
+        client.writer.write(
+            b'GET /upgrade HTTP/1.1\r\n'
+            b'Host: localhost\r\n'
+            b'Connection: Upgrade, HTTP2-Settings\r\n'
+            b'Upgrade: h2c\r\n'
+            b'HTTP2-Settings: ' + urlsafe_b64encode(settings) + b'\r\n\r\n')
+        data = await client.reader.readuntil(b'\r\n\r\n')
+        self.assertTrue(data.startswith(b'HTTP/1.1 101 Switching Protocols'))
+        client.task = asyncio.ensure_future(client._read())
+        response = client.responses[1] = Response()
+        client.start()
+        await self.wait([response])
+        self.assertEqual(bytes(response.body), b'HTTP/2 GET /upgrade  0')
+        client.stream_id = 3
+        response = client.request('/next')
+        await self.wait([response])
+        self.assertEqual(bytes(response.body), b'HTTP/2 GET /next  0')
+
+    async def test_no_upgrade_with_body(self):
+        server = await self.server()
+        reader, writer = await asyncio.open_connection(*server.address)
+        writer.write(b'POST /upgrade HTTP/1.1\r\n'
+                     b'Host: localhost\r\n'
+                     b'Connection: Upgrade, HTTP2-Settings\r\n'
+                     b'Upgrade: h2c\r\n'
+                     b'HTTP2-Settings: AAMAAABkAAQCAAAAAAIAAAAA\r\n'
+                     b'Content-Length: 3\r\n\r\nabc')
+        data = await reader.readuntil(b'\r\n\r\n')
+        writer.close()
+        self.assertTrue(data.startswith(b'HTTP/1.1 200 OK'))
+
+    async def test_max_concurrent_streams(self):
+        server = await self.server(http2_max_streams=2)
+        client = await self.client(server)
+        responses = [client.request('/slow') for _ in range(3)]
+        await self.wait(responses)
+        self.assertEqual(client.settings[http2.MAX_CONCURRENT_STREAMS], 2)
+        self.assertEqual(responses[0].status, 200)
+        self.assertEqual(responses[1].status, 200)
+        self.assertEqual(responses[2].reset, 7)
+        # the connection is still usable
+        response = client.request('/after')
+        await self.wait([response])
+        self.assertEqual(response.status, 200)
+
+    async def test_flow_control(self):
+        client = await self.client()
+        client.send(http2.SETTINGS, 0, 0,
+                    http2.SETTING.pack(http2.INITIAL_WINDOW_SIZE, 1000))
+        response = client.request('/big')
+        await asyncio.sleep(0.2)
+        self.assertEqual(len(response.body), 1000)
+        self.assertFalse(response.done.done())
+        client.send(http2.WINDOW_UPDATE, 0, 1,
+                    http2.UINT32.pack(200000))
+        await asyncio.sleep(0.2)
+        # limited by the connection window
+        self.assertEqual(len(response.body), 65535)
+        client.send(http2.WINDOW_UPDATE, 0, 0,
+                    http2.UINT32.pack(100000))
+        await self.wait([response])
+        self.assertEqual(bytes(response.body), b'x' * 100000)
+
+    async def test_ping(self):
+        client = await self.client()
+        client.send(http2.PING, 0, 0, b'12345678')
+        response = client.request('/ping')
+        await self.wait([response])
+        self.assertIn((http2.PING, http2.ACK, 0), client.frames)
+
+    async def test_protocol_error(self):
+        client = await self.client()
+        client.send(http2.DATA, 0, 0, b'hello')
+        last_stream_id, code = await asyncio.wait_for(client.goaway, 5)
+        self.assertEqual(last_stream_id, 0)
+        self.assertEqual(code, http2.PROTOCOL_ERROR)
+
+    async def test_compression_error(self):
+        client = await self.client()
+        client.send(http2.HEADERS, http2.END_HEADERS | http2.END_STREAM,
+                    1, b'\x80')
+        last_stream_id, code = await asyncio.wait_for(client.goaway, 5)
+        self.assertEqual(code, http2.COMPRESSION_ERROR)
+
+    async def test_invalid_headers(self):
+        client = await self.client()
+        block = client.encoder.encode([(b':method', b'GET'),
+                                       (b':path', b'/'),
+                                       (b'connection', b'keep-alive')])
+        response = client.responses[1] = Response()
+        client.send(http2.HEADERS, http2.END_HEADERS | http2.END_STREAM,
+                    1, block)
+        await self.wait([response])
+        self.assertEqual(response.reset, http2.PROTOCOL_ERROR)
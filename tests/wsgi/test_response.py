@@ -0,0 +1,149 @@
+'''Tests the response middleware in pulsar.apps.wsgi'''
+import json
+import zlib
+import asyncio
+import unittest
+
+from pulsar.apps.http import HttpWsgiClient
+from pulsar.apps.wsgi import (
+    Router, WsgiHandler, WsgiResponse, GZipMiddleware
+)
+
+
+def records(n):
+    for i in range(n):
+        yield json.dumps({'id': i, 'name': 'record %d' % i}).encode('utf-8')
+
+
+async def delayed(data):
+    await asyncio.sleep(0.01)
+    return data
+
+
+class Site(Router):
+
+    def get(self, request):
+        response = request.response
+        response.content_type = 'application/json'
+        response.content = json.dumps(list(range(500)))
+        return response
+
+    def get_stream(self, request):
+        response = request.response
+        response.content_type = 'application/json'
+        response.content = records(1000)
+        return response
+
+    def get_async(self, request):
+        response = request.response
+        response.content_type = 'text/plain'
+        response.content = (delayed(b'hello %d\n' % i) for i in range(10))
+        return response
+
+
+class Stream(Router):
+
+    def get(self, request):
+        return Site.get_stream(self, request)
+
+
+class Async(Router):
+
+    def get(self, request):
+        return Site.get_async(self, request)
+
+
+def environ(encoding='gzip'):
+    return {'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': encoding}
+
+
+class TestGZipMiddleware(unittest.TestCase):
+
+    def client(self, middleware=None):
+        handler = WsgiHandler((Site('/', Stream('stream'), Async('async')),),
+                              response_middleware=[middleware or
+                                                   GZipMiddleware()])
+        return HttpWsgiClient(handler)
+
+    def test_compress_content(self):
+        data = json.dumps(list(range(500))).encode('utf-8')
+        response = WsgiResponse(content=data,
+                                content_type='application/json')
+        middleware = GZipMiddleware()
+        response = middleware(environ(), response)
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertEqual(response.headers['vary'], 'Accept-Encoding')
+        self.assertFalse(response.is_streamed())
+        body = b''.join(response.content)
+        self.assertEqual(zlib.decompress(body, 16 + zlib.MAX_WBITS), data)
+
+    def test_deflate(self):
+        data = json.dumps(list(range(500))).encode('utf-8')
+        response = WsgiResponse(content=data,
+                                content_type='application/json')
+        response = GZipMiddleware()(environ('deflate'), response)
+        self.assertEqual(response.headers['content-encoding'], 'deflate')
+        self.assertEqual(zlib.decompress(b''.join(response.content)), data)
+
+    def test_not_available(self):
+        middleware = GZipMiddleware()
+        response = WsgiResponse(content=b'x'*100)
+        self.assertFalse(middleware.available(environ(), response))
+        response = WsgiResponse(content=b'x'*1000)
+        self.assertFalse(middleware.available(environ('identity'), response))
+        self.assertTrue(middleware.available(environ(), response))
+        response = WsgiResponse(content=b'x'*1000, content_type='image/png')
+        self.assertFalse(middleware.available(environ(), response))
+        response = WsgiResponse(content=records(10))
+        response['Content-Length'] = '50'
+        self.assertFalse(middleware.available(environ(), response))
+
+    def test_content_types(self):
+        middleware = GZipMiddleware(content_types={
+            'application/json': (9, 10),
+            'text/*': (0, 0)
+        })
+        self.assertEqual(middleware.options('application/json'), (9, 10))
+        self.assertEqual(middleware.options('text/html; charset=utf-8'),
+                         (0, 0))
+        self.assertEqual(middleware.options('application/xml'), (6, 200))
+        response = WsgiResponse(content=b'[1, 2, 3, 4]',
+                                content_type='application/json')
+        self.assertTrue(middleware.available(environ(), response))
+        response = WsgiResponse(content=b'x'*1000, content_type='text/plain')
+        self.assertFalse(middleware.available(environ(), response))
+
+    def test_streamed(self):
+        response = WsgiResponse(content=records(100),
+                                content_type='application/json')
+        response['Content-Length'] = '2000'
+        response = GZipMiddleware()(environ(), response)
+        self.assertTrue(response.is_streamed())
+        self.assertFalse('content-length' in response.headers)
+        body = b''.join(response.content)
+        self.assertEqual(zlib.decompress(body, 16 + zlib.MAX_WBITS),
+                         b''.join(records(100)))
+
+    async def test_gzip_response(self):
+        cli = self.client()
+        response = await cli.get('http://example.com/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertTrue('content-length' in response.headers)
+        self.assertEqual(response.json(), list(range(500)))
+
+    async def test_gzip_stream(self):
+        cli = self.client()
+        response = await cli.get('http://example.com/stream')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertEqual(response.headers['transfer-encoding'], 'chunked')
+        self.assertEqual(response.content, b''.join(records(1000)))
+
+    async def test_gzip_async_chunks(self):
+        cli = self.client(GZipMiddleware(content_types={'text/*': (1, 0)}))
+        response = await cli.get('http://example.com/async')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertEqual(response.content,
+                         b''.join((b'hello %d\n' % i for i in range(10))))
@@ -1,4 +1,5 @@
 import unittest
+from uuid import uuid4
 
 from pulsar.apps.wsgi import Route
 
@@ -139,6 +140,14 @@ class Routes(unittest.TestCase):
         self.assertEqual(r.url(rest='a/'), '/bla/a/')
         self.assertEqual(r.url(), '/bla/')
 
+    def test_uuid_variable(self):
+        uid = uuid4()
+        r = Route('<uuid:id>/')
+        self.assertEqual(r.variables, set(['id']))
+        self.assertEqual(r.match('%s/' % uid), {'id': uid})
+        self.assertEqual(r.match('%s/' % uid.hex), None)
+        self.assertEqual(r.url(id=uid), '/%s/' % uid)
+
     def testSplitRoot(self):
         r = Route('')
         self.assertEqual(r.level, 0)
@@ -1,14 +1,22 @@
 '''Tests the wsgi middleware in pulsar.apps.wsgi'''
+import os
+import tempfile
 import unittest
+from uuid import uuid4
 
-from pulsar.api import Http404, PermissionDenied, create_future
+from pulsar.api import (
+    Http404, PermissionDenied, MethodNotAllowed, create_future
+)
 from pulsar.apps.http import HttpWsgiClient
 from pulsar.apps.wsgi import (
-    Router, RouterParam, route, MediaRouter, WsgiHandler
+    Router, RouterParam, route, MediaRouter, WsgiHandler, AssetCache
 )
 
+from pulsar.apps.wsgi.routers import parse_range_header
+from pulsar.apps.wsgi.wrappers import FileWrapper
+
 from examples.helloworld.manage import hello
-from examples.httpbin.manage import HttpBin
+from examples.httpbin.manage import HttpBin, ASSET_DIR
 
 
 class TRouter(Router):
@@ -104,6 +112,57 @@ class TestRouter(unittest.TestCase):
         self.assertNotEqual(hnd.router, router)
         self.assertEqual(hnd.urlargs, {})
 
+    def test_resolve_order(self):
+        router = Router('/',
+                        Router('<name>', get=lambda r: 'name'),
+                        Router('<int:id>', get=lambda r: 'id'),
+                        Router('items/', Router('<int:id>/edit',
+                                                post=lambda r: 'edit')),
+                        Router('items/<path:path>', get=lambda r: 'path'))
+        hnd = router.resolve('/35', 'GET')
+        self.assertEqual(hnd.urlargs, {'name': '35'})
+        hnd = router.resolve('/items/35/edit', 'POST')
+        self.assertEqual(hnd.urlargs, {'id': 35})
+        self.assertRaises(MethodNotAllowed, router.resolve,
+                          '/items/35/edit', 'GET')
+        hnd = router.resolve('/items/foo/edit', 'GET')
+        self.assertEqual(hnd.urlargs, {'path': 'foo/edit'})
+        # items/ router comes first and does not serve get
+        self.assertRaises(MethodNotAllowed, router.resolve, '/items/', 'GET')
+        self.assertEqual(router.resolve('/items', 'GET').urlargs,
+                         {'name': 'items'})
+        self.assertEqual(router.resolve('/a/b', 'GET'), None)
+
+    def test_resolve_typed(self):
+        uid = uuid4()
+        router = Router('/',
+                        Router('<uuid:id>', get=lambda r: 'uuid'),
+                        Router('<float:value>', get=lambda r: 'float'),
+                        Router('<any(a, b):page>/', get=lambda r: 'any'),
+                        Router('<int(min=5):id>', get=lambda r: 'id'),
+                        Router('re/[0-9]+', get=lambda r: 're'))
+        self.assertEqual(router.resolve('/%s' % uid, 'GET').urlargs,
+                         {'id': uid})
+        self.assertEqual(router.resolve('/1.5', 'GET').urlargs,
+                         {'value': 1.5})
+        self.assertEqual(router.resolve('/b/', 'GET').urlargs,
+                         {'page': 'b'})
+        self.assertEqual(router.resolve('/c/', 'GET'), None)
+        self.assertEqual(router.resolve('/7', 'GET').urlargs, {'id': 7})
+        self.assertEqual(router.resolve('/4', 'GET'), None)
+        # static bits are escaped
+        self.assertEqual(router.resolve('/re/5', 'GET'), None)
+        self.assertTrue(router.resolve('/re/[0-9]+', 'GET'))
+
+    def test_resolve_add_child(self):
+        router = Router('/', Router('a', get=lambda r: 'a'))
+        self.assertTrue(router.resolve('/a', 'GET'))
+        self.assertEqual(router.resolve('/b', 'GET'), None)
+        child = router.add_child(Router('b', get=lambda r: 'b'))
+        self.assertEqual(router.resolve('/b', 'GET').router, child)
+        router.remove_child(child)
+        self.assertEqual(router.resolve('/b', 'GET'), None)
+
     def test_derived(self):
         self.assertTrue('gzip' in HttpBin.rule_methods)
         self.assertFalse('gzip' in HttpBin2.rule_methods)
@@ -272,3 +331,138 @@ class TestRouter(unittest.TestCase):
         self.assertEqual(response.text, 'Hello World!\n')
         response = await cli.get('http://example.com/foo/bla.png')
         self.assertEqual(response.status_code, 404)
+
+    def test_parse_range_header(self):
+        self.assertEqual(parse_range_header(None, 100), None)
+        self.assertEqual(parse_range_header('lines=1-3', 100), None)
+        self.assertEqual(parse_range_header('bytes=5-2', 100), None)
+        self.assertEqual(parse_range_header('bytes=a-2', 100), None)
+        self.assertEqual(parse_range_header('bytes=0-9', 100), [(0, 9)])
+        self.assertEqual(parse_range_header('bytes=90-', 100), [(90, 99)])
+        self.assertEqual(parse_range_header('bytes=-10', 100), [(90, 99)])
+        self.assertEqual(parse_range_header('bytes=-200', 100), [(0, 99)])
+        self.assertEqual(parse_range_header('bytes=95-200', 100), [(95, 99)])
+        self.assertEqual(parse_range_header('bytes=0-0, 5-6', 100),
+                         [(0, 0), (5, 6)])
+        self.assertEqual(parse_range_header('bytes=100-', 100), [])
+
+    async def test_file_wrapper(self):
+        path = os.path.join(ASSET_DIR, 'httpbin.js')
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path, 'rb') as f:
+            self.assertEqual(b''.join(FileWrapper(f)), data)
+        with open(path, 'rb') as f:
+            wrapper = FileWrapper(f, ranges=[b'--', (10, 20), (0, 5)])
+            chunks = []
+            async for chunk in wrapper:
+                chunks.append(chunk)
+            self.assertEqual(b''.join(chunks),
+                             b'--' + data[10:30] + data[:5])
+            self.assertEqual(b''.join(wrapper),
+                             b'--' + data[10:30] + data[:5])
+
+    async def test_media_router_range(self):
+        router = MediaRouter('/media', ASSET_DIR)
+        cli = HttpWsgiClient(WsgiHandler((router,)))
+        with open(os.path.join(ASSET_DIR, 'httpbin.js'), 'rb') as f:
+            data = f.read()
+        url = 'http://example.com/media/httpbin.js'
+        response = await cli.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['accept-ranges'], 'bytes')
+        self.assertEqual(response.content, data)
+        response = await cli.get(url, headers={'range': 'bytes=10-29'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers['content-range'],
+                         'bytes 10-29/%d' % len(data))
+        self.assertEqual(response.content, data[10:30])
+        response = await cli.get(url, headers={'range': 'bytes=-5'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, data[-5:])
+        response = await cli.get(url, headers={'range': 'bytes=0-4,-5'})
+        self.assertEqual(response.status_code, 206)
+        ct = response.headers['content-type']
+        self.assertTrue(ct.startswith('multipart/byteranges; boundary='))
+        boundary = ct.split('=')[1].encode('ascii')
+        body = response.content
+        self.assertEqual(int(response.headers['content-length']), len(body))
+        self.assertTrue(body.startswith(b'--' + boundary))
+        self.assertTrue(body.endswith(b'--' + boundary + b'--\r\n'))
+        self.assertTrue(b'\r\n\r\n' + data[:5] + b'\r\n' in body)
+        self.assertTrue(b'\r\n\r\n' + data[-5:] + b'\r\n' in body)
+        response = await cli.get(url, headers={'range': 'bytes=%d-' %
+                                               len(data)})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers['content-range'],
+                         'bytes */%d' % len(data))
+
+    async def test_media_router_cache(self):
+        cache = AssetCache(check_interval=None)
+        router = MediaRouter('/media', ASSET_DIR, cache=cache)
+        cli = HttpWsgiClient(WsgiHandler((router,)))
+        with open(os.path.join(ASSET_DIR, 'httpbin.js'), 'rb') as f:
+            data = f.read()
+        url = 'http://example.com/media/httpbin.js'
+        response = await cli.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, data)
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertEqual(response.headers['vary'], 'Accept-Encoding')
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(len(cache), 1)
+        etag = response.headers['etag']
+        response = await cli.get(url, headers={'accept-encoding': 'identity'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, data)
+        self.assertFalse('content-encoding' in response.headers)
+        self.assertEqual(int(response.headers['content-length']), len(data))
+        self.assertNotEqual(response.headers['etag'], etag)
+        self.assertEqual(cache.hits, 1)
+        response = await cli.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['etag'], etag)
+        self.assertEqual(cache.hits, 2)
+        response = await cli.get(url, headers={'range': 'bytes=0-9'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, data[:10])
+        self.assertEqual(cache.hits, 2)
+        response = await cli.get('http://example.com/media/nothere.js')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(cache), 1)
+
+    async def test_media_router_cache_invalidate(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'test.txt')
+        with open(path, 'wb') as f:
+            f.write(b'a'*1000)
+        cache = AssetCache(max_size=1500, check_interval=0)
+        router = MediaRouter('/media', directory, cache=cache)
+        cli = HttpWsgiClient(WsgiHandler((router,)))
+        url = 'http://example.com/media/test.txt'
+        response = await cli.get(url)
+        self.assertEqual(response.content, b'a'*1000)
+        self.assertEqual(cache.size, cache.info()['size'])
+        with open(path, 'wb') as f:
+            f.write(b'b'*200)
+        response = await cli.get(url)
+        self.assertEqual(response.content, b'b'*200)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 2)
+        response = await cli.get(url)
+        self.assertEqual(response.content, b'b'*200)
+        self.assertEqual(cache.hits, 1)
+        # eviction by size
+        with open(os.path.join(directory, 'big.txt'), 'wb') as f:
+            f.write(os.urandom(1400))
+        response = await cli.get('http://example.com/media/big.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(cache), 1)
+        self.assertFalse('/media/test.txt' in cache)
+        self.assertTrue(cache.size <= cache.max_size)
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)